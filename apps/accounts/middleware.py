@@ -1,3 +1,4 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
@@ -13,7 +14,7 @@ except ImportError:
         pass
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.views import redirect_to_login
-from django.conf import settings
+from apps.config.middleware.path_classifier import classify_request, get_path_classifier
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,14 +25,25 @@ class AccessControlMiddleware:
     Middleware para controlar acesso e fornecer feedback adequado
     quando usuários tentam acessar áreas restritas.
     """
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
     
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         response = self.get_response(request)
         return response
     
+    async def __acall__(self, request):
+        # process_exception continua síncrono: o Django só o chama em caso de erro
+        return await self.get_response(request)
+    
     def process_exception(self, request, exception):
         """Processa exceções de permissão e fornece feedback adequado"""
         
@@ -54,8 +66,7 @@ class AccessControlMiddleware:
         """Trata acesso de usuários não autenticados"""
         
         # Determinar o tipo de área que está tentando acessar
-        path = request.path
-        area_info = self.get_area_info(path)
+        area_info = classify_request(request).area_info
         
         # Adicionar mensagem explicativa
         messages.warning(
@@ -71,7 +82,7 @@ class AccessControlMiddleware:
         """Trata acesso de usuários autenticados sem permissão"""
         
         path = request.path
-        area_info = self.get_area_info(path)
+        area_info = classify_request(request).area_info
         
         # Mensagem específica baseada na área
         if area_info["type"] == "config":
@@ -106,68 +117,7 @@ class AccessControlMiddleware:
     
     def get_area_info(self, path):
         """Retorna informações sobre a área que está sendo acessada"""
-
-        # Excluir arquivos estáticos e mídia
-        if path.startswith('/static/') or path.startswith('/media/'):
-            return {
-                'name': 'arquivos estáticos',
-                'type': 'static',
-                'description': 'recursos do sistema'
-            }
-
-        area_mappings = {
-            '/config/': {
-                'name': 'o Painel de Configurações',
-                'type': 'config',
-                'description': 'área administrativa do sistema'
-            },
-            '/admin/': {
-                'name': 'o Django Admin',
-                'type': 'admin',
-                'description': 'interface administrativa'
-            },
-            '/accounts/configuracoes/': {
-                'name': 'as Configurações de Conta',
-                'type': 'profile',
-                'description': 'configurações pessoais'
-            },
-            '/accounts/perfil/': {
-                'name': 'o Perfil',
-                'type': 'profile',
-                'description': 'página de perfil'
-            }
-        }
-        
-        # Verificar correspondências exatas primeiro
-        for pattern, info in area_mappings.items():
-            if path.startswith(pattern):
-                return info
-        
-        # Padrões genéricos
-        if path.startswith('/config/'):
-            return {
-                'name': 'esta área de Configurações',
-                'type': 'config',
-                'description': 'área administrativa'
-            }
-        elif path.startswith('/admin/'):
-            return {
-                'name': 'o Django Admin',
-                'type': 'admin',
-                'description': 'interface administrativa'
-            }
-        elif path.startswith('/accounts/'):
-            return {
-                'name': 'esta área de Conta',
-                'type': 'profile',
-                'description': 'área de usuário'
-            }
-        else:
-            return {
-                'name': 'esta área',
-                'type': 'general',
-                'description': 'área restrita'
-            }
+        return get_path_classifier().classify(path).area_info
     
     def get_client_ip(self, request):
         """Obtém o IP do cliente"""
@@ -264,61 +214,93 @@ class RateLimitMiddleware:
     """
     Middleware para tratar exceções de rate limiting de forma elegante
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         try:
             response = self.get_response(request)
             return response
         except Ratelimited:
-            # Adiciona mensagem de erro amigável
-            messages.error(
-                request,
-                '⏰ Muitas tentativas em pouco tempo. Aguarde alguns minutos antes de tentar novamente.'
-            )
+            return self.handle_ratelimited(request)
+
+    async def __acall__(self, request):
+        try:
+            return await self.get_response(request)
+        except Ratelimited:
+            return self.handle_ratelimited(request)
+
+    def handle_ratelimited(self, request):
+        """Resposta amigável para requisições bloqueadas pelo rate limit"""
+        # Adiciona mensagem de erro amigável
+        messages.error(
+            request,
+            '⏰ Muitas tentativas em pouco tempo. Aguarde alguns minutos antes de tentar novamente.'
+        )
 
-            # Redireciona para a mesma página ou página anterior
-            referer = request.META.get('HTTP_REFERER')
-            if referer:
-                return HttpResponseRedirect(referer)
-            else:
-                return redirect('pages:home')
+        # Redireciona para a mesma página ou página anterior
+        referer = request.META.get('HTTP_REFERER')
+        if referer:
+            return HttpResponseRedirect(referer)
+        else:
+            return redirect('pages:home')
 
 class SmartRedirectMiddleware:
     """
     Middleware para redirecionamentos inteligentes baseados no contexto do usuário
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # O Django só evita a troca de thread se o process_view for uma corrotina
+            self.process_view = self.aprocess_view
 
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
         response = self.get_response(request)
         return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
     
     def process_view(self, request, view_func, view_args, view_kwargs):
         """Processa views antes da execução"""
+        return self.smart_redirect(request, request.user)
+    
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """Versão assíncrona de process_view (usuário carregado com request.auser())"""
+        return self.smart_redirect(request, await request.auser())
+    
+    def smart_redirect(self, request, user):
+        """Decide o redirecionamento a partir da classificação e do usuário já carregado"""
         
-        # Debug logs
-        print(f"SmartRedirectMiddleware: Processing {request.path}")
-        print(f"SmartRedirectMiddleware: First installation: {self.is_first_installation()}")
-        print(f"SmartRedirectMiddleware: Is setup wizard: {self.is_setup_wizard(request.path)}")
-        print(f"SmartRedirectMiddleware: Is restricted area: {self.is_restricted_area(request.path)}")
-        print(f"SmartRedirectMiddleware: User authenticated: {request.user.is_authenticated}")
+        classification = classify_request(request)
         
         # Verificar se é primeira instalação e permitir acesso ao wizard
-        if self.is_first_installation() and self.is_setup_wizard(request.path):
-            print("SmartRedirectMiddleware: Allowing setup wizard access")
+        if self.is_first_installation() and classification.setup_wizard:
+            logger.debug("SmartRedirectMiddleware: acesso ao setup wizard liberado")
             return None
         
         # Se é uma tentativa de acesso a área restrita
-        if self.is_restricted_area(request.path):
+        if classification.restricted:
             
             # Se não está logado
-            if not request.user.is_authenticated:
-                print("SmartRedirectMiddleware: Redirecting to login")
+            if not user.is_authenticated:
+                logger.debug(f"SmartRedirectMiddleware: {request.path} redirecionado para o login")
                 return self.redirect_to_smart_login(request)
             
             # Se está logado mas pode não ter permissão
@@ -328,45 +310,21 @@ class SmartRedirectMiddleware:
     
     def is_first_installation(self):
         """Verifica se é primeira instalação"""
-        from pathlib import Path
-        from django.conf import settings
-        first_install_file = Path(settings.BASE_DIR) / '.first_install'
-        return first_install_file.exists()
+        from apps.config.services.install_state_service import install_state
+        return install_state.is_first_installation()
     
     def is_setup_wizard(self, path):
         """Verifica se é o wizard de setup"""
-        setup_paths = [
-            '/config/setup/',
-            '/config/setup/api/',
-            '/config/wizard/',
-            '/config/wizard-teste/',
-            '/config/wizard-teste/api/',
-            '/config/setup-wizard/',
-            '/config/setup-wizard/api/',
-            '/config/setup-wizard/api/finalize/',
-        ]
-        return any(path.startswith(setup_path) for setup_path in setup_paths)
+        return get_path_classifier().classify(path).setup_wizard
     
     def is_restricted_area(self, path):
         """Verifica se o caminho é uma área restrita"""
-
-        # Excluir arquivos estáticos e mídia
-        if path.startswith('/static/') or path.startswith('/media/'):
-            return False
-
-        restricted_patterns = [
-            '/config/',
-            '/admin/',
-            '/accounts/configuracoes/',
-            '/accounts/perfil/',
-        ]
-
-        return any(path.startswith(pattern) for pattern in restricted_patterns)
+        return get_path_classifier().classify(path).restricted
     
     def redirect_to_smart_login(self, request):
         """Redireciona para login com contexto inteligente"""
         
-        area_info = AccessControlMiddleware(None).get_area_info(request.path)
+        area_info = classify_request(request).area_info
         
         # Mensagem contextual
         messages.info(
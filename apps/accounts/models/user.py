@@ -5,7 +5,8 @@ from django.urls import reverse
 from django.db.models.signals import pre_save, post_delete
 from django.dispatch import receiver
 import os
-from PIL import Image
+
+from core.images import image_derivatives
 
 class UserManager(BaseUserManager):
     """Gerenciador personalizado para o modelo User com email como nome de usuário"""
@@ -149,25 +150,37 @@ class User(AbstractUser):
         else:
             return self.email[0].upper()
 
+    # Nome do avatar como está no banco (detecta a troca em save)
+    _loaded_avatar = ''
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'avatar' in field_names:
+            instance._loaded_avatar = values[field_names.index('avatar')] or ''
+        return instance
+
     def save(self, *args, **kwargs):
-        """Override do save para redimensionar avatar"""
+        """Override do save: avatar novo ou trocado é processado em segundo plano"""
         super().save(*args, **kwargs)
 
-        # Redimensiona o avatar se necessário
-        if self.avatar:
-            self.resize_avatar()
+        # Saves sem o avatar (last_login, perfil sem foto nova) não tocam na imagem
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'avatar' not in update_fields:
+            return
+        current = self.avatar.name or ''
+        if current != self._loaded_avatar:
+            from apps.accounts.services.avatar_service import avatar_service
+
+            previous, self._loaded_avatar = self._loaded_avatar, current
+            avatar_service.schedule(self.pk, current, previous)
 
     def resize_avatar(self):
-        """Redimensiona o avatar para 300x300 pixels"""
-        try:
-            img = Image.open(self.avatar.path)
-            if img.height > 300 or img.width > 300:
-                output_size = (300, 300)
-                img.thumbnail(output_size)
-                img.save(self.avatar.path)
-        except Exception:
-            # Se houver erro no redimensionamento, ignora
-            pass
+        """Redimensiona o avatar e remove os metadados agora (normalmente feito em segundo plano)"""
+        from apps.accounts.services.avatar_service import avatar_service
+
+        if self.avatar:
+            avatar_service.process_file(self.avatar.name)
 
 @receiver(pre_save, sender=User)
 def user_pre_save(sender, instance, **kwargs):
@@ -179,5 +192,6 @@ def user_pre_save(sender, instance, **kwargs):
 def delete_user_avatar(sender, instance, **kwargs):
     """Signal para deletar o arquivo de avatar quando o usuário for deletado"""
     if instance.avatar:
+        image_derivatives.delete(instance.avatar.name)
         if os.path.isfile(instance.avatar.path):
             os.remove(instance.avatar.path)
\ No newline at end of file
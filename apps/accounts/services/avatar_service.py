@@ -0,0 +1,114 @@
+"""
+Processamento de avatares fora da requisição.
+
+Quando o campo avatar muda, User.save apenas agenda o processamento. Depois do
+commit, a fila de eventos (core.observers, modo BACKGROUND: o pool local de
+threads EventWorkerPool) reduz a imagem para AVATAR_SIZE, remove os metadados
+(EXIF com GPS, modelo da câmera etc.), gera os derivados WebP/srcset e apaga os
+arquivos do avatar anterior. Logins e edições de perfil não pagam mais pela
+E/S da imagem.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.files import atomic_write
+from core.images import image_derivatives
+from core.observers import BACKGROUND, CallbackObserver, dispatch_event, event_dispatcher
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class AvatarService:
+    """Redimensiona, limpa e gera os derivados do avatar em segundo plano"""
+
+    event_name = 'avatar_changed'
+    quality = 85
+
+    def get_size(self) -> int:
+        """Lado máximo do avatar em pixels"""
+        return getattr(settings, 'AVATAR_SIZE', 300)
+
+    def schedule(self, user_id: int, name: str, previous: str = '') -> None:
+        """Agenda o processamento do novo avatar (e a limpeza do anterior) para depois do commit"""
+        dispatch_event(
+            self.event_name,
+            {'user_id': user_id, 'name': name or '', 'previous': previous or ''},
+            source='avatar_service',
+        )
+
+    def handle(self, event) -> None:
+        """Executado no pool de eventos"""
+        from django.contrib.auth import get_user_model
+
+        user_id, name, previous = event.data['user_id'], event.data['name'], event.data['previous']
+        # Antes de gerar os novos: avatar_1.jpg e avatar_1.png compartilham avatar_1.webp
+        if previous and previous != name:
+            self.delete_files(previous)
+        if name:
+            # Outro upload pode ter substituído este antes da vez dele na fila
+            if get_user_model().objects.filter(pk=user_id, avatar=name).exists():
+                self.process_file(name)
+                image_derivatives.process(name)
+            else:
+                logger.debug(f"Avatar {name} do usuário {user_id} já substituído; ignorado")
+
+    def process_file(self, name: str) -> bool:
+        """
+        Reduz o avatar e remove os metadados, regravando o arquivo no lugar.
+
+        JPEGs grandes são decodificados já reduzidos (``Image.draft``: escala
+        1/2, 1/4 ou 1/8 no próprio decodificador), sem carregar a imagem
+        inteira na memória. Retorna True quando o arquivo foi regravado.
+        """
+        path = default_storage.path(name)
+        size = self.get_size()
+        start_ns = time.perf_counter_ns()
+        error = True
+        try:
+            with Image.open(path) as image:
+                image_format = image.format
+                oversized = image.width > size or image.height > size
+                has_metadata = bool(image.info.get('exif') or image.getexif())
+                if not oversized and not has_metadata:
+                    error = False
+                    return False
+                if image_format == 'JPEG':
+                    image.draft('RGB', (size, size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                    image = image.convert('RGB')
+                # Sem exif=/pnginfo=: o Pillow não copia os metadados para o novo arquivo
+                self._save(image, path, image_format)
+            error = False
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao processar avatar {name}: {e}")
+            return False
+        finally:
+            performance_monitor.record_timing('accounts.avatar.process', start_ns, error)
+
+    def _save(self, image: Image.Image, path: str, image_format: str) -> None:
+        options = {'quality': self.quality, 'optimize': True} if image_format in ('JPEG', 'WEBP') else {}
+        # Gravado com FILE_UPLOAD_PERMISSIONS: o servidor web que entrega /media/ precisa ler o avatar
+        with atomic_write(path) as tmp_file:
+            image.save(tmp_file, image_format, **options)
+
+    def delete_files(self, name: str) -> None:
+        """Remove um avatar antigo e os derivados dele"""
+        try:
+            image_derivatives.delete(name)
+            default_storage.delete(name)
+        except Exception as e:
+            logger.error(f"Erro ao remover avatar antigo {name}: {e}")
+
+
+# Instância global (uma por processo)
+avatar_service = AvatarService()
+
+event_dispatcher.subscribe(AvatarService.event_name, CallbackObserver(avatar_service.handle), mode=BACKGROUND)
@@ -1,78 +1,51 @@
-from django.core.mail import send_mail, get_connection
+from django.core.mail import EmailMultiAlternatives, send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
+from django.utils import translation
 from django.utils.html import strip_tags
 from apps.accounts.interfaces.services import IEmailService
+from apps.accounts.services.email_transport import (
+    build_connection, email_config_loader, is_connection_error, load_email_config, smtp_pool
+)
+from core.performance import performance_monitor
 import logging
 import smtplib
+import time
 
 logger = logging.getLogger(__name__)
 
 
 class EmailService(IEmailService):
     """
-    Serviço avançado para envio de emails com configurações dinâmicas
-    """
-    
-    def __init__(self):
-        self.config = self._load_email_config()
-    
-    def _load_email_config(self):
-        """Carrega configurações de email do sistema"""
-        try:
-            # Primeiro, tentar carregar da configuração padrão no banco
-            from apps.config.models import EmailConfiguration
+    Serviço avançado para envio de emails com configurações dinâmicas.
 
-            default_config = EmailConfiguration.get_default()
-            if default_config and default_config.is_active:
-                return default_config.get_config_dict()
-
-            # Se não há configuração padrão, tentar carregar do sistema antigo
-            from apps.config.services.system_config_service import SystemConfigService
-            from apps.config.repositories.config_repository import DjangoSystemConfigRepository
+    A configuração vem do EmailConfigLoader (cache por processo, invalidado ao
+    salvar uma EmailConfiguration) e os envios SMTP reutilizam as conexões do
+    pool: instanciar o serviço não consulta o banco e enviar não reabre a
+    sessão SMTP a cada email.
+    """
 
-            config_service = SystemConfigService(
-                DjangoSystemConfigRepository(),
-                None
-            )
+    def __init__(self):
+        self._config = None
 
-            email_config = config_service.get_config('email_settings')
+    @property
+    def config(self):
+        """Configuração efetiva (ou a atribuída a esta instância, p. ex. para testar uma EmailConfiguration)"""
+        if self._config is not None:
+            return self._config
+        return email_config_loader.get()
 
-            if email_config and isinstance(email_config, dict):
-                return email_config
+    @config.setter
+    def config(self, value):
+        self._config = value
 
-        except Exception as e:
-            logger.warning(f'Não foi possível carregar configurações de email: {e}')
+    def _load_email_config(self):
+        """Carrega configurações de email do sistema (sem cache)"""
+        return load_email_config()
 
-        # Fallback para configurações do Django
-        return {
-            'EMAIL_BACKEND': getattr(settings, 'EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend'),
-            'EMAIL_HOST': getattr(settings, 'EMAIL_HOST', ''),
-            'EMAIL_PORT': getattr(settings, 'EMAIL_PORT', 587),
-            'EMAIL_HOST_USER': getattr(settings, 'EMAIL_HOST_USER', ''),
-            'EMAIL_HOST_PASSWORD': getattr(settings, 'EMAIL_HOST_PASSWORD', ''),
-            'EMAIL_USE_TLS': getattr(settings, 'EMAIL_USE_TLS', True),
-            'EMAIL_USE_SSL': getattr(settings, 'EMAIL_USE_SSL', False),
-            'DEFAULT_FROM_EMAIL': getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@havoc.com'),
-            'EMAIL_TIMEOUT': getattr(settings, 'EMAIL_TIMEOUT', 30),
-        }
-    
     def get_connection(self):
-        """Cria conexão de email com configurações dinâmicas"""
-        if self.config['EMAIL_BACKEND'] == 'django.core.mail.backends.smtp.EmailBackend':
-            return get_connection(
-                backend=self.config['EMAIL_BACKEND'],
-                host=self.config['EMAIL_HOST'],
-                port=self.config['EMAIL_PORT'],
-                username=self.config['EMAIL_HOST_USER'],
-                password=self.config['EMAIL_HOST_PASSWORD'],
-                use_tls=self.config['EMAIL_USE_TLS'],
-                use_ssl=self.config['EMAIL_USE_SSL'],
-                timeout=self.config['EMAIL_TIMEOUT'],
-                fail_silently=False
-            )
-        else:
-            return get_connection(backend=self.config['EMAIL_BACKEND'])
+        """Cria conexão de email com configurações dinâmicas (nova, fora do pool)"""
+        return build_connection(self.config)
     
     def test_connection(self):
         """Testa a conexão SMTP"""
@@ -96,19 +69,27 @@ class EmailService(IEmailService):
             return False, f"Erro na conexão SMTP: {str(e)}"
     
     def send_email(self, subject, message, recipient_list, html_message=None, fail_silently=False):
-        """Envia email usando configurações dinâmicas"""
+        """Envia email usando configurações dinâmicas (conexão SMTP do pool)"""
         try:
-            connection = self.get_connection()
-            
-            return send_mail(
-                subject=subject,
-                message=message,
-                from_email=self.config['DEFAULT_FROM_EMAIL'],
-                recipient_list=recipient_list,
-                html_message=html_message,
-                connection=connection,
-                fail_silently=fail_silently
-            )
+            config = self.config
+            for attempt in range(2):
+                try:
+                    # fail_silently tratado aqui: um erro engolido pelo backend devolveria ao pool uma sessão morta
+                    with smtp_pool.connection(config) as connection:
+                        return send_mail(
+                            subject=subject,
+                            message=message,
+                            from_email=config['DEFAULT_FROM_EMAIL'],
+                            recipient_list=recipient_list,
+                            html_message=html_message,
+                            connection=connection,
+                            fail_silently=False
+                        )
+                except Exception as e:
+                    # Sessão do pool derrubada pelo servidor: uma nova tentativa com outra conexão
+                    if attempt or not is_connection_error(e):
+                        raise
+                    logger.info(f'Conexão SMTP do pool caiu ({e}); reenviando com uma nova')
             
         except Exception as e:
             logger.error(f'Erro ao enviar email: {e}', exc_info=True)
@@ -136,6 +117,103 @@ class EmailService(IEmailService):
                 raise
             return False
     
+    def send_bulk(self, messages, fail_silently=True, batch_size=None):
+        """
+        Envia muitas mensagens reutilizando uma conexão do pool por lote.
+
+        ``messages``: EmailMessage/EmailMultiAlternatives (sem from_email usa o
+        DEFAULT_FROM_EMAIL da configuração). Cada mensagem é enviada e avaliada
+        sozinha; uma sessão derrubada pelo servidor é reaberta e a mensagem
+        tentada de novo uma vez. Retorna um resultado por destinatário:
+        ``[{'recipient', 'sent', 'error'}, ...]``. Com ``fail_silently=False``
+        a primeira falha interrompe o envio.
+        """
+        config = self.config
+        batch_size = batch_size or getattr(settings, 'EMAIL_BULK_BATCH_SIZE', 100)
+        messages = list(messages)
+        results = []
+        start_ns = time.perf_counter_ns()
+        for offset in range(0, len(messages), batch_size):
+            # Aberta por _send_one: servidor inacessível vira erro no relatório, não exceção
+            connection = None
+            try:
+                for message in messages[offset:offset + batch_size]:
+                    if not message.from_email or message.from_email == settings.DEFAULT_FROM_EMAIL:
+                        message.from_email = config['DEFAULT_FROM_EMAIL']
+                    connection, error = self._send_one(config, connection, message)
+                    for recipient in message.recipients():
+                        results.append({'recipient': recipient, 'sent': error is None, 'error': error})
+                    if error is not None:
+                        logger.warning(f'Falha ao enviar email para {", ".join(message.recipients())}: {error}')
+                        if not fail_silently:
+                            raise smtplib.SMTPException(error)
+            finally:
+                if connection is not None:
+                    smtp_pool.release(config, connection)
+
+        sent = sum(1 for result in results if result['sent'])
+        performance_monitor.record_timing('email.bulk', start_ns, sent < len(results))
+        performance_monitor.increment_counter('email.sent', sent)
+        performance_monitor.increment_counter('email.failed', len(results) - sent)
+        logger.info(f'Envio em massa: {sent}/{len(results)} destinatário(s) com sucesso')
+        return results
+
+    def _send_one(self, config, connection, message):
+        """Envia uma mensagem; retorna (conexão utilizável ou None, erro ou None)"""
+        for attempt in range(2):
+            if connection is None:
+                try:
+                    connection = smtp_pool.acquire(config)
+                except Exception as e:
+                    return None, f'Erro de conexão: {e}'
+            message.connection = connection
+            try:
+                message.send(fail_silently=False)
+                return connection, None
+            except smtplib.SMTPRecipientsRefused as e:
+                return connection, '; '.join(
+                    f"{code} {reply.decode(errors='replace') if isinstance(reply, bytes) else reply}"
+                    for code, reply in e.recipients.values()
+                )
+            except Exception as e:
+                if not is_connection_error(e):
+                    return connection, str(e) or e.__class__.__name__
+                # Sessão derrubada pelo servidor: descarta e tenta mais uma vez com uma nova
+                smtp_pool.release(config, connection, broken=True)
+                connection = None
+                if attempt:
+                    return None, str(e) or e.__class__.__name__
+        return connection, 'Falha no envio'
+
+    def send_mass_template_email(self, template_name, recipients, subject, context=None,
+                                 fail_silently=True, batch_size=None):
+        """
+        Envia o mesmo template a muitos destinatários.
+
+        ``recipients``: emails ou tuplas ``(email, idioma)`` (sem idioma usa
+        LANGUAGE_CODE). O template e o assunto são renderizados uma vez por
+        idioma, não por destinatário; cada destinatário recebe a sua própria
+        mensagem (ninguém vê os outros endereços). Retorna o mesmo relatório
+        por destinatário de ``send_bulk``.
+        """
+        by_locale = {}
+        for recipient in recipients:
+            email, locale = recipient if isinstance(recipient, (tuple, list)) else (recipient, None)
+            by_locale.setdefault(locale or settings.LANGUAGE_CODE, []).append(email)
+
+        from_email = self.config['DEFAULT_FROM_EMAIL']
+        messages = []
+        for locale, emails in by_locale.items():
+            with translation.override(locale):
+                html_message = render_to_string(template_name, dict(context or {}, locale=locale))
+                localized_subject = str(subject)
+            plain_message = strip_tags(html_message)
+            for email in emails:
+                message = EmailMultiAlternatives(localized_subject, plain_message, from_email, [email])
+                message.attach_alternative(html_message, 'text/html')
+                messages.append(message)
+        return self.send_bulk(messages, fail_silently=fail_silently, batch_size=batch_size)
+
     def send_password_reset_code(self, email, code):
         """Envia código de redefinição de senha"""
         try:
@@ -0,0 +1,305 @@
+"""
+Configuração de email em cache e pool de conexões SMTP.
+
+EmailConfigLoader: cada processo guarda a configuração efetiva (EmailConfiguration
+padrão, senão 'email_settings' do SystemConfigService, senão settings) e só a
+relê quando a versão compartilhada no cache muda; salvar/remover uma
+EmailConfiguration incrementa a versão (apps.config.signals). Mesmo esquema do
+snapshot de módulos (apps.config.services.module_state_service).
+
+SMTPConnectionPool: sessões SMTP já conectadas e autenticadas (TLS + AUTH
+custam várias idas e voltas ao servidor), separadas por configuração. Uma
+conexão ociosa há mais de EMAIL_POOL_IDLE_TIMEOUT segundos é descartada; acima
+de alguns segundos ociosa passa por um NOOP antes de ser reutilizada.
+"""
+import atexit
+import hashlib
+import logging
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+EMAIL_CONFIG_VERSION_KEY = 'accounts:email_config:version'
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+def load_email_config() -> Dict[str, Any]:
+    """Lê a configuração de email efetiva do banco (sem cache)"""
+    try:
+        # Primeiro, tentar carregar da configuração padrão no banco
+        from apps.config.models import EmailConfiguration
+
+        default_config = EmailConfiguration.get_default()
+        if default_config and default_config.is_active:
+            return default_config.get_config_dict()
+
+        # Se não há configuração padrão, tentar carregar do sistema antigo
+        from apps.config.services.system_config_service import SystemConfigService
+        from apps.config.repositories.config_repository import DjangoSystemConfigRepository
+
+        config_service = SystemConfigService(
+            DjangoSystemConfigRepository(),
+            None
+        )
+
+        email_config = config_service.get_config('email_settings')
+
+        if email_config and isinstance(email_config, dict):
+            return email_config
+
+    except Exception as e:
+        logger.warning(f'Não foi possível carregar configurações de email: {e}')
+
+    # Fallback para configurações do Django
+    return {
+        'EMAIL_BACKEND': getattr(settings, 'EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend'),
+        'EMAIL_HOST': getattr(settings, 'EMAIL_HOST', ''),
+        'EMAIL_PORT': getattr(settings, 'EMAIL_PORT', 587),
+        'EMAIL_HOST_USER': getattr(settings, 'EMAIL_HOST_USER', ''),
+        'EMAIL_HOST_PASSWORD': getattr(settings, 'EMAIL_HOST_PASSWORD', ''),
+        'EMAIL_USE_TLS': getattr(settings, 'EMAIL_USE_TLS', True),
+        'EMAIL_USE_SSL': getattr(settings, 'EMAIL_USE_SSL', False),
+        'DEFAULT_FROM_EMAIL': getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@havoc.com'),
+        'EMAIL_TIMEOUT': getattr(settings, 'EMAIL_TIMEOUT', 30),
+    }
+
+
+def build_connection(config: Dict[str, Any]):
+    """Backend de email (ainda fechado) para a configuração"""
+    if config.get('EMAIL_BACKEND') == SMTP_BACKEND:
+        return get_connection(
+            backend=config['EMAIL_BACKEND'],
+            host=config['EMAIL_HOST'],
+            port=config['EMAIL_PORT'],
+            username=config['EMAIL_HOST_USER'],
+            password=config['EMAIL_HOST_PASSWORD'],
+            use_tls=config['EMAIL_USE_TLS'],
+            use_ssl=config['EMAIL_USE_SSL'],
+            timeout=config['EMAIL_TIMEOUT'],
+            fail_silently=False
+        )
+    return get_connection(backend=config.get('EMAIL_BACKEND'))
+
+
+def is_connection_error(error: BaseException) -> bool:
+    """Erro da sessão/socket (a conexão não serve mais), não da mensagem (destinatário recusado etc.)"""
+    if isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+        return False
+    return isinstance(error, OSError)
+
+
+class EmailConfigLoader:
+    """
+    Configuração de email versionada, por processo.
+
+    ``get()`` não consulta o banco em regime estável: a versão no cache só é
+    lida a cada ``check_interval`` segundos e a configuração só é recarregada
+    quando ela muda.
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
+        self.check_interval = check_interval
+        self._config: Dict[str, Any] = {}
+        self._version = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load_count = 0
+
+    def get_check_interval(self) -> float:
+        if self.check_interval is not None:
+            return self.check_interval
+        return getattr(settings, 'EMAIL_CONFIG_CHECK_INTERVAL', 5)
+
+    def get(self) -> Dict[str, Any]:
+        """Cópia da configuração atual (quem chama pode alterá-la à vontade)"""
+        now = time.monotonic()
+        if not (self._loaded and now - self._checked_at < self.get_check_interval()):
+            with self._lock:
+                if not (self._loaded and now - self._checked_at < self.get_check_interval()):
+                    version = self._read_version()
+                    if not self._loaded or version != self._version:
+                        self._config = load_email_config()
+                        self._version = version
+                        self._loaded = True
+                        self.load_count += 1
+                    self._checked_at = now
+        return dict(self._config)
+
+    def invalidate(self) -> None:
+        """Força a recarga local na próxima leitura"""
+        with self._lock:
+            self._loaded = False
+
+    def bump_version(self) -> None:
+        """Incrementa a versão compartilhada, invalida a cópia local e descarta as conexões antigas"""
+        try:
+            cache.add(EMAIL_CONFIG_VERSION_KEY, 0, timeout=None)
+            cache.incr(EMAIL_CONFIG_VERSION_KEY)
+        except Exception as e:
+            # Sem incr atômico (ou chave expirada entre add e incr): usa um novo valor
+            logger.debug(f"Falha ao incrementar versão da configuração de email: {e}")
+            cache.set(EMAIL_CONFIG_VERSION_KEY, time.time_ns(), timeout=None)
+        self.invalidate()
+        smtp_pool.close_all()
+
+    def bump_version_on_commit(self) -> None:
+        """Agenda o incremento de versão para depois do commit da transação atual"""
+        transaction.on_commit(self.bump_version)
+
+    def _read_version(self):
+        try:
+            return cache.get(EMAIL_CONFIG_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Erro ao ler versão da configuração de email no cache: {e}")
+            return self._version
+
+
+class SMTPConnectionPool:
+    """
+    Conexões SMTP abertas e reutilizáveis, por configuração.
+
+    ``connection(config)`` empresta uma conexão aberta e a devolve ao pool ao
+    final, a menos que a sessão tenha caído (a conexão é fechada). Backends
+    que não são SMTP (console, arquivo, locmem) não são guardados.
+    """
+
+    # Ociosa há mais que isso: NOOP antes de reutilizar (o servidor pode ter derrubado a sessão)
+    verify_after = 5.0
+
+    def __init__(self, max_idle: Optional[int] = None, idle_timeout: Optional[float] = None):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self._idle: Dict[str, Deque[Tuple[float, Any]]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.opened = 0
+        self.reused = 0
+
+    def get_max_idle(self) -> int:
+        if self.max_idle is not None:
+            return self.max_idle
+        return getattr(settings, 'EMAIL_POOL_SIZE', 4)
+
+    def get_idle_timeout(self) -> float:
+        if self.idle_timeout is not None:
+            return self.idle_timeout
+        return getattr(settings, 'EMAIL_POOL_IDLE_TIMEOUT', 60)
+
+    @staticmethod
+    def key(config: Dict[str, Any]) -> str:
+        """Chave do pool: servidor, credenciais e opções (a senha entra só como hash)"""
+        parts = [str(config.get(name)) for name in (
+            'EMAIL_HOST', 'EMAIL_PORT', 'EMAIL_HOST_USER', 'EMAIL_HOST_PASSWORD',
+            'EMAIL_USE_TLS', 'EMAIL_USE_SSL', 'EMAIL_TIMEOUT',
+        )]
+        return hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+
+    def _check_fork(self) -> None:
+        # Sockets herdados do processo pai (preload do gunicorn) não podem ser compartilhados
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._idle = {}
+                    self._pid = os.getpid()
+
+    def acquire(self, config: Dict[str, Any]):
+        """Conexão aberta para a configuração (do pool, se houver uma viva)"""
+        if config.get('EMAIL_BACKEND') != SMTP_BACKEND:
+            return build_connection(config)
+        self._check_fork()
+        key = self.key(config)
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                released_at, connection = idle.pop()
+            age = now - released_at
+            if age > self.get_idle_timeout():
+                self._close(connection)
+                continue
+            if age > self.verify_after and not self._is_alive(connection):
+                self._close(connection)
+                continue
+            self.reused += 1
+            return connection
+
+        connection = build_connection(config)
+        connection.open()
+        self.opened += 1
+        return connection
+
+    def release(self, config: Dict[str, Any], connection, broken: bool = False) -> None:
+        """Devolve a conexão ao pool (ou a fecha, se quebrada, não SMTP ou o pool estiver cheio)"""
+        if config.get('EMAIL_BACKEND') != SMTP_BACKEND or broken or getattr(connection, 'connection', None) is None:
+            self._close(connection)
+            return
+        self._check_fork()
+        key = self.key(config)
+        with self._lock:
+            idle = self._idle.setdefault(key, deque())
+            if len(idle) < self.get_max_idle():
+                idle.append((time.monotonic(), connection))
+                return
+        self._close(connection)
+
+    @contextmanager
+    def connection(self, config: Dict[str, Any]) -> Iterator[Any]:
+        connection = self.acquire(config)
+        broken = False
+        try:
+            yield connection
+        except Exception as e:
+            broken = is_connection_error(e)
+            raise
+        finally:
+            self.release(config, connection, broken)
+
+    def close_all(self) -> None:
+        """Fecha todas as conexões ociosas (configuração alterada, fim do processo)"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        if self._pid != os.getpid():
+            return
+        for connections in idle.values():
+            for _, connection in connections:
+                self._close(connection)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = sum(len(connections) for connections in self._idle.values())
+        return {'opened': self.opened, 'reused': self.reused, 'idle': idle}
+
+    @staticmethod
+    def _is_alive(connection) -> bool:
+        try:
+            return connection.connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection) -> None:
+        try:
+            connection.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão de email: {e}")
+
+
+# Instâncias globais (uma por processo)
+email_config_loader = EmailConfigLoader()
+smtp_pool = SMTPConnectionPool()
+
+atexit.register(smtp_pool.close_all)
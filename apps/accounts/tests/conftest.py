@@ -17,4 +17,15 @@ class UserFactory(factory.django.DjangoModelFactory):
 
 @pytest.fixture
 def user_factory():
-    return UserFactory 
\ No newline at end of file
+    return UserFactory 
+@pytest.fixture
+def smtp_server():
+    """Servidor SMTP local (apps.accounts.tests.smtp_server) com o pool de conexões vazio"""
+    from apps.accounts.services.email_transport import smtp_pool
+    from apps.accounts.tests.smtp_server import LocalSMTPServer
+
+    smtp_pool.close_all()
+    smtp_pool.opened = smtp_pool.reused = 0
+    with LocalSMTPServer() as server:
+        yield server
+    smtp_pool.close_all()
@@ -0,0 +1,113 @@
+"""
+Servidor SMTP local para testes e benchmarks (substituto do aiosmtpd/smtpd).
+
+Aceita qualquer mensagem, recusa destinatários com ``recusado`` no endereço,
+espera ``handshake_ms`` por conexão (custo de TLS + AUTH de um servidor real)
+e pode derrubar as sessões abertas (``drop_sessions``).
+"""
+import socket
+import socketserver
+import threading
+import time
+
+from apps.accounts.services.email_transport import SMTP_BACKEND
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Servidor SMTP mínimo em 127.0.0.1 (porta livre), contando conexões e mensagens"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_ms: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.handshake = handshake_ms / 1000
+        self.connections = 0
+        self.messages = 0
+        self.sessions = set()
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+    def drop_sessions(self) -> None:
+        """Derruba as sessões abertas, como um servidor que encerra conexões ociosas"""
+        with self.lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            try:
+                session.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.sessions.add(self.connection)
+        try:
+            self.session()
+        finally:
+            with server.lock:
+                server.sessions.discard(self.connection)
+
+    def session(self):
+        server = self.server
+        time.sleep(server.handshake)
+        self.reply('220 localhost ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250 8BITMIME')
+            elif verb in ('HELO', 'MAIL', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                self.reply('550 Destinatário recusado' if 'recusado' in command else '250 OK')
+            elif verb == 'DATA':
+                self.reply('354 Fim com <CRLF>.<CRLF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with server.lock:
+                    server.messages += 1
+                self.reply('250 Aceito')
+            elif verb == 'QUIT':
+                self.reply('221 Tchau')
+                return
+            else:
+                self.reply('502 Não implementado')
+
+
+def smtp_config(port: int) -> dict:
+    """Configuração de email (formato do EmailConfigLoader) apontando para o servidor local"""
+    return {
+        'EMAIL_BACKEND': SMTP_BACKEND,
+        'EMAIL_HOST': '127.0.0.1',
+        'EMAIL_PORT': port,
+        'EMAIL_HOST_USER': '',
+        'EMAIL_HOST_PASSWORD': '',
+        'EMAIL_USE_TLS': False,
+        'EMAIL_USE_SSL': False,
+        'DEFAULT_FROM_EMAIL': 'benchmark@localhost',
+        'EMAIL_TIMEOUT': 10,
+    }
@@ -0,0 +1,21 @@
+import os
+import stat
+
+from PIL import Image
+
+from apps.accounts.services.avatar_service import AvatarService
+
+
+def test_avatar_processado_legivel_pelo_servidor_web(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.FILE_UPLOAD_PERMISSIONS = 0o644
+    (tmp_path / 'avatars').mkdir()
+    Image.new('RGB', (1200, 900), 'red').save(tmp_path / 'avatars' / 'avatar_1.jpg')
+
+    assert AvatarService().process_file('avatars/avatar_1.jpg')
+
+    path = tmp_path / 'avatars' / 'avatar_1.jpg'
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    with Image.open(path) as image:
+        assert max(image.size) == 300
+    assert os.listdir(tmp_path / 'avatars') == ['avatar_1.jpg']
@@ -0,0 +1,92 @@
+import socket
+
+import pytest
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+
+from apps.accounts.services.email_service import EmailService
+from apps.accounts.services.email_transport import EMAIL_CONFIG_VERSION_KEY, email_config_loader, smtp_pool
+from apps.accounts.tests.smtp_server import smtp_config
+
+
+@pytest.fixture
+def service(smtp_server):
+    service = EmailService()
+    service.config = smtp_config(smtp_server.port)
+    return service
+
+
+def test_envios_reutilizam_a_conexao_do_pool(service, smtp_server):
+    for i in range(5):
+        assert service.send_email('Assunto', 'Corpo', [f'usuario{i}@example.com']) == 1
+
+    assert smtp_pool.stats()['opened'] == 1
+    assert smtp_pool.stats()['reused'] == 4
+    assert smtp_server.connections == 1
+    assert smtp_server.messages == 5
+
+
+def test_destinatario_recusado_nao_impede_os_outros(service, smtp_server):
+    recipients = ['a@example.com', 'b.recusado@example.com', 'c@example.com']
+
+    results = service.send_bulk([EmailMessage('Assunto', 'Corpo', to=[email]) for email in recipients])
+
+    assert [result['sent'] for result in results] == [True, False, True]
+    assert results[1]['recipient'] == 'b.recusado@example.com'
+    assert '550' in results[1]['error']
+    assert smtp_server.messages == 2
+    assert smtp_pool.stats()['opened'] == 1
+
+
+def test_sessao_derrubada_pelo_servidor_e_reenviada_uma_vez(service, smtp_server):
+    service.send_email('Assunto', 'Corpo', ['a@example.com'])
+    smtp_server.drop_sessions()
+
+    assert service.send_email('Assunto', 'Corpo', ['b@example.com']) == 1
+
+    smtp_server.drop_sessions()
+    results = service.send_bulk([EmailMessage('Assunto', 'Corpo', to=['c@example.com'])])
+
+    assert results == [{'recipient': 'c@example.com', 'sent': True, 'error': None}]
+    assert smtp_server.messages == 3
+    assert smtp_pool.stats()['opened'] == 3
+
+
+def test_servidor_inacessivel_vira_erro_no_relatorio():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    service = EmailService()
+    service.config = smtp_config(port)
+
+    results = service.send_bulk([EmailMessage('Assunto', 'Corpo', to=['a@example.com'])])
+    mass = service.send_mass_template_email(
+        'accounts/emails/registration_confirmation.html', ['b@example.com'], 'Assunto',
+        context={'email': 'b@example.com', 'code': '123456', 'site_name': 'FireFlies'},
+    )
+
+    assert [(result['recipient'], result['sent']) for result in results + mass] == [
+        ('a@example.com', False), ('b@example.com', False),
+    ]
+    assert all(result['error'].startswith('Erro de conexão') for result in results + mass)
+
+
+@pytest.mark.django_db
+def test_salvar_configuracao_recarrega_e_esvazia_o_pool(service, django_capture_on_commit_callbacks):
+    from apps.config.models import EmailConfiguration
+
+    service.send_email('Assunto', 'Corpo', ['a@example.com'])
+    assert smtp_pool.stats()['idle'] == 1
+    email_config_loader.get()
+    version, loads = cache.get(EMAIL_CONFIG_VERSION_KEY), email_config_loader.load_count
+
+    with django_capture_on_commit_callbacks(execute=True):
+        EmailConfiguration.objects.create(
+            name='Principal', email_host='127.0.0.1', default_from_email='site@example.com',
+            is_active=True, is_default=True,
+        )
+
+    assert cache.get(EMAIL_CONFIG_VERSION_KEY) != version
+    assert smtp_pool.stats()['idle'] == 0
+    assert email_config_loader.get()['EMAIL_HOST'] == '127.0.0.1'
+    assert email_config_loader.load_count == loads + 1
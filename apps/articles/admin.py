@@ -1,5 +1,6 @@
 from django.contrib import admin
 from apps.articles.models import Article, Category, Tag, Comment
+from apps.articles.services.render_cache_service import article_render_cache
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -182,16 +183,24 @@ class CommentAdmin(admin.ModelAdmin):
     def approve_comments(self, request, queryset):
         """Aprovar comentários selecionados"""
         from django.utils import timezone
+        slugs = self._article_slugs(queryset)
+        targets = self._counter_targets(queryset)
         updated = queryset.filter(is_spam=False).update(
             is_approved=True,
             approved_at=timezone.now()
         )
+        Comment.objects.refresh_counters(*targets)
+        article_render_cache.invalidate_articles(slugs)
         self.message_user(request, f'{updated} comentário(s) aprovado(s).')
     approve_comments.short_description = "✅ Aprovar comentários selecionados"
 
     def mark_as_spam(self, request, queryset):
         """Marcar como spam"""
+        slugs = self._article_slugs(queryset)
+        targets = self._counter_targets(queryset)
         updated = queryset.update(is_spam=True, is_approved=False, approved_at=None)
+        Comment.objects.refresh_counters(*targets)
+        article_render_cache.invalidate_articles(slugs)
         self.message_user(request, f'{updated} comentário(s) marcado(s) como spam.')
     mark_as_spam.short_description = "🚫 Marcar como spam"
 
@@ -201,6 +210,15 @@ class CommentAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} comentário(s) desmarcado(s) como spam.')
     mark_as_not_spam.short_description = "✅ Não é spam"
 
+    def _article_slugs(self, queryset):
+        """Slugs dos artigos afetados (update() em lote não dispara signals)"""
+        return list(queryset.values_list('article__slug', flat=True).distinct())
+
+    def _counter_targets(self, queryset):
+        """Artigos e comentários pai cujos contadores o update() em lote altera"""
+        rows = list(queryset.values_list('article_id', 'parent_id'))
+        return [row[0] for row in rows], [row[1] for row in rows]
+
     class Media:
         js = ('admin/js/comment_admin.js',)
         css = {
@@ -6,3 +6,10 @@ class ArticlesConfig(AppConfig):
     name = 'apps.articles'
     label = 'articles'
     verbose_name = "Artigos e Conteúdo"
+
+    def ready(self):
+        """Importa signals e registra o índice de busca quando o app estiver pronto"""
+        import apps.articles.signals
+        from core.search import search_engine
+        from apps.articles.search import ArticleSearchIndex
+        search_engine.register(ArticleSearchIndex())
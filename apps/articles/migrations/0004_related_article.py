@@ -0,0 +1,30 @@
+# Generated by Django 5.2.2 on 2026-10-18 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_article_image_caption'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedArticle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=0.0, help_text='Similaridade ponderada entre os artigos (0 a 1)', verbose_name='pontuação')),
+                ('rank', models.PositiveSmallIntegerField(default=0, help_text='Posição do vizinho na lista do artigo (0 = mais relevante)', verbose_name='posição')),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='articles.article', verbose_name='artigo')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_to_entries', to='articles.article', verbose_name='artigo relacionado')),
+            ],
+            options={
+                'verbose_name': 'artigo relacionado',
+                'verbose_name_plural': 'artigos relacionados',
+                'ordering': ['article', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('article', 'rank'), name='unique_related_article_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.2 on 2026-10-18 06:31
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counters(apps, schema_editor):
+    """Preenche os contadores a partir dos comentários aprovados existentes"""
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('articles', 'Comment')
+
+    approved_comments = (
+        Comment.objects.filter(article=OuterRef('pk'), is_approved=True)
+        .order_by().values('article').annotate(total=Count('id')).values('total')
+    )
+    Article.objects.update(
+        approved_comment_count=Coalesce(Subquery(approved_comments, output_field=IntegerField()), 0)
+    )
+    approved_replies = (
+        Comment.objects.filter(parent=OuterRef('pk'), is_approved=True)
+        .order_by().values('parent').annotate(total=Count('id')).values('total')
+    )
+    Comment.objects.update(
+        approved_reply_count=Coalesce(Subquery(approved_replies, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_related_article'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de comentários aprovados (mantido pelos signals de comentário)', verbose_name='comentários aprovados'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='approved_reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de respostas aprovadas (mantido pelos signals de comentário)', verbose_name='respostas aprovadas'),
+        ),
+        migrations.RunPython(backfill_comment_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+from core.search.indexes import SearchIndex
+from core.search.schema import create_table, drop_table, populate_table
+
+
+class ArticleSearchIndex(SearchIndex):
+    """apps.articles.search.ArticleSearchIndex no momento desta migração, sobre o modelo histórico"""
+    name = 'articles'
+    fields = {
+        'title': 3.0,
+        'excerpt': 2.0,
+        'meta_keywords': 2.0,
+        'tags': 2.0,
+        'content': 1.0,
+    }
+    html_fields = ('content',)
+
+    def __init__(self, model):
+        self.model = model
+
+    def get_queryset(self):
+        return self.model._default_manager.prefetch_related('tags')
+
+    def prepare_tags(self, article):
+        return ' '.join(tag.name for tag in article.tags.all())
+
+
+def create_search_table(apps, schema_editor):
+    """Tabela FTS5 (SQLite) ou tsvector + GIN (PostgreSQL), já com os artigos existentes indexados"""
+    index = ArticleSearchIndex(apps.get_model('articles', 'Article'))
+    create_table(schema_editor, f'search_{index.name}', tuple(index.fields))
+    populate_table(schema_editor, index)
+
+
+def drop_search_table(apps, schema_editor):
+    drop_table(schema_editor, 'search_articles')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_comment_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
@@ -2,10 +2,12 @@ from .article import Article
 from .category import Category
 from .tag import Tag
 from .comment import Comment
+from .related import RelatedArticle
 
 __all__ = [
     'Article',
     'Category',
     'Tag',
     'Comment',
+    'RelatedArticle',
 ]
@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
+from core.view_counter import view_count_buffer
 from django.utils import timezone
 
 User = get_user_model()
@@ -170,6 +171,12 @@ class Article(models.Model):
         default=0,
         help_text='Tempo estimado de leitura em minutos'
     )
+    approved_comment_count = models.PositiveIntegerField(
+        'comentários aprovados',
+        default=0,
+        editable=False,
+        help_text='Número de comentários aprovados (mantido pelos signals de comentário)'
+    )
 
     objects = ArticleQuerySet.as_manager()
 
@@ -234,6 +241,12 @@ class Article(models.Model):
 
     def get_related_articles(self, limit=3):
         """Retorna artigos relacionados baseados na categoria e tags"""
+        from apps.articles.services.related_articles_service import related_articles_service
+
+        precomputed = related_articles_service.get_related(self, limit)
+        if precomputed:
+            return precomputed
+
         related = Article.objects.filter(
             status='published'
         ).exclude(id=self.id)
@@ -252,9 +265,9 @@ class Article(models.Model):
         return related[:limit]
 
     def increment_view_count(self):
-        """Incrementa contador de visualizações"""
+        """Incrementa contador de visualizações (em buffer, gravado em lote)"""
+        view_count_buffer.increment(type(self), self.pk)
         self.view_count += 1
-        self.save(update_fields=['view_count'])
 
     @property
     def is_published(self):
@@ -274,7 +287,7 @@ class Article(models.Model):
     @property
     def comment_count(self):
         """Retorna número de comentários aprovados"""
-        return self.comments.filter(is_approved=True).count()
+        return self.approved_comment_count
 
     def can_be_commented(self):
         """Verifica se o artigo pode receber comentários"""
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from django.core.validators import EmailValidator
 from django.utils import timezone
@@ -21,6 +23,58 @@ class CommentManager(models.Manager):
         comment.save()
         return comment
 
+    def get_thread(self, article):
+        """
+        Comentários aprovados do artigo em árvore, com uma única consulta.
+
+        Retorna os comentários raiz (mais recentes primeiro); as respostas de
+        cada um ficam em get_replies(), em ordem cronológica. Respostas cujo
+        comentário pai não está aprovado ficam de fora, como em get_replies().
+        """
+        comments = list(
+            self.filter(article=article, is_approved=True)
+            .select_related('user')
+            .order_by('created_at', 'id')
+        )
+        by_id = {comment.id: comment for comment in comments}
+        roots = []
+        for comment in comments:
+            # Evita uma consulta por comentário em can_be_replied/__str__
+            comment.article = article
+            comment._thread_replies = []
+        for comment in comments:
+            if comment.parent_id is None:
+                roots.append(comment)
+            elif comment.parent_id in by_id:
+                parent = by_id[comment.parent_id]
+                comment.parent = parent
+                parent._thread_replies.append(comment)
+        roots.reverse()
+        return roots
+
+    def refresh_counters(self, article_ids=(), parent_ids=()):
+        """Recalcula os contadores de comentários/respostas aprovados"""
+        from apps.articles.models import Article
+
+        article_ids = {pk for pk in article_ids if pk is not None}
+        parent_ids = {pk for pk in parent_ids if pk is not None}
+        if article_ids:
+            approved = (
+                self.filter(article=OuterRef('pk'), is_approved=True)
+                .order_by().values('article').annotate(total=Count('id')).values('total')
+            )
+            Article.objects.filter(pk__in=article_ids).update(
+                approved_comment_count=Coalesce(Subquery(approved, output_field=IntegerField()), 0)
+            )
+        if parent_ids:
+            approved = (
+                self.filter(parent=OuterRef('pk'), is_approved=True)
+                .order_by().values('parent').annotate(total=Count('id')).values('total')
+            )
+            self.filter(pk__in=parent_ids).update(
+                approved_reply_count=Coalesce(Subquery(approved, output_field=IntegerField()), 0)
+            )
+
 class Comment(models.Model):
     """Modelo para comentários de artigos"""
     
@@ -113,6 +167,12 @@ class Comment(models.Model):
         blank=True,
         help_text='Data e hora da aprovação'
     )
+    approved_reply_count = models.PositiveIntegerField(
+        'respostas aprovadas',
+        default=0,
+        editable=False,
+        help_text='Número de respostas aprovadas (mantido pelos signals de comentário)'
+    )
 
     objects = CommentManager()
 
@@ -130,6 +190,18 @@ class Comment(models.Model):
     def __str__(self):
         return f"Comentário de {self.name} em {self.article.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Estado gravado, para os signals saberem quais contadores mudaram
+        instance._counter_state = instance.counter_state
+        return instance
+
+    @property
+    def counter_state(self):
+        """(artigo, pai, aprovado): o que afeta os contadores denormalizados"""
+        return (self.article_id, self.parent_id, self.is_approved)
+
     def save(self, *args, **kwargs):
         """Preenche nome e email do usuário se estiver logado"""
         if self.user and not self.name:
@@ -139,6 +211,9 @@ class Comment(models.Model):
         super().save(*args, **kwargs)
 
     def get_replies(self):
+        # Árvore já montada por Comment.objects.get_thread()
+        if hasattr(self, '_thread_replies'):
+            return self._thread_replies
         return Comment.objects.get_replies(self)
 
     def approve(self):
@@ -155,7 +230,7 @@ class Comment(models.Model):
     @property
     def reply_count(self):
         """Retorna número de respostas aprovadas"""
-        return self.get_replies().count()
+        return self.approved_reply_count
 
     @property
     def author_name(self):
@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class RelatedArticle(models.Model):
+    """Vizinho pré-calculado de um artigo (top-N por sobreposição de tags e categoria)"""
+
+    article = models.ForeignKey(
+        'articles.Article',
+        on_delete=models.CASCADE,
+        related_name='related_entries',
+        verbose_name='artigo'
+    )
+    related = models.ForeignKey(
+        'articles.Article',
+        on_delete=models.CASCADE,
+        related_name='related_to_entries',
+        verbose_name='artigo relacionado'
+    )
+    score = models.FloatField(
+        'pontuação',
+        default=0.0,
+        help_text='Similaridade ponderada entre os artigos (0 a 1)'
+    )
+    rank = models.PositiveSmallIntegerField(
+        'posição',
+        default=0,
+        help_text='Posição do vizinho na lista do artigo (0 = mais relevante)'
+    )
+
+    class Meta:
+        verbose_name = 'artigo relacionado'
+        verbose_name_plural = 'artigos relacionados'
+        ordering = ['article', 'rank']
+        constraints = [
+            # Também é o índice da consulta da página de detalhe (article = ? ORDER BY rank)
+            models.UniqueConstraint(fields=['article', 'rank'], name='unique_related_article_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.related_id} ({self.score:.3f})"
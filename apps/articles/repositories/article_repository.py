@@ -1,9 +1,15 @@
 from typing import Dict, Any, Optional
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, QuerySet, F
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 from apps.articles.interfaces.repositories import IArticleRepository
 from apps.articles.models import Article
+from apps.articles.services.related_articles_service import related_articles_service
+from core.search import ranked_queryset, search_engine
+from core.view_counter import view_count_buffer
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DjangoArticleRepository(IArticleRepository):
     """Implementação concreta do repositório de artigos para Django"""
@@ -108,10 +114,19 @@ class DjangoArticleRepository(IArticleRepository):
         ).select_related('author', 'category').order_by('-published_at')[:limit]
     
     def search(self, query: str) -> QuerySet:
-        """Busca artigos por termo"""
+        """Busca artigos por termo (índice invertido com ranking de relevância)"""
         if not query:
             return Article.objects.none()
         
+        published = Article.objects.filter(
+            status='published',
+            published_at__lte=timezone.now()
+        ).select_related('author', 'category').prefetch_related('tags')
+        try:
+            return ranked_queryset(published, search_engine.search('articles', query, queryset=published))
+        except Exception as e:
+            logger.warning(f"Busca indexada indisponível, usando icontains: {e}")
+        
         return Article.objects.filter(
             Q(title__icontains=query) |
             Q(excerpt__icontains=query) |
@@ -147,17 +162,19 @@ class DjangoArticleRepository(IArticleRepository):
         ).select_related('author', 'category').prefetch_related('tags').distinct().order_by('-published_at')
     
     def increment_view_count(self, article_id: int) -> None:
-        """Incrementa contador de visualizações"""
-        try:
-            Article.objects.filter(id=article_id).update(
-                view_count=F('view_count') + 1
-            )
-        except Exception:
-            # Falha silenciosa para não afetar a experiência do usuário
-            pass
+        """Incrementa contador de visualizações (em buffer, gravado em lote)"""
+        view_count_buffer.increment(Article, article_id)
     
     def get_related_articles(self, article: Article, limit: int = 3) -> QuerySet:
-        """Obtém artigos relacionados"""
+        """Obtém artigos relacionados (índice pré-calculado, uma consulta)"""
+        related = related_articles_service.get_related(article, limit)
+        if related:
+            return related
+        # Artigo ainda sem vizinhos pré-calculados
+        return self._fallback_related_articles(article, limit)
+    
+    def _fallback_related_articles(self, article: Article, limit: int) -> QuerySet:
+        """Relacionados pela mesma categoria ou, sem ela, por tags em comum"""
         related = Article.objects.filter(
             status='published',
             published_at__lte=timezone.now()
@@ -0,0 +1,26 @@
+"""
+Índice de busca de artigos
+"""
+from core.search import SearchIndex
+from apps.articles.models import Article
+
+
+class ArticleSearchIndex(SearchIndex):
+    """Título, resumo, palavras-chave, tags e conteúdo, com pesos de relevância"""
+    name = 'articles'
+    model = Article
+    fields = {
+        'title': 3.0,
+        'excerpt': 2.0,
+        'meta_keywords': 2.0,
+        'tags': 2.0,
+        'content': 1.0,
+    }
+    html_fields = ('content',)
+    m2m_fields = ('tags',)
+
+    def get_queryset(self):
+        return Article.objects.prefetch_related('tags')
+
+    def prepare_tags(self, article):
+        return ' '.join(tag.name for tag in article.tags.all())
@@ -0,0 +1,349 @@
+"""
+Índice pré-calculado de artigos relacionados.
+
+Cada artigo publicado guarda seus N vizinhos mais próximos na tabela
+RelatedArticle. A similaridade entre dois artigos é ponderada:
+
+    pontuação = peso_tags * Jaccard(tags_a, tags_b) + peso_categoria * (mesma categoria)
+
+A página de detalhe lê os vizinhos com uma única consulta pelo índice
+(article, rank). Quando tags, categoria ou status de um artigo mudam, só as
+listas afetadas são recalculadas: a do próprio artigo e as dos artigos que
+compartilham tags/categoria com ele ou que o tinham como vizinho.
+"""
+import logging
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleProfile(NamedTuple):
+    """O que entra no cálculo de similaridade de um artigo publicado"""
+    category_id: Optional[int]
+    tags: FrozenSet[int]
+    published_at: float
+
+
+class ProfileIndex(NamedTuple):
+    """Perfis dos artigos publicados e índices invertidos por tag e categoria"""
+    profiles: Dict[int, ArticleProfile]
+    by_tag: Dict[int, Set[int]]
+    by_category: Dict[int, Set[int]]
+
+
+Neighbours = List[Tuple[int, float]]
+
+
+class RelatedArticlesService:
+    """Calcula, grava e consulta os vizinhos pré-calculados de cada artigo"""
+
+    tag_weight = 0.7
+    category_weight = 0.3
+    metric_prefix = 'related_articles'
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+
+    def get_limit(self) -> int:
+        """Quantidade de vizinhos guardados por artigo"""
+        if self.limit is not None:
+            return self.limit
+        return getattr(settings, 'RELATED_ARTICLES_LIMIT', 6)
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+
+    def get_related(self, article, limit: int = 3) -> QuerySet:
+        """Vizinhos publicados do artigo, em ordem de relevância (uma consulta)"""
+        from apps.articles.models import Article
+
+        return Article.objects.filter(
+            related_to_entries__article_id=article.pk,
+            status='published',
+            published_at__lte=timezone.now(),
+        ).select_related('author', 'category').order_by('related_to_entries__rank')[:limit]
+
+    # ------------------------------------------------------------------
+    # Similaridade
+    # ------------------------------------------------------------------
+
+    def score(self, a: ArticleProfile, b: ArticleProfile) -> float:
+        """Similaridade ponderada entre dois artigos (0 a 1)"""
+        score = 0.0
+        if a.tags and b.tags:
+            shared = len(a.tags & b.tags)
+            if shared:
+                score += self.tag_weight * shared / len(a.tags | b.tags)
+        if a.category_id is not None and a.category_id == b.category_id:
+            score += self.category_weight
+        return score
+
+    def load_profiles(self, article_ids: Optional[Iterable[int]] = None) -> ProfileIndex:
+        """Perfis dos artigos publicados (todos, ou só os de ``article_ids``), em duas consultas"""
+        from apps.articles.models import Article
+
+        articles = Article.objects.filter(status='published')
+        if article_ids is not None:
+            article_ids = set(article_ids)
+            if not article_ids:
+                return ProfileIndex({}, defaultdict(set), defaultdict(set))
+            articles = articles.filter(id__in=article_ids)
+        return self._load(articles)
+
+    def load_neighbourhood(self, article_ids: Iterable[int]) -> ProfileIndex:
+        """
+        Perfis dos artigos e de todos os publicados que compartilham tag ou
+        categoria com eles: o suficiente para ``compute()`` desses artigos,
+        sem carregar o acervo inteiro.
+        """
+        from apps.articles.models import Article
+
+        seeds = self.load_profiles(article_ids)
+        tag_ids = set().union(*(profile.tags for profile in seeds.profiles.values()))
+        category_ids = {
+            profile.category_id for profile in seeds.profiles.values() if profile.category_id is not None
+        }
+        if not tag_ids and not category_ids:
+            return seeds
+        neighbours = Article.objects.filter(
+            Q(tags__in=tag_ids) | Q(category_id__in=category_ids)
+        ).values('pk')
+        return self._extend(seeds, self._load(Article.objects.filter(status='published', pk__in=neighbours)))
+
+    def _load(self, articles: QuerySet) -> ProfileIndex:
+        from apps.articles.models import Article
+
+        tags = defaultdict(set)
+        for article_id, tag_id in Article.tags.through.objects.filter(
+            article_id__in=articles.values('pk')
+        ).values_list('article_id', 'tag_id'):
+            tags[article_id].add(tag_id)
+
+        profiles = {}
+        by_tag = defaultdict(set)
+        by_category = defaultdict(set)
+        for article_id, category_id, published_at in articles.values_list('id', 'category_id', 'published_at'):
+            profile = ArticleProfile(
+                category_id=category_id,
+                tags=frozenset(tags.get(article_id, ())),
+                published_at=published_at.timestamp() if published_at else 0.0,
+            )
+            profiles[article_id] = profile
+            for tag_id in profile.tags:
+                by_tag[tag_id].add(article_id)
+            if category_id is not None:
+                by_category[category_id].add(article_id)
+        return ProfileIndex(profiles, by_tag, by_category)
+
+    @staticmethod
+    def _extend(index: ProfileIndex, other: ProfileIndex) -> ProfileIndex:
+        """Junta os perfis carregados em ``other`` a ``index`` (que é alterado e retornado)"""
+        index.profiles.update(other.profiles)
+        for tag_id, article_ids in other.by_tag.items():
+            index.by_tag[tag_id] |= article_ids
+        for category_id, article_ids in other.by_category.items():
+            index.by_category[category_id] |= article_ids
+        return index
+
+    def candidates(self, article_id: int, index: ProfileIndex) -> Set[int]:
+        """Artigos que compartilham ao menos uma tag ou a categoria"""
+        profile = index.profiles.get(article_id)
+        if profile is None:
+            return set()
+        found = set()
+        for tag_id in profile.tags:
+            found |= index.by_tag[tag_id]
+        if profile.category_id is not None:
+            found |= index.by_category[profile.category_id]
+        found.discard(article_id)
+        return found
+
+    def compute(self, article_id: int, index: ProfileIndex) -> Neighbours:
+        """Top-N vizinhos do artigo: [(related_id, score), ...]"""
+        profile = index.profiles.get(article_id)
+        if profile is None:
+            return []
+        scored = []
+        for other_id in self.candidates(article_id, index):
+            score = self.score(profile, index.profiles[other_id])
+            if score > 0:
+                scored.append((other_id, score))
+        return self._top(scored, index)
+
+    # ------------------------------------------------------------------
+    # Gravação
+    # ------------------------------------------------------------------
+
+    def rebuild(self) -> int:
+        """Recalcula os vizinhos de todos os artigos; retorna o número de linhas gravadas"""
+        from apps.articles.models import RelatedArticle
+
+        index = self.load_profiles()
+        rows = [
+            RelatedArticle(article_id=article_id, related_id=related_id, score=score, rank=rank)
+            for article_id in index.profiles
+            for rank, (related_id, score) in enumerate(self.compute(article_id, index))
+        ]
+        with transaction.atomic():
+            RelatedArticle.objects.all().delete()
+            RelatedArticle.objects.bulk_create(rows, batch_size=1000)
+        performance_monitor.increment_counter(f'{self.metric_prefix}.rebuild')
+        logger.info(f"Artigos relacionados recalculados: {len(index.profiles)} artigo(s), {len(rows)} vizinho(s)")
+        return len(rows)
+
+    def refresh(self, article_ids: Iterable[int], holders: Iterable[int] = ()) -> int:
+        """
+        Recalcula as listas afetadas pela mudança dos artigos informados.
+
+        ``holders`` são artigos que tinham algum deles como vizinho e cuja
+        lista deve ser recalculada por completo mesmo que as linhas já tenham sido removidas
+        (por exemplo, em cascata ao excluir o artigo). Retorna o número de
+        listas alteradas.
+        """
+        from apps.articles.models import RelatedArticle
+
+        changed = set(article_ids)
+        if not changed:
+            return 0
+
+        holders = set(holders)
+        # Só a vizinhança dos artigos alterados, não o acervo inteiro
+        index = self.load_neighbourhood(changed | holders)
+        affected = changed | holders
+        for article_id in changed:
+            affected |= self.candidates(article_id, index)
+        affected |= set(
+            RelatedArticle.objects.filter(related_id__in=changed).values_list('article_id', flat=True)
+        )
+
+        stored: Dict[int, Neighbours] = defaultdict(list)
+        for article_id, related_id, score in RelatedArticle.objects.filter(
+            article_id__in=affected
+        ).order_by('article_id', 'rank').values_list('article_id', 'related_id', 'score'):
+            stored[article_id].append((related_id, score))
+
+        # Perfis que o merge ainda precisa: listas afetadas fora da vizinhança e seus vizinhos guardados
+        missing = set(affected)
+        for neighbours in stored.values():
+            missing.update(related_id for related_id, _ in neighbours)
+        missing -= index.profiles.keys()
+        if missing:
+            self._extend(index, self.load_profiles(missing))
+
+        updates: Dict[int, Neighbours] = {}
+        recompute = set()
+        for article_id in affected:
+            current = stored.get(article_id, [])
+            if article_id in changed or article_id in holders or article_id not in index.profiles:
+                neighbours = self.compute(article_id, index)
+                performance_monitor.increment_counter(f'{self.metric_prefix}.recompute')
+            else:
+                neighbours = self._merge(article_id, current, changed, index)
+                if neighbours is None:
+                    recompute.add(article_id)
+                    continue
+                performance_monitor.increment_counter(f'{self.metric_prefix}.merge')
+            if not self._same(current, neighbours):
+                updates[article_id] = neighbours
+
+        if recompute:
+            # A lista cheia perdeu um vizinho: o próximo da fila só sai da vizinhança completa
+            self._extend(index, self.load_neighbourhood(recompute))
+            for article_id in recompute:
+                neighbours = self.compute(article_id, index)
+                performance_monitor.increment_counter(f'{self.metric_prefix}.recompute')
+                if not self._same(stored.get(article_id, []), neighbours):
+                    updates[article_id] = neighbours
+
+        if updates:
+            with transaction.atomic():
+                RelatedArticle.objects.filter(article_id__in=list(updates)).delete()
+                RelatedArticle.objects.bulk_create([
+                    RelatedArticle(article_id=article_id, related_id=related_id, score=score, rank=rank)
+                    for article_id, neighbours in updates.items()
+                    for rank, (related_id, score) in enumerate(neighbours)
+                ], batch_size=1000)
+        logger.debug(f"Artigos relacionados: {len(affected)} lista(s) revista(s), {len(updates)} alterada(s)")
+        return len(updates)
+
+    def refresh_on_commit(self, article_ids: Iterable[int], holders: Iterable[int] = (),
+                          callback=None) -> None:
+        """Agenda refresh para depois do commit; ``callback`` recebe o número de listas alteradas"""
+        article_ids, holders = list(article_ids), list(holders)
+
+        def run():
+            try:
+                changed = self.refresh(article_ids, holders)
+            except Exception as e:
+                logger.error(f"Erro ao recalcular artigos relacionados {article_ids}: {e}")
+                return
+            if callback and changed:
+                callback(changed)
+
+        transaction.on_commit(run)
+
+    def rebuild_on_commit(self, callback=None) -> None:
+        """Agenda rebuild para depois do commit da transação atual"""
+        def run():
+            try:
+                self.rebuild()
+            except Exception as e:
+                logger.error(f"Erro ao recalcular artigos relacionados: {e}")
+                return
+            if callback:
+                callback()
+
+        transaction.on_commit(run)
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def _top(self, scored: Neighbours, index: ProfileIndex) -> Neighbours:
+        # Empate: o mais recente primeiro, depois o maior id
+        scored.sort(key=lambda item: (-item[1], -index.profiles[item[0]].published_at, -item[0]))
+        return scored[:self.get_limit()]
+
+    def _merge(self, article_id: int, current: Neighbours, changed: Set[int],
+               index: ProfileIndex) -> Optional[Neighbours]:
+        """
+        Atualiza a lista guardada só com as novas pontuações dos artigos alterados.
+
+        Retorna None quando a lista estava cheia e um artigo alterado perdeu
+        pontuação (ou saiu): o vizinho seguinte não está guardado e é preciso
+        recalcular tudo.
+        """
+        limit = self.get_limit()
+        previous = dict(current)
+        profile = index.profiles[article_id]
+        merged = [(related_id, score) for related_id, score in current if related_id not in changed]
+        for other_id in changed:
+            other = index.profiles.get(other_id)
+            score = self.score(profile, other) if other is not None else 0.0
+            if other_id in previous and len(current) >= limit and score < previous[other_id]:
+                return None
+            if score > 0:
+                merged.append((other_id, score))
+        # Vizinhos guardados que deixaram de estar publicados também forçam o recálculo
+        if any(related_id not in index.profiles for related_id, _ in merged):
+            return None
+        return self._top(merged, index)
+
+    @staticmethod
+    def _same(a: Neighbours, b: Neighbours) -> bool:
+        return len(a) == len(b) and all(
+            x[0] == y[0] and abs(x[1] - y[1]) < 1e-9 for x, y in zip(a, b)
+        )
+
+
+# Instância global (uma por processo)
+related_articles_service = RelatedArticlesService()
@@ -0,0 +1,139 @@
+"""
+Cache de renderização da página de detalhe de artigos.
+
+Leitores anônimos recebem o HTML já renderizado. A chave combina o slug com
+duas versões guardadas no cache do Django: uma global (qualquer artigo salvo,
+removido ou criado, pois a lista de relacionados muda) e uma por slug
+(comentários aprovados, marcados como spam ou removidos). Invalidar é só
+incrementar uma versão; as entradas antigas expiram sozinhas.
+
+O token CSRF do formulário de comentários é renderizado como um marcador e
+trocado pelo token do leitor a cada resposta.
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_RENDER_VERSION_KEY = 'articles:render:version'
+ARTICLE_SLUG_VERSION_KEY = 'articles:render:version:{slug}'
+ARTICLE_DETAIL_KEY = 'articles:detail:{slug}:{global_version}:{slug_version}'
+
+# Substituído pelo token CSRF de cada leitor ao servir o HTML
+CSRF_PLACEHOLDER = '__article-render-cache-csrf__'
+
+
+class ArticleRenderCache:
+    """Cache do HTML de ArticleDetailView para leitores anônimos"""
+
+    metric_prefix = 'article_detail_cache'
+
+    def __init__(self, timeout: Optional[int] = None):
+        self.timeout = timeout
+
+    def get_timeout(self) -> int:
+        """Tempo de vida (segundos) do HTML em cache"""
+        if self.timeout is not None:
+            return self.timeout
+        return getattr(settings, 'ARTICLE_DETAIL_CACHE_TIMEOUT', 300)
+
+    def is_cacheable(self, request) -> bool:
+        """Só GET anônimo, sem query string e sem mensagens pendentes"""
+        if request.method not in ('GET', 'HEAD') or request.GET:
+            return False
+        user = getattr(request, 'user', None)
+        if user is None or user.is_authenticated:
+            return False
+        return not len(get_messages(request))
+
+    def get(self, slug: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Chave atual e entrada em cache ({'article_id', 'html'}) ou None; registra hit/miss.
+
+        Num miss, a chave deve ser repassada a ``set()``: as versões são lidas
+        uma vez só, antes de renderizar, e um artigo salvo durante a
+        renderização não tem o HTML antigo gravado sob a versão nova.
+        """
+        try:
+            key = self._key(slug)
+            entry = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Erro ao ler cache do artigo {slug}: {e}")
+            key, entry = None, None
+        outcome = 'hit' if entry else 'miss'
+        performance_monitor.increment_counter(f'{self.metric_prefix}.{outcome}')
+        return key, entry
+
+    def set(self, key: Optional[str], article_id: int, html: str) -> None:
+        """Guarda o HTML renderizado (com o marcador CSRF) sob a chave obtida em ``get()``"""
+        if key is None:
+            return
+        try:
+            cache.set(key, {'article_id': article_id, 'html': html}, self.get_timeout())
+        except Exception as e:
+            logger.warning(f"Erro ao gravar cache do artigo (chave {key}): {e}")
+
+    def build_response(self, request, entry: Dict[str, Any]) -> HttpResponse:
+        """Resposta a partir da entrada em cache, com o token CSRF do leitor"""
+        return HttpResponse(self.render_csrf(request, entry['html']))
+
+    def render_csrf(self, request, html: str) -> str:
+        """Troca o marcador pelo token CSRF da requisição"""
+        if CSRF_PLACEHOLDER not in html:
+            return html
+        return html.replace(CSRF_PLACEHOLDER, get_token(request))
+
+    def invalidate_all(self) -> None:
+        """Invalida o HTML de todos os artigos"""
+        self._bump(ARTICLE_RENDER_VERSION_KEY)
+        performance_monitor.increment_counter(f'{self.metric_prefix}.invalidation')
+
+    def invalidate_article(self, slug: str) -> None:
+        """Invalida o HTML de um artigo"""
+        self._bump(ARTICLE_SLUG_VERSION_KEY.format(slug=slug))
+        performance_monitor.increment_counter(f'{self.metric_prefix}.invalidation')
+
+    def invalidate_articles(self, slugs: Iterable[str]) -> None:
+        """Invalida o HTML de vários artigos"""
+        for slug in set(slugs):
+            self.invalidate_article(slug)
+
+    def invalidate_all_on_commit(self) -> None:
+        """Agenda invalidate_all para depois do commit da transação atual"""
+        transaction.on_commit(self.invalidate_all)
+
+    def invalidate_article_on_commit(self, slug: str) -> None:
+        """Agenda invalidate_article para depois do commit da transação atual"""
+        transaction.on_commit(lambda: self.invalidate_article(slug))
+
+    def _key(self, slug: str) -> str:
+        slug_version_key = ARTICLE_SLUG_VERSION_KEY.format(slug=slug)
+        versions = cache.get_many([ARTICLE_RENDER_VERSION_KEY, slug_version_key])
+        return ARTICLE_DETAIL_KEY.format(
+            slug=slug,
+            global_version=versions.get(ARTICLE_RENDER_VERSION_KEY, 0),
+            slug_version=versions.get(slug_version_key, 0),
+        )
+
+    def _bump(self, key: str) -> None:
+        try:
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+        except Exception as e:
+            # Sem incr atômico (ou chave expirada entre add e incr): usa um novo valor
+            logger.debug(f"Falha ao incrementar versão {key}: {e}")
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+# Instância global (uma por processo; o estado fica no cache do Django)
+article_render_cache = ArticleRenderCache()
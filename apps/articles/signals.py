@@ -0,0 +1,142 @@
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from core.images import image_derivatives
+from core.observers import CallbackObserver, event_dispatcher
+from apps.articles.models import Article, Comment, RelatedArticle
+from apps.articles.services.related_articles_service import related_articles_service
+from apps.articles.services.render_cache_service import article_render_cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender='articles.Article')
+@receiver(post_delete, sender='articles.Article')
+def invalidate_article_render_cache(sender, instance, **kwargs):
+    """Artigo salvo ou removido: invalida todas as páginas (relacionados mudam)"""
+    article_render_cache.invalidate_all_on_commit()
+
+
+@receiver(post_save, sender='articles.Comment')
+@receiver(post_delete, sender='articles.Comment')
+def invalidate_comment_article_render_cache(sender, instance, **kwargs):
+    """Comentário criado, aprovado, marcado como spam ou removido: invalida o artigo"""
+    try:
+        slug = instance.article.slug
+    except Exception:
+        # Artigo já removido (cascata); a invalidação global cobre esse caso
+        return
+    article_render_cache.invalidate_article_on_commit(slug)
+
+
+@receiver(post_save, sender='articles.Comment')
+def refresh_comment_counters(sender, instance, created, **kwargs):
+    """Comentário criado, aprovado, marcado como spam ou movido: recalcula os contadores"""
+    previous = getattr(instance, '_counter_state', None)
+    current = instance.counter_state
+    instance._counter_state = current
+    if created:
+        if instance.is_approved:
+            Comment.objects.refresh_counters([instance.article_id], [instance.parent_id])
+        return
+    article_ids, parent_ids = [instance.article_id], [instance.parent_id]
+    if previous is not None and previous != current:
+        article_ids.append(previous[0])
+        parent_ids.append(previous[1])
+    elif previous is not None:
+        # Nada mudou nos contadores do artigo e do pai; só o próprio pode ter ficado defasado
+        article_ids, parent_ids = [], []
+    # save() completo grava o approved_reply_count em memória, que pode estar defasado
+    parent_ids.append(instance.pk)
+    Comment.objects.refresh_counters(article_ids, parent_ids)
+
+
+@receiver(post_delete, sender='articles.Comment')
+def refresh_comment_counters_after_delete(sender, instance, **kwargs):
+    """Comentário removido: recalcula os contadores do artigo e do pai"""
+    state = getattr(instance, '_counter_state', instance.counter_state)
+    if state[2]:
+        Comment.objects.refresh_counters([state[0]], [state[1]])
+
+
+@receiver(post_save, sender='articles.Article')
+def refresh_article_comment_count(sender, instance, created, update_fields=None, **kwargs):
+    """save() completo do artigo grava o contador em memória, que pode estar defasado"""
+    if created or (update_fields is not None and 'approved_comment_count' not in update_fields):
+        return
+    Comment.objects.refresh_counters(article_ids=[instance.pk])
+
+
+# Campos que alteram a similaridade entre artigos
+RELATED_ARTICLE_FIELDS = {'status', 'category', 'category_id', 'published_at'}
+
+
+def _related_articles_changed(changed=None):
+    """Listas de relacionados regravadas: o HTML em cache deixa de valer"""
+    article_render_cache.invalidate_all()
+
+
+@receiver(post_save, sender='articles.Article')
+def refresh_related_articles(sender, instance, update_fields=None, **kwargs):
+    """Artigo salvo: recalcula os relacionados afetados após o commit"""
+    if update_fields is not None and not RELATED_ARTICLE_FIELDS & set(update_fields):
+        return
+    related_articles_service.refresh_on_commit([instance.pk], callback=_related_articles_changed)
+
+
+@receiver(pre_delete, sender='articles.Article')
+def collect_related_article_holders(sender, instance, **kwargs):
+    """Guarda quem tinha o artigo como vizinho antes da remoção em cascata"""
+    instance._related_holders = list(
+        RelatedArticle.objects.filter(related_id=instance.pk).values_list('article_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender='articles.Article')
+def refresh_related_articles_after_delete(sender, instance, **kwargs):
+    """Artigo removido: recalcula as listas de quem o tinha como vizinho"""
+    holders = getattr(instance, '_related_holders', [])
+    if holders:
+        related_articles_service.refresh_on_commit(
+            [instance.pk], holders=holders, callback=_related_articles_changed
+        )
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def refresh_related_articles_on_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Tags de um artigo (ou artigos de uma tag) alterados"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        article_ids = [instance.pk]
+    elif pk_set:
+        article_ids = list(pk_set)
+    else:
+        # clear() a partir da tag: os artigos afetados já não são conhecidos
+        related_articles_service.rebuild_on_commit(callback=_related_articles_changed)
+        return
+    related_articles_service.refresh_on_commit(article_ids, callback=_related_articles_changed)
+
+
+@receiver(post_delete, sender='articles.Tag')
+@receiver(post_delete, sender='articles.Category')
+def rebuild_related_articles(sender, instance, **kwargs):
+    """Tag ou categoria removida sem sinais por artigo: recalcula tudo"""
+    related_articles_service.rebuild_on_commit(callback=_related_articles_changed)
+
+
+@receiver(post_save, sender='articles.Article')
+def generate_featured_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    """Imagem destacada nova ou trocada: gera WebP e variantes por largura em segundo plano"""
+    if update_fields is not None and 'featured_image' not in update_fields:
+        return
+    if instance.featured_image:
+        image_derivatives.schedule(instance.featured_image.name)
+
+
+def on_article_created(event):
+    """Evento article_created do event_dispatcher"""
+    article_render_cache.invalidate_all()
+
+
+event_dispatcher.subscribe('article_created', CallbackObserver(on_article_created))
@@ -0,0 +1,50 @@
+import pytest
+from django.db import connection
+from django.template.loader import render_to_string
+from django.test.utils import CaptureQueriesContext
+
+from apps.articles.models import Comment
+
+
+def _add_thread(article, comment_factory, size):
+    """``size`` comentários aprovados: ~1/4 raízes, o resto respostas em vários níveis"""
+    created = list(article.comments.all())
+    for i in range(size):
+        parent = created[(i * 7) % len(created)] if created and i % 4 else None
+        created.append(comment_factory(article=article, parent=parent))
+
+
+def _render_queries(article):
+    with CaptureQueriesContext(connection) as queries:
+        html = render_to_string('articles/comments/comment_snippet.html', {
+            'article': article, 'comments': Comment.objects.get_thread(article), 'csrf_token': 'teste',
+        })
+    return len(queries), html
+
+
+@pytest.mark.django_db
+def test_thread_renderizada_com_consultas_constantes(article_factory, comment_factory):
+    article = article_factory()
+
+    _add_thread(article, comment_factory, 10)
+    queries_10, html_10 = _render_queries(article)
+
+    _add_thread(article, comment_factory, 90)
+    queries_100, html_100 = _render_queries(article)
+
+    assert html_10.count('class="comment-item') < html_100.count('class="comment-item')
+    assert queries_10 == queries_100
+
+
+@pytest.mark.django_db
+def test_contador_de_comentarios_aprovados(article_factory, comment_factory):
+    article = article_factory()
+    comment = comment_factory(article=article)
+    comment_factory(article=article, parent=comment)
+    comment_factory(article=article, is_approved=False)
+
+    article.refresh_from_db()
+    comment.refresh_from_db()
+
+    assert article.comment_count == 2
+    assert comment.approved_reply_count == 1
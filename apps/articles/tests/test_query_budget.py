@@ -0,0 +1,62 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient
+from django.urls import reverse
+
+from apps.articles.views.article_views import ArticleDetailView, ArticleListView
+from apps.config.services.install_state_service import install_state
+from core.query_budget import QueryBudgetMiddleware, assert_query_budget
+
+
+@pytest.fixture(autouse=True)
+def installed(tmp_path, monkeypatch):
+    # Sem o marcador de primeira instalação: nada é redirecionado para o setup
+    monkeypatch.setattr(install_state, '_base_dir', tmp_path)
+    install_state.invalidate()
+    yield
+    install_state.invalidate()
+
+
+@pytest.fixture
+def articles(article_factory, comment_factory, user_factory):
+    author = user_factory()
+    created = [article_factory(author=author) for _ in range(12)]
+    for article in created[:3]:
+        comment = comment_factory(article=article)
+        comment_factory(article=article, parent=comment)
+    return created
+
+
+@pytest.mark.django_db
+def test_lista_de_artigos_dentro_do_orcamento(client, articles):
+    with assert_query_budget(view=ArticleListView):
+        response = client.get(reverse('articles:article_list'))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_detalhe_do_artigo_dentro_do_orcamento(client, articles):
+    article = articles[0]
+
+    with assert_query_budget(view=ArticleDetailView):
+        response = client.get(reverse('articles:article_detail', kwargs={'slug': article.slug}))
+
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+def test_middleware_registra_consultas_sob_asgi(articles, settings):
+    settings.QUERY_SERVER_TIMING = True
+
+    response = async_to_sync(AsyncClient().get)(reverse('articles:article_list'))
+
+    assert response.status_code == 200
+    assert 'desc="0 queries"' not in response['Server-Timing']
+
+
+def test_middleware_roda_no_modo_async_sem_adaptador():
+    async def get_response(request):
+        return None
+
+    assert iscoroutinefunction(QueryBudgetMiddleware(get_response))
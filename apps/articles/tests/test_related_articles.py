@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from apps.articles.models import Article, Category, RelatedArticle, Tag
+from apps.articles.services.related_articles_service import RelatedArticlesService
+
+
+def _stored():
+    return {
+        (article_id, related_id, rank)
+        for article_id, related_id, rank in RelatedArticle.objects.values_list('article_id', 'related_id', 'rank')
+    }
+
+
+@pytest.fixture
+def corpus(article_factory, user_factory):
+    rng = random.Random(7)
+    author = user_factory()
+    categories = [Category.objects.create(name=f'Categoria {i}', slug=f'categoria-{i}') for i in range(3)]
+    tags = [Tag.objects.create(name=f'Tag {i}', slug=f'tag-{i}') for i in range(12)]
+    articles = []
+    for _ in range(40):
+        article = article_factory(author=author, category=rng.choice(categories + [None]))
+        article.tags.set(rng.sample(tags, rng.randint(1, 3)))
+        articles.append(article)
+    return rng, tags, articles
+
+
+@pytest.mark.django_db
+def test_refresh_incremental_igual_ao_recalculo_completo(corpus):
+    rng, tags, articles = corpus
+    service = RelatedArticlesService(limit=3)
+    service.rebuild()
+
+    for article in rng.sample(articles, 8):
+        article.tags.set(rng.sample(tags, rng.randint(0, 3)))
+        service.refresh([article.id])
+    unpublished = articles[0]
+    Article.objects.filter(pk=unpublished.pk).update(status='draft')
+    service.refresh([unpublished.pk])
+    incremental = _stored()
+
+    service.rebuild()
+
+    assert incremental == _stored()
+
+
+@pytest.mark.django_db
+def test_vizinhanca_carrega_so_quem_compartilha_tag_ou_categoria(article_factory):
+    shared, other = Tag.objects.create(name='Django', slug='django'), Tag.objects.create(name='Fotos', slug='fotos')
+    article, neighbour, unrelated = article_factory(), article_factory(), article_factory()
+    article.tags.set([shared])
+    neighbour.tags.set([shared])
+    unrelated.tags.set([other])
+
+    index = RelatedArticlesService().load_neighbourhood([article.id])
+
+    assert set(index.profiles) == {article.id, neighbour.id}
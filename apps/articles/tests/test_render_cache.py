@@ -0,0 +1,33 @@
+import pytest
+from django.core.cache import cache
+
+from apps.articles.services.render_cache_service import article_render_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_html_renderizado_antes_de_uma_edicao_nao_fica_sob_a_versao_nova():
+    key, entry = article_render_cache.get('artigo')
+    assert entry is None
+
+    # Artigo salvo entre o miss e o fim da renderização
+    article_render_cache.invalidate_article('artigo')
+    article_render_cache.set(key, 1, '<p>versão antiga</p>')
+
+    assert article_render_cache.get('artigo')[1] is None
+
+
+def test_miss_seguido_de_set_serve_o_html(client, article_factory):
+    article = article_factory()
+
+    first = client.get(article.get_absolute_url())
+    assert first.status_code == 200
+
+    key, entry = article_render_cache.get(article.slug)
+    assert entry is not None
+    assert entry['article_id'] == article.id
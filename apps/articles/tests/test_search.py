@@ -0,0 +1,41 @@
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from apps.articles.repositories.article_repository import DjangoArticleRepository
+from core.search import SQLiteFTS5SearchBackend, search_engine
+
+
+@pytest.mark.django_db
+def test_rascunhos_nao_tiram_artigos_publicados_do_limite(article_factory, settings):
+    settings.SEARCH_MAX_RESULTS = 3
+    # Rascunhos mais relevantes (termo no título) que o único publicado
+    for _ in range(10):
+        article_factory(title='Desempenho desempenho', status='draft')
+    published = article_factory(title='Outro assunto', excerpt='desempenho')
+    search_engine.rebuild('articles')
+
+    results = list(DjangoArticleRepository().search('desempenho'))
+
+    assert results == [published]
+
+
+@pytest.mark.django_db
+def test_tabela_de_busca_criada_pelas_migracoes():
+    if not isinstance(search_engine.backend, SQLiteFTS5SearchBackend):
+        pytest.skip('Backend de busca sem tabela no banco')
+    assert 'search_articles' in connection.introspection.table_names()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migracao_indexa_os_artigos_existentes(article_factory):
+    if not isinstance(search_engine.backend, SQLiteFTS5SearchBackend):
+        pytest.skip('Backend de busca sem tabela no banco')
+    executor = MigrationExecutor(connection)
+    executor.migrate([('articles', '0005_comment_counters')])
+    executor.loader.build_graph()
+    article = article_factory(title='Otimização de consultas')
+
+    executor.migrate([('articles', '0006_search_table')])
+
+    assert list(DjangoArticleRepository().search('consultas')) == [article]
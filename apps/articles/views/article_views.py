@@ -5,13 +5,16 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
 from django.urls import reverse_lazy, reverse
 from django.core.paginator import Paginator
+from django.db.models import Count
 from django.http import JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
 from apps.articles.services.article_service import ArticleService
+from apps.articles.services.render_cache_service import article_render_cache, CSRF_PLACEHOLDER
 from apps.articles.repositories.article_repository import DjangoArticleRepository
 from apps.articles.interfaces.services import IArticleService
 from apps.articles.models.article import Article
+from apps.articles.models.comment import Comment
 from apps.articles.models.category import Category
 from apps.articles.models.tag import Tag
 from apps.articles.forms import ArticleForm
@@ -24,6 +27,7 @@ class ArticleListView(ModuleEnabledRequiredMixin, ListView):
     template_name = 'articles/article_list.html'
     context_object_name = 'articles'
     paginate_by = 12
+    query_budget = 8  # core.query_budget: máximo de consultas SQL por requisição
 
     def get_queryset(self):
         service = service_factory.create_article_service()
@@ -33,7 +37,10 @@ class ArticleListView(ModuleEnabledRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         service = service_factory.create_article_service()
         context['featured_articles'] = service.get_featured_articles(limit=3)
-        context['categories'] = Category.objects.filter(articles__isnull=False).distinct().order_by('name')
+        # Contagem anotada: uma consulta em vez de um COUNT por categoria no template
+        context['categories'] = Category.objects.annotate(
+            article_count=Count('articles')
+        ).filter(article_count__gt=0).order_by('name')
         context['meta_title'] = 'Artigos'
         context['meta_description'] = 'Todos os artigos do blog'
         return context
@@ -45,6 +52,28 @@ class ArticleDetailView(ModuleEnabledRequiredMixin, DetailView):
     context_object_name = 'article'
     slug_field = 'slug'
     slug_url_arg = 'slug'
+    query_budget = 12
+
+    def get(self, request, *args, **kwargs):
+        slug = self.kwargs['slug']
+        self.render_cacheable = article_render_cache.is_cacheable(request)
+        if self.render_cacheable:
+            self.render_cache_key, entry = article_render_cache.get(slug)
+            if entry:
+                # HTML em cache: só a visualização é contabilizada (em buffer)
+                service_factory.create_article_service().increment_article_views(entry['article_id'])
+                return article_render_cache.build_response(request, entry)
+
+        response = super().get(request, *args, **kwargs)
+        if self.render_cacheable:
+            response.add_post_render_callback(self.store_rendered_page)
+        return response
+
+    def store_rendered_page(self, response):
+        """Guarda o HTML renderizado e aplica o token CSRF desta requisição"""
+        html = response.content.decode(response.charset)
+        article_render_cache.set(self.render_cache_key, self.object.id, html)
+        response.content = article_render_cache.render_csrf(self.request, html)
 
     def get_object(self, queryset=None):
         service = service_factory.create_article_service()
@@ -55,9 +84,12 @@ class ArticleDetailView(ModuleEnabledRequiredMixin, DetailView):
         service = service_factory.create_article_service()
         article = self.object
         service.increment_article_views(article.id)
+        if getattr(self, 'render_cacheable', False):
+            # Token trocado a cada resposta; o HTML em cache não carrega o de ninguém
+            context['csrf_token'] = CSRF_PLACEHOLDER
         context['related_articles'] = service.get_related_articles(article, limit=3)
-        context['comments'] = article.comments.filter(is_approved=True, parent__isnull=True).order_by('-created_at')[:5]
-        context['comment_count'] = article.comments.filter(is_approved=True).count()
+        context['comments'] = Comment.objects.get_thread(article)[:5]
+        context['comment_count'] = article.comment_count
         context['meta_title'] = article.seo_title or article.title
         context['meta_description'] = article.seo_description or article.excerpt
         context['meta_keywords'] = getattr(article, 'meta_keywords', '') or ''
@@ -280,7 +312,10 @@ class CategoryDetailView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category
-        context['categories'] = Category.objects.filter(articles__isnull=False).distinct().order_by('name')
+        # Contagem anotada: uma consulta em vez de um COUNT por categoria no template
+        context['categories'] = Category.objects.annotate(
+            article_count=Count('articles')
+        ).filter(article_count__gt=0).order_by('name')
         context['meta_title'] = f'Artigos em {self.category.name}'
         context['meta_description'] = self.category.seo_description
         context['featured_articles'] = Article.objects.filter(is_featured=True, status='published')[:3]
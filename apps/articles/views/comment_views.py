@@ -115,12 +115,12 @@ def add_reply(request, slug, comment_id):
                     article_service = ArticleService(DjangoArticleRepository())
                     article_obj = article_service.get_article_by_slug(slug)
                     related_articles = article_service.get_related_articles(article_obj, limit=3)
-                    comments = article_obj.comments.filter(is_approved=True, parent__isnull=True).order_by('-created_at')[:5]
+                    comments = Comment.objects.get_thread(article_obj)[:5]
                     context = {
                         'article': article_obj,
                         'related_articles': related_articles,
                         'comments': comments,
-                        'comment_count': article_obj.comments.filter(is_approved=True).count(),
+                        'comment_count': article_obj.comment_count,
                         'reply_form': form,
                         'reply_parent_id': parent_comment.id,
                     }
@@ -139,11 +139,8 @@ def add_reply(request, slug, comment_id):
 def comment_list(request, slug):
     """Listar comentários de um artigo (AJAX)"""
     article = get_object_or_404(Article, slug=slug, status='published')
-    comments = Comment.objects.filter(
-        article=article,
-        is_approved=True,
-        parent__isnull=True
-    ).select_related('user').prefetch_related('replies').order_by('-created_at')
+    # Árvore inteira em uma consulta; a paginação é sobre os comentários raiz
+    comments = Comment.objects.get_thread(article)
     paginator = Paginator(comments, 10)
     page_number = request.GET.get('page', 1)
     page_obj = paginator.get_page(page_number)
@@ -243,16 +240,22 @@ def comment_stats(request):
     if not request.user.is_staff:
         return HttpResponseForbidden()
     
-    # Estatísticas gerais
-    total_comments = Comment.objects.count()
-    approved_comments = Comment.objects.filter(is_approved=True).count()
-    pending_comments = Comment.objects.filter(is_approved=False, is_spam=False).count()
-    spam_comments = Comment.objects.filter(is_spam=True).count()
+    # Estatísticas gerais (uma consulta)
+    totals = Comment.objects.aggregate(
+        total=Count('id'),
+        approved=Count('id', filter=Q(is_approved=True)),
+        pending=Count('id', filter=Q(is_approved=False, is_spam=False)),
+        spam=Count('id', filter=Q(is_spam=True)),
+    )
+    total_comments = totals['total']
+    approved_comments = totals['approved']
+    pending_comments = totals['pending']
+    spam_comments = totals['spam']
     
-    # Comentários por artigo (top 10)
-    top_articles = Article.objects.annotate(
-        comment_count=Count('comments', filter=Q(comments__is_approved=True))
-    ).order_by('-comment_count')[:10]
+    # Comentários por artigo (top 10, pelo contador denormalizado)
+    top_articles = Article.objects.only(
+        'title', 'slug', 'approved_comment_count'
+    ).order_by('-approved_comment_count')[:10]
     
     # Comentários recentes
     recent_comments = Comment.objects.filter(
@@ -292,15 +295,16 @@ def load_more_comments(request):
     article_id = request.GET.get('article_id')
     page = request.GET.get('page', 1)
     article = get_object_or_404(Article, id=article_id)
-    comments = Comment.objects.filter(article=article, parent=None, is_approved=True).order_by('created_at')
+    # Árvore inteira em uma consulta; raízes em ordem cronológica
+    comments = Comment.objects.get_thread(article)[::-1]
     paginator = Paginator(comments, 10)
     page_obj = paginator.get_page(page)
-    html = render_to_string('articles/comments/comment_list_partial.html', {'comments': page_obj})
+    html = render_to_string('articles/comments/comment_list_partial.html', {'comments': page_obj, 'article': article})
     return HttpResponse(html)
 
 
 def load_replies(request, comment_id):
     parent = get_object_or_404(Comment, id=comment_id)
-    replies = parent.replies.filter(is_approved=True).order_by('created_at')
+    replies = parent.replies.filter(is_approved=True).select_related('user', 'article').order_by('created_at')
     html = render_to_string('articles/comments/reply_list_partial.html', {'replies': replies})
     return HttpResponse(html)
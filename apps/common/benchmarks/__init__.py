@@ -0,0 +1,33 @@
+"""
+Benchmarks de desempenho do FireFlies.
+
+Cada cenário é uma função ``(iterations: int) -> dict`` registrada em
+``BENCHMARKS`` pelo caminho pontuado. Execute com:
+
+    python manage.py run_benchmark <cenario> [--iterations N]
+"""
+from django.utils.module_loading import import_string
+
+BENCHMARKS = {
+    'article_view_counter': 'apps.common.benchmarks.view_counter.article_view_counter',
+    'asgi_middleware_stack': 'apps.common.benchmarks.asgi.asgi_middleware_stack',
+    'cache_keys': 'apps.common.benchmarks.cache.cache_keys',
+    'cache_stampede': 'apps.common.benchmarks.cache.cache_stampede',
+    'email_delivery': 'apps.common.benchmarks.email.email_delivery',
+    'memory_cache_backend': 'apps.common.benchmarks.cache.memory_cache_backend',
+    'media_backup': 'apps.common.benchmarks.media_backup.media_backup',
+    'module_middleware_connections': 'apps.common.benchmarks.middleware.module_middleware_connections',
+    'path_classification': 'apps.common.benchmarks.middleware.path_classification',
+    'performance_monitor': 'apps.common.benchmarks.performance.performance_monitor',
+    'related_articles': 'apps.common.benchmarks.related_articles.related_articles',
+    'search_engine': 'apps.common.benchmarks.search.search_engine',
+    'service_factory_startup': 'apps.common.benchmarks.startup.service_factory_startup',
+    'tiered_cache': 'apps.common.benchmarks.cache.tiered_cache',
+}
+
+
+def get_benchmark(name: str):
+    """Importa a função do cenário pelo nome registrado"""
+    if name not in BENCHMARKS:
+        raise KeyError(f"Benchmark desconhecido: {name}")
+    return import_string(BENCHMARKS[name])
@@ -0,0 +1,147 @@
+"""
+Benchmark da pilha de middlewares sob o handler ASGI do Django.
+
+A pilha do projeto roda em modo assíncrono contra uma cópia em que as mesmas
+middlewares são marcadas como somente síncronas (o comportamento anterior).
+As requisições passam pelo handler ASGI em processo, via ``AsyncClient``, com
+uma view assíncrona que só aguarda ``VIEW_IO_DELAY`` segundos, simulando I/O
+assíncrono (cache, HTTP externo). Na pilha somente síncrona a cadeia inteira
+roda na thread única do ``sync_to_async`` e as requisições ficam serializadas.
+"""
+import asyncio
+import contextlib
+import statistics
+import threading
+import time
+
+from asgiref.sync import AsyncToSync, SyncToAsync
+from django.http import HttpResponse
+from django.test import AsyncClient, override_settings
+from django.urls import re_path
+from django.utils.module_loading import import_string
+
+# Middlewares do projeto (as do Django ficam iguais nas duas pilhas)
+PROJECT_MIDDLEWARE = [
+    'apps.config.middleware.setup_middleware.SetupMiddleware',
+    'apps.accounts.middleware.RateLimitMiddleware',
+    'apps.accounts.middleware.AccessControlMiddleware',
+    'apps.accounts.middleware.SmartRedirectMiddleware',
+    'apps.config.middleware.module_middleware.ModuleAccessMiddleware',
+    'apps.config.middleware.module_middleware.ModuleContextMiddleware',
+]
+
+DJANGO_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+# Espera simulada de I/O dentro da view
+VIEW_IO_DELAY = 0.002
+
+# Caminhos do app pages, que passam pela verificação de módulos
+ASGI_PATHS = ['/', '/pages/', '/sobre/', '/contato/']
+
+
+async def benchmark_view(request):
+    await asyncio.sleep(VIEW_IO_DELAY)
+    return HttpResponse('ok')
+
+
+# URLconf usado durante o benchmark (ROOT_URLCONF aponta para este módulo)
+urlpatterns = [
+    re_path(r'^.*$', benchmark_view),
+]
+
+
+def _sync_only(path: str) -> str:
+    """Cria (neste módulo) uma subclasse somente síncrona da middleware"""
+    middleware_class = import_string(path)
+    name = f'SyncOnly{middleware_class.__name__}'
+    if name not in globals():
+        globals()[name] = type(name, (middleware_class,), {
+            'async_capable': False,
+            '__module__': __name__,
+        })
+    return f'{__name__}.{name}'
+
+
+@contextlib.contextmanager
+def _count_thread_switches():
+    """Conta as passagens sync_to_async/async_to_sync durante o bloco"""
+    counter = {'sync_to_async': 0, 'async_to_sync': 0}
+    original_sync_to_async = SyncToAsync.__call__
+    original_async_to_sync = AsyncToSync.__call__
+
+    async def counting_sync_to_async(self, *args, **kwargs):
+        counter['sync_to_async'] += 1
+        return await original_sync_to_async(self, *args, **kwargs)
+
+    def counting_async_to_sync(self, *args, **kwargs):
+        counter['async_to_sync'] += 1
+        return original_async_to_sync(self, *args, **kwargs)
+
+    SyncToAsync.__call__ = counting_sync_to_async
+    AsyncToSync.__call__ = counting_async_to_sync
+    try:
+        yield counter
+    finally:
+        SyncToAsync.__call__ = original_sync_to_async
+        AsyncToSync.__call__ = original_async_to_sync
+
+
+async def _drive(iterations: int, concurrency: int) -> dict:
+    client = AsyncClient()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    peak_threads = threading.active_count()
+
+    async def one(i):
+        nonlocal peak_threads
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(ASGI_PATHS[i % len(ASGI_PATHS)])
+            latencies.append(time.perf_counter() - start)
+            peak_threads = max(peak_threads, threading.active_count())
+            assert response.status_code == 200, response.status_code
+
+    # Aquecimento: carrega a pilha, o snapshot de módulos e a prontidão do banco
+    await one(0)
+    latencies.clear()
+
+    with _count_thread_switches() as switches:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(iterations)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'mean_ms': statistics.fmean(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'requests_per_second': iterations / elapsed,
+        'thread_switches_per_request': (switches['sync_to_async'] + switches['async_to_sync']) / iterations,
+        'peak_threads': peak_threads,
+    }
+
+
+def _run_stack(middleware: list, iterations: int, concurrency: int) -> dict:
+    with override_settings(MIDDLEWARE=middleware, ROOT_URLCONF=__name__):
+        return asyncio.run(_drive(iterations, concurrency))
+
+
+def asgi_middleware_stack(iterations: int = 1000, concurrency: int = 50) -> dict:
+    """Latência e trocas de thread por requisição: pilha somente síncrona x assíncrona"""
+    sync_only = _run_stack(
+        DJANGO_MIDDLEWARE + [_sync_only(path) for path in PROJECT_MIDDLEWARE],
+        iterations, concurrency,
+    )
+    native = _run_stack(DJANGO_MIDDLEWARE + PROJECT_MIDDLEWARE, iterations, concurrency)
+
+    results = {'iterations': iterations, 'concurrency': concurrency}
+    for label, stack in (('sync_only', sync_only), ('async', native)):
+        for key, value in stack.items():
+            results[f'{label}_{key}'] = value
+    results['mean_latency_speedup'] = (
+        sync_only['mean_ms'] / native['mean_ms'] if native['mean_ms'] else 0.0
+    )
+    return results
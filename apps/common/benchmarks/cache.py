@@ -0,0 +1,351 @@
+"""
+Benchmark do cache em memória do core.cache: dict sem limite x LRU/TTL limitado.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from core.cache import (
+    CachedValue, DjangoCacheBackend, MemoryCacheBackend, TieredCacheBackend, cache_manager,
+    cache_result, make_cache_key,
+)
+
+
+class LegacyMemoryCacheBackend:
+    """Implementação anterior (dict sem limite, datetimes por entrada), para comparação"""
+
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, key):
+        if key in self._cache:
+            item = self._cache[key]
+            if item['expires_at'] is None or datetime.now() < item['expires_at']:
+                return item['value']
+            else:
+                del self._cache[key]
+        return None
+
+    def set(self, key, value, timeout=None):
+        expires_at = None
+        if timeout:
+            expires_at = datetime.now() + timedelta(seconds=timeout)
+        self._cache[key] = {'value': value, 'expires_at': expires_at, 'created_at': datetime.now()}
+        return True
+
+    def get_stats(self):
+        return {
+            'total_keys': len(self._cache),
+            'expired_keys': len([k for k, v in self._cache.items()
+                                 if v['expires_at'] and datetime.now() > v['expires_at']]),
+        }
+
+
+def _run(factory, iterations: int) -> dict:
+    value = {'title': 'Navegação', 'items': list(range(10))}
+
+    # Memória retida (medida à parte: o tracemalloc distorce os tempos)
+    tracemalloc.start()
+    backend = factory()
+    for i in range(iterations):
+        backend.set(f'key:{i}', value, 300)
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    backend = factory()
+    start = time.perf_counter()
+    for i in range(iterations):
+        backend.set(f'key:{i}', value, 300)
+    set_seconds = time.perf_counter() - start
+
+    hot = [f'key:{i}' for i in range(iterations - 1000, iterations)]
+    start = time.perf_counter()
+    for _ in range(max(1, iterations // len(hot))):
+        for key in hot:
+            backend.get(key)
+    get_seconds = time.perf_counter() - start
+    gets = max(1, iterations // len(hot)) * len(hot)
+
+    start = time.perf_counter()
+    stats = backend.get_stats()
+    stats_ms = (time.perf_counter() - start) * 1000
+
+    # Entradas de vida curta que nunca são lidas de novo
+    for i in range(iterations):
+        backend.set(f'short:{i}', i, 0.01)
+    time.sleep(0.05)
+    backend.set('trigger', 1, 300)
+
+    return {
+        'set_us': set_seconds / iterations * 1e6,
+        'get_us': get_seconds / gets * 1e6,
+        'get_stats_ms': stats_ms,
+        'keys_after_sets': stats['total_keys'],
+        'memory_mb': memory_bytes / 1024 / 1024,
+        'keys_after_short_ttl': backend.get_stats()['total_keys'],
+        'backend': backend,
+    }
+
+
+def _threads(iterations: int, threads: int = 8) -> dict:
+    backend = MemoryCacheBackend(max_entries=1000)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(iterations // threads):
+                key = f'k:{(i * 7 + offset) % 5000}'
+                backend.set(key, i, 60)
+                backend.get(key)
+                if i % 10 == 0:
+                    backend.delete(key)
+        except Exception as e:
+            errors.append(e)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+    stats = backend.get_stats()
+    return {'errors': len(errors), 'keys': stats['total_keys'], 'evictions': stats['evictions']}
+
+
+def memory_cache_backend(iterations: int = 100000) -> dict:
+    """``iterations`` chaves distintas: implementação anterior x LRU/TTL com max_entries=10000"""
+    results = {'iterations': iterations}
+    for name, factory in (('legacy', LegacyMemoryCacheBackend),
+                          ('lru', lambda: MemoryCacheBackend(max_entries=10000))):
+        run = _run(factory, iterations)
+        backend = run.pop('backend')
+        for metric, value in run.items():
+            results[f'{name}_{metric}'] = value
+    lru_stats = backend.get_stats()
+    results['lru_evictions'] = lru_stats['evictions']
+    results['lru_expirations'] = lru_stats['expirations']
+    for metric, value in _threads(iterations).items():
+        results[f'threads_{metric}'] = value
+    return results
+
+
+def _get_us(backend, key: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        backend.get(key)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _staleness(window: float) -> dict:
+    """Dois "workers" (L1 próprios, mesmo L2): quanto tempo o B vê o valor antigo após o A gravar"""
+    key = f'benchmark:tiered:{window}'
+    worker_a = TieredCacheBackend(consistency_window=window)
+    worker_b = TieredCacheBackend(consistency_window=window)
+    worker_a.set(key, 'v1', 60)
+    worker_b.sync()
+    before = worker_b.get(key)
+
+    worker_a.set(key, 'v2', 60)
+    changed_at = time.monotonic()
+    stale_reads = 0
+    while worker_b.get(key) != 'v2':
+        stale_reads += 1
+        time.sleep(window / 20 if window else 0.001)
+        if time.monotonic() - changed_at > window + 5:
+            break
+    stale_seconds = time.monotonic() - changed_at
+
+    worker_a.delete(key)
+    time.sleep(window)
+    after_delete = worker_b.get(key)
+    return {
+        'consistent': before == 'v1' and after_delete is None and stale_seconds <= window + 0.05,
+        'stale_seconds': stale_seconds,
+        'stale_reads': stale_reads,
+    }
+
+
+def tiered_cache(iterations: int = 100000) -> dict:
+    """Leitura de chave quente: cache do Django x L1 do cache em duas camadas; janela de consistência"""
+    key = 'benchmark:tiered:hot'
+    value = {'items': [{'title': f'Item {i}', 'url': f'/pagina-{i}/'} for i in range(20)]}
+    django_backend = DjangoCacheBackend()
+    tiered = TieredCacheBackend()
+    tiered.set(key, value, 60)
+    tiered.get(key)
+
+    results = {
+        'iterations': iterations,
+        'django_get_us': _get_us(django_backend, key, iterations),
+        'tiered_get_us': _get_us(tiered, key, iterations),
+        'l1_get_us': _get_us(tiered.l1, key, iterations),
+    }
+    results['speedup'] = results['django_get_us'] / results['tiered_get_us']
+    stats = tiered.get_stats()
+    results['tiered_l1_hits'] = stats['l1_hits']
+    results['tiered_l2_hits'] = stats['l2_hits']
+    tiered.delete(key)
+
+    for window in (0.0, 0.2, 1.0):
+        for metric, value in _staleness(window).items():
+            results[f'window_{window}_{metric}'] = value
+    return results
+
+
+def _legacy_get_or_set(backend, key, default_func, timeout):
+    """get_or_set anterior: todo chamador que não encontra o valor recalcula"""
+    value = backend.get(key)
+    if value is None:
+        value = default_func()
+        backend.set(key, value, timeout)
+    return value
+
+
+def _concurrent(callers: int, call) -> dict:
+    """``callers`` threads liberadas juntas chamando ``call``; mede a latência de cada uma"""
+    barrier = threading.Barrier(callers)
+    latencies = []
+
+    def worker(_):
+        barrier.wait()
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        list(executor.map(worker, range(callers)))
+    latencies.sort()
+    return {'median_ms': latencies[len(latencies) // 2] * 1000, 'max_ms': latencies[-1] * 1000}
+
+
+def cache_stampede(iterations: int = 32) -> dict:
+    """``iterations`` chamadores simultâneos numa chave ausente/vencida (cálculo de 50 ms)"""
+    results = {'callers': iterations}
+    computations = []
+
+    def slow_value():
+        computations.append(1)
+        time.sleep(0.05)
+        return {'computed_at': time.time()}
+
+    for backend_name in ('memory', 'django', 'tiered'):
+        backend = cache_manager.get_backend(backend_name)
+
+        key = f'benchmark:stampede:{uuid.uuid4().hex}'
+        computations.clear()
+        _concurrent(iterations, lambda: _legacy_get_or_set(backend, key, slow_value, 60))
+        results[f'{backend_name}_legacy_computations'] = len(computations)
+
+        key = f'benchmark:stampede:{uuid.uuid4().hex}'
+        computations.clear()
+        timing = _concurrent(iterations, lambda: cache_manager.get_or_set(key, slow_value, 60, backend_name))
+        results[f'{backend_name}_single_flight_computations'] = len(computations)
+        results[f'{backend_name}_single_flight_max_ms'] = timing['max_ms']
+
+        # Valor vencido dentro da janela stale-while-revalidate
+        key = f'benchmark:stampede:{uuid.uuid4().hex}'
+        backend.set(key, CachedValue({'computed_at': 0}, time.time() - 1, 0.05), 60)
+        computations.clear()
+        timing = _concurrent(iterations, lambda: cache_manager.get_or_set(key, slow_value, 60, backend_name))
+        results[f'{backend_name}_stale_computations'] = len(computations)
+        results[f'{backend_name}_stale_median_ms'] = timing['median_ms']
+
+    # Cache negativo: None também fica em cache
+    key = f'benchmark:stampede:{uuid.uuid4().hex}'
+    calls = []
+    for _ in range(100):
+        cache_manager.get_or_set(key, lambda: calls.append(1), 60, 'memory')
+    results['negative_computations_for_100_calls'] = len(calls)
+
+    results['single_flight_ok'] = all(
+        results[f'{name}_single_flight_computations'] == 1 and results[f'{name}_stale_computations'] == 1
+        for name in ('memory', 'django', 'tiered')
+    )
+    results.update({f'stats_{name}': value for name, value in sorted(cache_manager.get_stats().items())})
+    return results
+
+
+def _sample_calls():
+    """Chamadas de exemplo (args, kwargs) com strings, coleções e datas"""
+    return [
+        (('navegação',), {}),
+        (('artigos', 42), {'page': 2}),
+        ((('a', 'b'),), {'filters': {'status': 'published', 'tags': ['python', 'django']}}),
+        (({'categoria', 'tag', 'autor'},), {}),
+        ((datetime(2025, 1, 31, 12, 30),), {'delta': 1.5}),
+    ]
+
+
+def _legacy_key(func, args, kwargs) -> str:
+    """Chave anterior: hash() dos argumentos (aleatório por processo para strings)"""
+    key_parts = ['', func.__name__]
+    if args:
+        key_parts.append(str(hash(args)))
+    if kwargs:
+        key_parts.append(str(hash(frozenset(kwargs.items()))))
+    return hashlib.md5(":".join(key_parts).encode()).hexdigest()
+
+
+def _keys_in_this_process() -> dict:
+    """Chaves (nova e anterior) de cada chamada de exemplo; None quando a anterior falha"""
+    keys = {'stable': [], 'legacy': []}
+    for args, kwargs in _sample_calls():
+        keys['stable'].append(make_cache_key(_sample_calls, args, kwargs))
+        try:
+            keys['legacy'].append(_legacy_key(_sample_calls, args, kwargs))
+        except TypeError:
+            keys['legacy'].append(None)
+    return keys
+
+
+def _keys_in_subprocess() -> dict:
+    """Executa _keys_in_this_process num novo interpretador (outro sal de hash)"""
+    code = (
+        'import json, django; django.setup(); '
+        'from apps.common.benchmarks.cache import _keys_in_this_process; '
+        'print(json.dumps(_keys_in_this_process()))'
+    )
+    env = dict(os.environ, PYTHONHASHSEED='random')
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    output = subprocess.run(
+        [sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def cache_keys(iterations: int = 10000) -> dict:
+    """Chaves estáveis entre processos, custo de montagem e invalidação por tag em cada backend"""
+    first, second = _keys_in_subprocess(), _keys_in_subprocess()
+    results = {
+        'calls': len(_sample_calls()),
+        'stable_keys_match_across_processes': first['stable'] == second['stable'],
+        'legacy_keys_match_across_processes': first['legacy'] == second['legacy'],
+        'legacy_unhashable_calls': sum(1 for key in first['legacy'] if key is None),
+    }
+
+    args, kwargs = _sample_calls()[2]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        make_cache_key(_sample_calls, args, kwargs)
+    results['make_cache_key_us'] = (time.perf_counter() - start) / iterations * 1e6
+
+    calls = []
+    for backend_name in ('memory', 'django', 'tiered'):
+        prefix = f'benchmark:{uuid.uuid4().hex}'
+
+        @cache_result(timeout=60, key_prefix=prefix, backend_name=backend_name, tags=['article:{0}'])
+        def article_summary(article_id):
+            calls.append(article_id)
+            return {'id': article_id}
+
+        calls.clear()
+        article_summary(42), article_summary(42), article_summary(7)
+        cache_manager.invalidate_tags('article:42', backend_name=backend_name)
+        article_summary(42), article_summary(7)
+        # 42 calculado de novo após a invalidação; 7 continua em cache
+        results[f'{backend_name}_tag_invalidation_ok'] = calls == [42, 7, 42]
+    return results
@@ -0,0 +1,76 @@
+"""
+Benchmark do envio de emails contra um servidor SMTP local (apps.accounts.tests.smtp_server).
+
+O servidor aceita qualquer mensagem, recusa destinatários com ``recusado`` no
+endereço e espera ``handshake_ms`` por conexão, simulando o custo de TLS +
+AUTH de um servidor real. Compara uma conexão por email (comportamento
+anterior), o pool e o envio em massa com template renderizado por idioma.
+"""
+import time
+
+from django.core.mail import send_mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.services.email_service import EmailService
+from apps.accounts.services.email_transport import build_connection, email_config_loader, load_email_config, smtp_pool
+from apps.accounts.tests.smtp_server import LocalSMTPServer, smtp_config
+
+
+def email_delivery(iterations: int = 200, handshake_ms: float = 20.0) -> dict:
+    """``iterations`` emails: conexão por email x pool x envio em massa (2 idiomas, 5% recusados)"""
+    results = {'emails': iterations, 'handshake_ms': handshake_ms}
+    recipients = [f'usuario{i}@example.com' for i in range(iterations)]
+
+    # Carregar a configuração: a cada EmailService() antes, do cache agora
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(iterations):
+            load_email_config()
+    results['config_queries_uncached'] = len(queries)
+    email_config_loader.invalidate()
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(iterations):
+            EmailService().config
+    results['config_queries_cached'] = len(queries)
+
+    with LocalSMTPServer(handshake_ms) as server:
+        config = smtp_config(server.port)
+
+        start = time.perf_counter()
+        for recipient in recipients:
+            send_mail('Benchmark', 'Corpo', config['DEFAULT_FROM_EMAIL'], [recipient],
+                      connection=build_connection(config))
+        results['per_message_seconds'] = time.perf_counter() - start
+        results['per_message_connections'] = server.connections
+
+        service = EmailService()
+        service.config = config
+        try:
+            server.connections = 0
+            start = time.perf_counter()
+            for recipient in recipients:
+                service.send_email('Benchmark', 'Corpo', [recipient])
+            results['pooled_seconds'] = time.perf_counter() - start
+            results['pooled_connections'] = server.connections
+
+            server.connections = 0
+            bulk_recipients = [
+                (recipient.replace('@', '.recusado@') if i % 20 == 0 else recipient, 'en' if i % 2 else 'pt-br')
+                for i, recipient in enumerate(recipients)
+            ]
+            start = time.perf_counter()
+            outcomes = service.send_mass_template_email(
+                'accounts/emails/registration_confirmation.html', bulk_recipients, 'Benchmark',
+                context={'email': 'usuario@example.com', 'code': '123456', 'site_name': 'FireFlies'},
+            )
+            results['bulk_seconds'] = time.perf_counter() - start
+            results['bulk_connections'] = server.connections
+            results['bulk_sent'] = sum(1 for outcome in outcomes if outcome['sent'])
+            results['bulk_refused'] = sum(1 for outcome in outcomes if not outcome['sent'])
+        finally:
+            smtp_pool.close_all()
+
+    for name in ('per_message', 'pooled', 'bulk'):
+        seconds = results[f'{name}_seconds']
+        results[f'{name}_emails_per_s'] = iterations / seconds if seconds else 0.0
+    return results
@@ -0,0 +1,112 @@
+"""
+Benchmark do backup da mídia: make_archive + cópia + leitura x tar.gz em fluxo x incremental.
+
+Monta uma pasta de mídia sintética de ``iterations`` MB (arquivos aleatórios,
+incompressíveis como JPEG/MP4, e uma parte de texto) num diretório temporário.
+Para a pasta de vários GB do pedido original use, por exemplo,
+``--iterations 4096``; o padrão é pequeno para rodar em qualquer máquina.
+"""
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from django.test import override_settings
+
+from apps.config.services.media_backup_service import MediaBackupService
+
+FILE_SIZE = 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+
+def _build_tree(root: str, megabytes: int) -> list:
+    paths = []
+    for index in range(megabytes):
+        directory = os.path.join(root, 'uploads', f'{index // 100:03d}')
+        os.makedirs(directory, exist_ok=True)
+        if index % 10 == 0:
+            name, data = f'post_{index}.txt', (b'lorem ipsum dolor sit amet ' * (FILE_SIZE // 27 + 1))[:FILE_SIZE]
+        else:
+            name, data = f'image_{index}.jpg', os.urandom(FILE_SIZE)
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as media_file:
+            media_file.write(data)
+        paths.append(path)
+    return paths
+
+
+def _legacy(media_root: str, backup_dir: str) -> dict:
+    """O que a view fazia: make_archive num temporário, cópia para backups/media e leitura para o download"""
+    start = time.perf_counter()
+    with tempfile.NamedTemporaryFile(suffix='.tar.gz', delete=False) as tmpfile:
+        tmpfile.close()
+        tar_path = shutil.make_archive(tmpfile.name[:-7], 'gztar', media_root)
+        backup_path = os.path.join(backup_dir, 'legacy.tar.gz')
+        shutil.copy(tar_path, backup_path)
+        sent = 0
+        first_byte = time.perf_counter() - start
+        with open(tar_path, 'rb') as archive:
+            while chunk := archive.read(READ_SIZE):
+                sent += len(chunk)
+    elapsed = time.perf_counter() - start
+    for path in (tmpfile.name, tar_path, backup_path):
+        if os.path.exists(path):
+            os.remove(path)
+    # Gravações: o temporário e a cópia
+    return {'seconds': elapsed, 'first_byte_seconds': first_byte, 'sent_bytes': sent, 'written_bytes': 2 * sent}
+
+
+def _stream(service: MediaBackupService, incremental: bool = False) -> dict:
+    start = time.perf_counter()
+    name, chunks = service.stream(incremental=incremental)
+    sent = 0
+    first_byte = None
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - start
+        sent += len(chunk)
+    elapsed = time.perf_counter() - start
+    return {
+        'seconds': elapsed,
+        'first_byte_seconds': first_byte,
+        'sent_bytes': sent,
+        'written_bytes': os.path.getsize(os.path.join(service.get_backup_dir(), name)),
+        'files': len(service.load_index().get('files', {})),
+    }
+
+
+def media_backup(iterations: int = 64) -> dict:
+    """Backup de uma pasta de mídia sintética de ``iterations`` MB (10% texto, 90% incompressível)"""
+    results = {'tree_mb': iterations}
+    with tempfile.TemporaryDirectory() as base_dir:
+        media_root = os.path.join(base_dir, 'media')
+        paths = _build_tree(media_root, iterations)
+        with override_settings(BASE_DIR=Path(base_dir), MEDIA_ROOT=media_root):
+            service = MediaBackupService()
+            backup_dir = service.get_backup_dir()
+            os.makedirs(backup_dir, exist_ok=True)
+
+            for key, value in _legacy(media_root, backup_dir).items():
+                results[f'legacy_{key}'] = value
+            # Mesmo nível do make_archive (9), para comparar só o fluxo
+            with override_settings(MEDIA_BACKUP_COMPRESSLEVEL=9):
+                for key, value in _stream(service).items():
+                    results[f'stream_level9_{key}'] = value
+            for key, value in _stream(service).items():
+                results[f'stream_{key}'] = value
+
+            # 1% alterado, 1% só com mtime novo (mesmo conteúdo): entram apenas os alterados
+            step = 100
+            for path in paths[::step]:
+                with open(path, 'r+b') as media_file:
+                    media_file.write(os.urandom(16))
+            for path in paths[step // 2::step]:
+                os.utime(path)
+            for key, value in _stream(service, incremental=True).items():
+                results[f'incremental_{key}'] = value
+            results['incremental_changed_files'] = len(paths[::step])
+
+    for name in ('legacy', 'stream_level9', 'stream'):
+        results[f'{name}_mb_per_s'] = iterations / results[f'{name}_seconds'] if results[f'{name}_seconds'] else 0.0
+    return results
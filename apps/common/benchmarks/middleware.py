@@ -0,0 +1,178 @@
+"""
+Benchmarks das middlewares de módulos.
+"""
+from django.core.signals import request_finished, request_started
+from django.db.backends.signals import connection_created
+from django.template import Template
+from django.template.response import SimpleTemplateResponse
+from django.test import RequestFactory
+
+from apps.config.middleware.module_middleware import ModuleAccessMiddleware, ModuleContextMiddleware
+from apps.config.services.database_readiness_service import DatabaseReadinessService
+
+# Páginas servidas pelo app pages (módulo principal, sempre habilitado)
+CACHED_PAGE_PATHS = ['/', '/sobre/', '/contato/', '/pages/inicio/']
+
+
+class PerRequestProbe(DatabaseReadinessService):
+    """Reproduz o comportamento antigo: ensure_connection() a cada requisição"""
+
+    def is_ready(self) -> bool:
+        return self._probe()
+
+
+def _run_hits(readiness, iterations: int) -> int:
+    """Simula ``iterations`` páginas em cache e conta as conexões abertas"""
+    factory = RequestFactory()
+    template = Template('')
+
+    def get_response(request):
+        return SimpleTemplateResponse(template, {})
+
+    access = ModuleAccessMiddleware(get_response, readiness=readiness)
+    context = ModuleContextMiddleware(get_response, readiness=readiness)
+
+    opened = []
+
+    def on_connection_created(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(on_connection_created)
+    try:
+        for i in range(iterations):
+            request = factory.get(CACHED_PAGE_PATHS[i % len(CACHED_PAGE_PATHS)])
+            request_started.send(sender=__name__)
+            response = access.process_request(request) or get_response(request)
+            context.process_template_response(request, response)
+            # Fecha as conexões como no fim de uma requisição real (CONN_MAX_AGE=0)
+            request_finished.send(sender=__name__)
+    finally:
+        connection_created.disconnect(on_connection_created)
+    return len(opened)
+
+
+def module_middleware_connections(iterations: int = 1000) -> dict:
+    """Conexões abertas por ``iterations`` páginas em cache: sonda por requisição x estado memorizado"""
+    # Aquece o snapshot de módulos para que ambos os cenários meçam só a sonda
+    _run_hits(DatabaseReadinessService(), 1)
+
+    per_request = _run_hits(PerRequestProbe(), iterations)
+    memoized_readiness = DatabaseReadinessService()
+    memoized = _run_hits(memoized_readiness, iterations)
+
+    return {
+        'iterations': iterations,
+        'connections_per_request_probe': per_request,
+        'connections_memoized_readiness': memoized,
+        'readiness_probes': memoized_readiness.probe_count,
+    }
+
+
+MIXED_PATHS = [
+    '/', '/sobre/', '/contato/', '/pages/inicio/', '/pagina-dinamica/',
+    '/artigos/', '/artigos/um-artigo-qualquer/', '/artigos/categoria/django/',
+    '/accounts/login/', '/accounts/perfil/', '/accounts/configuracoes/senha/',
+    '/config/', '/config/modulos/', '/config/setup/', '/config/setup-wizard/api/finalize/',
+    '/admin/', '/admin/accounts/user/1/change/', '/static/css/main.css',
+    '/media/avatars/user.jpg', '/health/', '/favicon.ico', '/.well-known/security.txt',
+]
+
+
+def _legacy_classify(path: str) -> tuple:
+    """Classificação como era feita antes: listas recriadas e varridas a cada chamada"""
+    module_exempt_paths = [
+        '/admin/', '/static/', '/media/', '/accounts/login/', '/accounts/logout/',
+        '/accounts/register/', '/accounts/password-reset/', '/config/', '/health/',
+        '/favicon.ico', '/.well-known/',
+    ]
+    module_exempt = any(path.startswith(p) for p in module_exempt_paths)
+
+    setup_exempt_paths = [
+        '/config/wizard/', '/config/wizard-teste/', '/config/setup/api/',
+        '/config/setup-wizard/api/', '/config/setup/redirect/', '/admin/',
+        '/accounts/login/', '/accounts/logout/', '/static/', '/media/',
+    ]
+    setup_exempt = any(path.startswith(p) for p in setup_exempt_paths)
+
+    setup_paths = [
+        '/config/setup/', '/config/setup/api/', '/config/wizard/', '/config/wizard-teste/',
+        '/config/wizard-teste/api/', '/config/setup-wizard/', '/config/setup-wizard/api/',
+        '/config/setup-wizard/api/finalize/',
+    ]
+    setup_wizard = any(path.startswith(p) for p in setup_paths)
+
+    if path.startswith('/static/') or path.startswith('/media/'):
+        restricted = False
+    else:
+        restricted_patterns = ['/config/', '/admin/', '/accounts/configuracoes/', '/accounts/perfil/']
+        restricted = any(path.startswith(p) for p in restricted_patterns)
+
+    area_mappings = {
+        '/config/': {'type': 'config'},
+        '/admin/': {'type': 'admin'},
+        '/accounts/configuracoes/': {'type': 'profile'},
+        '/accounts/perfil/': {'type': 'profile'},
+    }
+    area = {'type': 'general'}
+    if path.startswith('/static/') or path.startswith('/media/'):
+        area = {'type': 'static'}
+    else:
+        for pattern, info in area_mappings.items():
+            if path.startswith(pattern):
+                area = info
+                break
+        else:
+            if path.startswith('/accounts/'):
+                area = {'type': 'profile'}
+
+    path_parts = path.strip('/').split('/')
+    url_to_app_mapping = {
+        'accounts': 'accounts', 'config': 'config', 'artigos': 'articles',
+        'blog': 'blog', 'shop': 'shop', 'forum': 'forum',
+    }
+    app_name = url_to_app_mapping.get(path_parts[0], 'pages') if path_parts[0] else 'pages'
+
+    return module_exempt, setup_exempt, setup_wizard, restricted, area['type'], app_name
+
+
+def path_classification(iterations: int = 10000) -> dict:
+    """Classificação de ``iterations`` caminhos mistos: varredura linear x trie compilada"""
+    import time
+    from apps.config.middleware.path_classifier import get_path_classifier
+
+    paths = [MIXED_PATHS[i % len(MIXED_PATHS)] for i in range(iterations)]
+    classifier = get_path_classifier()
+
+    mismatches = 0
+    for path in MIXED_PATHS:
+        c = classifier.classify(path)
+        current = (c.module_exempt, c.setup_exempt, c.setup_wizard, c.restricted,
+                   c.area_info['type'], c.app_name)
+        if current != _legacy_classify(path):
+            mismatches += 1
+
+    start = time.perf_counter()
+    for path in paths:
+        _legacy_classify(path)
+    legacy_seconds = time.perf_counter() - start
+
+    # Trie sem o LRU (caminhos nunca vistos, ex.: slugs novos)
+    start = time.perf_counter()
+    for path in paths:
+        classifier._classify(path)
+    trie_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for path in paths:
+        classifier.classify(path)
+    cached_seconds = time.perf_counter() - start
+
+    return {
+        'iterations': iterations,
+        'legacy_us_per_path': legacy_seconds / iterations * 1e6,
+        'trie_us_per_path': trie_seconds / iterations * 1e6,
+        'trie_cached_us_per_path': cached_seconds / iterations * 1e6,
+        'speedup_uncached': legacy_seconds / trie_seconds if trie_seconds else 0.0,
+        'speedup_cached': legacy_seconds / cached_seconds if cached_seconds else 0.0,
+        'classification_mismatches': mismatches,
+    }
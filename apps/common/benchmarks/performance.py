@@ -0,0 +1,147 @@
+"""
+Benchmark do PerformanceMonitor: lock global por chamada x buffers por thread.
+
+Mede o custo de uma função cronometrada (decorador sobre uma função vazia,
+descontada a chamada sem decorador), a vazão com várias threads e a precisão
+dos quantis do histograma contra os valores exatos.
+"""
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import wraps
+
+from core.performance import LatencyHistogram, PerformanceMonitor, PerformanceProfile
+
+
+class LegacyPerformanceMonitor:
+    """
+    Implementação anterior (lock global, datetimes e fatia da lista por chamada), para comparação.
+
+    Usa RLock: a original chamava record_metric com o Lock já adquirido em
+    stop_timer e travava na primeira chamada.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.profiles = {}
+        self.metrics = []
+        self._lock = threading.RLock()
+
+    def start_timer(self, name):
+        timer_id = f"{name}_{int(time.time() * 1000000)}"
+        with self._lock:
+            self.timers[timer_id] = {'name': name, 'start_time': time.time(), 'start_datetime': datetime.now()}
+        return timer_id
+
+    def stop_timer(self, timer_id):
+        with self._lock:
+            if timer_id not in self.timers:
+                return 0.0
+            timer_data = self.timers[timer_id]
+            elapsed_time = time.time() - timer_data['start_time']
+            name = timer_data['name']
+            if name not in self.profiles:
+                self.profiles[name] = PerformanceProfile(name=name)
+            profile = self.profiles[name]
+            profile.total_calls += 1
+            profile.total_time += elapsed_time
+            profile.min_time = min(profile.min_time, elapsed_time)
+            profile.max_time = max(profile.max_time, elapsed_time)
+            profile.avg_time = profile.total_time / profile.total_calls
+            profile.last_call = datetime.now()
+            self.record_metric(name, elapsed_time * 1000)
+            del self.timers[timer_id]
+            return elapsed_time
+
+    def record_metric(self, name, value):
+        metric = (name, value, datetime.now())
+        with self._lock:
+            self.metrics.append(metric)
+            if len(self.metrics) > 1000:
+                self.metrics = self.metrics[-1000:]
+
+
+def _legacy_decorator(monitor, name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timer_id = monitor.start_timer(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                monitor.stop_timer(timer_id)
+        return wrapper
+    return decorator
+
+
+def _decorator(monitor, name):
+    # O mesmo corpo de monitor_performance, com um monitor próprio do benchmark
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start_ns = time.perf_counter_ns()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                monitor.record_timing(name, start_ns, error)
+        return wrapper
+    return decorator
+
+
+def _noop():
+    return None
+
+
+def _per_call_us(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _threaded_seconds(func, iterations: int, threads: int) -> float:
+    def worker(_):
+        for _ in range(iterations // threads):
+            func()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, range(threads)))
+    return time.perf_counter() - start
+
+
+def performance_monitor(iterations: int = 200000, threads: int = 8) -> dict:
+    """Custo por chamada cronometrada, vazão com ``threads`` threads e erro dos quantis"""
+    bare_us = _per_call_us(_noop, iterations)
+    results = {'iterations': iterations, 'bare_call_us': bare_us}
+
+    monitors = {
+        'legacy': (LegacyPerformanceMonitor(), _legacy_decorator),
+        'buffered': (PerformanceMonitor(), _decorator),
+    }
+    for name, (monitor, decorate) in monitors.items():
+        timed = decorate(monitor, 'benchmark.noop')(_noop)
+        results[f'{name}_overhead_us'] = _per_call_us(timed, iterations) - bare_us
+        results[f'{name}_threads_seconds'] = _threaded_seconds(timed, iterations, threads)
+
+    buffered = monitors['buffered'][0]
+    results['buffered_calls_recorded'] = buffered.get_profile('benchmark.noop').total_calls
+
+    # Precisão dos quantis: durações log-normais (mediana ~100µs)
+    rng = random.Random(42)
+    durations = sorted(int(rng.lognormvariate(11.5, 1.0)) for _ in range(iterations))
+    histogram = LatencyHistogram()
+    for duration in durations:
+        histogram.add(duration)
+    quantiles = (0.5, 0.95, 0.99)
+    for q, value in zip(quantiles, histogram.quantiles(quantiles)):
+        exact = durations[max(0, math.ceil(q * len(durations)) - 1)]
+        results[f'p{int(q * 100)}_relative_error'] = abs(value - exact) / exact
+    results['histogram_buckets'] = len(histogram.counts)
+    return results
@@ -0,0 +1,107 @@
+"""
+Benchmark dos artigos relacionados: consultas por requisição x índice pré-calculado.
+"""
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.articles.services.related_articles_service import RelatedArticlesService
+
+BENCHMARK_PREFIX = 'benchmark-relacionados'
+
+
+def _measure(lookup, articles) -> dict:
+    """Tempo médio (ms) e consultas por artigo de ``lookup``"""
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for article in articles:
+            start = time.perf_counter()
+            list(lookup(article))
+            timings.append(time.perf_counter() - start)
+    return {
+        'ms_per_article': statistics.fmean(timings) * 1000,
+        'queries_per_article': len(queries) / len(articles),
+    }
+
+
+def related_articles(iterations: int = 1000, sample: int = 200) -> dict:
+    """Relacionados de ``sample`` artigos num acervo de ``iterations`` artigos"""
+    from apps.articles.models import Article, Category, RelatedArticle, Tag
+    from apps.articles.repositories.article_repository import DjangoArticleRepository
+
+    # Tudo numa transação desfeita ao final: nada do benchmark fica no banco e
+    # os sinais (rebuild ao remover tags/categorias) nunca disparam
+    with transaction.atomic():
+        rng = random.Random(42)
+        User = get_user_model()
+        author = User.objects.create(
+            username='benchmark-related-articles', email='benchmark-related-articles@example.com'
+        )
+        categories = Category.objects.bulk_create([
+            Category(name=f'Benchmark relacionados {i}', slug=f'{BENCHMARK_PREFIX}-categoria-{i}')
+            for i in range(10)
+        ])
+        tags = Tag.objects.bulk_create([
+            Tag(name=f'Benchmark relacionados {i}', slug=f'{BENCHMARK_PREFIX}-tag-{i}')
+            for i in range(60)
+        ])
+        now = timezone.now()
+        articles = Article.objects.bulk_create([
+            Article(
+                title=f'Benchmark relacionados {i}', slug=f'{BENCHMARK_PREFIX}-{i}',
+                excerpt='Benchmark', content='Benchmark', status='published', author=author,
+                category=rng.choice(categories + [None]), published_at=now,
+            )
+            for i in range(iterations)
+        ])
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article.id, tag_id=tag.id)
+            for article in articles
+            for tag in rng.sample(tags, rng.randint(1, 5))
+        ])
+
+        service = RelatedArticlesService()
+        repository = DjangoArticleRepository()
+        measured = rng.sample(articles, min(sample, len(articles)))
+        legacy = _measure(lambda article: repository._fallback_related_articles(article, 3), measured)
+
+        # Só as listas dos artigos do benchmark (rebuild() regravaria as do banco inteiro)
+        ids = [article.id for article in articles]
+        start = time.perf_counter()
+        service.refresh(ids)
+        build_seconds = time.perf_counter() - start
+        rows = RelatedArticle.objects.filter(article_id__in=ids).count()
+
+        precomputed = _measure(lambda article: service.get_related(article, 3), measured)
+
+        # Mudança de tags de um artigo: só as listas afetadas são recalculadas
+        # (tabela intermediária direto, sem o sinal m2m_changed, para medir só o refresh)
+        changed = measured[0]
+        Article.tags.through.objects.filter(article_id=changed.id).delete()
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=changed.id, tag_id=tag.id) for tag in rng.sample(tags, 3)
+        ])
+        start = time.perf_counter()
+        lists_changed = service.refresh([changed.id])
+        refresh_seconds = time.perf_counter() - start
+
+        results = {
+            'articles': iterations,
+            'sample': len(measured),
+            'legacy_ms_per_article': legacy['ms_per_article'],
+            'legacy_queries_per_article': legacy['queries_per_article'],
+            'precomputed_ms_per_article': precomputed['ms_per_article'],
+            'precomputed_queries_per_article': precomputed['queries_per_article'],
+            'build_seconds': build_seconds,
+            'build_rows': rows,
+            'incremental_refresh_seconds': refresh_seconds,
+            'incremental_lists_changed': lists_changed,
+            'speedup': legacy['ms_per_article'] / precomputed['ms_per_article'],
+        }
+        transaction.set_rollback(True)
+    return results
@@ -0,0 +1,145 @@
+"""
+Benchmark da busca textual: icontains (LIKE) x índice invertido.
+
+Gera um corpus sintético de ``iterations`` artigos (vocabulário com
+distribuição de Zipf) e compara a varredura com LIKE usada antes com os
+backends SQLite FTS5 e em memória (BM25). Execute com 10000 e 100000.
+"""
+import random
+import statistics
+import time
+
+from django.db import connection
+
+from core.search import InMemorySearchBackend, SQLiteFTS5SearchBackend, SearchIndex
+from core.search.analysis import analyze, unique_terms
+
+SEED_WORDS = [
+    'programação', 'django', 'python', 'desenvolvimento', 'aplicação', 'banco', 'dados',
+    'servidor', 'usuário', 'segurança', 'desempenho', 'cache', 'consulta', 'índice',
+    'artigo', 'página', 'conteúdo', 'publicação', 'comentário', 'categoria', 'imagem',
+    'configuração', 'módulo', 'sistema', 'interface', 'projeto', 'equipe', 'código',
+    'teste', 'produção', 'migração', 'modelo', 'formulário', 'template', 'rotas',
+]
+SYLLABLES = ['ba', 'ca', 'de', 'fi', 'go', 'la', 'me', 'ni', 'po', 'ra', 'se', 'ti', 'vo', 'xu', 'ção', 'ões']
+
+QUERIES = [
+    'programação django', 'desempenho do banco de dados', 'segurança', 'cache de consultas',
+    'migração', 'formulários', 'imagens e categorias', 'servidor de produção',
+]
+
+
+class BenchmarkSearchIndex(SearchIndex):
+    name = 'benchmark_articles'
+    fields = {'title': 3.0, 'excerpt': 2.0, 'meta_keywords': 2.0, 'content': 1.0}
+
+
+def _vocabulary(rng: random.Random, size: int = 4000) -> list:
+    words = list(SEED_WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return words
+
+
+def _corpus(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    words = _vocabulary(rng)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+
+    def text(length):
+        return ' '.join(rng.choices(words, weights=weights, k=length))
+
+    for doc_id in range(1, count + 1):
+        yield doc_id, {
+            'title': text(6),
+            'excerpt': text(20),
+            'meta_keywords': text(5),
+            'content': text(80),
+        }
+
+
+def _rare_queries() -> list:
+    """Termos menos frequentes do vocabulário sintético (posições 200 a 3500)"""
+    words = _vocabulary(random.Random(42))
+    return [words[rank] for rank in (200, 800, 2000, 3500)]
+
+
+def _time_queries(run, queries: list, repeat: int = 3) -> float:
+    """Média em ms por consulta"""
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            timings.append(time.perf_counter() - start)
+    return statistics.fmean(timings) * 1000
+
+
+def search_engine(iterations: int = 10000) -> dict:
+    """Consultas em ``iterations`` artigos: LIKE x SQLite FTS5 x BM25 em memória"""
+    index = BenchmarkSearchIndex()
+    documents = list(_corpus(iterations))
+
+    start = time.perf_counter()
+    analyzed = [(doc_id, {field: analyze(text) for field, text in doc.items()}) for doc_id, doc in documents]
+    analyze_seconds = time.perf_counter() - start
+
+    results = {'documents': iterations, 'analyze_seconds': analyze_seconds}
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'CREATE TEMP TABLE benchmark_like (id INTEGER PRIMARY KEY, title TEXT, '
+            'excerpt TEXT, meta_keywords TEXT, content TEXT)'
+        )
+        cursor.executemany(
+            'INSERT INTO benchmark_like (id, title, excerpt, meta_keywords, content) VALUES (%s, %s, %s, %s, %s)',
+            [(doc_id, d['title'], d['excerpt'], d['meta_keywords'], d['content']) for doc_id, d in documents],
+        )
+
+    def like_query(query):
+        # Como o icontains anterior: a frase inteira em cada coluna
+        pattern = f'%{query}%'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT id FROM benchmark_like WHERE title LIKE %s OR excerpt LIKE %s '
+                'OR meta_keywords LIKE %s OR content LIKE %s ORDER BY id DESC',
+                [pattern] * 4,
+            )
+            return cursor.fetchall()
+
+    limit = 500
+    fts5 = SQLiteFTS5SearchBackend()
+    memory = InMemorySearchBackend()
+    scenarios = {'common': QUERIES, 'rare': _rare_queries()}
+    try:
+        for scenario, queries in scenarios.items():
+            results[f'like_{scenario}_ms_per_query'] = _time_queries(like_query, queries)
+
+        if fts5.is_available():
+            start = time.perf_counter()
+            fts5.rebuild(index, analyzed)
+            results['fts5_build_seconds'] = time.perf_counter() - start
+            for scenario, queries in scenarios.items():
+                results[f'fts5_{scenario}_ms_per_query'] = _time_queries(
+                    lambda query: fts5.search(index, unique_terms(analyze(query)), limit), queries
+                )
+
+        start = time.perf_counter()
+        memory.rebuild(index, analyzed)
+        results['memory_build_seconds'] = time.perf_counter() - start
+        for scenario, queries in scenarios.items():
+            results[f'memory_{scenario}_ms_per_query'] = _time_queries(
+                lambda query: memory.search(index, unique_terms(analyze(query)), limit), queries
+            )
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE IF EXISTS temp.benchmark_like')
+        fts5.drop(index)
+        memory.drop(index)
+
+    for backend in ('fts5', 'memory'):
+        for scenario in scenarios:
+            key = f'{backend}_{scenario}_ms_per_query'
+            if results.get(key):
+                results[f'{backend}_{scenario}_speedup'] = results[f'like_{scenario}_ms_per_query'] / results[key]
+    return results
@@ -0,0 +1,65 @@
+"""
+Benchmark da inicialização: ServiceFactory preguiçosa x importação antecipada.
+
+Cada medição roda num interpretador novo com ``python -X importtime`` e soma
+o tempo próprio de cada módulo importado. O modo antecipado reproduz a
+factory anterior: importa todas as implementações registradas e instancia
+todos os repositórios assim que o módulo é carregado.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+
+SETUP = 'import django; django.setup(); '
+
+SCENARIOS = {
+    'lazy': SETUP + 'import core.factories',
+    'eager': SETUP + (
+        'import core.factories as f; '
+        '[f.service_factory.get_service_class(name) for name in f.SERVICE_REGISTRY]; '
+        '[f.service_factory.get_repository(name) for name in f.REPOSITORY_REGISTRY]'
+    ),
+}
+
+
+def _importtime(args: list) -> dict:
+    """Módulos importados, soma dos tempos próprios (ms) e tempo total do processo (ms)"""
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args], env=env, capture_output=True, text=True,
+        cwd=settings.BASE_DIR, check=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules = 0
+    self_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        modules += 1
+        self_us += int(line.split('|')[0].split(':')[1])
+    return {'modules': modules, 'import_ms': self_us / 1000, 'wall_ms': wall_ms}
+
+
+def _median(runs: list) -> dict:
+    return {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+
+
+def service_factory_startup(iterations: int = 3) -> dict:
+    """Importação de core.factories (preguiçosa x antecipada) e ``manage.py check``, mediana de ``iterations`` processos"""
+    results = {'runs': iterations}
+    for name, code in SCENARIOS.items():
+        for key, value in _median([_importtime(['-c', code]) for _ in range(iterations)]).items():
+            results[f'{name}_{key}'] = value
+    results['modules_avoided'] = results['eager_modules'] - results['lazy_modules']
+    results['import_ms_saved'] = results['eager_import_ms'] - results['lazy_import_ms']
+
+    manage = str(settings.BASE_DIR / 'manage.py')
+    for key, value in _median([_importtime([manage, 'check']) for _ in range(iterations)]).items():
+        results[f'check_{key}'] = value
+    return results
@@ -0,0 +1,82 @@
+"""
+Benchmark do contador de visualizações sob acessos concorrentes a um mesmo slug.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+
+from core.view_counter import ViewCountBuffer
+
+BENCHMARK_SLUG = 'benchmark-contador-de-visualizacoes'
+
+
+def _hammer(hit, iterations: int, threads: int) -> dict:
+    """Dispara ``iterations`` acessos em ``threads`` threads e mede o tempo"""
+    chunks = [iterations // threads + (1 if i < iterations % threads else 0) for i in range(threads)]
+    errors = []
+
+    def worker(count):
+        try:
+            for _ in range(count):
+                try:
+                    hit()
+                except Exception as e:
+                    errors.append(e)
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(worker, chunks))
+    return {'seconds': time.perf_counter() - start, 'errors': len(errors)}
+
+
+def article_view_counter(iterations: int = 1000, threads: int = 8) -> dict:
+    """UPDATE por acesso x buffer com gravação em lote, ``threads`` acessando o mesmo artigo"""
+    from apps.articles.models import Article
+
+    User = get_user_model()
+    author = User.objects.create(
+        username='benchmark-view-counter', email='benchmark-view-counter@example.com'
+    )
+    article = Article.objects.create(
+        title='Benchmark do contador de visualizações', slug=BENCHMARK_SLUG,
+        excerpt='Benchmark', content='Benchmark', status='published', author=author,
+    )
+    try:
+        def direct_update():
+            Article.objects.filter(id=article.id).update(view_count=F('view_count') + 1)
+
+        direct = _hammer(direct_update, iterations, threads)
+        after_direct = Article.objects.values_list('view_count', flat=True).get(id=article.id)
+
+        buffer = ViewCountBuffer(flush_interval=0.1)
+
+        def buffered_hit():
+            buffer.increment(Article, article.id)
+            # O que o sinal request_finished faz ao fim de cada requisição
+            buffer.maybe_flush()
+
+        buffered = _hammer(buffered_hit, iterations, threads)
+        buffer.flush()
+        after_buffered = Article.objects.values_list('view_count', flat=True).get(id=article.id)
+
+        return {
+            'iterations': iterations,
+            'threads': threads,
+            'direct_seconds': direct['seconds'],
+            'direct_update_queries': iterations,
+            'direct_errors': direct['errors'],
+            'direct_counted': after_direct,
+            'buffered_seconds': buffered['seconds'],
+            'buffered_update_queries': buffer.update_queries,
+            'buffered_errors': buffered['errors'],
+            'buffered_counted': after_buffered - after_direct,
+            'speedup': direct['seconds'] / buffered['seconds'] if buffered['seconds'] else 0.0,
+        }
+    finally:
+        article.delete()
+        author.delete()
@@ -0,0 +1,75 @@
+"""
+Gera WebP e variantes por largura das imagens já enviadas (artigos e avatares)
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.articles.models import Article
+from core.images import build_derivatives, image_derivatives
+
+SOURCES = {
+    'articles': lambda: Article.objects.exclude(featured_image='').values_list('featured_image', flat=True),
+    'avatars': lambda: get_user_model().objects.exclude(avatar='').exclude(avatar__isnull=True).values_list('avatar', flat=True),
+}
+
+
+class Command(BaseCommand):
+    help = 'Gera os derivados (WebP e variantes por largura) das imagens existentes em paralelo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=sorted(SOURCES), action='append',
+                            help='Apenas estas origens (padrão: todas)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Processos em paralelo (padrão: número de CPUs)')
+        parser.add_argument('--force', action='store_true', help='Regera mesmo os derivados atualizados')
+        parser.add_argument('--dry-run', action='store_true', help='Só lista as imagens pendentes')
+
+    def handle(self, *args, **options):
+        location = image_derivatives.get_location()
+        if location is None:
+            raise CommandError('O storage padrão não é local: derivados não suportados')
+
+        names = set()
+        for source in options['source'] or sorted(SOURCES):
+            names.update(name for name in SOURCES[source]() if name)
+        missing = sorted(name for name in names if not os.path.isfile(os.path.join(location, name)))
+        pending = sorted(
+            name for name in names - set(missing)
+            if options['force'] or not image_derivatives.is_current(name)
+        )
+        self.stdout.write(f'{len(names)} imagem(ns), {len(pending)} pendente(s), {len(missing)} sem arquivo')
+        if options['dry_run'] or not pending:
+            for name in pending:
+                self.stdout.write(f'  {name}')
+            return
+
+        widths = image_derivatives.get_widths()
+        quality = image_derivatives.get_quality()
+        entries = {}
+        failed = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            futures = {
+                executor.submit(build_derivatives, name, location, widths, quality): name
+                for name in pending
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    entries[name] = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'  {name}: {e}')
+        # Uma única gravação do manifesto para todo o lote
+        image_derivatives.manifest.update(entries)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'  {len(entries)} imagem(ns) processada(s) em {elapsed:.1f}s com {options["workers"]} processo(s)'
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'  {failed} falha(s)'))
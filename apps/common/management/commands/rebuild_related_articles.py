@@ -0,0 +1,20 @@
+"""
+Recalcula o índice de artigos relacionados
+"""
+from django.core.management.base import BaseCommand
+
+from apps.articles.services.related_articles_service import related_articles_service
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os artigos relacionados pré-calculados de todos os artigos publicados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Vizinhos guardados por artigo (padrão: RELATED_ARTICLES_LIMIT)')
+
+    def handle(self, *args, **options):
+        if options['limit']:
+            related_articles_service.limit = options['limit']
+        self.stdout.write(f'Vizinhos por artigo: {related_articles_service.get_limit()}')
+        rows = related_articles_service.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'  {rows} vizinho(s) gravado(s)'))
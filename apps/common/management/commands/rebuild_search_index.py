@@ -0,0 +1,25 @@
+"""
+Reconstrói os índices de busca textual (artigos, páginas)
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import search_engine
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói os índices de busca a partir do banco de dados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('indexes', nargs='*', help='Índices a reconstruir (padrão: todos)')
+
+    def handle(self, *args, **options):
+        names = options['indexes'] or [index.name for index in search_engine.get_indexes()]
+        backend = type(search_engine.backend).__name__
+        self.stdout.write(f'Backend de busca: {backend}')
+
+        for name in names:
+            try:
+                counts = search_engine.rebuild(name)
+            except KeyError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(f'  {name}: {counts[name]} documento(s) indexado(s)'))
@@ -0,0 +1,34 @@
+"""
+Executa um cenário de benchmark registrado em apps.common.benchmarks
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.benchmarks import BENCHMARKS, get_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Executa benchmarks de desempenho (use --list para ver os cenários)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', nargs='?', help='Nome do cenário de benchmark')
+        parser.add_argument('--iterations', type=int, default=1000, help='Número de iterações do cenário.')
+        parser.add_argument('--list', action='store_true', help='Lista os cenários disponíveis.')
+
+    def handle(self, *args, **options):
+        if options['list'] or not options['name']:
+            self.stdout.write('Cenários disponíveis:')
+            for name in sorted(BENCHMARKS):
+                self.stdout.write(f'  - {name}')
+            return
+
+        try:
+            benchmark = get_benchmark(options['name'])
+        except KeyError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f"Executando benchmark: {options['name']}"))
+        results = benchmark(iterations=options['iterations'])
+        for key, value in results.items():
+            if isinstance(value, float):
+                value = f'{value:.4f}'
+            self.stdout.write(f'  {key}: {value}')
@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from apps.config.models import SystemConfiguration, UserActivityLog, DatabaseConfiguration, AppModuleConfiguration
+from apps.config.models import SystemConfiguration, UserActivityLog, DatabaseConfiguration, AppModuleConfiguration, BackupJob
 from apps.config.models.user_activity_log import UserActivityLog
 
 User = get_user_model()
@@ -62,6 +62,26 @@ class UserActivityLogAdmin(admin.ModelAdmin):
         return request.user.is_superuser
 
 
+@admin.register(BackupJob)
+class BackupJobAdmin(admin.ModelAdmin):
+    """Admin para jobs de backup (criados pela página de backup, executados pelo backup_worker)"""
+    list_display = ('id', 'kind', 'status', 'progress', 'message', 'output_file', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status', 'created_at')
+    readonly_fields = (
+        'kind', 'status', 'progress', 'message', 'input_file', 'output_file', 'error', 'worker',
+        'requested_by', 'created_at', 'started_at', 'finished_at', 'heartbeat_at'
+    )
+    ordering = ('-created_at',)
+
+    def has_add_permission(self, request):
+        """Jobs são criados pela página de backup"""
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        """Não permite editar jobs"""
+        return False
+
+
 @admin.register(DatabaseConfiguration)
 class DatabaseConfigurationAdmin(admin.ModelAdmin):
     """Admin para configurações de banco de dados"""
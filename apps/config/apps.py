@@ -8,5 +8,8 @@ class ConfigConfig(AppConfig):
     verbose_name = "Configurações e Administração"
 
     def ready(self):
-        """Importa signals quando o app estiver pronto"""
+        """Importa signals e liga a instrumentação de métricas quando o app estiver pronto"""
         import apps.config.signals
+        # Receptores de conexão/requisição já na inicialização do worker, não no
+        # primeiro import do URLconf (a primeira requisição também é medida)
+        import core.metrics  # noqa: F401
@@ -267,6 +267,33 @@ class IModuleService(ABC):
         """
         pass
     
+    @abstractmethod
+    def get_module_state(self, app_name: str) -> Optional[Any]:
+        """
+        Retorna o estado do módulo a partir do snapshot em memória (sem query)
+        :param app_name: Nome do app
+        :return: Estado do módulo ou None
+        """
+        pass
+    
+    @abstractmethod
+    async def aget_module_state(self, app_name: str) -> Optional[Any]:
+        """
+        Versão assíncrona de get_module_state
+        :param app_name: Nome do app
+        :return: Estado do módulo ou None
+        """
+        pass
+    
+    @abstractmethod
+    async def ais_module_enabled(self, app_name: str) -> bool:
+        """
+        Versão assíncrona de is_module_enabled
+        :param app_name: Nome do app
+        :return: True se habilitado
+        """
+        pass
+    
     @abstractmethod
     def is_core_module(self, app_name: str) -> bool:
         """
@@ -0,0 +1,50 @@
+"""
+Worker dos jobs de backup/restauração do banco enfileirados pela área de configuração
+"""
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.config.services.backup_job_service import backup_job_service
+
+
+class Command(BaseCommand):
+    help = 'Executa os jobs de backup e restauração do banco (pg_dump/pg_restore ou backup online do SQLite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Processa a fila atual e sai')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Segundos entre consultas à fila vazia (padrão: 2)')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # SIGTERM (systemd, docker stop): termina o job em andamento antes de sair
+        signal.signal(signal.SIGTERM, self._stop)
+        worker = backup_job_service.worker_name()
+        self.stdout.write(f'Worker de backup {worker} aguardando jobs')
+
+        while not self.stopping:
+            close_old_connections()
+            stale = backup_job_service.fail_stale()
+            if stale:
+                self.stdout.write(self.style.WARNING(f'  {stale} job(s) sem sinal do worker marcados como falhos'))
+            job = backup_job_service.claim_next(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+                continue
+
+            self.stdout.write(f'  {job}: iniciado')
+            start = time.perf_counter()
+            job = backup_job_service.run(job)
+            elapsed = time.perf_counter() - start
+            if job.error:
+                self.stderr.write(f'  {job}: {job.error}')
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  {job}: {job.output_file} em {elapsed:.1f}s'))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
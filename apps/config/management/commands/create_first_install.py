@@ -63,6 +63,10 @@ class Command(BaseCommand):
         self.stdout.write('3. Crie o usuário administrador')
         self.stdout.write('4. Configure o sistema de email')
         self.stdout.write('5. Finalize a configuração')
+        self.stdout.write(
+            '⚠️ Processos já em execução memorizam o estado "instalado": '
+            'reinicie o servidor para que o wizard seja ativado.'
+        )
         
         self.stdout.write('\n💡 Para remover o modo primeira instalação:')
         self.stdout.write('   python manage.py create_first_install --remove') 
\ No newline at end of file
@@ -2,9 +2,10 @@ from django.http import HttpResponseRedirect
 from django.urls import reverse
 from django.contrib import messages
 from django.utils.deprecation import MiddlewareMixin
-from django.conf import settings
-from pathlib import Path
 from apps.config.services.module_service import ModuleService
+from apps.config.services.install_state_service import install_state
+from apps.config.services.database_readiness_service import DatabaseReadinessService, database_readiness
+from apps.config.middleware.path_classifier import classify_request, get_path_classifier
 from apps.config.interfaces.middleware import IModuleAccessMiddleware, IModuleContextMiddleware, IModuleService
 import logging
 
@@ -14,150 +15,124 @@ logger = logging.getLogger(__name__)
 class ModuleAccessMiddleware(MiddlewareMixin, IModuleAccessMiddleware):
     """Middleware para controlar acesso aos módulos baseado na configuração"""
     
-    def __init__(self, get_response, module_service: IModuleService = None):
+    def __init__(self, get_response, module_service: IModuleService = None,
+                 readiness: DatabaseReadinessService = None):
         self.get_response = get_response
         # Injeção de dependência - usa service fornecido ou cria padrão
         self.module_service = module_service or ModuleService()
+        self.database_readiness = readiness or database_readiness
         super().__init__(get_response)
     
     def process_request(self, request):
         """Processa a requisição para verificar acesso ao módulo"""
-
-        # Verificar se é primeira instalação - se for, não verificar módulos
-        if self.is_first_installation():
+        app_name = self.get_checked_app_name(request)
+        if not app_name:
             return None
 
-        # URLs que sempre devem ser acessíveis
-        exempt_paths = [
-            '/admin/',
-            '/static/',
-            '/media/',
-            '/accounts/login/',
-            '/accounts/logout/',
-            '/accounts/register/',
-            '/accounts/password-reset/',
-            '/config/',  # Todo o painel de configuração
-            '/health/',
-            '/favicon.ico',
-            '/.well-known/',
-        ]
-
-        # Verifica se a URL está na lista de exceções
-        if self.is_path_exempt(request.path, exempt_paths):
+        # Verificar se o banco de dados está configurado antes de tentar acessá-lo
+        if not self.database_readiness.is_ready():
+            # Se não conseguir conectar ao banco, não verificar módulos
             return None
 
-        # Verificar se o banco de dados está configurado antes de tentar acessá-lo
+        # Verifica se o módulo está habilitado
         try:
-            from django.db import connection
-            connection.ensure_connection()
-        except Exception:
-            # Se não conseguir conectar ao banco, não verificar módulos
+            if not self.module_service.is_module_enabled(app_name):
+                module = self.module_service.get_module_state(app_name)
+                return self.handle_disabled_module(request, app_name, module)
+        except Exception as e:
+            # Se houver qualquer erro ao verificar módulos, permite acesso
+            logger.warning(f"Erro ao verificar módulo {app_name}: {str(e)}")
             return None
 
-        # Extrai o nome do app da URL
-        app_name = self.extract_app_name(request.path)
+        return None
 
-        # Se não conseguir identificar o app, permite acesso
+    async def aprocess_request(self, request):
+        """Versão assíncrona de process_request (snapshot e prontidão sem troca de thread)"""
+        app_name = self.get_checked_app_name(request)
         if not app_name:
             return None
 
-        # Verifica se o módulo está habilitado
+        if not await self.database_readiness.ais_ready():
+            return None
+
         try:
-            if not self.module_service.is_module_enabled(app_name):
-                # Se for um módulo principal, algo está errado - log mas permite acesso
-                if self.module_service.is_core_module(app_name):
-                    logger.error(f"Módulo principal {app_name} está desabilitado!")
-                    return None
-
-                # Obtém informações do módulo para mensagem mais informativa
-                module = self.module_service.get_module_by_name(app_name)
-                module_display_name = module.display_name if module else app_name.title()
-
-                # Módulo desabilitado, redireciona para home com mensagem
-                messages.warning(
-                    request,
-                    f'O módulo "{module_display_name}" não está disponível no momento. '
-                    f'Entre em contato com o administrador se precisar acessar esta funcionalidade.'
-                )
-                return HttpResponseRedirect(reverse('pages:home'))
+            if not await self.module_service.ais_module_enabled(app_name):
+                module = await self.module_service.aget_module_state(app_name)
+                return self.handle_disabled_module(request, app_name, module)
         except Exception as e:
-            # Se houver qualquer erro ao verificar módulos, permite acesso
             logger.warning(f"Erro ao verificar módulo {app_name}: {str(e)}")
             return None
 
         return None
+
+    async def __acall__(self, request):
+        # Substitui o __acall__ do MiddlewareMixin, que rodaria process_request em outra thread
+        response = await self.aprocess_request(request)
+        return response or await self.get_response(request)
+
+    def get_checked_app_name(self, request):
+        """Nome do módulo a verificar, ou None se a requisição dispensa a verificação"""
+
+        # Verificar se é primeira instalação - se for, não verificar módulos
+        if self.is_first_installation():
+            return None
+
+        # Classificação compartilhada entre as middlewares (calculada uma vez por requisição)
+        classification = classify_request(request)
+
+        # Verifica se a URL está na lista de exceções
+        if classification.module_exempt:
+            return None
+
+        # Nome do app extraído da URL (se não conseguir identificar o app, permite acesso)
+        return classification.app_name or None
+
+    def handle_disabled_module(self, request, app_name: str, module=None):
+        """Redireciona para a home ao acessar um módulo desabilitado"""
+        # Se for um módulo principal, algo está errado - log mas permite acesso
+        if self.module_service.is_core_module(app_name):
+            logger.error(f"Módulo principal {app_name} está desabilitado!")
+            return None
+
+        # Obtém informações do módulo para mensagem mais informativa
+        module_display_name = module.display_name if module else app_name.title()
+
+        # Módulo desabilitado, redireciona para home com mensagem
+        messages.warning(
+            request,
+            f'O módulo "{module_display_name}" não está disponível no momento. '
+            f'Entre em contato com o administrador se precisar acessar esta funcionalidade.'
+        )
+        return HttpResponseRedirect(reverse('pages:home'))
     
     def is_first_installation(self):
         """Verifica se é primeira instalação"""
-        first_install_file = Path(settings.BASE_DIR) / '.first_install'
-        return first_install_file.exists()
+        return install_state.is_first_installation()
     
     def is_path_exempt(self, path: str, exempt_paths: list = None) -> bool:
         """Verifica se um caminho está isento de verificação"""
-        if exempt_paths is None:
-            exempt_paths = [
-                '/admin/',
-                '/static/',
-                '/media/',
-                '/accounts/login/',
-                '/accounts/logout/',
-                '/accounts/register/',
-                '/accounts/password-reset/',
-                '/config/',
-            ]
-        
-        for exempt_path in exempt_paths:
-            if path.startswith(exempt_path):
-                return True
-        return False
+        if exempt_paths is not None:
+            return any(path.startswith(exempt_path) for exempt_path in exempt_paths)
+        return get_path_classifier().classify(path).module_exempt
     
     def extract_app_name(self, path: str) -> str:
-        """Extrai o nome do app da URL"""
-        # Remove a barra inicial e divide por barras
-        path_parts = path.strip('/').split('/')
-
-        if not path_parts or path_parts[0] == '':
-            return 'pages'  # URL raiz pertence ao app pages
-
-        # Mapeia URLs para nomes de apps (usando os nomes exatos do banco de dados)
-        url_to_app_mapping = {
-            'accounts': 'accounts',  # Corrigido: sem prefixo apps.
-            'config': 'config',      # Corrigido: sem prefixo apps.
-            'artigos': 'articles',   # Corrigido: sem prefixo apps.
-            'blog': 'blog',
-            'shop': 'shop',
-            'forum': 'forum',
-        }
-
-        first_part = path_parts[0]
-
-        # Se a URL está no mapeamento, retorna o app correspondente
-        if first_part in url_to_app_mapping:
-            return url_to_app_mapping[first_part]
-
-        # URLs que pertencem ao app pages (páginas estáticas e dinâmicas)
-        pages_urls = [
-            'sobre', 'contato', 'privacidade', 'termos', 'design-demo',
-            'paginas', 'busca'
-        ]
-
-        if first_part in pages_urls:
-            return 'pages'  # Corrigido: sem prefixo apps.
-
-        # Se não está no mapeamento e não é uma URL conhecida do pages,
-        # pode ser uma página dinâmica (slug) do pages
-        # Vamos assumir que é pages por padrão para URLs não mapeadas
-        return 'pages'  # Corrigido: sem prefixo apps.
+        """Extrai o nome do app da URL (raiz e URLs não mapeadas pertencem ao app pages)"""
+        return get_path_classifier().extract_app_name(path)
 
 
 class ModuleContextMiddleware(MiddlewareMixin, IModuleContextMiddleware):
     """Middleware para adicionar contexto de módulos aos templates"""
     
-    def __init__(self, get_response, module_service: IModuleService = None):
+    def __init__(self, get_response, module_service: IModuleService = None,
+                 readiness: DatabaseReadinessService = None):
         self.get_response = get_response
         # Injeção de dependência - usa service fornecido ou cria padrão
         self.module_service = module_service or ModuleService()
+        self.database_readiness = readiness or database_readiness
         super().__init__(get_response)
+        if self.async_mode:
+            # O Django só evita a troca de thread se o hook for uma corrotina
+            self.process_template_response = self.aprocess_template_response
     
     def process_template_response(self, request, response):
         """Adiciona contexto de módulos ao template"""
@@ -166,10 +141,7 @@ class ModuleContextMiddleware(MiddlewareMixin, IModuleContextMiddleware):
             return response
         
         # Verificar se o banco de dados está configurado antes de tentar acessá-lo
-        try:
-            from django.db import connection
-            connection.ensure_connection()
-        except Exception:
+        if not self.database_readiness.is_ready():
             # Se não conseguir conectar ao banco, não adicionar contexto
             return response
             
@@ -189,10 +161,32 @@ class ModuleContextMiddleware(MiddlewareMixin, IModuleContextMiddleware):
         
         return response
     
+    async def aprocess_template_response(self, request, response):
+        """Versão assíncrona de process_template_response"""
+        if self.is_first_installation():
+            return response
+        
+        if not await self.database_readiness.ais_ready():
+            return response
+            
+        try:
+            if hasattr(response, 'context_data') and response.context_data is not None:
+                # QuerySet preguiçoso: só é avaliado na renderização, fora do event loop
+                response.context_data['available_modules'] = self.get_menu_modules()
+                
+                current_app = self.get_current_app(request)
+                if current_app:
+                    response.context_data['current_module'] = (
+                        await self.module_service.aget_module_state(current_app)
+                    )
+        except Exception as e:
+            logger.warning(f"Erro ao adicionar contexto de módulos: {str(e)}")
+        
+        return response
+    
     def is_first_installation(self):
         """Verifica se é primeira instalação"""
-        first_install_file = Path(settings.BASE_DIR) / '.first_install'
-        return first_install_file.exists()
+        return install_state.is_first_installation()
     
     def get_current_app(self, request) -> str:
         """Identifica o app atual baseado na URL"""
@@ -206,4 +200,4 @@ class ModuleContextMiddleware(MiddlewareMixin, IModuleContextMiddleware):
     
     def get_current_module(self, app_name: str):
         """Obtém informações do módulo atual"""
-        return self.module_service.get_module_by_name(app_name)
+        return self.module_service.get_module_state(app_name)
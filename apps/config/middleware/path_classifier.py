@@ -0,0 +1,285 @@
+"""
+Classificação de caminhos compartilhada pelas middlewares.
+
+As listas de prefixos (isenções de módulos, isenções do setup, wizard, áreas
+restritas e áreas de acesso) são compiladas uma única vez em uma trie de
+caracteres. Cada requisição é classificada uma vez e o resultado fica em
+``request.path_classification`` para ser reutilizado pelas demais middlewares.
+"""
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+# Isenções do controle de módulos (ModuleAccessMiddleware)
+MODULE_EXEMPT_PATHS = [
+    '/admin/',
+    '/static/',
+    '/media/',
+    '/accounts/login/',
+    '/accounts/logout/',
+    '/accounts/register/',
+    '/accounts/password-reset/',
+    '/config/',  # Todo o painel de configuração
+    '/health/',
+    '/metrics/',
+    '/favicon.ico',
+    '/.well-known/',
+]
+
+# URLs que não devem ser redirecionadas para o wizard (SetupMiddleware)
+SETUP_EXEMPT_PATHS = [
+    '/config/wizard/',
+    '/config/wizard-teste/',
+    '/config/setup/api/',
+    '/config/setup-wizard/api/',
+    '/config/setup/redirect/',
+    '/admin/',
+    '/accounts/login/',
+    '/accounts/logout/',
+    '/static/',
+    '/media/',
+    '/metrics/',
+]
+
+# URLs do wizard de setup (SmartRedirectMiddleware)
+SETUP_WIZARD_PATHS = [
+    '/config/setup/',
+    '/config/setup/api/',
+    '/config/wizard/',
+    '/config/wizard-teste/',
+    '/config/wizard-teste/api/',
+    '/config/setup-wizard/',
+    '/config/setup-wizard/api/',
+    '/config/setup-wizard/api/finalize/',
+]
+
+# Áreas restritas (SmartRedirectMiddleware)
+RESTRICTED_PATHS = [
+    '/config/',
+    '/admin/',
+    '/accounts/configuracoes/',
+    '/accounts/perfil/',
+]
+
+STATIC_AREA = {
+    'name': 'arquivos estáticos',
+    'type': 'static',
+    'description': 'recursos do sistema'
+}
+
+GENERAL_AREA = {
+    'name': 'esta área',
+    'type': 'general',
+    'description': 'área restrita'
+}
+
+# Áreas de acesso (AccessControlMiddleware); vence o prefixo mais longo
+AREA_PATHS = {
+    '/static/': STATIC_AREA,
+    '/media/': STATIC_AREA,
+    '/config/': {
+        'name': 'o Painel de Configurações',
+        'type': 'config',
+        'description': 'área administrativa do sistema'
+    },
+    '/admin/': {
+        'name': 'o Django Admin',
+        'type': 'admin',
+        'description': 'interface administrativa'
+    },
+    '/accounts/': {
+        'name': 'esta área de Conta',
+        'type': 'profile',
+        'description': 'área de usuário'
+    },
+    '/accounts/configuracoes/': {
+        'name': 'as Configurações de Conta',
+        'type': 'profile',
+        'description': 'configurações pessoais'
+    },
+    '/accounts/perfil/': {
+        'name': 'o Perfil',
+        'type': 'profile',
+        'description': 'página de perfil'
+    },
+}
+
+# Primeiro segmento da URL -> nome do módulo (complementado pelo URLconf)
+URL_TO_APP_MAPPING = {
+    'accounts': 'accounts',
+    'config': 'config',
+    'artigos': 'articles',
+    'blog': 'blog',
+    'shop': 'shop',
+    'forum': 'forum',
+}
+
+# Módulo usado para a raiz e para URLs não mapeadas (páginas dinâmicas)
+DEFAULT_APP = 'pages'
+
+# Flags da trie
+MODULE_EXEMPT = 1
+SETUP_EXEMPT = 2
+SETUP_WIZARD = 4
+RESTRICTED = 8
+
+
+class PathClassification(NamedTuple):
+    """Resultado (imutável) da classificação de um caminho"""
+    path: str
+    module_exempt: bool
+    setup_exempt: bool
+    setup_wizard: bool
+    restricted: bool
+    app_name: str
+    area_info: Dict[str, str]
+
+
+class _TrieNode:
+    __slots__ = ('children', 'flags', 'area')
+
+    def __init__(self):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.flags = 0
+        self.area: Optional[Dict[str, str]] = None
+
+
+class PathClassifier:
+    """Trie de prefixos compilada que classifica um caminho em uma única passada"""
+
+    def __init__(self,
+                 module_exempt: Iterable[str] = MODULE_EXEMPT_PATHS,
+                 setup_exempt: Iterable[str] = SETUP_EXEMPT_PATHS,
+                 setup_wizard: Iterable[str] = SETUP_WIZARD_PATHS,
+                 restricted: Iterable[str] = RESTRICTED_PATHS,
+                 areas: Dict[str, Dict[str, str]] = None,
+                 app_mapping: Dict[str, str] = None,
+                 default_app: str = DEFAULT_APP,
+                 cache_size: int = 2048):
+        self._root = _TrieNode()
+        for prefix in module_exempt:
+            self._insert(prefix).flags |= MODULE_EXEMPT
+        for prefix in setup_exempt:
+            self._insert(prefix).flags |= SETUP_EXEMPT
+        for prefix in setup_wizard:
+            self._insert(prefix).flags |= SETUP_WIZARD
+        for prefix in restricted:
+            self._insert(prefix).flags |= RESTRICTED
+        for prefix, info in (AREA_PATHS if areas is None else areas).items():
+            self._insert(prefix).area = info
+        self.app_mapping = dict(URL_TO_APP_MAPPING if app_mapping is None else app_mapping)
+        self.default_app = default_app
+        # Caminhos repetidos (home, listas, estáticos) saem de um LRU limitado
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    @classmethod
+    def from_settings(cls) -> 'PathClassifier':
+        """Monta o classificador a partir dos settings e do URLconf"""
+        static_prefixes = [
+            url for url in (getattr(settings, 'STATIC_URL', ''), getattr(settings, 'MEDIA_URL', ''))
+            if url and url.startswith('/')
+        ]
+        areas = dict(AREA_PATHS)
+        for prefix in static_prefixes:
+            areas.setdefault(prefix, STATIC_AREA)
+
+        return cls(
+            module_exempt=[*MODULE_EXEMPT_PATHS, *static_prefixes,
+                           *getattr(settings, 'MODULE_EXEMPT_PATHS', [])],
+            setup_exempt=[*SETUP_EXEMPT_PATHS, *static_prefixes],
+            areas=areas,
+            app_mapping={**URL_TO_APP_MAPPING, **get_urlconf_app_mapping()},
+        )
+
+    def _insert(self, prefix: str) -> _TrieNode:
+        node = self._root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        return node
+
+    def match(self, path: str) -> Tuple[int, Optional[Dict[str, str]]]:
+        """Retorna as flags de todos os prefixos casados e a área do prefixo mais longo"""
+        node = self._root
+        flags = node.flags
+        area = node.area
+        for char in path:
+            node = node.children.get(char)
+            if node is None:
+                break
+            flags |= node.flags
+            if node.area is not None:
+                area = node.area
+        return flags, area
+
+    def extract_app_name(self, path: str) -> str:
+        """Extrai o nome do módulo a partir do primeiro segmento da URL"""
+        first_part = path.lstrip('/').split('/', 1)[0]
+        if not first_part:
+            return self.default_app
+        return self.app_mapping.get(first_part, self.default_app)
+
+    def _classify(self, path: str) -> PathClassification:
+        """Classifica um caminho (use ``classify``, que tem cache)"""
+        flags, area = self.match(path)
+        return PathClassification(
+            path=path,
+            module_exempt=bool(flags & MODULE_EXEMPT),
+            setup_exempt=bool(flags & SETUP_EXEMPT),
+            setup_wizard=bool(flags & SETUP_WIZARD),
+            restricted=bool(flags & RESTRICTED),
+            app_name=self.extract_app_name(path),
+            area_info=area or GENERAL_AREA,
+        )
+
+
+def get_urlconf_app_mapping() -> Dict[str, str]:
+    """Mapeia o prefixo de cada include() de apps locais para o nome do app"""
+    from django.urls import URLResolver, get_resolver
+
+    mapping = {}
+    for pattern in get_resolver().url_patterns:
+        if not isinstance(pattern, URLResolver):
+            continue
+        urlconf_name = getattr(pattern.urlconf_module, '__name__', '')
+        if not urlconf_name.startswith('apps.'):
+            continue
+        prefix = str(pattern.pattern).strip('^/').split('/', 1)[0]
+        app_name = pattern.app_name or urlconf_name.split('.')[1]
+        if prefix:
+            mapping[prefix] = app_name
+    return mapping
+
+
+_classifier: Optional[PathClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_path_classifier() -> PathClassifier:
+    """Classificador global, compilado uma única vez por processo"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = PathClassifier.from_settings()
+    return _classifier
+
+
+def reset_path_classifier() -> None:
+    """Descarta o classificador compilado (ex.: após mudar settings em testes)"""
+    global _classifier
+    with _classifier_lock:
+        _classifier = None
+
+
+def classify_request(request) -> PathClassification:
+    """Classifica a requisição uma única vez e guarda o resultado nela"""
+    classification = getattr(request, 'path_classification', None)
+    if classification is None or classification.path != request.path:
+        classification = get_path_classifier().classify(request.path)
+        request.path_classification = classification
+    return classification
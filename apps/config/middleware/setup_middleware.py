@@ -2,20 +2,29 @@
 Middleware para redirecionar para setup na primeira instalação
 """
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
 from django.urls import reverse
-from django.conf import settings
-from pathlib import Path
+from apps.config.services.install_state_service import install_state
+from apps.config.middleware.path_classifier import classify_request, get_path_classifier
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 
 class SetupMiddleware:
     """
     Middleware que redireciona para o setup wizard na primeira instalação
     """
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
         # URLs que não devem ser redirecionadas
         self.exempt_urls = [
             '/config/setup/',
@@ -26,37 +35,33 @@ class SetupMiddleware:
         ]
     
     def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.setup_redirect(request)
+        return response or self.get_response(request)
+    
+    async def __acall__(self, request):
+        # Estado de instalação memorizado e classificação em memória: sem troca de thread
+        response = self.setup_redirect(request)
+        return response or await self.get_response(request)
+    
+    def setup_redirect(self, request):
+        """Retorna o redirecionamento para o wizard, ou None para seguir adiante"""
         # Verificar se é primeira instalação
         if self.is_first_installation():
             # Verificar se a URL atual não está na lista de exceções
-            if not self.is_exempt_url(request.path):
-                print(f"SetupMiddleware: Redirecting {request.path} to setup wizard")
+            if not classify_request(request).setup_exempt:
+                logger.debug(f"SetupMiddleware: {request.path} redirecionado para o setup wizard")
                 # Redirecionar para setup
                 return redirect('config:setup_wizard')
             else:
-                print(f"SetupMiddleware: Allowing {request.path} (exempt)")
-        
-        response = self.get_response(request)
-        return response
+                logger.debug(f"SetupMiddleware: {request.path} liberado (isento)")
+        return None
     
     def is_first_installation(self):
         """Verifica se é primeira instalação"""
-        first_install_file = Path(settings.BASE_DIR) / '.first_install'
-        return first_install_file.exists()
+        return install_state.is_first_installation()
     
     def is_exempt_url(self, path):
         """Verifica se a URL está na lista de exceções"""
-        # URLs que não devem ser redirecionadas para o wizard
-        exempt_urls = [
-            '/config/wizard/',
-            '/config/wizard-teste/',
-            '/config/setup/api/',
-            '/config/setup-wizard/api/',
-            '/config/setup/redirect/',
-            '/admin/',
-            '/accounts/login/',
-            '/accounts/logout/',
-            '/static/',
-            '/media/',
-        ]
-        return any(path.startswith(url) for url in exempt_urls) 
\ No newline at end of file
+        return get_path_classifier().classify(path).setup_exempt
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.2 on 2026-10-18 07:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('config', '0007_group_slug_delete_module'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackupJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('database_backup', 'Backup do banco'), ('database_restore', 'Restauração do banco')], max_length=30, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('succeeded', 'Concluído'), ('failed', 'Falhou')], default='queued', max_length=20, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Etapa atual')),
+                ('input_file', models.CharField(blank=True, help_text='Backup enviado para restauração (relativo a backups/database)', max_length=255, verbose_name='Arquivo de entrada')),
+                ('output_file', models.CharField(blank=True, help_text='Nome do backup em backups/database', max_length=255, verbose_name='Arquivo gerado')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Último sinal do worker')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='backup_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'job de backup',
+                'verbose_name_plural': 'jobs de backup',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='config_back_status_059718_idx')],
+            },
+        ),
+    ]
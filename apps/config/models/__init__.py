@@ -2,6 +2,7 @@ from .system_configuration import SystemConfiguration
 from .user_activity_log import UserActivityLog
 from .configuration_models import EmailConfiguration, DatabaseConfiguration
 from .app_module_config import AppModuleConfiguration
+from .backup_job import BackupJob
 
 __all__ = [
     'SystemConfiguration',
@@ -9,4 +10,5 @@ __all__ = [
     'EmailConfiguration',
     'DatabaseConfiguration',
     'AppModuleConfiguration',
+    'BackupJob',
 ]
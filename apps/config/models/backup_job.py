@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import models
+
+
+class BackupJob(models.Model):
+    """Job de backup/restauração do banco executado pelo worker (manage.py backup_worker)"""
+
+    KIND_DATABASE_BACKUP = 'database_backup'
+    KIND_DATABASE_RESTORE = 'database_restore'
+    KIND_CHOICES = [
+        (KIND_DATABASE_BACKUP, 'Backup do banco'),
+        (KIND_DATABASE_RESTORE, 'Restauração do banco'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Na fila'),
+        (STATUS_RUNNING, 'Em execução'),
+        (STATUS_SUCCEEDED, 'Concluído'),
+        (STATUS_FAILED, 'Falhou'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES, verbose_name='Tipo')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED, verbose_name='Status')
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')
+    message = models.CharField(max_length=255, blank=True, verbose_name='Etapa atual')
+    input_file = models.CharField(
+        max_length=255, blank=True, verbose_name='Arquivo de entrada',
+        help_text='Backup enviado para restauração (relativo a backups/database)'
+    )
+    output_file = models.CharField(
+        max_length=255, blank=True, verbose_name='Arquivo gerado',
+        help_text='Nome do backup em backups/database'
+    )
+    error = models.TextField(blank=True, verbose_name='Erro')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='Worker')
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='backup_jobs', verbose_name='Solicitado por'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Criado em')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Iniciado em')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Finalizado em')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='Último sinal do worker')
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_SUCCEEDED, self.STATUS_FAILED)
+
+    class Meta:
+        verbose_name = 'job de backup'
+        verbose_name_plural = 'jobs de backup'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
@@ -0,0 +1,478 @@
+"""
+Jobs de backup e restauração do banco fora da requisição.
+
+As views só enfileiram um BackupJob e acompanham o progresso (JSON); quem roda
+pg_dump/pg_restore ou a API de backup online do SQLite é o worker
+(``python manage.py backup_worker``). Nenhum worker do gunicorn fica preso por
+minutos nem cai no timeout do proxy.
+
+PostgreSQL: ``pg_dump -F d -j N`` (formato diretório, tabelas despejadas e
+comprimidas em paralelo), empacotado num .tar sem recomprimir.
+SQLite: ``sqlite3.Connection.backup`` (cópia consistente com o banco em uso)
+comprimida em gzip. A retenção (BACKUP_RETENTION_COUNT/DAYS) é aplicada ao
+listar os backups e ao fim de cada job.
+"""
+import collections
+import datetime
+import gzip
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import tarfile
+import tempfile
+import threading
+import time
+from typing import Callable, List, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, connection, connections, transaction
+from django.db.models import Exists
+from django.utils import timezone
+
+from apps.config.models import BackupJob
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+BACKUP_EXTENSIONS = ('.backup', '.tar', '.gz', '.zip')
+CHUNK_SIZE = 1024 * 1024
+# Chave da trava consultiva (pg_advisory_xact_lock) que serializa as reservas no PostgreSQL
+CLAIM_LOCK_ID = 0x6261636b
+
+
+def get_backup_dir(backup_type: str) -> str:
+    return os.path.join(settings.BASE_DIR, 'backups', backup_type)
+
+
+def apply_retention(backup_type: str) -> List[str]:
+    """
+    Remove os backups além dos BACKUP_RETENTION_COUNT mais recentes e, com
+    BACKUP_RETENTION_DAYS > 0, os mais antigos que isso (o mais recente nunca).
+
+    Um backup que é base (manifesto <arquivo>.json) de outro mantido também é
+    mantido: a cadeia de incrementais da mídia continua restaurável.
+    Retorna os nomes removidos.
+    """
+    backup_dir = get_backup_dir(backup_type)
+    keep_count = getattr(settings, 'BACKUP_RETENTION_COUNT', 10)
+    keep_days = getattr(settings, 'BACKUP_RETENTION_DAYS', 0)
+    if not os.path.isdir(backup_dir) or keep_count <= 0:
+        return []
+    files = []
+    for name in os.listdir(backup_dir):
+        path = os.path.join(backup_dir, name)
+        if name.endswith(BACKUP_EXTENSIONS) and os.path.isfile(path):
+            files.append((os.path.getmtime(path), name))
+    files.sort(reverse=True)
+
+    cutoff = time.time() - keep_days * 86400 if keep_days > 0 else None
+    keep = {
+        name for index, (mtime, name) in enumerate(files)
+        if index == 0 or (index < keep_count and (cutoff is None or mtime >= cutoff))
+    }
+    pending = list(keep)
+    while pending:
+        try:
+            with open(os.path.join(backup_dir, f"{pending.pop()}.json"), encoding='utf-8') as manifest_file:
+                base = json.load(manifest_file).get('base')
+        except (OSError, ValueError):
+            continue
+        if base and base not in keep:
+            keep.add(base)
+            pending.append(base)
+
+    removed = []
+    for _, name in files:
+        if name in keep:
+            continue
+        for path in (os.path.join(backup_dir, name), os.path.join(backup_dir, f"{name}.json")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        removed.append(name)
+    if removed:
+        logger.info(f"Retenção de backups ({backup_type}): {len(removed)} arquivo(s) removido(s)")
+    return removed
+
+
+class BackupJobFailed(Exception):
+    """Falha de pg_dump/pg_restore/SQLite durante um job (mensagem exibida ao usuário)"""
+
+
+class _Heartbeat(threading.Thread):
+    """Atualiza heartbeat_at do job enquanto ele roda (pg_dump pode ficar minutos calado numa tabela)"""
+
+    def __init__(self, job_id: int, interval: float):
+        super().__init__(name=f'backup-heartbeat-{job_id}', daemon=True)
+        self.job_id = job_id
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    BackupJob.objects.filter(pk=self.job_id, status=BackupJob.STATUS_RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except Exception as e:
+                    # SQLite travado pela cópia/restauração: tenta de novo no próximo intervalo
+                    logger.warning(f"Heartbeat do job de backup {self.job_id}: {e}")
+        finally:
+            connection.close()
+
+
+class BackupJobService:
+    """Enfileira, executa e acompanha os jobs de backup/restauração do banco"""
+
+    progress_interval = 1.0
+
+    def get_dump_jobs(self) -> int:
+        return max(1, getattr(settings, 'BACKUP_DUMP_JOBS', 2))
+
+    def get_compress_level(self) -> int:
+        return getattr(settings, 'BACKUP_DUMP_COMPRESSLEVEL', 6)
+
+    def get_stale_seconds(self) -> int:
+        return getattr(settings, 'BACKUP_JOB_STALE_SECONDS', 600)
+
+    # ------------------------------------------------------------------
+    # Fila (chamado pelas views)
+    # ------------------------------------------------------------------
+
+    def enqueue_backup(self, user=None) -> BackupJob:
+        return BackupJob.objects.create(kind=BackupJob.KIND_DATABASE_BACKUP, requested_by=user, message='Na fila')
+
+    def enqueue_restore(self, uploaded_file, user=None) -> BackupJob:
+        """Grava o upload em backups/database/uploads (em blocos) e enfileira a restauração"""
+        upload_dir = os.path.join(get_backup_dir('database'), 'uploads')
+        os.makedirs(upload_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        name = f"{timestamp}_{os.path.basename(uploaded_file.name)}"
+        with open(os.path.join(upload_dir, name), 'wb') as target:
+            for chunk in uploaded_file.chunks():
+                target.write(chunk)
+        return BackupJob.objects.create(
+            kind=BackupJob.KIND_DATABASE_RESTORE, requested_by=user,
+            input_file=os.path.join('uploads', name), message='Na fila'
+        )
+
+    def status(self, job: BackupJob) -> dict:
+        """Estado do job para o polling da view"""
+        return {
+            'id': job.pk,
+            'kind': job.kind,
+            'kind_display': job.get_kind_display(),
+            'status': job.status,
+            'status_display': job.get_status_display(),
+            'progress': job.progress,
+            'message': job.message,
+            'output_file': job.output_file,
+            'error': job.error,
+            'finished': job.is_finished,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def worker_name(self) -> str:
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def fail_stale(self) -> int:
+        """Marca como falhos os jobs cujo worker parou de dar sinal (processo morto, máquina reiniciada)"""
+        cutoff = timezone.now() - datetime.timedelta(seconds=self.get_stale_seconds())
+        return BackupJob.objects.filter(status=BackupJob.STATUS_RUNNING, heartbeat_at__lt=cutoff).update(
+            status=BackupJob.STATUS_FAILED, finished_at=timezone.now(),
+            error='O worker parou de responder durante o job', message='Interrompido'
+        )
+
+    def claim_next(self, worker: Optional[str] = None) -> Optional[BackupJob]:
+        """
+        Reserva o job mais antigo da fila.
+
+        A reserva é um único UPDATE condicionado a o job ainda estar na fila e
+        a nenhum outro estar em execução: de dois workers, só um leva um job.
+        Um job por vez no sistema todo: backup e restauração simultâneos do
+        mesmo banco não fazem sentido.
+
+        No SQLite o UPDATE já toma a trava de escrita do banco antes de ler. No
+        PostgreSQL o NOT EXISTS lê o snapshot do comando, e dois workers
+        reservando jobs diferentes não se veriam: a trava consultiva da
+        transação serializa as reservas.
+        """
+        worker = worker or self.worker_name()
+        job_id = BackupJob.objects.filter(status=BackupJob.STATUS_QUEUED).order_by('created_at').values_list(
+            'pk', flat=True
+        ).first()
+        if job_id is None:
+            return None
+        running = BackupJob.objects.filter(status=BackupJob.STATUS_RUNNING)
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_xact_lock(%s)', [CLAIM_LOCK_ID])
+            now = timezone.now()
+            claimed = BackupJob.objects.filter(pk=job_id, status=BackupJob.STATUS_QUEUED).filter(
+                ~Exists(running)
+            ).update(
+                status=BackupJob.STATUS_RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+                message='Iniciando'
+            )
+        # Perdeu a corrida (outro worker levou este job ou outro já roda): tenta na próxima volta
+        return BackupJob.objects.get(pk=job_id) if claimed else None
+
+    def run(self, job: BackupJob) -> BackupJob:
+        """Executa um job já reservado e grava o resultado"""
+        start_ns = time.perf_counter_ns()
+        heartbeat = _Heartbeat(job.pk, interval=max(1.0, self.get_stale_seconds() / 4))
+        heartbeat.start()
+        try:
+            if job.kind == BackupJob.KIND_DATABASE_RESTORE:
+                self.restore_database(job)
+            else:
+                job.output_file = self.backup_database(job)
+            job.status, job.progress, job.message = BackupJob.STATUS_SUCCEEDED, 100, 'Concluído'
+        except Exception as e:
+            logger.error(f"Job de backup {job.pk} falhou: {e}")
+            job.status, job.error, job.message = BackupJob.STATUS_FAILED, str(e), 'Falhou'
+        finally:
+            heartbeat.stopped.set()
+            heartbeat.join()
+        job.finished_at = timezone.now()
+        self._save_result(job)
+        apply_retention('database')
+        performance_monitor.record_timing(
+            f'config.backup_job.{job.kind}', start_ns, job.status == BackupJob.STATUS_FAILED
+        )
+        return job
+
+    def _save_result(self, job: BackupJob) -> None:
+        # save() completo: depois de uma restauração a tabela de jobs é a do backup
+        # restaurado, e a linha deste job pode não existir mais (o save a recria)
+        close_old_connections()
+        if job.requested_by_id and not get_user_model().objects.filter(pk=job.requested_by_id).exists():
+            job.requested_by = None
+        job.save()
+        if job.kind == BackupJob.KIND_DATABASE_RESTORE and job.status == BackupJob.STATUS_SUCCEEDED:
+            # O backup restaurado guarda o job que o gerou como "em execução"
+            BackupJob.objects.filter(status=BackupJob.STATUS_RUNNING).exclude(pk=job.pk).update(
+                status=BackupJob.STATUS_FAILED, finished_at=job.finished_at,
+                error='Interrompido pela restauração do banco', message='Interrompido'
+            )
+
+    def _progress(self, job: BackupJob, progress: int, message: str) -> None:
+        job.progress, job.message = progress, message
+        BackupJob.objects.filter(pk=job.pk).update(
+            progress=progress, message=message, heartbeat_at=timezone.now()
+        )
+
+    def _throttled(self, job: BackupJob, start: int, end: int) -> Callable[[float, str], None]:
+        """Progresso de uma etapa (fração 0..1 mapeada em start..end), no máximo uma gravação por segundo"""
+        last = [0.0]
+
+        def report(fraction: float, message: str) -> None:
+            now = time.monotonic()
+            if now - last[0] >= self.progress_interval:
+                last[0] = now
+                self._progress(job, start + int((end - start) * min(1.0, max(0.0, fraction))), message)
+        return report
+
+    # ------------------------------------------------------------------
+    # Backup
+    # ------------------------------------------------------------------
+
+    def backup_database(self, job: BackupJob, label: str = '') -> str:
+        """Gera o backup em backups/database e retorna o nome do arquivo"""
+        db = settings.DATABASES['default']
+        backup_dir = get_backup_dir('database')
+        os.makedirs(backup_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        suffix = f'_{label}' if label else ''
+        if connection.vendor == 'postgresql':
+            name = f"{db['NAME']}_{timestamp}{suffix}.dump.tar"
+            dump = self._dump_postgresql
+        elif connection.vendor == 'sqlite':
+            name = f"{os.path.splitext(os.path.basename(str(db['NAME'])))[0]}_{timestamp}{suffix}.sqlite3.gz"
+            dump = self._dump_sqlite
+        else:
+            raise BackupJobFailed(f'Backup não suportado para o banco {connection.vendor}')
+        stem, extension = name.split('.', 1)
+        counter = 1
+        # Dois backups no mesmo segundo (os jobs rodam um por vez)
+        while os.path.exists(os.path.join(backup_dir, name)):
+            counter += 1
+            name = f"{stem}_{counter}.{extension}"
+        path = os.path.join(backup_dir, name)
+        part_path = f"{path}.part"
+        try:
+            dump(job, part_path)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        logger.info(f"Backup do banco gerado: {name} ({os.path.getsize(path)} bytes)")
+        return name
+
+    def _pg_command(self, program: str) -> tuple:
+        db = settings.DATABASES['default']
+        command = [
+            program,
+            '-U', db['USER'],
+            '-h', db.get('HOST') or 'localhost',
+            '-p', str(db.get('PORT') or '5432'),
+        ]
+        env = os.environ.copy()
+        env['PGPASSWORD'] = db.get('PASSWORD', '')
+        return command, env
+
+    def _run_pg(self, command: list, env: dict, total: int, report: Callable[[float, str], None],
+                markers: tuple, message: str) -> None:
+        """Roda pg_dump/pg_restore -v contando os itens concluídos no stderr para o progresso"""
+        tail = collections.deque(maxlen=20)
+        done = 0
+        process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        for line in process.stderr:
+            tail.append(line.rstrip())
+            if any(marker in line for marker in markers):
+                done += 1
+                report(done / total if total else 0.0, message)
+        if process.wait() != 0:
+            raise BackupJobFailed(f"{command[0]} terminou com código {process.returncode}: {' | '.join(tail)}")
+
+    def _dump_postgresql(self, job: BackupJob, target: str) -> None:
+        db = settings.DATABASES['default']
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_tables WHERE schemaname NOT IN ('pg_catalog', 'information_schema')"
+            )
+            tables = cursor.fetchone()[0]
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(target), prefix='.dump_') as work_dir:
+            dump_dir = os.path.join(work_dir, 'dump')
+            command, env = self._pg_command('pg_dump')
+            command += [
+                '-F', 'd', '-j', str(self.get_dump_jobs()), '-Z', str(self.get_compress_level()),
+                '-b', '-v', '-f', dump_dir, db['NAME'],
+            ]
+            self._progress(job, 5, f'pg_dump: {tables} tabela(s), {self.get_dump_jobs()} processo(s)')
+            self._run_pg(
+                command, env, tables, self._throttled(job, 5, 90),
+                ('dumping contents of table', 'finished item'), 'Exportando tabelas',
+            )
+            # Os arquivos do formato diretório já estão comprimidos: tar sem gzip
+            self._progress(job, 90, 'Empacotando')
+            with tarfile.open(target, 'w') as archive:
+                archive.add(dump_dir, arcname='dump')
+
+    def _sqlite_path(self) -> str:
+        return str(settings.DATABASES['default']['NAME'])
+
+    def _dump_sqlite(self, job: BackupJob, target: str) -> None:
+        self._progress(job, 5, 'Copiando o banco')
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(target), prefix='.dump_', suffix='.sqlite3') as copy:
+            # Cópia online num passo só: em lotes, cada escrita de outra conexão
+            # (inclusive o progresso deste job) reiniciaria a cópia do zero
+            source = sqlite3.connect(self._sqlite_path())
+            destination = sqlite3.connect(copy.name)
+            try:
+                with destination:
+                    source.backup(destination)
+            finally:
+                destination.close()
+                source.close()
+            self._compress(job, copy.name, target)
+
+    def _compress(self, job: BackupJob, source_path: str, target: str) -> None:
+        report = self._throttled(job, 10, 95)
+        total = os.path.getsize(source_path) or 1
+        done = 0
+        with open(source_path, 'rb') as source, gzip.open(target, 'wb', compresslevel=self.get_compress_level()) as out:
+            while chunk := source.read(CHUNK_SIZE):
+                out.write(chunk)
+                done += len(chunk)
+                report(done / total, 'Comprimindo')
+
+    # ------------------------------------------------------------------
+    # Restauração
+    # ------------------------------------------------------------------
+
+    def restore_database(self, job: BackupJob) -> None:
+        """Faz o backup automático do banco atual e restaura o arquivo enviado"""
+        backup_dir = get_backup_dir('database')
+        source = os.path.realpath(os.path.join(backup_dir, job.input_file))
+        if not source.startswith(os.path.realpath(backup_dir) + os.sep) or not os.path.isfile(source):
+            raise BackupJobFailed('Arquivo de backup enviado não encontrado')
+
+        self._progress(job, 1, 'Backup automático antes da restauração')
+        job.output_file = self.backup_database(job, label='pre_restore')
+        BackupJob.objects.filter(pk=job.pk).update(output_file=job.output_file)
+
+        try:
+            if connection.vendor == 'postgresql':
+                self._restore_postgresql(job, source)
+            elif connection.vendor == 'sqlite':
+                self._restore_sqlite(job, source)
+            else:
+                raise BackupJobFailed(f'Restauração não suportada para o banco {connection.vendor}')
+        finally:
+            os.remove(source)
+
+    def _restore_postgresql(self, job: BackupJob, source: str) -> None:
+        db = settings.DATABASES['default']
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(source), prefix='.restore_') as work_dir:
+            if source.endswith('.tar'):
+                self._progress(job, 50, 'Desempacotando')
+                with tarfile.open(source) as archive:
+                    archive.extractall(work_dir, filter='data')
+                dump = os.path.join(work_dir, 'dump')
+            elif source.endswith('.backup'):
+                dump = source
+            else:
+                raise BackupJobFailed('Formato não suportado: envie .dump.tar ou .backup (pg_dump -F c)')
+
+            command, env = self._pg_command('pg_restore')
+            listing = subprocess.run(['pg_restore', '-l', dump], capture_output=True, text=True)
+            items = sum(1 for line in listing.stdout.splitlines() if ' TABLE DATA ' in line)
+            connections.close_all()
+            command += ['-d', db['NAME'], '-c', '--if-exists', '-j', str(self.get_dump_jobs()), '-v', dump]
+            self._run_pg(
+                command, env, items, self._throttled(job, 55, 99),
+                ('processing data for table', 'finished item'), 'Restaurando tabelas',
+            )
+
+    def _restore_sqlite(self, job: BackupJob, source: str) -> None:
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(source), prefix='.restore_', suffix='.sqlite3') as copy:
+            self._progress(job, 50, 'Descomprimindo')
+            opener = gzip.open if source.endswith('.gz') else open
+            with opener(source, 'rb') as compressed:
+                shutil.copyfileobj(compressed, copy, CHUNK_SIZE)
+            copy.flush()
+
+            restored = sqlite3.connect(copy.name)
+            try:
+                if restored.execute('PRAGMA quick_check').fetchone()[0] != 'ok':
+                    raise BackupJobFailed('O arquivo enviado não é um banco SQLite íntegro')
+                # O destino fica travado até o fim da cópia: sem gravações de progresso no meio
+                self._progress(job, 60, 'Restaurando o banco')
+                connections.close_all()
+                destination = sqlite3.connect(self._sqlite_path())
+                try:
+                    restored.backup(destination)
+                finally:
+                    destination.close()
+            except sqlite3.DatabaseError as e:
+                raise BackupJobFailed(f'Backup SQLite inválido: {e}') from e
+            finally:
+                restored.close()
+
+
+# Instância global (uma por processo)
+backup_job_service = BackupJobService()
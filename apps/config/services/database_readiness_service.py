@@ -0,0 +1,91 @@
+"""
+Estado de prontidão do banco de dados.
+
+As middlewares de módulos precisam saber se o banco está configurado antes de
+consultá-lo. Em vez de chamar ``connection.ensure_connection()`` a cada
+requisição (o que abre uma conexão mesmo quando a resposta sairia do cache),
+o resultado é calculado uma vez por processo e recalculado apenas quando o
+setup wizard troca o banco de dados.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseReadinessService:
+    """
+    Memoriza se o banco de dados está acessível.
+
+    Um resultado positivo vale até ``refresh()``. Um resultado negativo é
+    reavaliado depois de ``DATABASE_READINESS_RETRY_INTERVAL`` segundos, para
+    que o sistema perceba quando o banco passa a existir durante o setup.
+    """
+
+    def __init__(self, alias: str = DEFAULT_DB_ALIAS, retry_interval: Optional[float] = None):
+        self.alias = alias
+        self.retry_interval = retry_interval
+        self._ready: Optional[bool] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # Quantas vezes o banco foi efetivamente testado
+        self.probe_count = 0
+
+    def get_retry_interval(self) -> float:
+        """Intervalo para reavaliar um banco indisponível"""
+        if self.retry_interval is not None:
+            return self.retry_interval
+        return getattr(settings, 'DATABASE_READINESS_RETRY_INTERVAL', 30)
+
+    def is_ready(self) -> bool:
+        """Retorna o estado memorizado, testando o banco só quando necessário"""
+        ready = self._ready
+        if ready:
+            return True
+        if ready is False and time.monotonic() - self._checked_at < self.get_retry_interval():
+            return False
+
+        with self._lock:
+            if self._ready is None or (
+                self._ready is False
+                and time.monotonic() - self._checked_at >= self.get_retry_interval()
+            ):
+                self._ready = self._probe()
+                self._checked_at = time.monotonic()
+            return self._ready
+
+    async def ais_ready(self) -> bool:
+        """Versão assíncrona: só troca de thread quando precisa testar o banco"""
+        if self._ready:
+            return True
+        return await sync_to_async(self.is_ready, thread_sensitive=True)()
+
+    def refresh(self) -> bool:
+        """Descarta o estado memorizado e testa o banco novamente"""
+        with self._lock:
+            self._ready = None
+        return self.is_ready()
+
+    def invalidate(self) -> None:
+        """Descarta o estado memorizado; o próximo is_ready() testa o banco"""
+        with self._lock:
+            self._ready = None
+
+    def _probe(self) -> bool:
+        self.probe_count += 1
+        try:
+            connections[self.alias].ensure_connection()
+            return True
+        except Exception as e:
+            logger.warning(f"Banco de dados '{self.alias}' indisponível: {e}")
+            return False
+
+
+# Instância global (uma por processo)
+database_readiness = DatabaseReadinessService()
@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from apps.config.models import DatabaseConfiguration, UserActivityLog
 from apps.config.interfaces.services import IDatabaseService
+from apps.config.services.database_readiness_service import database_readiness
 
 User = get_user_model()
 
@@ -99,6 +100,9 @@ class DatabaseService(IDatabaseService):
             # Recarregar configurações do Django
             self._reload_django_settings()
             
+            # Reavaliar a prontidão do banco usada pelas middlewares
+            database_readiness.invalidate()
+            
             return True, f"Banco de dados trocado para '{config.name}' com sucesso", config
         
         return success, message, config
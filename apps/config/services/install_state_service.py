@@ -0,0 +1,64 @@
+"""
+Estado de instalação do sistema (marcador ``.first_install``).
+
+Enquanto o setup não termina, o marcador é verificado no disco a cada chamada.
+Assim que ele some, o estado "instalado" fica memorizado para o resto da vida
+do processo e as middlewares deixam de fazer stat() por requisição.
+"""
+import logging
+import threading
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class InstallStateService:
+    """Detecta a primeira instalação com memoização do estado "instalado" """
+
+    MARKER_NAME = '.first_install'
+
+    def __init__(self, base_dir=None):
+        self._base_dir = base_dir
+        self._installed = False
+        self._lock = threading.Lock()
+        # Quantas vezes o disco foi consultado (útil para testes do caminho quente)
+        self.check_count = 0
+
+    @property
+    def marker_path(self) -> Path:
+        """Caminho do arquivo marcador de primeira instalação"""
+        return Path(self._base_dir or settings.BASE_DIR) / self.MARKER_NAME
+
+    def is_first_installation(self) -> bool:
+        """Retorna True enquanto o marcador existir; depois disso, sem I/O"""
+        if self._installed:
+            return False
+
+        with self._lock:
+            if self._installed:
+                return False
+            self.check_count += 1
+            if self.marker_path.exists():
+                return True
+            self._installed = True
+            return False
+
+    def complete_installation(self) -> None:
+        """Remove o marcador e memoriza o estado "instalado" neste processo"""
+        with self._lock:
+            marker = self.marker_path
+            if marker.exists():
+                marker.unlink()
+                logger.info("Marcador de primeira instalação removido")
+            self._installed = True
+
+    def invalidate(self) -> None:
+        """Descarta o estado memorizado; a próxima chamada consulta o disco"""
+        with self._lock:
+            self._installed = False
+
+
+# Instância global (uma por processo)
+install_state = InstallStateService()
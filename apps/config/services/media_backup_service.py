@@ -0,0 +1,362 @@
+"""
+Backup da pasta de mídia em fluxo, com snapshots incrementais.
+
+O tar.gz é montado e comprimido bloco a bloco enquanto é enviado
+(``StreamingHttpResponse``) e, na mesma passada, gravado em backups/media:
+nada de arquivo temporário, cópia e releitura. A memória usada é constante
+(um bloco de CHUNK_SIZE), qualquer que seja o tamanho da pasta.
+
+backups/media/index.json guarda o estado do último snapshot (tamanho, mtime e
+SHA-256 de cada arquivo). Um backup incremental arquiva só os arquivos novos ou
+alterados: tamanho e mtime iguais reaproveitam o hash anterior sem ler o
+arquivo; tamanho igual com mtime diferente é relido e comparado pelo hash.
+Cada arquivo leva o manifesto (.backup-manifest.json, também salvo ao lado
+como <arquivo>.json) com o snapshot base e os arquivos removidos desde ele;
+restaurar a cadeia é aplicar o completo e, em ordem, os incrementais.
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import stat as stat_module
+import tarfile
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, IO, Iterator, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from core.files import TEMP_SUFFIX, FileLock, write_json
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+MANIFEST_MEMBER = '.backup-manifest.json'
+INDEX_NAME = 'index.json'
+
+# Arquivos transitórios de quem grava na mídia (gravações atômicas, flock do manifesto de imagens)
+_SKIP_SUFFIXES = (TEMP_SUFFIX, '.lock')
+
+
+class MediaBackupBusy(RuntimeError):
+    """Outro backup da mídia está em andamento"""
+
+
+class _GzipTee:
+    """Comprime o tar em gzip e grava cada bloco comprimido na cópia arquivada"""
+
+    def __init__(self, copy_file: IO[bytes], level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        self._copy = copy_file
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+    def _out(self, data: bytes) -> bytes:
+        if data:
+            self._copy.write(data)
+            self.compressed_bytes += len(data)
+        return data
+
+    def write(self, data: bytes) -> bytes:
+        self.raw_bytes += len(data)
+        return self._out(self._compressor.compress(data))
+
+    def finish(self) -> bytes:
+        # Dois blocos zerados encerram o tar; completa o registro como o tarfile faz
+        end = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+        remainder = (self.raw_bytes + len(end)) % tarfile.RECORDSIZE
+        if remainder:
+            end += tarfile.NUL * (tarfile.RECORDSIZE - remainder)
+        data = self.write(end)
+        return data + self._out(self._compressor.flush())
+
+
+class MediaBackupService:
+    """Gera (em fluxo) e restaura backups da pasta de mídia"""
+
+    def get_media_root(self) -> str:
+        return str(settings.MEDIA_ROOT)
+
+    def get_backup_dir(self) -> str:
+        return os.path.join(settings.BASE_DIR, 'backups', 'media')
+
+    def get_compress_level(self) -> int:
+        return getattr(settings, 'MEDIA_BACKUP_COMPRESSLEVEL', 6)
+
+    # ------------------------------------------------------------------
+    # Estado (índice do último snapshot)
+    # ------------------------------------------------------------------
+
+    def _index_path(self) -> str:
+        return os.path.join(self.get_backup_dir(), INDEX_NAME)
+
+    def load_index(self) -> Dict[str, Any]:
+        """Estado do último snapshot: {'archive': nome, 'files': {caminho: [tamanho, mtime_ns, sha256]}}"""
+        try:
+            with open(self._index_path(), encoding='utf-8') as index_file:
+                return json.load(index_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Índice de backup da mídia ilegível: {e}")
+            return {}
+
+    def _acquire(self) -> FileLock:
+        """Trava exclusiva (flock) de backups/media; liberada com ``release()``"""
+        os.makedirs(self.get_backup_dir(), exist_ok=True)
+        try:
+            return FileLock(os.path.join(self.get_backup_dir(), '.lock')).acquire(blocking=False)
+        except BlockingIOError:
+            raise MediaBackupBusy('Já existe um backup da mídia em andamento') from None
+
+    # ------------------------------------------------------------------
+    # Planejamento
+    # ------------------------------------------------------------------
+
+    def scan(self) -> Dict[str, os.stat_result]:
+        """Arquivos regulares da mídia (caminho relativo com '/') e seus stats"""
+        media_root = self.get_media_root()
+        found = {}
+        for directory, dirnames, filenames in os.walk(media_root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith(_SKIP_SUFFIXES):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path, follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                if not stat_module.S_ISREG(stat.st_mode):
+                    continue
+                found[os.path.relpath(path, media_root).replace(os.sep, '/')] = stat
+        return found
+
+    def _hash_file(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as source:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def plan(self, incremental: bool = False) -> Dict[str, Any]:
+        """
+        Decide o que entra no arquivo.
+
+        Retorna o tipo efetivo ('full' sem snapshot anterior), o snapshot base,
+        os arquivos a arquivar, os removidos e o novo estado dos inalterados.
+        """
+        files = self.scan()
+        previous = self.load_index() if incremental else {}
+        known = previous.get('files', {})
+        if not known:
+            return {'kind': 'full', 'base': None, 'archive': sorted(files), 'deleted': [], 'state': {}, 'stats': files}
+
+        archive, state = [], {}
+        for name, stat in files.items():
+            entry = known.get(name)
+            if entry and entry[0] == stat.st_size:
+                if entry[1] == stat.st_mtime_ns:
+                    state[name] = entry
+                    continue
+                # Mesmo tamanho, mtime diferente (touch, cópia): o conteúdo decide
+                digest = self._hash_file(os.path.join(self.get_media_root(), name))
+                if digest == entry[2]:
+                    state[name] = [stat.st_size, stat.st_mtime_ns, digest]
+                    continue
+            archive.append(name)
+        return {
+            'kind': 'incremental',
+            'base': previous.get('archive'),
+            'archive': archive,
+            'deleted': sorted(set(known) - set(files)),
+            'state': state,
+            'stats': files,
+        }
+
+    # ------------------------------------------------------------------
+    # Backup em fluxo
+    # ------------------------------------------------------------------
+
+    def archive_name(self, kind: str, label: str = '') -> str:
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        suffix = f'_{label}' if label else ('_incr' if kind == 'incremental' else '')
+        name = f"media_{timestamp}{suffix}.tar.gz"
+        counter = 1
+        # Dois backups no mesmo segundo (chamado com a trava obtida)
+        while os.path.exists(os.path.join(self.get_backup_dir(), name)):
+            counter += 1
+            name = f"media_{timestamp}{suffix}_{counter}.tar.gz"
+        return name
+
+    def _header(self, name: str, size: int, mtime: float, mode: int = 0o644) -> bytes:
+        info = tarfile.TarInfo(name)
+        info.size = size
+        info.mtime = int(mtime)
+        info.mode = mode & 0o7777
+        return info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+
+    def _padding(self, size: int) -> bytes:
+        remainder = size % tarfile.BLOCKSIZE
+        return tarfile.NUL * (tarfile.BLOCKSIZE - remainder) if remainder else b''
+
+    def _member(self, tee: _GzipTee, name: str, stat: os.stat_result) -> Iterator[Tuple[bytes, Optional[str]]]:
+        """
+        Blocos comprimidos de um arquivo; o último item traz o SHA-256 do conteúdo.
+
+        Um arquivo apagado entre o scan() e a leitura não gera nada (nem o cabeçalho).
+        """
+        try:
+            source = open(os.path.join(self.get_media_root(), name), 'rb')
+        except FileNotFoundError:
+            logger.warning(f"{name} foi removido durante o backup da mídia")
+            return
+        with source:
+            yield tee.write(self._header(name, stat.st_size, stat.st_mtime, stat.st_mode)), None
+            digest = hashlib.sha256()
+            remaining = stat.st_size
+            while remaining:
+                chunk = source.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    # Arquivo encolheu durante a leitura: completa o tamanho declarado no cabeçalho
+                    logger.warning(f"{name} mudou durante o backup da mídia")
+                    chunk = tarfile.NUL * remaining
+                remaining -= len(chunk)
+                digest.update(chunk)
+                yield tee.write(chunk), None
+        yield tee.write(self._padding(stat.st_size)), digest.hexdigest()
+
+    def stream(self, incremental: bool = False, label: str = '') -> Tuple[str, Iterator[bytes]]:
+        """
+        Nome do arquivo e o gerador dos blocos do tar.gz, que grava a cópia em
+        backups/media na mesma passada.
+
+        A trava e o plano são obtidos já aqui, antes do primeiro byte: um
+        backup concorrente falha com MediaBackupBusy ainda com status 4xx/5xx.
+        O índice e o manifesto ao lado só são gravados quando o arquivo
+        termina; se o cliente desconectar, o arquivo parcial é descartado.
+        """
+        lock = self._acquire()
+        try:
+            plan = self.plan(incremental)
+        except BaseException:
+            lock.release()
+            raise
+        name = self.archive_name(plan['kind'], label)
+        return name, self._stream(plan, name, lock)
+
+    def _stream(self, plan: Dict[str, Any], name: str, lock: FileLock) -> Iterator[bytes]:
+        start_ns = time.perf_counter_ns()
+        error = True
+        path = os.path.join(self.get_backup_dir(), name)
+        part_path = f"{path}.part"
+        state = dict(plan['state'])
+        archived, vanished = [], []
+        try:
+            with open(part_path, 'wb') as copy_file:
+                tee = _GzipTee(copy_file, self.get_compress_level())
+                for member in plan['archive']:
+                    stat = plan['stats'][member]
+                    for data, digest in self._member(tee, member, stat):
+                        if data:
+                            yield data
+                        if digest:
+                            state[member] = [stat.st_size, stat.st_mtime_ns, digest]
+                    if member in state:
+                        archived.append(member)
+                    else:
+                        # Apagado depois do scan(): fora do estado, e removido na restauração do incremental
+                        vanished.append(member)
+
+                manifest = {
+                    'archive': name,
+                    'kind': plan['kind'],
+                    'base': plan['base'],
+                    'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                    'files': {member: state[member][2] for member in archived},
+                    'deleted': sorted(plan['deleted'] + vanished) if plan['kind'] == 'incremental' else plan['deleted'],
+                }
+                body = json.dumps(manifest, separators=(',', ':')).encode('utf-8')
+                data = tee.write(self._header(MANIFEST_MEMBER, len(body), time.time()) + body + self._padding(len(body)))
+                yield data + tee.finish()
+            os.replace(part_path, path)
+            write_json(f"{path}.json", manifest)
+            write_json(self._index_path(), {'archive': name, 'files': state})
+            error = False
+            logger.info(
+                f"Backup da mídia {name}: {len(archived)} arquivo(s), "
+                f"{tee.raw_bytes} bytes -> {tee.compressed_bytes} bytes"
+            )
+        finally:
+            if error and os.path.exists(part_path):
+                os.remove(part_path)
+            lock.release()
+            performance_monitor.record_timing('config.media_backup', start_ns, error)
+
+    async def aiter_chunks(self, chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+        """
+        Os blocos de stream() para o ASGI, um a um numa thread.
+
+        Um gerador síncrono numa resposta ASGI é consumido inteiro antes do
+        envio (o arquivo todo em memória); assim cada bloco é enviado assim que
+        comprimido. Se o cliente desconectar, o gerador é fechado e a cópia
+        parcial descartada, como no WSGI.
+        """
+        produce = sync_to_async(next, thread_sensitive=False)
+        try:
+            while (data := await produce(chunks, None)) is not None:
+                yield data
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=False)()
+
+    def write_archive(self, incremental: bool = False, label: str = '') -> str:
+        """Gera o backup sem enviá-lo a ninguém (p. ex. antes de uma restauração) e retorna o nome"""
+        name, chunks = self.stream(incremental, label)
+        for _ in chunks:
+            pass
+        return name
+
+    # ------------------------------------------------------------------
+    # Restauração
+    # ------------------------------------------------------------------
+
+    def restore(self, fileobj: IO[bytes]) -> Dict[str, Any]:
+        """
+        Extrai um tar.gz (completo ou incremental) direto do upload, sem cópia temporária.
+
+        Usa o filtro 'data' do tarfile (sem caminhos absolutos, ``..``, links
+        para fora da pasta ou dispositivos). Um incremental também remove os
+        arquivos listados como apagados no manifesto dele.
+        """
+        media_root = self.get_media_root()
+        os.makedirs(media_root, exist_ok=True)
+        manifest = None
+        extracted = 0
+        with tarfile.open(fileobj=fileobj, mode='r|gz') as archive:
+            for member in archive:
+                if member.name == MANIFEST_MEMBER:
+                    manifest = json.load(archive.extractfile(member))
+                    continue
+                archive.extract(member, media_root, filter='data')
+                extracted += member.isfile()
+
+        deleted = 0
+        if manifest and manifest.get('kind') == 'incremental':
+            real_root = os.path.realpath(media_root)
+            for name in manifest.get('deleted', []):
+                path = os.path.realpath(os.path.join(media_root, name))
+                if not path.startswith(real_root + os.sep):
+                    continue
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+        return {'extracted': extracted, 'deleted': deleted, 'manifest': manifest}
+
+
+# Instância global (uma por processo)
+media_backup_service = MediaBackupService()
@@ -5,6 +5,7 @@ from django.contrib.auth import get_user_model
 from django.conf import settings
 from apps.config.models.app_module_config import AppModuleConfiguration
 from apps.config.interfaces.services import IModuleService
+from apps.config.services.module_state_service import ModuleState, module_state_snapshot
 import logging
 
 User = get_user_model()
@@ -17,8 +18,9 @@ class ModuleService(IModuleService):
     Permite criar, atualizar, habilitar, desabilitar e consultar módulos, além de validar dependências.
     """
     
-    def __init__(self):
+    def __init__(self, state_snapshot=None):
         self.core_apps = AppModuleConfiguration.CORE_APPS
+        self.state_snapshot = state_snapshot or module_state_snapshot
     
     def get_all_modules(self) -> List[AppModuleConfiguration]:
         """Retorna todos os módulos"""
@@ -54,11 +56,21 @@ class ModuleService(IModuleService):
             except AppModuleConfiguration.DoesNotExist:
                 return None
     
+    def get_module_state(self, app_name: str) -> Optional[ModuleState]:
+        """Retorna o estado do módulo a partir do snapshot em memória"""
+        return self.state_snapshot.get(app_name)
+    
+    async def aget_module_state(self, app_name: str) -> Optional[ModuleState]:
+        """Versão assíncrona de get_module_state"""
+        return await self.state_snapshot.aget(app_name)
+    
     def is_module_enabled(self, app_name: str) -> bool:
-        """Verifica se um módulo está habilitado"""
-        module = self.get_module_by_name(app_name)
-        print(f"[DEBUG is_module_enabled] app_name={app_name} module={module} is_enabled={getattr(module, 'is_enabled', None)} status={getattr(module, 'status', None)}")
-        return module.is_available if module else False
+        """Verifica se um módulo está habilitado (via snapshot em memória, sem query)"""
+        return self.state_snapshot.is_module_enabled(app_name)
+    
+    async def ais_module_enabled(self, app_name: str) -> bool:
+        """Versão assíncrona de is_module_enabled"""
+        return await self.state_snapshot.ais_module_enabled(app_name)
     
     def is_core_module(self, app_name: str) -> bool:
         """Verifica se é um módulo principal"""
@@ -0,0 +1,189 @@
+"""
+Snapshot em memória do estado dos módulos.
+
+Cada processo (worker do gunicorn) mantém uma cópia de todas as linhas de
+AppModuleConfiguration. A cópia é recarregada apenas quando a versão
+compartilhada no cache muda, e essa versão só é consultada a cada
+``MODULE_STATE_CHECK_INTERVAL`` segundos. Em regime estável, verificar se um
+módulo está habilitado não faz nenhuma query.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MODULE_STATE_VERSION_KEY = 'config:module_state:version'
+
+
+@dataclass(frozen=True)
+class ModuleState:
+    """Estado imutável de um módulo, copiado de AppModuleConfiguration"""
+    app_name: str
+    display_name: str
+    is_enabled: bool
+    status: str
+    is_core: bool
+    show_in_menu: bool
+    menu_order: int
+    menu_icon: str
+    url_pattern: str
+
+    @property
+    def is_available(self) -> bool:
+        """Mesma regra de AppModuleConfiguration.is_available"""
+        return self.is_enabled and self.status == 'active'
+
+
+class ModuleStateSnapshot:
+    """
+    Snapshot versionado, por processo, de todos os módulos do sistema.
+
+    A versão é um contador no cache do Django. Quem altera um módulo chama
+    ``bump_version()``; os demais workers percebem a mudança na próxima
+    verificação (no máximo ``check_interval`` segundos depois).
+    """
+
+    def __init__(self, check_interval: Optional[float] = None):
+        self.check_interval = check_interval
+        self._states: Dict[str, ModuleState] = {}
+        self._version = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load_count = 0
+
+    def get_check_interval(self) -> float:
+        """Intervalo máximo entre consultas à versão compartilhada"""
+        if self.check_interval is not None:
+            return self.check_interval
+        return getattr(settings, 'MODULE_STATE_CHECK_INTERVAL', 5)
+
+    def get(self, app_name: str) -> Optional[ModuleState]:
+        """Busca o estado de um módulo, tolerante ao prefixo 'apps.'"""
+        return self._lookup(self._get_states(), app_name)
+
+    async def aget(self, app_name: str) -> Optional[ModuleState]:
+        """Versão assíncrona de ``get`` (cache e ORM assíncronos na recarga)"""
+        return self._lookup(await self._aget_states(), app_name)
+
+    def is_module_enabled(self, app_name: str) -> bool:
+        """Verifica se um módulo está disponível sem consultar o banco"""
+        state = self.get(app_name)
+        return state.is_available if state else False
+
+    async def ais_module_enabled(self, app_name: str) -> bool:
+        """Versão assíncrona de ``is_module_enabled``"""
+        state = await self.aget(app_name)
+        return state.is_available if state else False
+
+    def get_menu_modules(self) -> List[ModuleState]:
+        """Módulos disponíveis que aparecem no menu, na ordem do menu"""
+        modules = [
+            state for state in self._get_states().values()
+            if state.is_available and state.show_in_menu
+        ]
+        return sorted(modules, key=lambda m: (m.menu_order, m.display_name))
+
+    def invalidate(self) -> None:
+        """Força a recarga local na próxima leitura"""
+        with self._lock:
+            self._loaded = False
+
+    def bump_version(self) -> None:
+        """Incrementa a versão compartilhada e invalida o snapshot local"""
+        try:
+            cache.add(MODULE_STATE_VERSION_KEY, 0, timeout=None)
+            cache.incr(MODULE_STATE_VERSION_KEY)
+        except Exception as e:
+            # Sem incr atômico (ou chave expirada entre add e incr): usa um novo valor
+            logger.debug(f"Falha ao incrementar versão dos módulos: {e}")
+            cache.set(MODULE_STATE_VERSION_KEY, time.time_ns(), timeout=None)
+        self.invalidate()
+
+    def bump_version_on_commit(self) -> None:
+        """Agenda o incremento de versão para depois do commit da transação atual"""
+        transaction.on_commit(self.bump_version)
+
+    @staticmethod
+    def _lookup(states: Dict[str, ModuleState], app_name: str) -> Optional[ModuleState]:
+        state = states.get(app_name)
+        if state is None:
+            if app_name.startswith('apps.'):
+                state = states.get(app_name.split('.', 1)[1])
+            else:
+                state = states.get(f'apps.{app_name}')
+        return state
+
+    def _is_fresh(self, now: float) -> bool:
+        return self._loaded and now - self._checked_at < self.get_check_interval()
+
+    def _get_states(self) -> Dict[str, ModuleState]:
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return self._states
+
+        with self._lock:
+            if self._is_fresh(now):
+                return self._states
+
+            version = self._read_version()
+            if not self._loaded or version != self._version:
+                self._states = self._load_states()
+                self._version = version
+                self._loaded = True
+                self.load_count += 1
+            self._checked_at = now
+            return self._states
+
+    async def _aget_states(self) -> Dict[str, ModuleState]:
+        # Sem lock: uma recarga concorrente no event loop é inofensiva (mesmo resultado)
+        now = time.monotonic()
+        if self._is_fresh(now):
+            return self._states
+
+        try:
+            version = await cache.aget(MODULE_STATE_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Erro ao ler versão dos módulos no cache: {e}")
+            version = self._version
+
+        if not self._loaded or version != self._version:
+            self._states = await self._aload_states()
+            self._version = version
+            self._loaded = True
+            self.load_count += 1
+        self._checked_at = now
+        return self._states
+
+    def _read_version(self):
+        try:
+            return cache.get(MODULE_STATE_VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"Erro ao ler versão dos módulos no cache: {e}")
+            return self._version
+
+    @staticmethod
+    def _state_rows():
+        from apps.config.models.app_module_config import AppModuleConfiguration
+
+        return AppModuleConfiguration.objects.values_list(
+            'app_name', 'display_name', 'is_enabled', 'status', 'is_core',
+            'show_in_menu', 'menu_order', 'menu_icon', 'url_pattern',
+        )
+
+    def _load_states(self) -> Dict[str, ModuleState]:
+        return {row[0]: ModuleState(*row) for row in self._state_rows()}
+
+    async def _aload_states(self) -> Dict[str, ModuleState]:
+        return {row[0]: ModuleState(*row) async for row in self._state_rows()}
+
+
+# Instância global (uma por processo)
+module_state_snapshot = ModuleStateSnapshot()
@@ -27,3 +27,31 @@ def log_group_creation(sender, instance, created, **kwargs):
         logger.info(f"Novo grupo criado: {instance.name} (ID: {instance.id})")
     else:
         logger.info(f"Grupo atualizado: {instance.name} (ID: {instance.id})")
+
+
+@receiver(post_save, sender='config.AppModuleConfiguration')
+@receiver(post_delete, sender='config.AppModuleConfiguration')
+def bump_module_state_version(sender, instance, **kwargs):
+    """Propaga alterações de módulos (admin, comandos, serviços) para o snapshot dos workers"""
+    from apps.config.services.module_state_service import module_state_snapshot
+    module_state_snapshot.bump_version_on_commit()
+
+
+@receiver(post_save, sender='config.EmailConfiguration')
+@receiver(post_delete, sender='config.EmailConfiguration')
+def bump_email_config_version(sender, instance, update_fields=None, **kwargs):
+    """Recarrega a configuração de email em cache e descarta as conexões SMTP do pool"""
+    # Estatísticas de teste/envio não mudam a configuração
+    if update_fields and set(update_fields) <= {'last_tested_at', 'last_test_result', 'emails_sent_count'}:
+        return
+    from apps.accounts.services.email_transport import email_config_loader
+    email_config_loader.bump_version_on_commit()
+
+
+@receiver(post_save, sender='config.SystemConfiguration')
+@receiver(post_delete, sender='config.SystemConfiguration')
+def bump_email_settings_version(sender, instance, **kwargs):
+    """A configuração antiga ('email_settings') também alimenta o EmailService"""
+    if instance.key == 'email_settings':
+        from apps.accounts.services.email_transport import email_config_loader
+        email_config_loader.bump_version_on_commit()
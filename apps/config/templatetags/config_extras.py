@@ -38,6 +38,24 @@ def mul(value, arg):
         return 0
 
 
+@register.simple_tag
+def sparkline(values, width=120, height=28, max_value=100):
+    """Gráfico de tendência em SVG inline para uma série de valores (0 a max_value)"""
+    points = [float(value) for value in values or [] if value is not None]
+    if len(points) < 2:
+        return ''
+    step = width / (len(points) - 1)
+    coordinates = ' '.join(
+        f'{index * step:.1f},{height - 1 - min(max(point, 0), max_value) / max_value * (height - 2):.1f}'
+        for index, point in enumerate(points)
+    )
+    return format_html(
+        '<svg class="sparkline" width="{}" height="{}" viewBox="0 0 {} {}" preserveAspectRatio="none" '
+        'aria-hidden="true"><polyline fill="none" stroke="currentColor" stroke-width="1.5" points="{}"/></svg>',
+        width, height, width, height, coordinates,
+    )
+
+
 @register.simple_tag
 def config_status_badge(is_active, is_default=False):
     """Gera badge de status para configurações"""
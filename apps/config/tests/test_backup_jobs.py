@@ -0,0 +1,88 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.config.models import BackupJob
+from apps.config.services import backup_job_service as backup_job_module
+from apps.config.services.backup_job_service import BackupJobService
+
+
+@pytest.mark.django_db
+def test_reserva_o_job_mais_antigo():
+    service = BackupJobService()
+    first = service.enqueue_backup()
+    service.enqueue_backup()
+
+    job = service.claim_next('worker-1')
+
+    assert job.pk == first.pk
+    assert job.status == BackupJob.STATUS_RUNNING
+    assert job.worker == 'worker-1'
+
+
+@pytest.mark.django_db
+def test_nao_reserva_com_outro_job_em_execucao():
+    service = BackupJobService()
+    service.enqueue_backup()
+    waiting = service.enqueue_backup()
+    service.claim_next('worker-1')
+
+    assert service.claim_next('worker-2') is None
+    waiting.refresh_from_db()
+    assert waiting.status == BackupJob.STATUS_QUEUED
+
+
+@pytest.mark.django_db
+def test_reserva_num_unico_update_condicionado():
+    service = BackupJobService()
+    service.enqueue_backup()
+
+    with CaptureQueriesContext(connection) as queries:
+        service.claim_next('worker-1')
+
+    updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert 'NOT EXISTS' in updates[0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_workers_concorrentes_reservam_um_job_so(monkeypatch):
+    service = BackupJobService()
+    for _ in range(4):
+        service.enqueue_backup()
+    barrier = threading.Barrier(4, timeout=10)
+    waited = threading.local()
+
+    def now():
+        # Todos os workers já leram a fila antes de qualquer um gravar a reserva
+        if not getattr(waited, 'done', False):
+            waited.done = True
+            barrier.wait()
+        return timezone.now()
+
+    monkeypatch.setattr(backup_job_module, 'timezone', SimpleNamespace(now=now))
+    claimed, errors = [], []
+
+    def worker(name):
+        try:
+            job = service.claim_next(name)
+            if job is not None:
+                claimed.append(job.pk)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(f'worker-{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(claimed) == 1
+    assert BackupJob.objects.filter(status=BackupJob.STATUS_RUNNING).count() == 1
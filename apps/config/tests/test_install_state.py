@@ -0,0 +1,40 @@
+import pytest
+
+from apps.config.services.install_state_service import install_state
+
+
+@pytest.fixture
+def marker_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(install_state, '_base_dir', tmp_path)
+    install_state.invalidate()
+    yield tmp_path
+    install_state.invalidate()
+
+
+@pytest.mark.django_db
+def test_marcador_consultado_ate_a_instalacao_terminar(marker_dir):
+    (marker_dir / install_state.MARKER_NAME).touch()
+
+    assert install_state.is_first_installation()
+    assert install_state.is_first_installation()
+
+    install_state.complete_installation()
+
+    assert not (marker_dir / install_state.MARKER_NAME).exists()
+    assert not install_state.is_first_installation()
+
+
+@pytest.mark.django_db
+def test_requisicoes_apos_instalacao_nao_consultam_o_disco(client, marker_dir):
+    (marker_dir / install_state.MARKER_NAME).touch()
+    response = client.get('/')
+    assert response.status_code == 302
+
+    install_state.complete_installation()
+    client.get('/')
+    checks = install_state.check_count
+
+    for _ in range(20):
+        client.get('/')
+
+    assert install_state.check_count == checks
@@ -0,0 +1,76 @@
+import io
+import json
+import os
+import tarfile
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from apps.config.services.media_backup_service import MANIFEST_MEMBER, MediaBackupService
+
+
+@pytest.fixture
+def service(tmp_path, settings):
+    settings.BASE_DIR = tmp_path
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    (tmp_path / 'media' / 'fotos').mkdir(parents=True)
+    (tmp_path / 'media' / 'fotos' / 'a.jpg').write_bytes(b'a' * 3000)
+    (tmp_path / 'media' / 'fotos' / 'b.jpg').write_bytes(b'b' * 5000)
+    return MediaBackupService()
+
+
+def _members(data):
+    with tarfile.open(fileobj=io.BytesIO(data), mode='r:gz') as archive:
+        manifest = json.load(archive.extractfile(MANIFEST_MEMBER))
+        return sorted(archive.getnames()), manifest
+
+
+def test_arquivo_apagado_depois_do_scan_fica_fora_do_backup(service, tmp_path):
+    name, chunks = service.stream()
+    (tmp_path / 'media' / 'fotos' / 'b.jpg').unlink()
+
+    names, manifest = _members(b''.join(chunks))
+
+    assert names == [MANIFEST_MEMBER, 'fotos/a.jpg']
+    assert list(manifest['files']) == ['fotos/a.jpg']
+    assert list(service.load_index()['files']) == ['fotos/a.jpg']
+
+
+def test_incremental_lista_como_removido_o_arquivo_apagado_no_meio(service, tmp_path):
+    service.write_archive()
+    (tmp_path / 'media' / 'fotos' / 'b.jpg').write_bytes(b'c' * 10)
+
+    name, chunks = service.stream(incremental=True)
+    (tmp_path / 'media' / 'fotos' / 'b.jpg').unlink()
+    names, manifest = _members(b''.join(chunks))
+
+    assert names == [MANIFEST_MEMBER]
+    assert manifest['deleted'] == ['fotos/b.jpg']
+    assert list(service.load_index()['files']) == ['fotos/a.jpg']
+
+
+def test_iterador_async_entrega_o_mesmo_arquivo(service):
+    async def collect(chunks):
+        return [data async for data in chunks]
+
+    name, chunks = service.stream()
+    blocks = async_to_sync(collect)(service.aiter_chunks(chunks))
+
+    names, manifest = _members(b''.join(blocks))
+    assert names == [MANIFEST_MEMBER, 'fotos/a.jpg', 'fotos/b.jpg']
+    assert os.path.exists(os.path.join(service.get_backup_dir(), name))
+    assert list(service.load_index()['files']) == ['fotos/a.jpg', 'fotos/b.jpg']
+
+
+def test_iterador_async_interrompido_descarta_a_copia_parcial(service):
+    async def first_block(chunks):
+        iterator = service.aiter_chunks(chunks)
+        data = await iterator.__anext__()
+        await iterator.aclose()
+        return data
+
+    name, chunks = service.stream()
+    assert async_to_sync(first_block)(chunks)
+
+    assert not [f for f in os.listdir(service.get_backup_dir()) if f.startswith('media_')]
+    service.write_archive()  # trava liberada
@@ -0,0 +1,29 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from apps.config.services.install_state_service import install_state
+from apps.config.views.dashboard import ConfigDashboardView
+from core.query_budget import assert_query_budget
+
+
+@pytest.fixture(autouse=True)
+def installed(tmp_path, monkeypatch):
+    # Sem o marcador de primeira instalação: nada é redirecionado para o setup
+    monkeypatch.setattr(install_state, '_base_dir', tmp_path)
+    install_state.invalidate()
+    yield
+    install_state.invalidate()
+
+
+@pytest.mark.django_db
+def test_dashboard_dentro_do_orcamento(client):
+    admin = get_user_model().objects.create_superuser(
+        username='admin', email='admin@example.com', password='senha123'
+    )
+    client.force_login(admin)
+
+    with assert_query_budget(view=ConfigDashboardView):
+        response = client.get(reverse('config:dashboard'))
+
+    assert response.status_code == 200
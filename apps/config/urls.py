@@ -52,7 +52,7 @@ from apps.config.views.users import (
     UserListView, UserCreateView, UserUpdateView, UserDeleteView
 )
 from apps.config.views.backup_views import (
-    backup_database, backup_media, restore_database, restore_media, download_backup
+    backup_database, backup_job_status, backup_media, restore_database, restore_media, download_backup
 )
 
 
@@ -147,6 +147,7 @@ urlpatterns = [
 
     # Backup & Restauração
     path('backup/database/', backup_database, name='backup_database'),
+    path('backup/jobs/<int:job_id>/', backup_job_status, name='backup_job_status'),
     path('backup/media/', backup_media, name='backup_media'),
     path('restore/database/', restore_database, name='restore_database'),
     path('restore/media/', restore_media, name='restore_media'),
@@ -3,12 +3,13 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.views import View
 from django.db import connection
+from django.db.models import Count, Q
 from django.conf import settings
 from apps.config.services.system_config_service import AuditLogService
 from apps.config.repositories.config_repository import DjangoAuditLogRepository
 from apps.config.mixins import ConfigPermissionMixin, PermissionHelperMixin
 from apps.config.models.app_module_config import AppModuleConfiguration
-import psutil
+from core.performance import system_monitor
 import platform
 import sys
 import os
@@ -22,14 +23,15 @@ User = get_user_model()
 class ConfigDashboardView(ConfigPermissionMixin, PermissionHelperMixin, View):
     """Dashboard principal do módulo de configuração com métricas do sistema"""
     template_name = 'config/dashboard.html'
+    trend_points = 60
+    query_budget = 20  # core.query_budget: máximo de consultas SQL por requisição
 
     def get_system_metrics(self):
-        """Coleta métricas do sistema"""
+        """Coleta métricas do sistema (última amostra do coletor em segundo plano, sem bloquear)"""
         try:
-            # Métricas de CPU e Memória
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            metrics = system_monitor.get_system_metrics()
+            if not metrics:
+                return None
 
             # Informações do sistema
             system_info = {
@@ -40,14 +42,20 @@ class ConfigDashboardView(ConfigPermissionMixin, PermissionHelperMixin, View):
             }
 
             return {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_used': round(memory.used / (1024**3), 2),  # GB
-                'memory_total': round(memory.total / (1024**3), 2),  # GB
-                'disk_percent': disk.percent,
-                'disk_used': round(disk.used / (1024**3), 2),  # GB
-                'disk_total': round(disk.total / (1024**3), 2),  # GB
+                'cpu_percent': metrics['cpu_percent'],
+                'memory_percent': metrics['memory_percent'],
+                'memory_used': round(metrics['memory_used_gb'], 2),  # GB
+                'memory_total': round(metrics['memory_total_gb'], 2),  # GB
+                'disk_percent': metrics['disk_percent'],
+                'disk_used': round(metrics['disk_used_gb'], 2),  # GB
+                'disk_total': round(metrics['disk_total_gb'], 2),  # GB
+                'sampled_at': datetime.fromtimestamp(metrics['timestamp']),
                 'system_info': system_info,
+                # Séries curtas para os gráficos de tendência
+                'trends': {
+                    name: system_monitor.get_trend(name, points=self.trend_points)
+                    for name in ('cpu_percent', 'memory_percent', 'disk_percent')
+                },
             }
         except Exception:
             return None
@@ -154,16 +162,16 @@ class ConfigDashboardView(ConfigPermissionMixin, PermissionHelperMixin, View):
 
     def get(self, request):
         """Exibe o dashboard com métricas do sistema"""
-        # Estatísticas de usuários
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        staff_users = User.objects.filter(is_staff=True).count()
-        superusers = User.objects.filter(is_superuser=True).count()
-        total_groups = Group.objects.count()
-
-        # Usuários recentes (últimos 7 dias)
+        # Estatísticas de usuários (uma única consulta agregada), incluindo os recentes (últimos 7 dias)
         week_ago = datetime.now() - timedelta(days=7)
-        recent_users = User.objects.filter(date_joined__gte=week_ago).count()
+        user_stats = User.objects.aggregate(
+            total_users=Count('pk'),
+            active_users=Count('pk', filter=Q(is_active=True)),
+            staff_users=Count('pk', filter=Q(is_staff=True)),
+            superusers=Count('pk', filter=Q(is_superuser=True)),
+            recent_users=Count('pk', filter=Q(date_joined__gte=week_ago)),
+        )
+        total_groups = Group.objects.count()
 
         # Métricas do sistema
         system_metrics = self.get_system_metrics()
@@ -178,12 +186,12 @@ class ConfigDashboardView(ConfigPermissionMixin, PermissionHelperMixin, View):
 
         # Organizar estatísticas como o template espera
         stats = {
-            'total_users': total_users,
-            'active_users': active_users,
-            'staff_users': staff_users,
-            'superusers': superusers,
+            'total_users': user_stats['total_users'],
+            'active_users': user_stats['active_users'],
+            'staff_users': user_stats['staff_users'],
+            'superusers': user_stats['superusers'],
             'total_groups': total_groups,
-            'recent_users': recent_users,
+            'recent_users': user_stats['recent_users'],
             'total_articles': total_articles,
             'active_modules': active_modules,
             'emails_sent': emails_sent,
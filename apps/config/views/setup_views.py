@@ -23,6 +23,7 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.cache import never_cache
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from apps.config.services.install_state_service import install_state
 import psycopg2
 
 # Importação condicional do MySQL
@@ -126,9 +127,7 @@ class SetupAPIView(View):
             
             if success:
                 # Remover arquivo de primeira instalação
-                first_install_file = Path(settings.BASE_DIR) / '.first_install'
-                if first_install_file.exists():
-                    first_install_file.unlink()
+                install_state.complete_installation()
             
             return JsonResponse({'success': success, 'message': 'Configuração finalizada!' if success else 'Erro na finalização'})
             
@@ -141,9 +140,7 @@ def setup_redirect(request):
     """
     Redireciona para setup se for primeira instalação
     """
-    first_install_file = Path(settings.BASE_DIR) / '.first_install'
-    
-    if first_install_file.exists():
+    if install_state.is_first_installation():
         return redirect('config:setup_wizard')
     else:
         return redirect('pages:home')  # Redireciona para a página inicial do app pages 
\ No newline at end of file
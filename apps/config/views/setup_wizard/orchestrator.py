@@ -2,6 +2,7 @@ from .base import WizardStepHandler, WizardStepError
 from django.core.cache import cache
 from django.conf import settings
 from pathlib import Path
+from apps.config.services.database_readiness_service import database_readiness
 import logging
 
 logger = logging.getLogger(__name__)
@@ -100,6 +101,9 @@ class SetupWizardOrchestrator:
             # Executar migrações do banco de dados
             self.run_migrations()
             
+            # O banco pode ter mudado: reavaliar a prontidão usada pelas middlewares
+            database_readiness.invalidate()
+            
             # Aplicar configuração do admin (após as migrações)
             if admin_data:
                 self.apply_admin_config(admin_data)
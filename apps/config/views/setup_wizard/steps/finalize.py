@@ -3,6 +3,7 @@ from django.contrib import messages
 from django.shortcuts import redirect
 from apps.config.models.app_module_config import AppModuleConfiguration
 from apps.config.services.module_service import ModuleService
+from apps.config.services.install_state_service import install_state
 import logging
 
 logger = logging.getLogger(__name__)
@@ -26,6 +27,9 @@ class FinalizeStepHandler(WizardStepHandler):
                 else:
                     logger.error(f"Erro na sincronização: {sync_result.get('error', 'Erro desconhecido')}")
                 
+                # Sai do modo primeira instalação (memorizado nas middlewares)
+                install_state.complete_installation()
+                
                 messages.success(request, "🎉 Tudo pronto! Sua configuração foi finalizada com sucesso.")
                 return redirect('config:dashboard')
             except Exception as e:
@@ -8,12 +8,11 @@ from django.views import View
 from django.contrib import messages
 from django.views.decorators.cache import never_cache
 from django.utils.decorators import method_decorator
-from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from pathlib import Path
 import json
 from .setup_wizard import orchestrator
+from apps.config.services.install_state_service import install_state
 from django.core.cache import cache
 import logging
 from django.views.decorators.csrf import csrf_exempt
@@ -281,9 +280,7 @@ class SetupAPIView(View):
             
             if success:
                 # Remove .first_install file
-                first_install_file = Path(settings.BASE_DIR) / '.first_install'
-                if first_install_file.exists():
-                    first_install_file.unlink()
+                install_state.complete_installation()
                 
                 logger.info("Setup finalized successfully")
                 return JsonResponse({
@@ -308,9 +305,7 @@ class SetupAPIView(View):
 @never_cache
 def setup_redirect(request):
     """Redireciona para o wizard se necessário"""
-    first_install_file = Path(settings.BASE_DIR) / '.first_install'
-    
-    if first_install_file.exists():
+    if install_state.is_first_installation():
         return redirect('config:setup_wizard')
     else:
         return redirect('pages:home')
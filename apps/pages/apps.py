@@ -8,5 +8,8 @@ class PagesConfig(AppConfig):
     verbose_name = "Páginas da Aplicação"
 
     def ready(self):
-        """Importa signals quando o app estiver pronto"""
+        """Importa signals e registra o índice de busca quando o app estiver pronto"""
         import apps.pages.signals
+        from core.search import search_engine
+        from apps.pages.search import PageSearchIndex
+        search_engine.register(PageSearchIndex())
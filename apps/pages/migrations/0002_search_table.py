@@ -0,0 +1,41 @@
+from django.db import migrations
+
+from core.search.indexes import SearchIndex
+from core.search.schema import create_table, drop_table, populate_table
+
+
+class PageSearchIndex(SearchIndex):
+    """apps.pages.search.PageSearchIndex no momento desta migração, sobre o modelo histórico"""
+    name = 'pages'
+    fields = {
+        'title': 3.0,
+        'excerpt': 2.0,
+        'meta_keywords': 2.0,
+        'content': 1.0,
+    }
+    html_fields = ('content',)
+
+    def __init__(self, model):
+        self.model = model
+
+
+def create_search_table(apps, schema_editor):
+    """Tabela FTS5 (SQLite) ou tsvector + GIN (PostgreSQL), já com as páginas existentes indexadas"""
+    index = PageSearchIndex(apps.get_model('pages', 'Page'))
+    create_table(schema_editor, f'search_{index.name}', tuple(index.fields))
+    populate_table(schema_editor, index)
+
+
+def drop_search_table(apps, schema_editor):
+    drop_table(schema_editor, 'search_pages')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_table, drop_search_table),
+    ]
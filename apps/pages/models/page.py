@@ -3,6 +3,7 @@ from django.urls import reverse
 from django.utils.text import slugify
 from django.contrib.auth import get_user_model
 from django.core.validators import MinLengthValidator
+from core.view_counter import view_count_buffer
 
 User = get_user_model()
 
@@ -185,9 +186,9 @@ class Page(models.Model):
         return self.page_set.filter(status='published').order_by('menu_order', 'title')
 
     def increment_view_count(self):
-        """Incrementa contador de visualizações"""
+        """Incrementa contador de visualizações (em buffer, gravado em lote)"""
+        view_count_buffer.increment(type(self), self.pk)
         self.view_count += 1
-        self.save(update_fields=['view_count'])
 
     @property
     def is_published(self):
@@ -1,9 +1,14 @@
 from typing import Dict, Any
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q, QuerySet, F
+from django.db.models import Q, QuerySet
 from django.utils import timezone
 from apps.pages.interfaces.repositories import IPageRepository
 from apps.pages.models import Page
+from core.search import ranked_queryset, search_engine
+from core.view_counter import view_count_buffer
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DjangoPageRepository(IPageRepository):
     """Implementação concreta do repositório de páginas para Django"""
@@ -80,10 +85,16 @@ class DjangoPageRepository(IPageRepository):
         ).order_by('menu_order', 'title')
     
     def search(self, query: str) -> QuerySet:
-        """Busca páginas por termo"""
+        """Busca páginas por termo (índice invertido com ranking de relevância)"""
         if not query:
             return Page.objects.none()
         
+        published = Page.objects.filter(status='published')
+        try:
+            return ranked_queryset(published, search_engine.search('pages', query, queryset=published))
+        except Exception as e:
+            logger.warning(f"Busca indexada indisponível, usando icontains: {e}")
+        
         return Page.objects.filter(
             Q(title__icontains=query) |
             Q(content__icontains=query) |
@@ -99,14 +110,8 @@ class DjangoPageRepository(IPageRepository):
         ).order_by('-view_count')[:limit]
     
     def increment_view_count(self, page_id: int) -> None:
-        """Incrementa contador de visualizações"""
-        try:
-            Page.objects.filter(id=page_id).update(
-                view_count=F('view_count') + 1
-            )
-        except Exception:
-            # Falha silenciosa para não afetar a experiência do usuário
-            pass
+        """Incrementa contador de visualizações (em buffer, gravado em lote)"""
+        view_count_buffer.increment(Page, page_id)
     
     def get_children(self, parent_id: int) -> QuerySet:
         """Obtém páginas filhas"""
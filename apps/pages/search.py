@@ -0,0 +1,18 @@
+"""
+Índice de busca de páginas
+"""
+from core.search import SearchIndex
+from apps.pages.models import Page
+
+
+class PageSearchIndex(SearchIndex):
+    """Título, resumo, palavras-chave e conteúdo, com pesos de relevância"""
+    name = 'pages'
+    model = Page
+    fields = {
+        'title': 3.0,
+        'excerpt': 2.0,
+        'meta_keywords': 2.0,
+        'content': 1.0,
+    }
+    html_fields = ('content',)
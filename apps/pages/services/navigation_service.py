@@ -1,10 +1,14 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from apps.pages.interfaces.services import INavigationService
 from apps.pages.interfaces.repositories import INavigationRepository
+from core.cache import cache_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAIN_NAVIGATION_CACHE_KEY = 'main_navigation'
+MAIN_NAVIGATION_CACHE_TIMEOUT = 3600
+
 class NavigationService(INavigationService):
     """Serviço para gerenciamento de navegação"""
     
@@ -16,6 +20,16 @@ class NavigationService(INavigationService):
         Obtém navegação principal
         :return: Lista de itens de navegação
         """
+        # L1 por processo + cache compartilhado; invalidado em apps.pages.signals.
+        # Falha ao ler o banco (None) não vai para o cache: a próxima requisição tenta de novo
+        navigation = cache_manager.get_or_set(
+            MAIN_NAVIGATION_CACHE_KEY, self._build_main_navigation,
+            timeout=MAIN_NAVIGATION_CACHE_TIMEOUT, backend_name='tiered', cache_none=False
+        )
+        return navigation if navigation is not None else []
+    
+    def _build_main_navigation(self) -> Optional[List[Dict]]:
+        """Monta a navegação principal a partir do banco (None se o banco falhar)"""
         try:
             items = self.navigation_repository.get_main_navigation()
             navigation_data = []
@@ -49,7 +63,7 @@ class NavigationService(INavigationService):
             return navigation_data
         except Exception as e:
             logger.error(f"Erro ao obter navegação principal: {str(e)}")
-            return []
+            return None
     
     def get_breadcrumbs(self, page) -> List[Dict]:
         """
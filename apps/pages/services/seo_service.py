@@ -2,10 +2,14 @@ from typing import Dict, Any, List
 from django.conf import settings
 from apps.pages.interfaces.services import ISEOService
 from apps.pages.interfaces.repositories import ISEORepository, IPageRepository
+from core.cache import cache_manager
 import logging
 
 logger = logging.getLogger(__name__)
 
+SEO_SETTINGS_CACHE_KEY = 'seo_settings'
+SEO_SETTINGS_CACHE_TIMEOUT = 3600
+
 class SEOService(ISEOService):
     """Serviço para gerenciamento de SEO"""
     
@@ -18,7 +22,11 @@ class SEOService(ISEOService):
         Obtém configurações de SEO
         :return: Configurações de SEO
         """
-        return self.seo_repository.get_settings()
+        # L1 por processo + cache compartilhado; invalidado em apps.pages.signals
+        return cache_manager.get_or_set(
+            SEO_SETTINGS_CACHE_KEY, self.seo_repository.get_settings,
+            timeout=SEO_SETTINGS_CACHE_TIMEOUT, backend_name='tiered'
+        )
     
     def update_seo_settings(self, seo_data: Dict[str, Any]):
         """
@@ -1,18 +1,26 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
+from core.cache import cache_manager
 from apps.pages.models import Page, NavigationItem, SEOSettings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+def delete_cache(key):
+    """Remove do cache compartilhado e do L1 de todos os processos (backend "tiered")"""
+    cache_manager.delete(key, backend_name='tiered')
+
+
 @receiver(post_save, sender=Page)
 def page_saved(sender, instance, created, **kwargs):
     """Signal executado quando uma página é salva"""
     # Limpa cache relacionado a páginas
-    cache.delete('homepage')
-    cache.delete('menu_pages')
-    cache.delete('published_pages')
+    delete_cache('homepage')
+    delete_cache('menu_pages')
+    delete_cache('published_pages')
+    # Itens de navegação apontam para a URL da página
+    delete_cache('main_navigation')
     
     # Log da ação
     action = 'criada' if created else 'atualizada'
@@ -22,9 +30,10 @@ def page_saved(sender, instance, created, **kwargs):
 def page_deleted(sender, instance, **kwargs):
     """Signal executado quando uma página é deletada"""
     # Limpa cache relacionado a páginas
-    cache.delete('homepage')
-    cache.delete('menu_pages')
-    cache.delete('published_pages')
+    delete_cache('homepage')
+    delete_cache('menu_pages')
+    delete_cache('published_pages')
+    delete_cache('main_navigation')
     
     # Log da ação
     logger.info(f"Página deletada: {instance.title}")
@@ -33,7 +42,7 @@ def page_deleted(sender, instance, **kwargs):
 def navigation_saved(sender, instance, created, **kwargs):
     """Signal executado quando um item de navegação é salvo"""
     # Limpa cache de navegação
-    cache.delete('main_navigation')
+    delete_cache('main_navigation')
     
     # Log da ação
     action = 'criado' if created else 'atualizado'
@@ -43,7 +52,7 @@ def navigation_saved(sender, instance, created, **kwargs):
 def navigation_deleted(sender, instance, **kwargs):
     """Signal executado quando um item de navegação é deletado"""
     # Limpa cache de navegação
-    cache.delete('main_navigation')
+    delete_cache('main_navigation')
     
     # Log da ação
     logger.info(f"Item de navegação deletado: {instance.title}")
@@ -52,7 +61,7 @@ def navigation_deleted(sender, instance, **kwargs):
 def seo_settings_saved(sender, instance, created, **kwargs):
     """Signal executado quando configurações de SEO são salvas"""
     # Limpa cache de SEO
-    cache.delete('seo_settings')
+    delete_cache('seo_settings')
     
     # Log da ação
     action = 'criadas' if created else 'atualizadas'
@@ -71,6 +80,6 @@ def clear_pages_cache():
     ]
     
     for key in cache_keys:
-        cache.delete(key)
+        delete_cache(key)
     
     logger.info("Cache de páginas limpo")
@@ -0,0 +1,50 @@
+import pytest
+
+from apps.pages.services.navigation_service import MAIN_NAVIGATION_CACHE_KEY, NavigationService
+from core.cache import cache_manager
+
+
+class FailingRepository:
+    def get_main_navigation(self):
+        raise RuntimeError('banco indisponível')
+
+
+class Item:
+    id = 1
+    title = 'Início'
+    icon = ''
+    css_class = ''
+    open_in_new_tab = False
+
+    def get_url(self):
+        return '/'
+
+    def get_children(self):
+        return []
+
+
+class WorkingRepository:
+    def get_main_navigation(self):
+        return [Item()]
+
+
+@pytest.fixture(autouse=True)
+def clear_navigation_cache():
+    cache_manager.delete(MAIN_NAVIGATION_CACHE_KEY, backend_name='tiered')
+    yield
+    cache_manager.delete(MAIN_NAVIGATION_CACHE_KEY, backend_name='tiered')
+
+
+def test_falha_do_banco_nao_fica_em_cache():
+    assert NavigationService(FailingRepository()).get_main_navigation() == []
+
+    navigation = NavigationService(WorkingRepository()).get_main_navigation()
+
+    assert [item['title'] for item in navigation] == ['Início']
+
+
+def test_navegacao_servida_do_cache():
+    NavigationService(WorkingRepository()).get_main_navigation()
+
+    # Em cache: o repositório não é consultado de novo
+    assert NavigationService(FailingRepository()).get_main_navigation()[0]['title'] == 'Início'
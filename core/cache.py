@@ -2,12 +2,24 @@
 Caching System
 Provides comprehensive caching utilities with multiple backends
 """
+import enum
 import json
+import heapq
+import itertools
 import logging
 import hashlib
+import math
+import random
+import sys
+import threading
+import time
+import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Union, Callable
-from datetime import datetime, timedelta
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from datetime import date, datetime, time as time_type
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Union, Callable
 from functools import wraps
 import pickle
 
@@ -44,6 +56,30 @@ class ICacheBackend(ABC):
     def clear(self) -> bool:
         """Clear all cache"""
         pass
+    
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Set value only if key is absent (not atomic unless the backend overrides it)"""
+        if self.exists(key):
+            return False
+        return self.set(key, value, timeout)
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values; missing keys are left out"""
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+    
+    def incr(self, key: str, delta: int = 1) -> Optional[int]:
+        """Increment an integer value; None when the key is missing (not atomic by default)"""
+        value = self.get(key)
+        if value is None:
+            return None
+        value += delta
+        self.set(key, value)
+        return value
 
 
 class DjangoCacheBackend(ICacheBackend):
@@ -83,6 +119,32 @@ class DjangoCacheBackend(ICacheBackend):
             logger.error(f"Error checking cache key {key}: {e}")
             return False
     
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Atomically set value if key is absent (shared across processes)"""
+        try:
+            return django_cache.add(key, value, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Error adding cache key {key}: {e}")
+            return False
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip"""
+        try:
+            return django_cache.get_many(keys)
+        except Exception as e:
+            logger.error(f"Error getting cache keys {keys}: {e}")
+            return {}
+    
+    def incr(self, key: str, delta: int = 1) -> Optional[int]:
+        """Atomically increment an integer value; None when the key is missing"""
+        try:
+            return django_cache.incr(key, delta)
+        except ValueError:
+            return None
+        except Exception as e:
+            logger.error(f"Error incrementing cache key {key}: {e}")
+            return None
+    
     def clear(self) -> bool:
         """Clear all Django cache"""
         try:
@@ -93,72 +155,440 @@ class DjangoCacheBackend(ICacheBackend):
             return False
 
 
+class _MemoryEntry:
+    """Compact cache entry (monotonic expiry, estimated size)"""
+    __slots__ = ('value', 'expires_at', 'size')
+
+    def __init__(self, value: Any, expires_at: Optional[float], size: int):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate size in bytes of a cached value"""
+    if isinstance(value, (bytes, bytearray, str)):
+        return sys.getsizeof(value)
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
 class MemoryCacheBackend(ICacheBackend):
-    """In-memory cache backend"""
-    
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
-    
+    """
+    Bounded, thread-safe in-memory LRU cache with per-entry TTL.
+
+    Entries live in an OrderedDict (LRU order) and expire on a monotonic
+    clock. Expiry deadlines are also kept in a heap, so the reaper that runs
+    on writes removes expired entries without scanning the whole cache
+    (amortized O(log n) per entry). When ``max_entries`` or ``max_bytes`` is
+    exceeded, the least recently used entries are evicted. Sizes are only
+    estimated when a byte limit is configured.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 default_timeout: Optional[int] = None, sizeof: Callable[[Any], int] = estimate_size,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = (max_entries if max_entries is not None
+                            else getattr(settings, 'MEMORY_CACHE_MAX_ENTRIES', 10000))
+        self.max_bytes = (max_bytes if max_bytes is not None
+                          else getattr(settings, 'MEMORY_CACHE_MAX_BYTES', 0))
+        self.default_timeout = default_timeout
+        self.sizeof = sizeof
+        self.clock = clock
+        self._cache: 'OrderedDict[str, _MemoryEntry]' = OrderedDict()
+        self._expiry_heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
     def get(self, key: str) -> Optional[Any]:
         """Get value from memory cache"""
-        if key in self._cache:
-            item = self._cache[key]
-            if item['expires_at'] is None or datetime.now() < item['expires_at']:
-                return item['value']
-            else:
-                del self._cache[key]
-        return None
-    
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry.expires_at is not None and entry.expires_at <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
     def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
-        """Set value in memory cache"""
-        expires_at = None
-        if timeout:
-            expires_at = datetime.now() + timedelta(seconds=timeout)
-        
-        self._cache[key] = {
-            'value': value,
-            'expires_at': expires_at,
-            'created_at': datetime.now()
-        }
+        """Set value in memory cache (timeout in seconds; None/0 uses the default)"""
+        timeout = timeout or self.default_timeout
+        size = self.sizeof(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            logger.debug(f"Value for cache key {key} exceeds max_bytes ({size} bytes)")
+            self.delete(key)
+            return False
+
+        with self._lock:
+            now = self.clock()
+            expires_at = now + timeout if timeout else None
+            if key in self._cache:
+                self._remove(key)
+            entry = _MemoryEntry(value, expires_at, size)
+            self._cache[key] = entry
+            self._bytes += size
+            if expires_at is not None:
+                heapq.heappush(self._expiry_heap, (expires_at, next(self._sequence), key, entry))
+            self._reap(now)
+            self._enforce_limits()
         return True
-    
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Atomically set value if key is absent"""
+        with self._lock:
+            if self.exists(key):
+                return False
+            return self.set(key, value, timeout)
+
+    def incr(self, key: str, delta: int = 1) -> Optional[int]:
+        """Atomically increment an integer value, keeping its expiry"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or (entry.expires_at is not None and entry.expires_at <= self.clock()):
+                return None
+            entry.value += delta
+            return entry.value
+
     def delete(self, key: str) -> bool:
         """Delete value from memory cache"""
-        if key in self._cache:
-            del self._cache[key]
-            return True
-        return False
-    
+        with self._lock:
+            if key in self._cache:
+                self._remove(key)
+                return True
+            return False
+
     def exists(self, key: str) -> bool:
         """Check if key exists in memory cache"""
-        return self.get(key) is not None
-    
+        with self._lock:
+            entry = self._cache.get(key)
+            return entry is not None and (entry.expires_at is None or entry.expires_at > self.clock())
+
     def clear(self) -> bool:
         """Clear all memory cache"""
-        self._cache.clear()
+        with self._lock:
+            self._cache.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
         return True
-    
+
+    def keys(self) -> List[str]:
+        """Snapshot of the keys currently stored (expired ones included until reaped)"""
+        with self._lock:
+            return list(self._cache)
+
+    def reap(self) -> int:
+        """Remove every expired entry; returns how many were removed"""
+        with self._lock:
+            return self._reap(self.clock())
+
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
+        with self._lock:
+            self._reap(self.clock())
+            lookups = self.hits + self.misses
+            return {
+                'total_keys': len(self._cache),
+                'total_bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key: str) -> None:
+        # The heap keeps its (now stale) deadline; the reaper skips it
+        entry = self._cache.pop(key)
+        self._bytes -= entry.size
+
+    def _reap(self, now: float) -> int:
+        heap = self._expiry_heap
+        removed = 0
+        while heap and heap[0][0] <= now:
+            _, _, key, entry = heapq.heappop(heap)
+            if self._cache.get(key) is entry:
+                self._remove(key)
+                self.expirations += 1
+                removed += 1
+        # Overwritten/deleted keys leave stale deadlines behind; rebuild when they dominate
+        if len(heap) > 2 * len(self._cache) + 64:
+            self._expiry_heap = [item for item in heap if self._cache.get(item[2]) is item[3]]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def _enforce_limits(self) -> None:
+        while self._cache and (
+            (self.max_entries and len(self._cache) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._cache))
+            self._remove(key)
+            self.evictions += 1
+
+
+class TieredCacheBackend(ICacheBackend):
+    """
+    Two-tier cache: a small per-process L1 in front of a shared L2.
+
+    Reads go to L1 first and fall back to L2 (read-through); writes and
+    deletes go to L2 and L1 (write-through). Other processes learn about
+    changes through an invalidation log kept in L2: every write/delete
+    increments a sequence counter and stores the affected key under that
+    sequence number. Each process replays the log at most once per
+    ``consistency_window`` seconds and drops the listed keys from its L1,
+    so a value changed elsewhere is served stale for at most that long.
+    When the log cannot be replayed (too far behind, entries expired, L2
+    cleared), the whole L1 is dropped instead.
+
+    L1 hands out the stored object itself: treat cached values as read-only.
+    """
+
+    SEQUENCE_KEY = 'core.cache:tiered:sequence'
+    LOG_KEY = 'core.cache:tiered:log:{sequence}'
+
+    def __init__(self, l1: Optional[ICacheBackend] = None, l2: Optional[ICacheBackend] = None,
+                 consistency_window: Optional[float] = None, l1_timeout: Optional[int] = None,
+                 log_size: Optional[int] = None, shared_cache=None):
+        self.l1 = l1 or MemoryCacheBackend(
+            max_entries=getattr(settings, 'TIERED_CACHE_L1_MAX_ENTRIES', 1000)
+        )
+        self.l2 = l2 or DjangoCacheBackend()
+        self.consistency_window = (consistency_window if consistency_window is not None
+                                   else getattr(settings, 'TIERED_CACHE_CONSISTENCY_WINDOW', 1.0))
+        self.l1_timeout = (l1_timeout if l1_timeout is not None
+                           else getattr(settings, 'TIERED_CACHE_L1_TIMEOUT', 60))
+        self.log_size = (log_size if log_size is not None
+                         else getattr(settings, 'TIERED_CACHE_LOG_SIZE', 1000))
+        # Where the invalidation log lives (the Django cache behind L2)
+        self.shared_cache = shared_cache or django_cache
+        self._last_sequence: Optional[int] = None
+        self._next_sync = 0.0
+        self._own_sequences: 'OrderedDict[int, None]' = OrderedDict()
+        self._sync_lock = threading.Lock()
+        # Statistics
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.syncs = 0
+        self.invalidations = 0
+        self.l1_flushes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from L1, falling back to L2"""
+        self._maybe_sync()
+        value = self.l1.get(key)
+        if value is not None:
+            self.l1_hits += 1
+            return value
+        value = self.l2.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.l2_hits += 1
+        self.l1.set(key, value, self.l1_timeout)
+        return value
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Set value in L2 and L1, and notify the other processes"""
+        stored = self.l2.set(key, value, timeout)
+        self._publish(key)
+        if stored:
+            self.l1.set(key, value, min(timeout, self.l1_timeout) if timeout else self.l1_timeout)
+        else:
+            self.l1.delete(key)
+        return stored
+
+    def delete(self, key: str) -> bool:
+        """Delete value from L2 and L1, and notify the other processes"""
+        deleted = self.l2.delete(key)
+        self._publish(key)
+        self.l1.delete(key)
+        return deleted
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        """Atomically set value if key is absent in L2"""
+        added = self.l2.add(key, value, timeout)
+        if added:
+            self._publish(key)
+            self.l1.delete(key)
+        return added
+
+    def incr(self, key: str, delta: int = 1) -> Optional[int]:
+        """Atomically increment an integer value in L2"""
+        value = self.l2.incr(key, delta)
+        self._publish(key)
+        self.l1.delete(key)
+        return value
+
+    def exists(self, key: str) -> bool:
+        """Check if key exists in either tier"""
+        return self.get(key) is not None
+
+    def clear(self) -> bool:
+        """Clear both tiers (other processes drop their L1 on the next sync)"""
+        self.l1.clear()
+        return self.l2.clear()
+
+    def sync(self) -> None:
+        """Replay the invalidation log now"""
+        self._next_sync = 0.0
+        self._maybe_sync()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.l1_hits + self.l2_hits + self.misses
         return {
-            'total_keys': len(self._cache),
-            'expired_keys': len([k for k, v in self._cache.items() 
-                               if v['expires_at'] and datetime.now() > v['expires_at']])
+            'l1_hits': self.l1_hits,
+            'l2_hits': self.l2_hits,
+            'misses': self.misses,
+            'l1_hit_ratio': self.l1_hits / lookups if lookups else 0.0,
+            'syncs': self.syncs,
+            'invalidations': self.invalidations,
+            'l1_flushes': self.l1_flushes,
+            'consistency_window': self.consistency_window,
+            'l1': self.l1.get_stats() if hasattr(self.l1, 'get_stats') else {},
         }
 
+    def _publish(self, key: str) -> None:
+        log_timeout = max(60, int(self.consistency_window * 10))
+        try:
+            self.shared_cache.add(self.SEQUENCE_KEY, 0, timeout=None)
+            sequence = self.shared_cache.incr(self.SEQUENCE_KEY)
+        except Exception as e:
+            # No atomic incr: jump the sequence so every process drops its L1
+            logger.debug(f"Falling back to L1 flush for cache key {key}: {e}")
+            try:
+                self.shared_cache.set(self.SEQUENCE_KEY, time.time_ns(), timeout=None)
+            except Exception as e:
+                logger.error(f"Error publishing cache invalidation for {key}: {e}")
+            return
+        try:
+            self.shared_cache.set(self.LOG_KEY.format(sequence=sequence), key, log_timeout)
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation for {key}: {e}")
+        with self._sync_lock:
+            self._own_sequences[sequence] = None
+            while len(self._own_sequences) > self.log_size:
+                self._own_sequences.popitem(last=False)
+
+    def _maybe_sync(self) -> None:
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        # One thread replays the log; the others keep serving from L1
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_sync = now + self.consistency_window
+            self._sync()
+        except Exception as e:
+            logger.error(f"Error syncing tiered cache: {e}")
+        finally:
+            self._sync_lock.release()
+
+    def _sync(self) -> None:
+        self.syncs += 1
+        current = self.shared_cache.get(self.SEQUENCE_KEY) or 0
+        last = self._last_sequence
+        self._last_sequence = current
+        if last is None or current == last:
+            if last is None:
+                self._flush_l1()
+            return
+        if current < last or current - last > self.log_size:
+            self._flush_l1()
+            return
+
+        sequences = [seq for seq in range(last + 1, current + 1) if seq not in self._own_sequences]
+        if not sequences:
+            return
+        log_keys = {self.LOG_KEY.format(sequence=seq): seq for seq in sequences}
+        entries = self.shared_cache.get_many(list(log_keys))
+        if len(entries) < len(log_keys):
+            # Log entries expired (or are not written yet): assume anything changed
+            self._flush_l1()
+            return
+        for key in entries.values():
+            self.l1.delete(key)
+            self.invalidations += 1
+
+    def _flush_l1(self) -> None:
+        self.l1.clear()
+        self.l1_flushes += 1
+
+
+class CachedValue(NamedTuple):
+    """Envelope stored by get_or_set: the value plus freshness metadata"""
+    value: Any
+    # Wall-clock deadline (shared by every process); None = never stale
+    fresh_until: Optional[float]
+    # How long the value took to compute (drives the early refresh)
+    compute_seconds: float
+    # ((tag, version), ...) at compute time; any bumped tag invalidates the entry
+    tags: tuple = ()
+
+
+class _KeyLocks:
+    """Per-key in-process locks, dropped when nobody holds or waits for them"""
+
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks: Dict[str, list] = {}
+
+    @contextmanager
+    def hold(self, key: str, timeout: float):
+        with self._guard:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        acquired = entry[0].acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                entry[0].release()
+            with self._guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    self._locks.pop(key, None)
+
+
+_MISSING = object()
+
 
 class CacheManager:
     """Cache manager with multiple backends"""
     
+    LOCK_KEY = '{key}:lock'
+    TAG_KEY = 'core.cache:tag:{tag}'
+    
     def __init__(self):
         self.backends: Dict[str, ICacheBackend] = {}
         self.default_backend = "django"
+        self._local_locks = _KeyLocks()
+        self._stats: Dict[str, int] = defaultdict(int)
         self._setup_default_backends()
     
     def _setup_default_backends(self):
         """Setup default cache backends"""
         self.register_backend("django", DjangoCacheBackend())
         self.register_backend("memory", MemoryCacheBackend())
+        self.register_backend("tiered", TieredCacheBackend())
     
     def register_backend(self, name: str, backend: ICacheBackend) -> None:
         """Register a cache backend"""
@@ -175,7 +605,10 @@ class CacheManager:
     def get(self, key: str, backend_name: Optional[str] = None) -> Optional[Any]:
         """Get value from cache"""
         backend = self.get_backend(backend_name)
-        return backend.get(key)
+        value = backend.get(key)
+        if isinstance(value, CachedValue):
+            return value.value
+        return value
     
     def set(self, key: str, value: Any, timeout: Optional[int] = None, 
             backend_name: Optional[str] = None) -> bool:
@@ -199,21 +632,190 @@ class CacheManager:
         return backend.clear()
     
     def get_or_set(self, key: str, default_func: Callable[[], Any], 
-                   timeout: Optional[int] = None, backend_name: Optional[str] = None) -> Any:
-        """Get value from cache or set default if not exists"""
+                   timeout: Optional[int] = None, backend_name: Optional[str] = None,
+                   stale_ttl: Optional[int] = None, cache_none: bool = True,
+                   negative_timeout: Optional[int] = None, beta: Optional[float] = None,
+                   lock_timeout: Optional[float] = None, tags: Optional[List[str]] = None) -> Any:
+        """
+        Get value from cache or compute and store it.
+        
+        - Single flight: on a miss only one caller computes the value, guarded
+          by a lock in the cache (``add``) plus a per-key in-process lock;
+          the other callers wait for the stored result.
+        - Stale-while-revalidate: values are kept ``stale_ttl`` seconds past
+          ``timeout``; a stale hit is served while one caller recomputes.
+        - Probabilistic early refresh: shortly before expiry one caller may
+          recompute early, with probability growing as the deadline nears
+          and with the cost of the computation (``beta`` scales it).
+        - Negative caching: ``None`` results are cached too (for
+          ``negative_timeout`` seconds) unless ``cache_none`` is False.
+        - Tags: the entry is dropped as soon as any of ``tags`` is
+          invalidated with invalidate_tags().
+        """
         backend = self.get_backend(backend_name)
-        value = backend.get(key)
+        if stale_ttl is None:
+            stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 30)
+        if beta is None:
+            beta = getattr(settings, 'CACHE_EARLY_REFRESH_BETA', 1.0)
+        if lock_timeout is None:
+            lock_timeout = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+        tag_versions = self._tag_versions(backend, tags) if tags else ()
+        options = (timeout, stale_ttl, cache_none, negative_timeout, tag_versions)
+        
+        entry = self._valid_entry(backend.get(key), tag_versions)
+        if entry is not None and not isinstance(entry, CachedValue):
+            # Plain value written with set()
+            self._stats['hits'] += 1
+            return entry
+        if entry is not None:
+            if not self._needs_refresh(entry, beta):
+                self._stats['negative_hits' if entry.value is None else 'hits'] += 1
+                return entry.value
+            # Stale or picked for early refresh: one caller recomputes, the rest keep serving it
+            token = self._acquire_lock(backend, key, lock_timeout)
+            if token is None:
+                self._stats['stale_served'] += 1
+                return entry.value
+            try:
+                stale = entry.fresh_until <= time.time()
+                self._stats['stale_refreshes' if stale else 'early_refreshes'] += 1
+                value = self._compute(backend, key, default_func, *options)
+                # Nothing cacheable came back (cache_none=False): keep serving the old value
+                return entry.value if value is None and not cache_none else value
+            finally:
+                self._release_lock(backend, key, token)
+        
+        self._stats['misses'] += 1
+        return self._compute_single_flight(backend, key, default_func, lock_timeout, options)
+    
+    def invalidate_tags(self, *tags: str, backend_name: Optional[str] = None) -> int:
+        """Invalidate every get_or_set entry stored with any of ``tags`` (any backend)"""
+        backend = self.get_backend(backend_name)
+        for tag in tags:
+            key = self.TAG_KEY.format(tag=tag)
+            if backend.incr(key) is None:
+                # Missing (never used or evicted): a fresh version matches no stored entry
+                backend.set(key, time.time_ns(), None)
+        self._stats['tag_invalidations'] += len(tags)
+        return len(tags)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """get_or_set counters (hits, misses, computes, stale_served, ...)"""
+        return dict(self._stats)
+    
+    def reset_stats(self) -> None:
+        """Reset get_or_set counters"""
+        self._stats.clear()
+    
+    def _compute_single_flight(self, backend: ICacheBackend, key: str, default_func: Callable[[], Any],
+                               lock_timeout: float, options: tuple) -> Any:
+        # Threads of this process queue on a local lock; processes race on the cache lock
+        with self._local_locks.hold(key, lock_timeout):
+            entry = self._valid_entry(backend.get(key), options[-1])
+            if entry is not None:
+                self._stats['coalesced'] += 1
+                return entry.value if isinstance(entry, CachedValue) else entry
+            
+            token = self._acquire_lock(backend, key, lock_timeout)
+            if token is not None:
+                try:
+                    return self._compute(backend, key, default_func, *options)
+                finally:
+                    self._release_lock(backend, key, token)
+            
+            value = self._wait_for(backend, key, lock_timeout, options[-1])
+            if value is not _MISSING:
+                self._stats['coalesced'] += 1
+                return value
+            # The lock holder did not deliver in time: compute anyway
+            self._stats['lock_timeouts'] += 1
+            return self._compute(backend, key, default_func, *options)
+    
+    def _compute(self, backend: ICacheBackend, key: str, default_func: Callable[[], Any],
+                 timeout: Optional[int], stale_ttl: int, cache_none: bool,
+                 negative_timeout: Optional[int], tag_versions: tuple = ()) -> Any:
+        start = time.monotonic()
+        value = default_func()
+        elapsed = time.monotonic() - start
+        self._stats['computes'] += 1
         if value is None:
-            value = default_func()
-            backend.set(key, value, timeout)
+            if not cache_none:
+                return None
+            if negative_timeout is not None:
+                timeout = negative_timeout
+        fresh_until = time.time() + timeout if timeout else None
+        backend.set(key, CachedValue(value, fresh_until, elapsed, tag_versions),
+                    timeout + stale_ttl if timeout else timeout)
         return value
     
+    def _tag_versions(self, backend: ICacheBackend, tags: List[str]) -> tuple:
+        keys = {self.TAG_KEY.format(tag=tag): tag for tag in sorted(set(tags))}
+        versions = backend.get_many(list(keys))
+        for key in keys:
+            if key not in versions:
+                # Start at a unique value so an evicted version never matches old entries
+                backend.add(key, time.time_ns(), None)
+                versions[key] = backend.get(key)
+        return tuple((tag, versions[key]) for key, tag in keys.items())
+    
+    def _valid_entry(self, entry: Any, tag_versions: tuple) -> Any:
+        if isinstance(entry, CachedValue) and entry.tags != tag_versions:
+            self._stats['tag_misses'] += 1
+            return None
+        return entry
+    
+    @staticmethod
+    def _needs_refresh(entry: CachedValue, beta: float) -> bool:
+        if entry.fresh_until is None:
+            return False
+        now = time.time()
+        if now >= entry.fresh_until:
+            return True
+        if not beta or not entry.compute_seconds:
+            return False
+        # XFetch: refresh early with probability rising towards the deadline
+        return now - entry.compute_seconds * beta * math.log(random.random() or 1e-12) >= entry.fresh_until
+    
+    @staticmethod
+    def _lock_backend(backend: ICacheBackend) -> ICacheBackend:
+        # Locks live in the shared tier only; they never need an L1 copy
+        return backend.l2 if isinstance(backend, TieredCacheBackend) else backend
+    
+    def _acquire_lock(self, backend: ICacheBackend, key: str, lock_timeout: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        timeout = max(1, int(math.ceil(lock_timeout)))
+        if self._lock_backend(backend).add(self.LOCK_KEY.format(key=key), token, timeout):
+            return token
+        return None
+    
+    def _release_lock(self, backend: ICacheBackend, key: str, token: str) -> None:
+        lock_backend = self._lock_backend(backend)
+        lock_key = self.LOCK_KEY.format(key=key)
+        if lock_backend.get(lock_key) == token:
+            lock_backend.delete(lock_key)
+    
+    def _wait_for(self, backend: ICacheBackend, key: str, lock_timeout: float,
+                  tag_versions: tuple = ()) -> Any:
+        self._stats['lock_waits'] += 1
+        deadline = time.monotonic() + lock_timeout
+        delay = 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            entry = self._valid_entry(backend.get(key), tag_versions)
+            if entry is not None:
+                return entry.value if isinstance(entry, CachedValue) else entry
+            if self._lock_backend(backend).get(self.LOCK_KEY.format(key=key)) is None:
+                # Holder gave up (error) without storing a value
+                return _MISSING
+            delay = min(delay * 2, 0.1)
+        return _MISSING
+    
     def invalidate_pattern(self, pattern: str, backend_name: Optional[str] = None) -> int:
-        """Invalidate all keys matching pattern (memory backend only)"""
+        """Invalidate all keys matching pattern (memory backend only; use tags elsewhere)"""
         backend = self.get_backend(backend_name)
         if isinstance(backend, MemoryCacheBackend):
             count = 0
-            keys_to_delete = [k for k in backend._cache.keys() if pattern in k]
+            keys_to_delete = [k for k in backend.keys() if pattern in k]
             for key in keys_to_delete:
                 if backend.delete(key):
                     count += 1
@@ -225,64 +827,136 @@ class CacheManager:
 cache_manager = CacheManager()
 
 
+class UnstableCacheKey(TypeError):
+    """An argument has no deterministic representation for a cache key"""
+
+
+def _canonical(value: Any) -> Any:
+    """JSON-ready form of ``value`` that is identical in every process"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    cache_key = getattr(value, 'cache_key', None)
+    if callable(cache_key):
+        return {'__key__': _canonical(cache_key())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted((_canonical(item) for item in value), key=_sort_key)}
+    if isinstance(value, dict):
+        return {'__dict__': sorted(([_canonical(k), _canonical(v)] for k, v in value.items()), key=_sort_key)}
+    if isinstance(value, bytes):
+        return {'__bytes__': value.hex()}
+    if isinstance(value, (datetime, date, time_type)):
+        return {'__time__': value.isoformat()}
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return {f'__{type(value).__name__}__': str(value)}
+    if isinstance(value, enum.Enum):
+        return {'__enum__': f'{type(value).__qualname__}.{value.name}'}
+    meta = getattr(value, '_meta', None)
+    if meta is not None and hasattr(value, 'pk'):
+        # Django model instance: identified by label and primary key
+        return {'__model__': meta.label_lower, 'pk': _canonical(value.pk)}
+    raise UnstableCacheKey(f"Cannot build a stable cache key from {type(value).__name__}")
+
+
+def _sort_key(item: Any) -> str:
+    return json.dumps(item, sort_keys=True, separators=(',', ':'))
+
+
+def make_cache_key(func: Callable, args: tuple = (), kwargs: Optional[Dict[str, Any]] = None,
+                   key_prefix: str = "") -> str:
+    """
+    Deterministic cache key for a call: ``<prefix>:<module.qualname>:<digest>``.
+    
+    The digest covers a canonical JSON serialization of the arguments, so the
+    same call produces the same key in every process (unlike ``hash()``,
+    which is salted per process for strings). Model instances are keyed by
+    label and pk; objects can define ``cache_key()``. Anything else raises
+    UnstableCacheKey.
+    """
+    payload = json.dumps(
+        [_canonical(list(args)), _canonical(kwargs or {})],
+        sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+    )
+    digest = hashlib.sha256(payload.encode()).hexdigest()[:32]
+    name = f"{func.__module__}.{func.__qualname__}"
+    return f"{key_prefix or 'cache'}:{name}:{digest}"
+
+
+_not_cached_warned = set()
+
+
+def _log_not_cached(func: Callable, error: UnstableCacheKey) -> None:
+    """Warn once per function about uncacheable calls, then log at debug level"""
+    name = f"{func.__module__}.{func.__qualname__}"
+    level = logging.DEBUG if name in _not_cached_warned else logging.WARNING
+    _not_cached_warned.add(name)
+    logger.log(level, f"Not caching {func.__qualname__}: {error}")
+
+
+def _resolve_tags(tags, args: tuple, kwargs: Dict[str, Any]) -> Optional[List[str]]:
+    """Tags of a call: callable(*args, **kwargs) or templates formatted with the arguments"""
+    if not tags:
+        return None
+    if callable(tags):
+        return list(tags(*args, **kwargs))
+    return [tag.format(*args, **kwargs) for tag in tags]
+
+
 def cache_result(timeout: Optional[int] = None, key_prefix: str = "", 
-                backend_name: Optional[str] = None):
-    """Decorator to cache function results"""
+                backend_name: Optional[str] = None, stale_ttl: Optional[int] = None,
+                cache_none: bool = True, tags=None):
+    """
+    Decorator to cache function results (see CacheManager.get_or_set).
+    
+    ``tags`` is a list of templates formatted with the call arguments
+    (e.g. ``['article:{0}']``) or a callable returning the tags; entries are
+    dropped by ``cache_manager.invalidate_tags(...)``.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            # Generate cache key
-            key_parts = [key_prefix, func.__name__]
-            if args:
-                key_parts.append(str(hash(args)))
-            if kwargs:
-                key_parts.append(str(hash(frozenset(kwargs.items()))))
-            
-            cache_key = hashlib.md5(":".join(key_parts).encode()).hexdigest()
-            
-            # Try to get from cache
-            result = cache_manager.get(cache_key, backend_name)
-            if result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return result
+            try:
+                cache_key = make_cache_key(func, args, kwargs, key_prefix)
+            except UnstableCacheKey as e:
+                _log_not_cached(func, e)
+                return func(*args, **kwargs)
             
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache_manager.set(cache_key, result, timeout, backend_name)
-            logger.debug(f"Cached result for {func.__name__}")
-            
-            return result
+            return cache_manager.get_or_set(
+                cache_key, lambda: func(*args, **kwargs), timeout, backend_name,
+                stale_ttl=stale_ttl, cache_none=cache_none,
+                tags=_resolve_tags(tags, args, kwargs)
+            )
         return wrapper
     return decorator
 
 
 def cache_method_result(timeout: Optional[int] = None, key_prefix: str = "", 
-                       backend_name: Optional[str] = None):
-    """Decorator to cache method results"""
+                       backend_name: Optional[str] = None, stale_ttl: Optional[int] = None,
+                       cache_none: bool = True, tags=None):
+    """
+    Decorator to cache method results (see cache_result).
+    
+    ``self`` is part of the key like any other argument: model instances
+    are keyed by label and pk, other objects must define ``cache_key()``
+    (a stateless service can return a constant to share entries across
+    instances). Without either, calls are not cached. Tag templates and
+    callables receive the arguments without ``self``.
+    """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            # Generate cache key including instance
-            key_parts = [key_prefix, func.__name__, str(id(self))]
-            if args:
-                key_parts.append(str(hash(args)))
-            if kwargs:
-                key_parts.append(str(hash(frozenset(kwargs.items()))))
-            
-            cache_key = hashlib.md5(":".join(key_parts).encode()).hexdigest()
-            
-            # Try to get from cache
-            result = cache_manager.get(cache_key, backend_name)
-            if result is not None:
-                logger.debug(f"Cache hit for {func.__name__}")
-                return result
-            
-            # Execute method and cache result
-            result = func(self, *args, **kwargs)
-            cache_manager.set(cache_key, result, timeout, backend_name)
-            logger.debug(f"Cached result for {func.__name__}")
+            try:
+                cache_key = make_cache_key(func, (self,) + args, kwargs, key_prefix)
+            except UnstableCacheKey as e:
+                _log_not_cached(func, e)
+                return func(self, *args, **kwargs)
             
-            return result
+            return cache_manager.get_or_set(
+                cache_key, lambda: func(self, *args, **kwargs), timeout, backend_name,
+                stale_ttl=stale_ttl, cache_none=cache_none,
+                tags=_resolve_tags(tags, args, kwargs)
+            )
         return wrapper
     return decorator
 
@@ -4,8 +4,12 @@ ServiceFactory - Fábrica central de serviços do projeto
 - Serviços obrigatórios: RegistrationService, PasswordService, AuthService, ProfileService, EmailService, ArticleService, PageService
 - Serviços opcionais: NavigationService, SEOService, UserManagementService, PermissionManagementService, SystemConfigService, ModuleService, EmailConfigService, DatabaseService
 
+- Serviços e repositórios são resolvidos sob demanda a partir de caminhos pontilhados
+  (SERVICE_REGISTRY / REPOSITORY_REGISTRY): importar este módulo não importa nenhum deles
+- Instâncias com as dependências padrão são singletons (criação protegida por lock)
 - Em ambiente de desenvolvimento/teste, faz fallback para mocks/stubs se serviço não existir
 - Permite registro dinâmico de serviços customizados
+- get_import_report() mostra quanto tempo levou a importação de cada implementação
 
 Exemplo de uso:
 from core.factories import service_factory
@@ -13,77 +17,62 @@ article_service = service_factory.create_article_service()
 
 """
 
-from typing import Dict, Any, Optional, Type
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 from django.conf import settings
-from django.core.cache import cache
-import importlib
+from django.utils.module_loading import import_string
 import logging
+import threading
+import time
+
+if TYPE_CHECKING:
+    from apps.accounts.interfaces.services import (
+        IRegistrationService, IPasswordService, IAuthService,
+        IProfileService, IEmailService
+    )
+    from apps.accounts.interfaces.repositories import IUserRepository, IVerificationRepository
+    from apps.articles.interfaces.services import IArticleService
+    from apps.articles.interfaces.repositories import IArticleRepository
+    from apps.pages.interfaces.services import IPageService, ISEOService
+    from apps.pages.interfaces.repositories import IPageRepository, ISEORepository
+    from apps.config.interfaces.repositories import IUserRepository as IConfigUserRepository, IPermissionRepository, ISystemConfigRepository
+    from apps.config.interfaces.services import IUserManagementService, IPermissionManagementService, ISystemConfigService, IModuleService, IEmailConfigService, IDatabaseService
 
 logger = logging.getLogger(__name__)
 
-# Imports obrigatórios
-from apps.accounts.services.registration_service import RegistrationService
-from apps.accounts.services.password_service import PasswordService
-from apps.accounts.services.auth_service import AuthService
-from apps.accounts.services.profile_service import ProfileService
-from apps.accounts.services.email_service import EmailService
-from apps.articles.services.article_service import ArticleService
-from apps.pages.services.page_service import PageService
-
-# Imports opcionais com tratamento
-try:
-    from apps.pages.services.navigation_service import NavigationService
-except ImportError:
-    NavigationService = None
-try:
-    from apps.pages.services.seo_service import SEOService
-except ImportError:
-    SEOService = None
-try:
-    from apps.config.services.user_management_service import UserManagementService
-except ImportError:
-    UserManagementService = None
-try:
-    from apps.config.services.permission_management_service import PermissionManagementService
-except ImportError:
-    PermissionManagementService = None
-try:
-    from apps.config.services.system_config_service import SystemConfigService
-except ImportError:
-    SystemConfigService = None
-try:
-    from apps.config.services.module_service import ModuleService
-except ImportError:
-    ModuleService = None
-try:
-    from apps.config.services.email_config_service import EmailConfigService
-except ImportError:
-    EmailConfigService = None
-try:
-    from apps.config.services.database_service import DatabaseService
-except ImportError:
-    DatabaseService = None
-
-# Imports dos Repositories (obrigatórios)
-from apps.accounts.repositories.user_repository import DjangoUserRepository
-from apps.accounts.repositories.verification_repository import DjangoVerificationRepository
-from apps.articles.repositories.article_repository import DjangoArticleRepository
-from apps.pages.repositories.page_repository import DjangoPageRepository
-from apps.pages.repositories.seo_repository import DjangoSEORepository
-from apps.config.repositories.user_repository import DjangoUserRepository as DjangoConfigUserRepository
-
-# Interfaces
-from apps.accounts.interfaces.services import (
-    IRegistrationService, IPasswordService, IAuthService, 
-    IProfileService, IEmailService
-)
-from apps.accounts.interfaces.repositories import IUserRepository, IVerificationRepository
-from apps.articles.interfaces.services import IArticleService
-from apps.articles.interfaces.repositories import IArticleRepository
-from apps.pages.interfaces.services import IPageService, ISEOService
-from apps.pages.interfaces.repositories import IPageRepository, ISEORepository
-from apps.config.interfaces.repositories import IUserRepository as IConfigUserRepository, IPermissionRepository, ISystemConfigRepository
-from apps.config.interfaces.services import IUserManagementService, IPermissionManagementService, ISystemConfigService, IModuleService, IEmailConfigService, IDatabaseService
+# Implementação padrão de cada interface (SERVICE_OVERRIDES nas settings tem precedência)
+SERVICE_REGISTRY = {
+    'IRegistrationService': 'apps.accounts.services.registration_service.RegistrationService',
+    'IPasswordService': 'apps.accounts.services.password_service.PasswordService',
+    'IAuthService': 'apps.accounts.services.auth_service.AuthService',
+    'IProfileService': 'apps.accounts.services.profile_service.ProfileService',
+    'IEmailService': 'apps.accounts.services.email_service.EmailService',
+    'IArticleService': 'apps.articles.services.article_service.ArticleService',
+    'IPageService': 'apps.pages.services.page_service.PageService',
+    'INavigationService': 'apps.pages.services.navigation_service.NavigationService',
+    'ISEOService': 'apps.pages.services.seo_service.SEOService',
+    'IUserManagementService': 'apps.config.services.user_management_service.UserManagementService',
+    'IPermissionManagementService': 'apps.config.services.permission_management_service.PermissionManagementService',
+    'ISystemConfigService': 'apps.config.services.system_config_service.SystemConfigService',
+    'IModuleService': 'apps.config.services.module_service.ModuleService',
+    'IEmailConfigService': 'apps.config.services.email_config_service.EmailConfigService',
+    'IDatabaseService': 'apps.config.services.database_service.DatabaseService',
+}
+
+# Serviços que podem não existir nesta instalação (resolvem para None)
+OPTIONAL_SERVICES = {
+    'INavigationService', 'ISEOService', 'IUserManagementService', 'IPermissionManagementService',
+    'ISystemConfigService', 'IModuleService', 'IEmailConfigService', 'IDatabaseService',
+}
+
+REPOSITORY_REGISTRY = {
+    'user_repository': 'apps.accounts.repositories.user_repository.DjangoUserRepository',
+    'verification_repository': 'apps.accounts.repositories.verification_repository.DjangoVerificationRepository',
+    'article_repository': 'apps.articles.repositories.article_repository.DjangoArticleRepository',
+    'page_repository': 'apps.pages.repositories.page_repository.DjangoPageRepository',
+    'seo_repository': 'apps.pages.repositories.seo_repository.DjangoSEORepository',
+    'config_user_repository': 'apps.config.repositories.user_repository.DjangoUserRepository',
+}
+
 
 class ServiceFactory:
     """
@@ -91,251 +80,207 @@ class ServiceFactory:
     Implementa padrão Singleton para cache de instâncias
     Permite fallback para mocks em dev/test
     Permite registro dinâmico de serviços customizados
+
+    Serviços criados com dependências explícitas não entram no cache: a
+    chave antiga usava id() dos argumentos, que pode ser reaproveitado
+    depois que o objeto é coletado.
     """
     _instance = None
     _services_cache: Dict[str, Any] = {}
     _custom_services: Dict[str, Any] = {}
-    
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
-    
+
     def __init__(self):
         if not hasattr(self, '_initialized'):
             self._initialized = True
-            self._initialize_repositories()
+            # Reentrante: criar um serviço cria as dependências dele
+            self._lock = threading.RLock()
+            self._repositories: Dict[str, Any] = {}
+            self._classes: Dict[str, Any] = {}
+            self._import_times: Dict[str, float] = {}
             self._load_custom_config()
-    
-    def _initialize_repositories(self):
-        self._repositories = {
-            'user_repository': DjangoUserRepository(),
-            'verification_repository': DjangoVerificationRepository(),
-            'article_repository': DjangoArticleRepository(),
-            'page_repository': DjangoPageRepository(),
-            'seo_repository': DjangoSEORepository(),
-            'config_user_repository': DjangoConfigUserRepository(),
-        }
-    
+
     def _load_custom_config(self):
         self.custom_implementations = getattr(settings, 'SERVICE_OVERRIDES', {})
-    
+
+    def _import(self, path: str):
+        start = time.perf_counter()
+        try:
+            return import_string(path)
+        finally:
+            self._import_times.setdefault(path, (time.perf_counter() - start) * 1000)
+
     def get_repository(self, repository_type: str):
-        return self._repositories.get(repository_type)
-    
+        repository = self._repositories.get(repository_type)
+        if repository is None and repository_type in REPOSITORY_REGISTRY:
+            with self._lock:
+                repository = self._repositories.get(repository_type)
+                if repository is None:
+                    repository = self._import(REPOSITORY_REGISTRY[repository_type])()
+                    self._repositories[repository_type] = repository
+        return repository
+
     def register_service(self, interface_name: str, implementation):
         """Permite registrar serviço customizado em runtime"""
         self._custom_services[interface_name] = implementation
-    
-    def _get_implementation_class(self, interface_name: str, default_class):
+
+    def get_service_class(self, interface_name: str):
+        """Classe que implementa a interface (None para serviço opcional ausente)"""
         # 1. Verifica registro dinâmico
         if interface_name in self._custom_services:
             return self._custom_services[interface_name]
-        # 2. Verifica settings
-        custom_class = self.custom_implementations.get(interface_name)
-        if custom_class:
-            module_path, class_name = custom_class.rsplit('.', 1)
-            module = importlib.import_module(module_path)
-            return getattr(module, class_name)
-        # 3. Fallback para default
-        return default_class
-    
-    def create_article_service(self, article_repository: IArticleRepository = None) -> IArticleService:
-        cache_key = f"article_service_{id(article_repository)}"
-        if cache_key not in self._services_cache:
-            article_repo = article_repository or self.get_repository('article_repository')
-            service_class = self._get_implementation_class('IArticleService', ArticleService)
-            self._services_cache[cache_key] = service_class(article_repository=article_repo)
-        return self._services_cache[cache_key]
-    
-    def create_registration_service(self, 
-                                  user_repository: IUserRepository = None,
-                                  verification_repository: IVerificationRepository = None,
-                                  email_service: IEmailService = None) -> IRegistrationService:
+        if interface_name in self._classes:
+            return self._classes[interface_name]
+        # 2. Verifica settings; 3. Fallback para o registro padrão
+        path = self.custom_implementations.get(interface_name) or SERVICE_REGISTRY[interface_name]
+        try:
+            service_class = self._import(path)
+        except ImportError:
+            if interface_name not in OPTIONAL_SERVICES:
+                raise
+            logger.warning(f"{interface_name} não disponível ({path})")
+            service_class = None
+        self._classes[interface_name] = service_class
+        return service_class
+
+    def _get_or_create(self, cache_key: str, build: Callable[[], Any], *dependencies) -> Any:
+        """Singleton para as dependências padrão; instância nova quando alguma é injetada"""
+        if any(dependency is not None for dependency in dependencies):
+            return build()
+        service = self._services_cache.get(cache_key)
+        if service is None:
+            with self._lock:
+                service = self._services_cache.get(cache_key)
+                if service is None:
+                    service = build()
+                    self._services_cache[cache_key] = service
+        return service
+
+    def create_article_service(self, article_repository: 'IArticleRepository' = None) -> 'IArticleService':
+        return self._get_or_create('article_service', lambda: self.get_service_class('IArticleService')(
+            article_repository=article_repository or self.get_repository('article_repository')
+        ), article_repository)
+
+    def create_registration_service(self,
+                                  user_repository: 'IUserRepository' = None,
+                                  verification_repository: 'IVerificationRepository' = None,
+                                  email_service: 'IEmailService' = None) -> 'IRegistrationService':
         """Cria RegistrationService com dependências injetadas"""
-        cache_key = f"registration_service_{id(user_repository)}_{id(verification_repository)}_{id(email_service)}"
-        
-        if cache_key not in self._services_cache:
-            user_repo = user_repository or self.get_repository('user_repository')
-            verification_repo = verification_repository or self.get_repository('verification_repository')
-            email_svc = email_service or self.create_email_service()
-            
-            self._services_cache[cache_key] = RegistrationService(
-                user_repository=user_repo,
-                verification_repository=verification_repo,
-                email_service=email_svc
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_password_service(self, 
-                              user_repository: IUserRepository = None,
-                              email_service: IEmailService = None) -> IPasswordService:
+        return self._get_or_create('registration_service', lambda: self.get_service_class('IRegistrationService')(
+            user_repository=user_repository or self.get_repository('user_repository'),
+            verification_repository=verification_repository or self.get_repository('verification_repository'),
+            email_service=email_service or self.create_email_service()
+        ), user_repository, verification_repository, email_service)
+
+    def create_password_service(self,
+                              user_repository: 'IUserRepository' = None,
+                              email_service: 'IEmailService' = None) -> 'IPasswordService':
         """Cria PasswordService com dependências injetadas"""
-        cache_key = f"password_service_{id(user_repository)}_{id(email_service)}"
-        
-        if cache_key not in self._services_cache:
-            user_repo = user_repository or self.get_repository('user_repository')
-            email_svc = email_service or self.create_email_service()
-            
-            self._services_cache[cache_key] = PasswordService(
-                user_repository=user_repo,
-                email_service=email_svc
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_auth_service(self, 
-                          user_repository: IUserRepository = None) -> IAuthService:
+        return self._get_or_create('password_service', lambda: self.get_service_class('IPasswordService')(
+            user_repository=user_repository or self.get_repository('user_repository'),
+            email_service=email_service or self.create_email_service()
+        ), user_repository, email_service)
+
+    def create_auth_service(self,
+                          user_repository: 'IUserRepository' = None) -> 'IAuthService':
         """Cria AuthService com dependências injetadas"""
-        cache_key = f"auth_service_{id(user_repository)}"
-        
-        if cache_key not in self._services_cache:
-            user_repo = user_repository or self.get_repository('user_repository')
-            
-            self._services_cache[cache_key] = AuthService(
-                user_repository=user_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_profile_service(self, 
-                             user_repository: IUserRepository = None,
-                             email_service: IEmailService = None) -> IProfileService:
+        return self._get_or_create('auth_service', lambda: self.get_service_class('IAuthService')(
+            user_repository=user_repository or self.get_repository('user_repository')
+        ), user_repository)
+
+    def create_profile_service(self,
+                             user_repository: 'IUserRepository' = None,
+                             email_service: 'IEmailService' = None) -> 'IProfileService':
         """Cria ProfileService com dependências injetadas"""
-        cache_key = f"profile_service_{id(user_repository)}_{id(email_service)}"
-        
-        if cache_key not in self._services_cache:
-            user_repo = user_repository or self.get_repository('user_repository')
-            email_svc = email_service or self.create_email_service()
-            
-            self._services_cache[cache_key] = ProfileService(
-                user_repository=user_repo,
-                email_service=email_svc
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_email_service(self) -> IEmailService:
+        return self._get_or_create('profile_service', lambda: self.get_service_class('IProfileService')(
+            user_repository=user_repository or self.get_repository('user_repository'),
+            email_service=email_service or self.create_email_service()
+        ), user_repository, email_service)
+
+    def create_email_service(self) -> 'IEmailService':
         """Cria EmailService"""
-        cache_key = "email_service"
-        
-        if cache_key not in self._services_cache:
-            self._services_cache[cache_key] = EmailService()
-        
-        return self._services_cache[cache_key]
-    
-    def create_page_service(self, 
-                          page_repository: IPageRepository = None) -> IPageService:
+        return self._get_or_create('email_service', lambda: self.get_service_class('IEmailService')())
+
+    def create_page_service(self,
+                          page_repository: 'IPageRepository' = None) -> 'IPageService':
         """Cria PageService com dependências injetadas"""
-        cache_key = f"page_service_{id(page_repository)}"
-        
-        if cache_key not in self._services_cache:
-            page_repo = page_repository or self.get_repository('page_repository')
-            
-            self._services_cache[cache_key] = PageService(
-                page_repository=page_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
+        return self._get_or_create('page_service', lambda: self.get_service_class('IPageService')(
+            page_repository=page_repository or self.get_repository('page_repository')
+        ), page_repository)
+
     def create_navigation_service(self):
-        if NavigationService:
-            return NavigationService()
+        service_class = self.get_service_class('INavigationService')
+        if service_class:
+            return self._get_or_create('navigation_service', service_class)
         logger.warning('NavigationService não disponível, usando mock')
         return lambda *a, **kw: None
-    
-    def create_seo_service(self, 
-                          seo_repository: ISEORepository = None) -> ISEOService:
+
+    def create_seo_service(self,
+                          seo_repository: 'ISEORepository' = None) -> 'ISEOService':
         """Cria SEOService com dependências injetadas"""
-        cache_key = f"seo_service_{id(seo_repository)}"
-        
-        if cache_key not in self._services_cache:
-            seo_repo = seo_repository or self.get_repository('seo_repository')
-            
-            self._services_cache[cache_key] = SEOService(
-                seo_repository=seo_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_user_management_service(self, 
-                                     user_repository: IConfigUserRepository = None) -> IUserManagementService:
+        return self._get_or_create('seo_service', lambda: self.get_service_class('ISEOService')(
+            seo_repository=seo_repository or self.get_repository('seo_repository')
+        ), seo_repository)
+
+    def create_user_management_service(self,
+                                     user_repository: 'IConfigUserRepository' = None) -> 'IUserManagementService':
         """Cria UserManagementService com dependências injetadas"""
-        cache_key = f"user_management_service_{id(user_repository)}"
-        
-        if cache_key not in self._services_cache:
-            user_repo = user_repository or self.get_repository('config_user_repository')
-            
-            self._services_cache[cache_key] = UserManagementService(
-                user_repository=user_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_permission_management_service(self, 
-                                           permission_repository: IPermissionRepository = None) -> IPermissionManagementService:
+        return self._get_or_create('user_management_service', lambda: self.get_service_class('IUserManagementService')(
+            user_repository=user_repository or self.get_repository('config_user_repository')
+        ), user_repository)
+
+    def create_permission_management_service(self,
+                                           permission_repository: 'IPermissionRepository' = None) -> 'IPermissionManagementService':
         """Cria PermissionManagementService com dependências injetadas"""
-        cache_key = f"permission_management_service_{id(permission_repository)}"
-        
-        if cache_key not in self._services_cache:
-            perm_repo = permission_repository or self.get_repository('permission_repository')
-            
-            self._services_cache[cache_key] = PermissionManagementService(
-                permission_repository=perm_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_system_config_service(self, 
-                                   config_repository: ISystemConfigRepository = None) -> ISystemConfigService:
+        return self._get_or_create('permission_management_service', lambda: self.get_service_class('IPermissionManagementService')(
+            permission_repository=permission_repository or self.get_repository('permission_repository')
+        ), permission_repository)
+
+    def create_system_config_service(self,
+                                   config_repository: 'ISystemConfigRepository' = None) -> 'ISystemConfigService':
         """Cria SystemConfigService com dependências injetadas"""
-        cache_key = f"system_config_service_{id(config_repository)}"
-        
-        if cache_key not in self._services_cache:
-            config_repo = config_repository or self.get_repository('system_config_repository')
-            
-            self._services_cache[cache_key] = SystemConfigService(
-                config_repository=config_repo
-            )
-        
-        return self._services_cache[cache_key]
-    
-    def create_module_service(self) -> IModuleService:
+        return self._get_or_create('system_config_service', lambda: self.get_service_class('ISystemConfigService')(
+            config_repository=config_repository or self.get_repository('system_config_repository')
+        ), config_repository)
+
+    def create_module_service(self) -> 'IModuleService':
         """Cria ModuleService"""
-        cache_key = "module_service"
-        
-        if cache_key not in self._services_cache:
-            self._services_cache[cache_key] = ModuleService()
-        
-        return self._services_cache[cache_key]
-    
-    def create_email_config_service(self) -> IEmailConfigService:
+        return self._get_or_create('module_service', lambda: self.get_service_class('IModuleService')())
+
+    def create_email_config_service(self) -> 'IEmailConfigService':
         """Cria EmailConfigService"""
-        cache_key = "email_config_service"
-        
-        if cache_key not in self._services_cache:
-            self._services_cache[cache_key] = EmailConfigService()
-        
-        return self._services_cache[cache_key]
-    
-    def create_database_service(self) -> IDatabaseService:
+        return self._get_or_create('email_config_service', lambda: self.get_service_class('IEmailConfigService')())
+
+    def create_database_service(self) -> 'IDatabaseService':
         """Cria DatabaseService"""
-        cache_key = "database_service"
-        
-        if cache_key not in self._services_cache:
-            self._services_cache[cache_key] = DatabaseService()
-        
-        return self._services_cache[cache_key]
-    
+        return self._get_or_create('database_service', lambda: self.get_service_class('IDatabaseService')())
+
     def clear_cache(self):
         """Limpa o cache de serviços"""
-        self._services_cache.clear()
-    
+        with self._lock:
+            self._services_cache.clear()
+            self._classes.clear()
+
     def get_cached_services(self) -> Dict[str, Any]:
         """Retorna serviços em cache para debugging"""
         return self._services_cache.copy()
 
+    def get_import_report(self) -> Dict[str, Optional[float]]:
+        """
+        Tempo (ms) da importação de cada implementação registrada; None = ainda não importada.
+
+        O tempo é o da primeira resolução pela factory: um módulo que já
+        tinha sido importado por outro caminho aparece com custo próximo de zero.
+        """
+        paths = list(SERVICE_REGISTRY.values()) + list(REPOSITORY_REGISTRY.values())
+        paths += [path for path in self.custom_implementations.values() if path not in paths]
+        report = {path: self._import_times.get(path) for path in paths}
+        return dict(sorted(report.items(), key=lambda item: -(item[1] or 0.0)))
+
 
 # Instância global do factory
-service_factory = ServiceFactory() 
\ No newline at end of file
+service_factory = ServiceFactory()
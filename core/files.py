@@ -0,0 +1,99 @@
+"""
+Atomic File Writes and Cross-Process File Locks
+Shared by the image derivatives, avatar processing, metrics snapshots and
+media backups, which all rewrite files other processes read concurrently
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, Optional
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Temporary files end with this suffix (the media backup skips them)
+TEMP_SUFFIX = '.tmp'
+
+
+def file_permissions() -> int:
+    """Mode of the written files: FILE_UPLOAD_PERMISSIONS, like any uploaded media file"""
+    return getattr(settings, 'FILE_UPLOAD_PERMISSIONS', None) or 0o644
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'wb', encoding: Optional[str] = None,
+                 permissions: Optional[int] = None) -> Iterator[IO]:
+    """
+    Write ``path`` through a temporary file in the same directory.
+
+    The temporary file is renamed over ``path`` only when the block succeeds,
+    so readers never see a partial file; on error it is removed. mkstemp
+    creates it with mode 0600, so ``permissions`` (FILE_UPLOAD_PERMISSIONS by
+    default) is applied before the rename: the media web server runs as
+    another user.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=TEMP_SUFFIX)
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as tmp_file:
+            yield tmp_file
+        os.chmod(tmp_path, permissions if permissions is not None else file_permissions())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_json(path: str, data: Any, permissions: Optional[int] = None) -> None:
+    """Atomically write ``data`` as compact JSON"""
+    with atomic_write(path, 'w', encoding='utf-8', permissions=permissions) as json_file:
+        json.dump(data, json_file, separators=(',', ':'))
+
+
+class FileLock:
+    """
+    Exclusive flock on ``path``, shared by every process of the host.
+
+    Use as a context manager (blocking) or call ``acquire()`` / ``release()``
+    to hold it across calls; ``acquire(blocking=False)`` raises
+    BlockingIOError when another holder has it. A no-op where fcntl is not
+    available (``FileLock.supported`` is False).
+    """
+
+    supported = fcntl is not None
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def acquire(self, blocking: bool = True) -> 'FileLock':
+        if not self.supported:
+            return self
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        lock_file = open(self.path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BaseException:
+            lock_file.close()
+            raise
+        self._file = lock_file
+        return self
+
+    def release(self) -> None:
+        if self._file is not None:
+            # Closing the descriptor releases the flock
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> 'FileLock':
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
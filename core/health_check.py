@@ -2,15 +2,20 @@
 Health check views para monitoramento do sistema
 """
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.cache import never_cache
 from django.db import connection
 from django.core.cache import cache
 # import redis  # Comentado temporariamente
+import hmac
 import time
 import os
 
+from core.metrics import OPENMETRICS_CONTENT_TYPE, metrics_exporter
+from core.performance import system_monitor
+
 @never_cache
 @require_http_methods(["GET"])
 def health_check(request):
@@ -93,6 +98,19 @@ def health_check(request):
             'error': str(e)
         }
     
+    # Recursos do servidor: última amostra do coletor em segundo plano (sem bloquear)
+    latest = system_monitor.get_latest()
+    if latest:
+        health_status['checks']['system'] = {
+            'status': 'healthy',
+            'cpu_percent': latest['cpu_percent'],
+            'memory_percent': latest['memory_percent'],
+            'disk_percent': latest['disk_percent'],
+            'sampled_at': latest['timestamp'],
+        }
+    else:
+        health_status['checks']['system'] = {'status': 'unknown', 'error': 'No samples yet'}
+    
     # Determinar status HTTP
     status_code = 200 if health_status['status'] == 'healthy' else 503
     
@@ -124,3 +142,17 @@ def liveness_check(request):
     Endpoint de liveness check para Kubernetes
     """
     return JsonResponse({'status': 'alive'}, status=200)
+
+@never_cache
+@require_http_methods(["GET"])
+def metrics(request):
+    """
+    Métricas de todos os workers no formato OpenMetrics (Prometheus)
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization, f'Bearer {token}'):
+            return HttpResponse('Unauthorized\n', status=401, content_type='text/plain')
+    
+    return HttpResponse(metrics_exporter.render(), content_type=OPENMETRICS_CONTENT_TYPE)
@@ -0,0 +1,310 @@
+"""
+Image Derivatives
+Generates WebP and width-bucketed variants of uploaded images and records
+them in a manifest, so templates only reference files that exist
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.files import FileLock, atomic_write, write_json
+from core.observers import BACKGROUND, CallbackObserver, dispatch_event, event_dispatcher
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+
+# Formats Pillow can write back for the resized copies in the original format
+_SAVE_FORMATS = {'.jpg': 'JPEG', '.jpeg': 'JPEG', '.png': 'PNG', '.webp': 'WEBP'}
+
+
+def webp_name(name: str) -> Optional[str]:
+    """``foo.jpg`` -> ``foo.webp`` (None when the original already is WebP)"""
+    stem, ext = os.path.splitext(name)
+    if ext.lower() == '.webp':
+        return None
+    return f"{stem}.webp"
+
+
+def variant_name(name: str, width: int, ext: Optional[str] = None) -> str:
+    """``foo.jpg`` -> ``foo-640w.jpg`` (or ``foo-640w.webp`` with ``ext='.webp'``)"""
+    stem, original_ext = os.path.splitext(name)
+    return f"{stem}-{width}w{ext or original_ext}"
+
+
+def _save(image: Image.Image, path: str, image_format: str, quality: int) -> None:
+    # Write next to the target and rename: readers never see a partial file
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    options = {'quality': quality, 'optimize': True} if image_format in ('JPEG', 'WEBP') else {'optimize': True}
+    if image_format == 'WEBP':
+        options['method'] = 4
+    with atomic_write(path) as tmp_file:
+        image.save(tmp_file, image_format, **options)
+
+
+def build_derivatives(name: str, location: str, widths: Sequence[int] = DEFAULT_WIDTHS,
+                      quality: int = 80) -> Dict[str, Any]:
+    """
+    Write the derivatives of ``location/name`` and return its manifest entry.
+
+    Plain function of paths (no Django state) so the backfill command can
+    run it in a process pool. Widths not smaller than the original are
+    skipped: a variant is never an upscale.
+    """
+    path = os.path.join(location, name)
+    stat = os.stat(path)
+    ext = os.path.splitext(name)[1].lower()
+    with Image.open(path) as source:
+        source_format = _SAVE_FORMATS.get(ext)
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            has_alpha = 'A' in image.mode or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        width, height = image.size
+
+        entry = {
+            'width': width,
+            'height': height,
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'webp': None,
+            'variants': [],
+        }
+        full_webp = webp_name(name)
+        if full_webp:
+            _save(image, os.path.join(location, full_webp), 'WEBP', quality)
+            entry['webp'] = full_webp
+
+        for target in sorted(set(widths)):
+            if target >= width:
+                continue
+            resized = image.resize((target, max(1, round(height * target / width))), Image.Resampling.LANCZOS)
+            variant = {'width': target, 'src': None, 'webp': variant_name(name, target, '.webp')}
+            _save(resized, os.path.join(location, variant['webp']), 'WEBP', quality)
+            if source_format and source_format != 'WEBP':
+                variant['src'] = variant_name(name, target)
+                _save(resized, os.path.join(location, variant['src']), source_format, quality)
+            entry['variants'].append(variant)
+    return entry
+
+
+class ImageManifest:
+    """
+    JSON file mapping each original (storage name) to its derivatives.
+
+    Readers keep a parsed copy and re-stat the file at most every
+    ``reload_interval`` seconds. Writers merge their entries under an
+    exclusive flock and replace the file atomically, so web workers and the
+    backfill command can update it concurrently.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: float = 2.0):
+        self._path = path
+        self.reload_interval = reload_interval
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        if self._path:
+            return self._path
+        return os.path.join(settings.MEDIA_ROOT, getattr(settings, 'IMAGE_MANIFEST_NAME', 'derivatives.json'))
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding='utf-8') as manifest_file:
+                return json.load(manifest_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable image manifest {self.path}: {e}")
+            return {}
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Current entries (reloaded when the file changed)"""
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            with self._lock:
+                self._checked_at = now
+                try:
+                    mtime = os.stat(self.path).st_mtime
+                except FileNotFoundError:
+                    mtime = None
+                if mtime != self._mtime:
+                    self._entries = self._read() if mtime is not None else {}
+                    self._mtime = mtime
+        return self._entries
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.entries().get(name)
+
+    @contextmanager
+    def _exclusive(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if not FileLock.supported:
+            with self._lock:
+                yield
+            return
+        with FileLock(f"{self.path}.lock"):
+            yield
+
+    def update(self, entries: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """Merge ``entries`` into the file (a None value removes the original)"""
+        if not entries:
+            return
+        with self._exclusive():
+            current = self._read()
+            for name, entry in entries.items():
+                if entry is None:
+                    current.pop(name, None)
+                else:
+                    current[name] = entry
+            write_json(self.path, current)
+        with self._lock:
+            self._entries, self._mtime, self._checked_at = current, None, 0.0
+
+
+class ImageDerivativeService:
+    """Generates derivatives on upload and answers which sources exist for a media URL"""
+
+    event_name = 'image_uploaded'
+
+    def __init__(self, manifest: Optional[ImageManifest] = None):
+        self.manifest = manifest or ImageManifest()
+
+    def get_widths(self) -> Tuple[int, ...]:
+        return tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS))
+
+    def get_quality(self) -> int:
+        return getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+
+    def get_location(self) -> Optional[str]:
+        """Local directory of the default storage (None for remote storages)"""
+        location = getattr(default_storage, 'location', None)
+        return str(location) if location else None
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def is_current(self, name: str) -> bool:
+        """Derivatives exist and were built from the file as it is now"""
+        entry = self.manifest.get(name)
+        location = self.get_location()
+        if entry is None or location is None:
+            return False
+        try:
+            stat = os.stat(os.path.join(location, name))
+        except OSError:
+            return False
+        return entry.get('mtime') == stat.st_mtime and entry.get('size') == stat.st_size
+
+    def process(self, name: str) -> Optional[Dict[str, Any]]:
+        """Build the derivatives of one stored image now and record them"""
+        location = self.get_location()
+        if not name or location is None:
+            return None
+        start_ns = time.perf_counter_ns()
+        error = True
+        try:
+            entry = build_derivatives(name, location, self.get_widths(), self.get_quality())
+            self.manifest.update({name: entry})
+            error = False
+            return entry
+        except Exception as e:
+            logger.error(f"Error building derivatives of {name}: {e}")
+            return None
+        finally:
+            performance_monitor.record_timing('images.derivatives', start_ns, error)
+
+    def schedule(self, name: str) -> None:
+        """Generate the derivatives in the event worker pool after the current transaction commits"""
+        if name and not self.is_current(name):
+            dispatch_event(self.event_name, {'name': name}, source='image_derivatives')
+
+    def delete(self, name: str) -> None:
+        """Remove the derivative files of an original and its manifest entry"""
+        entry = self.manifest.get(name)
+        location = self.get_location()
+        if entry is None or location is None:
+            return
+        paths = [entry.get('webp')]
+        for variant in entry.get('variants', []):
+            paths += [variant.get('src'), variant.get('webp')]
+        for path in filter(None, paths):
+            try:
+                os.remove(os.path.join(location, path))
+            except FileNotFoundError:
+                pass
+        self.manifest.update({name: None})
+
+    # ------------------------------------------------------------------
+    # Lookup (template tags)
+    # ------------------------------------------------------------------
+
+    def name_from_url(self, url: str) -> Optional[str]:
+        """Storage name of a MEDIA_URL url (None for anything else)"""
+        if not url:
+            return None
+        media_url = settings.MEDIA_URL or ''
+        path = url.split('?', 1)[0]
+        if not media_url or not path.startswith(media_url):
+            return None
+        return unquote(path[len(media_url):])
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Manifest entry of the image at ``url``"""
+        name = self.name_from_url(url)
+        return self.manifest.get(name) if name else None
+
+    def url(self, name: str) -> str:
+        return default_storage.url(name)
+
+    def webp_url(self, url: str) -> Optional[str]:
+        """URL of the full-size WebP copy, when it exists"""
+        entry = self.lookup(url)
+        if entry and entry.get('webp'):
+            return self.url(entry['webp'])
+        return None
+
+    def srcset(self, url: str, widths: Optional[Iterable[int]] = None, webp: bool = False) -> List[Tuple[str, int]]:
+        """[(url, width), ...] of the existing variants plus the original, smallest first"""
+        entry = self.lookup(url)
+        if entry is None:
+            return []
+        wanted = set(widths) if widths else None
+        key = 'webp' if webp else 'src'
+        sources = [
+            (self.url(variant[key]), variant['width'])
+            for variant in entry.get('variants', [])
+            if variant.get(key) and (wanted is None or variant['width'] in wanted)
+        ]
+        full = self.webp_url(url) if webp else url
+        if full:
+            sources.append((full, entry['width']))
+        return sources
+
+
+def _on_image_uploaded(event) -> None:
+    image_derivatives.process(event.data['name'])
+
+
+# Global service instance (one per process)
+image_derivatives = ImageDerivativeService()
+
+event_dispatcher.subscribe(
+    ImageDerivativeService.event_name, CallbackObserver(_on_image_uploaded), mode=BACKGROUND
+)
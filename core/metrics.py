@@ -0,0 +1,450 @@
+"""
+Prometheus / OpenMetrics Export
+Exposes timer histograms, counters, cache hit ratios, DB query counts and
+process/system gauges, aggregated across all worker processes of the server
+"""
+import atexit
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+import psutil
+from django.conf import settings
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core.files import FileLock, write_json
+from core.performance import LatencyHistogram, performance_monitor, system_monitor
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Histogram buckets (seconds) exported for every timed operation
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ARCHIVE_FILE = 'archive.json'
+LOCK_FILE = '.lock'
+
+
+class MetricsExporter:
+    """
+    Multiprocess-safe OpenMetrics exporter.
+
+    Every process writes a JSON snapshot of its own metrics to
+    ``<METRICS_DIR>/<pid>.json`` (atomically, at most once per
+    ``METRICS_WRITE_INTERVAL`` after a request, and at exit). A scrape, served
+    by any worker, merges its live snapshot with the files of the other
+    workers: counters and histograms are summed, process gauges are labelled
+    by pid. Files left by dead workers are folded into ``archive.json`` so
+    counters never go backwards when gunicorn recycles a worker. The
+    directory must be local to the host (one per server).
+    """
+
+    def __init__(self, directory: Optional[str] = None, write_interval: Optional[float] = None,
+                 prefix: str = 'fireflies'):
+        self.directory = directory
+        self.write_interval = write_interval
+        self.prefix = prefix
+        self._last_write = 0.0
+        self._write_lock = threading.Lock()
+
+    def get_directory(self) -> str:
+        """Directory shared by the workers of this server"""
+        if self.directory:
+            return self.directory
+        return getattr(settings, 'METRICS_DIR', '') or os.path.join(tempfile.gettempdir(), 'fireflies-metrics')
+
+    def get_write_interval(self) -> float:
+        """Minimum seconds between two snapshot writes of a process"""
+        if self.write_interval is not None:
+            return self.write_interval
+        return getattr(settings, 'METRICS_WRITE_INTERVAL', 5)
+
+    # ------------------------------------------------------------------
+    # Per-process snapshots
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics of this process as plain data"""
+        data = performance_monitor.snapshot()
+        data['counters'].update(self._cache_counters())
+        data['pid'] = os.getpid()
+        data['written_at'] = time.time()
+        data['gauges'] = self._process_gauges()
+        return data
+
+    def write(self, snapshot: Optional[Dict[str, Any]] = None) -> bool:
+        """Write this process' snapshot (atomic rename)"""
+        # Another thread is already writing a snapshot that is just as fresh
+        if not self._write_lock.acquire(blocking=False):
+            return False
+        try:
+            snapshot = snapshot or self.snapshot()
+            self._last_write = time.monotonic()
+            return self._dump(self._path(snapshot['pid']), snapshot)
+        except Exception as e:
+            logger.warning(f"Error writing metrics snapshot: {e}")
+            return False
+        finally:
+            self._write_lock.release()
+
+    def maybe_write(self) -> bool:
+        """Write only when the interval has elapsed"""
+        if time.monotonic() - self._last_write < self.get_write_interval():
+            return False
+        return self.write()
+
+    # ------------------------------------------------------------------
+    # Aggregation
+    # ------------------------------------------------------------------
+
+    def collect(self) -> Dict[str, Any]:
+        """Merge the snapshots of every worker of the server"""
+        own = self.snapshot()
+        self.write(own)
+
+        merged = self._empty()
+        self._merge(merged, own, gauges=True)
+        directory = self.get_directory()
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            names = []
+        for name in names:
+            pid = self._pid_from_name(name)
+            if pid is None or pid == own['pid']:
+                continue
+            if psutil.pid_exists(pid):
+                snapshot = self._load(os.path.join(directory, name))
+                if snapshot:
+                    self._merge(merged, snapshot, gauges=True)
+            else:
+                self._archive(pid)
+        archive = self._load(os.path.join(directory, ARCHIVE_FILE))
+        if archive:
+            self._merge(merged, archive, gauges=False)
+        return merged
+
+    def _archive(self, pid: int) -> None:
+        """Fold the counters and histograms of a dead worker into the archive"""
+        directory = self.get_directory()
+        path = self._path(pid)
+        with self._file_lock():
+            snapshot = self._load(path)
+            if snapshot is None:
+                # Already folded by another worker
+                return
+            archive_path = os.path.join(directory, ARCHIVE_FILE)
+            archive = self._load(archive_path) or self._empty()
+            archive = self._normalize(archive)
+            self._merge(archive, snapshot, gauges=False)
+            archive.pop('processes', None)
+            if self._dump(archive_path, archive):
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+        logger.debug(f"Metrics of dead worker {pid} folded into the archive")
+
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {'counters': Counter(), 'timers': {}, 'processes': {}}
+
+    @classmethod
+    def _normalize(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        normalized = cls._empty()
+        cls._merge(normalized, data, gauges=False)
+        return normalized
+
+    @staticmethod
+    def _merge(target: Dict[str, Any], snapshot: Dict[str, Any], gauges: bool) -> None:
+        target['counters'].update(snapshot.get('counters', {}))
+        for name, timer in snapshot.get('timers', {}).items():
+            merged = target['timers'].get(name)
+            if merged is None:
+                merged = target['timers'][name] = {
+                    'count': 0, 'sum_ns': 0, 'errors': 0, 'min_ns': 0, 'max_ns': 0, 'buckets': Counter(),
+                }
+            if timer['count'] and (not merged['count'] or timer['min_ns'] < merged['min_ns']):
+                merged['min_ns'] = timer['min_ns']
+            merged['max_ns'] = max(merged['max_ns'], timer['max_ns'])
+            merged['count'] += timer['count']
+            merged['sum_ns'] += timer['sum_ns']
+            merged['errors'] += timer['errors']
+            # JSON turns the bucket indexes into strings
+            merged['buckets'].update({int(index): count for index, count in timer['buckets'].items()})
+        if gauges and 'pid' in snapshot:
+            target['processes'][snapshot['pid']] = snapshot.get('gauges', {})
+
+    # ------------------------------------------------------------------
+    # OpenMetrics text format
+    # ------------------------------------------------------------------
+
+    def render(self, merged: Optional[Dict[str, Any]] = None) -> str:
+        """Full scrape in OpenMetrics text format"""
+        merged = merged if merged is not None else self.collect()
+        lines: List[str] = []
+        self._render_timers(lines, merged['timers'])
+        self._render_counters(lines, merged['counters'])
+        self._render_processes(lines, merged['processes'])
+        self._render_system(lines)
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def _family(self, lines: List[str], name: str, metric_type: str, help_text: str,
+                unit: Optional[str] = None) -> str:
+        family = f'{self.prefix}_{name}'
+        lines.append(f'# TYPE {family} {metric_type}')
+        if unit:
+            lines.append(f'# UNIT {family} {unit}')
+        lines.append(f'# HELP {family} {help_text}')
+        return family
+
+    def _render_timers(self, lines: List[str], timers: Dict[str, Dict[str, Any]]) -> None:
+        if not timers:
+            return
+        bounds_ns = [int(bound * 1e9) for bound in DURATION_BUCKETS]
+        family = self._family(lines, 'operation_duration_seconds', 'histogram',
+                              'Duration of timed operations.', unit='seconds')
+        for name in sorted(timers):
+            timer = timers[name]
+            histogram = LatencyHistogram.from_counts(timer['buckets'])
+            labels = {'operation': name}
+            for bound, count in zip(DURATION_BUCKETS, histogram.cumulative(bounds_ns)):
+                lines.append(_sample(f'{family}_bucket', {**labels, 'le': _number(bound)}, count))
+            lines.append(_sample(f'{family}_bucket', {**labels, 'le': '+Inf'}, timer['count']))
+            lines.append(_sample(f'{family}_count', labels, timer['count']))
+            lines.append(_sample(f'{family}_sum', labels, timer['sum_ns'] / 1e9))
+
+        family = self._family(lines, 'operation_errors', 'counter', 'Timed operations that raised.')
+        for name in sorted(timers):
+            lines.append(_sample(f'{family}_total', {'operation': name}, timers[name]['errors']))
+
+    def _render_counters(self, lines: List[str], counters: Dict[str, int]) -> None:
+        queries = {name[len('db.queries.'):]: value for name, value in counters.items()
+                   if name.startswith('db.queries.')}
+        if queries:
+            family = self._family(lines, 'db_queries', 'counter', 'SQL queries executed, by database alias.')
+            for alias in sorted(queries):
+                lines.append(_sample(f'{family}_total', {'database': alias}, queries[alias]))
+
+        ratios = hit_ratios(counters)
+        if ratios:
+            family = self._family(lines, 'cache_hit_ratio', 'gauge', 'Hits / (hits + misses) since start.')
+            for cache_name in sorted(ratios):
+                lines.append(_sample(family, {'cache': cache_name}, ratios[cache_name]))
+
+        events = {name: value for name, value in counters.items() if not name.startswith('db.queries.')}
+        if events:
+            family = self._family(lines, 'events', 'counter', 'Named event counters (cache hits, invalidations, ...).')
+            for name in sorted(events):
+                lines.append(_sample(f'{family}_total', {'name': name}, events[name]))
+
+    def _render_processes(self, lines: List[str], processes: Dict[int, Dict[str, float]]) -> None:
+        family = self._family(lines, 'workers', 'gauge', 'Live worker processes reporting metrics.')
+        lines.append(_sample(family, {}, len(processes)))
+        gauges = (
+            ('process_resident_memory_bytes', 'resident_memory_bytes', 'Resident memory of the worker.', 'bytes'),
+            ('process_cpu_seconds', 'cpu_seconds', 'CPU time used by the worker.', 'seconds'),
+            ('process_threads', 'threads', 'Threads of the worker.', None),
+        )
+        for family_name, key, help_text, unit in gauges:
+            family = self._family(lines, family_name, 'gauge', help_text, unit=unit)
+            for pid in sorted(processes):
+                if key in processes[pid]:
+                    lines.append(_sample(family, {'pid': str(pid)}, processes[pid][key]))
+
+    def _render_system(self, lines: List[str]) -> None:
+        # Latest sample of the background sampler; never blocks
+        metrics = system_monitor.get_system_metrics()
+        gauges = (
+            ('system_cpu_percent', 'cpu_percent', 1, 'Host CPU usage (percent).', None),
+            ('system_memory_percent', 'memory_percent', 1, 'Host memory usage (percent).', None),
+            ('system_memory_available_bytes', 'memory_available_gb', 1024 ** 3, 'Host memory available.', 'bytes'),
+            ('system_disk_percent', 'disk_percent', 1, 'Root disk usage (percent).', None),
+            ('system_disk_free_bytes', 'disk_free_gb', 1024 ** 3, 'Root disk free space.', 'bytes'),
+        )
+        for family_name, key, scale, help_text, unit in gauges:
+            if key in metrics:
+                family = self._family(lines, family_name, 'gauge', help_text, unit=unit)
+                lines.append(_sample(family, {}, metrics[key] * scale))
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _cache_counters() -> Dict[str, int]:
+        """get_or_set and backend counters of core.cache, named like the monitor counters"""
+        from core.cache import cache_manager
+
+        counters = {}
+        names = {'hits': 'hit', 'misses': 'miss'}
+        for key, value in cache_manager.get_stats().items():
+            counters[f'cache.get_or_set.{names.get(key, key)}'] = value
+        for backend_name, backend in cache_manager.backends.items():
+            try:
+                stats = backend.get_stats() if hasattr(backend, 'get_stats') else {}
+            except Exception:
+                continue
+            if 'l1_hits' in stats:
+                hits = stats['l1_hits'] + stats['l2_hits']
+            else:
+                hits = stats.get('hits')
+            if hits is not None and 'misses' in stats:
+                counters[f'cache.backend.{backend_name}.hit'] = hits
+                counters[f'cache.backend.{backend_name}.miss'] = stats['misses']
+        return counters
+
+    @staticmethod
+    def _process_gauges() -> Dict[str, float]:
+        try:
+            process = psutil.Process()
+            with process.oneshot():
+                cpu = process.cpu_times()
+                return {
+                    'resident_memory_bytes': process.memory_info().rss,
+                    'cpu_seconds': cpu.user + cpu.system,
+                    'threads': process.num_threads(),
+                }
+        except Exception as e:
+            logger.debug(f"Error reading process gauges: {e}")
+            return {}
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.get_directory(), f'{pid}.json')
+
+    @staticmethod
+    def _pid_from_name(name: str) -> Optional[int]:
+        stem, extension = os.path.splitext(name)
+        if extension != '.json' or not stem.isdigit():
+            return None
+        return int(stem)
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metrics file {path}: {e}")
+            return None
+
+    def _dump(self, path: str, data: Dict[str, Any]) -> bool:
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # Private to the server's user: the default directory is under the shared /tmp
+            write_json(path, data, permissions=0o600)
+            return True
+        except OSError as e:
+            logger.warning(f"Error writing metrics file {path}: {e}")
+            return False
+
+    def _file_lock(self):
+        return FileLock(os.path.join(self.get_directory(), LOCK_FILE))
+
+
+def hit_ratios(counters: Dict[str, int]) -> Dict[str, float]:
+    """``<prefix>.hit`` / ``<prefix>.miss`` counter pairs -> {prefix: hit ratio}"""
+    ratios = {}
+    for name, hits in counters.items():
+        if not name.endswith('.hit'):
+            continue
+        prefix = name[:-len('.hit')]
+        total = hits + counters.get(f'{prefix}.miss', 0)
+        if total:
+            ratios[prefix] = hits / total
+    return ratios
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and not math.isfinite(value):
+        return '+Inf' if value > 0 else ('-Inf' if value < 0 else 'NaN')
+    if isinstance(value, float) and value.is_integer():
+        return f'{value:.1f}'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        return f'{name}{{{rendered}}} {_number(value)}'
+    return f'{name} {_number(value)}'
+
+
+# Global exporter instance (one per process)
+metrics_exporter = MetricsExporter()
+
+
+# ----------------------------------------------------------------------
+# Instrumentation: request durations and SQL queries
+# ----------------------------------------------------------------------
+
+_request_state = threading.local()
+
+
+def _count_query(execute, sql, params, many, context):
+    start_ns = time.perf_counter_ns()
+    error = True
+    try:
+        result = execute(sql, params, many, context)
+        error = False
+        return result
+    finally:
+        performance_monitor.record_timing('db.query', start_ns, error)
+        performance_monitor.increment_counter(f"db.queries.{context['connection'].alias}")
+
+
+def _instrument_connection(sender=None, connection=None, **kwargs):
+    # First in the chain: connection.execute_wrapper() blocks pop from the end
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+_serving = threading.Event()
+
+
+def _start_request(sender, **kwargs):
+    _request_state.start_ns = time.perf_counter_ns()
+    _serving.set()
+    # Web workers only: no sampler thread in management commands
+    system_monitor.start()
+
+
+def _finish_request(sender, **kwargs):
+    # request_finished fires after the response has been sent to the client
+    start_ns = getattr(_request_state, 'start_ns', None)
+    if start_ns is not None:
+        _request_state.start_ns = None
+        performance_monitor.record_timing('http.request', start_ns)
+    metrics_exporter.maybe_write()
+
+
+def _write_at_exit():
+    # Management commands also load this module: only web workers leave a snapshot
+    if _serving.is_set():
+        metrics_exporter.write()
+
+
+connection_created.connect(_instrument_connection, dispatch_uid='core.metrics.instrument_connection')
+for _connection in connections.all(initialized_only=True):
+    _instrument_connection(connection=_connection)
+request_started.connect(_start_request, dispatch_uid='core.metrics.start_request')
+request_finished.connect(_finish_request, dispatch_uid='core.metrics.finish_request')
+
+atexit.register(_write_at_exit)
@@ -2,13 +2,24 @@
 Observer Pattern Implementation
 Provides event-driven communication between components
 """
+import atexit
 import logging
+import os
+import queue
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Callable, Dict, List, Optional, Set
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import traceback
 
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from core.performance import performance_monitor
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,68 +67,237 @@ class IEventDispatcher(ABC):
         pass
 
 
+# Dispatch modes
+SYNC = 'sync'                # in the caller, right away (inside its transaction)
+ON_COMMIT = 'on_commit'      # in the caller, after the current transaction commits
+BACKGROUND = 'background'    # in the worker pool, after the current transaction commits
+DISPATCH_MODES = (SYNC, ON_COMMIT, BACKGROUND)
+
+
+def observer_name(observer: IObserver) -> str:
+    """Name used in logs and latency metrics (the callback name for CallbackObserver)"""
+    callback = getattr(observer, 'callback', None)
+    if callback is not None:
+        return getattr(callback, '__qualname__', type(callback).__name__)
+    return type(observer).__name__
+
+
+class EventWorkerPool:
+    """
+    Bounded pool of daemon threads running observers off the request path.
+
+    The queue holds at most ``queue_size`` notifications. When it is full,
+    ``submit`` waits up to ``put_timeout`` seconds and then runs the
+    notification in the caller (caller-runs backpressure): a burst of
+    events slows the producer down instead of growing memory or dropping
+    events. Threads start on the first submit and again after a fork.
+    """
+
+    def __init__(self, workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 put_timeout: Optional[float] = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self._queue: Optional[queue.Queue] = None
+        self._threads: List[threading.Thread] = []
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _setting(self, value, name: str, default):
+        return value if value is not None else getattr(settings, name, default)
+
+    def _ensure_started(self) -> queue.Queue:
+        if self._pid == os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._setting(self.queue_size, 'EVENT_QUEUE_SIZE', 1000))
+                self._threads = []
+                for index in range(max(1, self._setting(self.workers, 'EVENT_WORKERS', 2))):
+                    thread = threading.Thread(
+                        target=self._run, args=(self._queue,), name=f'event-worker-{index}', daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+                self._pid = os.getpid()
+        return self._queue
+
+    def submit(self, task: Callable[[], None]) -> bool:
+        """Queue ``task``; returns False when it had to run in the caller"""
+        work_queue = self._ensure_started()
+        try:
+            work_queue.put((task, time.perf_counter_ns()),
+                           timeout=self._setting(self.put_timeout, 'EVENT_QUEUE_TIMEOUT', 0.1))
+            return True
+        except queue.Full:
+            performance_monitor.increment_counter('events.backpressure')
+            logger.warning("Event queue full: running observer in the caller")
+            task()
+            return False
+
+    def _run(self, work_queue: queue.Queue) -> None:
+        while True:
+            item = work_queue.get()
+            try:
+                if item is None:
+                    return
+                task, queued_ns = item
+                performance_monitor.record_timing('events.queue_wait', queued_ns)
+                task()
+            except Exception as e:
+                logger.error(f"Error in event worker: {e}")
+            finally:
+                # Long-lived thread: release the DB connection like the end of a request would
+                close_old_connections()
+                work_queue.task_done()
+
+    def pending(self) -> int:
+        """Notifications waiting in the queue"""
+        return self._queue.qsize() if self._pid == os.getpid() else 0
+
+    def join(self) -> None:
+        """Block until every queued notification has run"""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Run what is queued and stop the threads (waits up to ``timeout`` seconds)"""
+        if self._pid != os.getpid():
+            return
+        with self._lock:
+            deadline = time.monotonic() + timeout
+            for _ in self._threads:
+                try:
+                    self._queue.put(None, timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Full:
+                    break
+            for thread in self._threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            self._threads = []
+            self._pid = None
+
+
 class EventDispatcher(IEventDispatcher):
-    """Event dispatcher implementation"""
+    """
+    Event dispatcher implementation.
+
+    Every subscription has a dispatch mode (SYNC, ON_COMMIT or BACKGROUND).
+    It comes from ``subscribe(mode=...)``, else the observer's
+    ``dispatch_mode`` attribute, else EVENT_DISPATCH_MODE. ``dispatch(event,
+    mode=...)`` overrides it for every observer of that event. ON_COMMIT
+    and BACKGROUND run after the current transaction commits (right away
+    outside one) and never if it rolls back, so observers always see
+    committed data. Each observer call is timed in core.performance as
+    ``events.observer.<name>``.
+    """
     
-    def __init__(self):
-        self._subscribers: Dict[str, Set[IObserver]] = {}
-        self._event_history: List[Event] = []
-        self._max_history = 1000
+    def __init__(self, max_history: int = 1000, pool: Optional[EventWorkerPool] = None):
+        # Copy-on-write: dispatch reads the dict without the lock
+        self._subscribers: Dict[str, Dict[IObserver, Optional[str]]] = {}
+        self._event_history: Deque[Event] = deque(maxlen=max_history)
+        self._max_history = max_history
+        self._lock = threading.Lock()
+        self.pool = pool or EventWorkerPool()
     
-    def subscribe(self, event_name: str, observer: IObserver) -> None:
+    def subscribe(self, event_name: str, observer: IObserver, mode: Optional[str] = None) -> None:
         """Subscribe observer to event"""
-        if event_name not in self._subscribers:
-            self._subscribers[event_name] = set()
-        self._subscribers[event_name].add(observer)
-        logger.info(f"Observer {type(observer).__name__} subscribed to {event_name}")
+        if mode is not None and mode not in DISPATCH_MODES:
+            raise ValueError(f"Unknown dispatch mode: {mode}")
+        with self._lock:
+            subscribers = dict(self._subscribers)
+            observers = dict(subscribers.get(event_name, {}))
+            observers[observer] = mode
+            subscribers[event_name] = observers
+            self._subscribers = subscribers
+        logger.info(f"Observer {observer_name(observer)} subscribed to {event_name}")
     
     def unsubscribe(self, event_name: str, observer: IObserver) -> None:
         """Unsubscribe observer from event"""
-        if event_name in self._subscribers:
-            self._subscribers[event_name].discard(observer)
-            if not self._subscribers[event_name]:
-                del self._subscribers[event_name]
-            logger.info(f"Observer {type(observer).__name__} unsubscribed from {event_name}")
+        with self._lock:
+            if observer not in self._subscribers.get(event_name, {}):
+                return
+            subscribers = dict(self._subscribers)
+            observers = dict(subscribers[event_name])
+            del observers[observer]
+            if observers:
+                subscribers[event_name] = observers
+            else:
+                del subscribers[event_name]
+            self._subscribers = subscribers
+        logger.info(f"Observer {observer_name(observer)} unsubscribed from {event_name}")
     
-    def dispatch(self, event: Event) -> None:
-        """Dispatch event to all subscribers"""
+    def get_mode(self, observer: IObserver, mode: Optional[str] = None) -> str:
+        """Dispatch mode of a subscription"""
+        mode = mode or getattr(observer, 'dispatch_mode', None) or getattr(settings, 'EVENT_DISPATCH_MODE', ON_COMMIT)
+        return mode if mode in DISPATCH_MODES else SYNC
+    
+    def dispatch(self, event: Event, mode: Optional[str] = None, using: Optional[str] = None) -> None:
+        """Dispatch event to all subscribers (``using``: database whose commit deferred modes wait for)"""
         try:
-            # Add to history
             self._event_history.append(event)
-            if len(self._event_history) > self._max_history:
-                self._event_history.pop(0)
+            performance_monitor.increment_counter(f'events.dispatched.{event.name}')
             
-            # Notify subscribers
-            if event.name in self._subscribers:
-                for observer in self._subscribers[event.name].copy():
-                    try:
-                        observer.update(event)
-                    except Exception as e:
-                        logger.error(f"Error in observer {type(observer).__name__}: {e}")
-                        logger.debug(traceback.format_exc())
+            observers = self._subscribers.get(event.name)
+            if not observers:
+                return
+            deferred = []
+            background = []
+            for observer, subscription_mode in observers.items():
+                observer_mode = self.get_mode(observer, mode or subscription_mode)
+                if observer_mode == SYNC:
+                    self._notify(observer, event)
+                elif observer_mode == ON_COMMIT:
+                    deferred.append(observer)
+                else:
+                    background.append(observer)
             
-            logger.debug(f"Event {event.name} dispatched to {len(self._subscribers.get(event.name, set()))} observers")
+            if deferred or background:
+                transaction.on_commit(lambda: self._release(event, deferred, background), using=using)
+            
+            logger.debug(f"Event {event.name} dispatched to {len(observers)} observers")
             
         except Exception as e:
             logger.error(f"Error dispatching event {event.name}: {e}")
             logger.debug(traceback.format_exc())
     
+    def _release(self, event: Event, deferred: List[IObserver], background: List[IObserver]) -> None:
+        # Runs once the transaction has committed
+        for observer in background:
+            self.pool.submit(lambda observer=observer: self._notify(observer, event))
+        for observer in deferred:
+            self._notify(observer, event)
+    
+    def _notify(self, observer: IObserver, event: Event) -> None:
+        name = observer_name(observer)
+        start_ns = time.perf_counter_ns()
+        error = True
+        try:
+            observer.update(event)
+            error = False
+        except Exception as e:
+            logger.error(f"Error in observer {name}: {e}")
+            logger.debug(traceback.format_exc())
+        finally:
+            performance_monitor.record_timing(f'events.observer.{name}', start_ns, error)
+    
     def get_subscribers_count(self, event_name: str) -> int:
         """Get number of subscribers for an event"""
-        return len(self._subscribers.get(event_name, set()))
+        return len(self._subscribers.get(event_name, {}))
     
     def get_event_history(self, event_name: Optional[str] = None) -> List[Event]:
         """Get event history, optionally filtered by event name"""
+        history = list(self._event_history)
         if event_name:
-            return [event for event in self._event_history if event.name == event_name]
-        return self._event_history.copy()
+            return [event for event in history if event.name == event_name]
+        return history
 
 
 class CallbackObserver(IObserver):
     """Observer that uses a callback function"""
     
-    def __init__(self, callback: Callable[[Event], None]):
+    def __init__(self, callback: Callable[[Event], None], dispatch_mode: Optional[str] = None):
         self.callback = callback
+        self.dispatch_mode = dispatch_mode
     
     def update(self, event: Event) -> None:
         """Call the callback function"""
@@ -159,6 +339,9 @@ class MetricsObserver(IObserver):
 # Global event dispatcher instance
 event_dispatcher = EventDispatcher()
 
+# Run what is still queued before the process exits
+atexit.register(event_dispatcher.pool.shutdown)
+
 
 def dispatch_event(name: str, data: Any, source: str, metadata: Optional[Dict[str, Any]] = None) -> None:
     """Convenience function to dispatch events"""
@@ -166,9 +349,9 @@ def dispatch_event(name: str, data: Any, source: str, metadata: Optional[Dict[st
     event_dispatcher.dispatch(event)
 
 
-def subscribe_to_event(event_name: str, observer: IObserver) -> None:
+def subscribe_to_event(event_name: str, observer: IObserver, mode: Optional[str] = None) -> None:
     """Convenience function to subscribe to events"""
-    event_dispatcher.subscribe(event_name, observer)
+    event_dispatcher.subscribe(event_name, observer, mode)
 
 
 def unsubscribe_from_event(event_name: str, observer: IObserver) -> None:
@@ -176,8 +359,8 @@ def unsubscribe_from_event(event_name: str, observer: IObserver) -> None:
     event_dispatcher.unsubscribe(event_name, observer)
 
 # Exemplo de uso:
-# from core.observers import event_dispatcher
-# def on_article_created(article):
-#     ...
-# event_dispatcher.subscribe('article_created', on_article_created)
-# event_dispatcher.notify('article_created', article) 
\ No newline at end of file
+# from core.observers import BACKGROUND, CallbackObserver, event_dispatcher
+# def on_article_created(event):
+#     ...  # event.data é o artigo
+# event_dispatcher.subscribe('article_created', CallbackObserver(on_article_created), mode=BACKGROUND)
+# dispatch_event('article_created', article, source='article_service')
@@ -2,18 +2,24 @@
 Performance Monitoring and Optimization
 Provides tools for monitoring and optimizing application performance
 """
+import itertools
+import math
+import os
 import time
 import logging
 import psutil
 import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, Iterable, List, Optional, Callable, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from functools import wraps
-from collections import defaultdict, deque
+from collections import Counter, defaultdict, deque
 import json
 
+from django.conf import settings
+from django.core.cache import cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +44,9 @@ class PerformanceProfile:
     avg_time: float = 0.0
     last_call: Optional[datetime] = None
     errors: int = 0
+    p50_time: Optional[float] = None
+    p95_time: Optional[float] = None
+    p99_time: Optional[float] = None
 
 
 class IPerformanceMonitor(ABC):
@@ -70,140 +79,570 @@ class IPerformanceMonitor(ABC):
         pass
 
 
+# perf_counter_ns() + offset ~= time_ns(); used to date samples only when they are read
+_WALL_OFFSET_NS = time.time_ns() - time.perf_counter_ns()
+
+
+def _wall_datetime(perf_ns: int) -> datetime:
+    return datetime.fromtimestamp((perf_ns + _WALL_OFFSET_NS) / 1e9)
+
+
+class LatencyHistogram:
+    """
+    Streaming log-linear histogram of durations in nanoseconds.
+
+    Each power of two is split into 16 buckets, so any quantile is reported
+    within ~3% of the true value using a few hundred integers per operation,
+    whatever the number of samples.
+    """
+
+    SUB_BUCKET_BITS = 4
+    __slots__ = ('counts', 'count', 'min_ns', 'max_ns')
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.min_ns = 0
+        self.max_ns = 0
+
+    @classmethod
+    def bucket_index(cls, value_ns: int) -> int:
+        """Bucket of a duration (monotonic in the duration)"""
+        if value_ns < (2 << cls.SUB_BUCKET_BITS):
+            return value_ns
+        shift = value_ns.bit_length() - cls.SUB_BUCKET_BITS - 1
+        return (shift << cls.SUB_BUCKET_BITS) + (value_ns >> shift)
+
+    @classmethod
+    def bucket_bounds(cls, index: int) -> Tuple[int, int]:
+        """[lower, upper) durations covered by a bucket"""
+        if index < (2 << cls.SUB_BUCKET_BITS):
+            return index, index + 1
+        shift = (index >> cls.SUB_BUCKET_BITS) - 1
+        mantissa = index - (shift << cls.SUB_BUCKET_BITS)
+        return mantissa << shift, (mantissa + 1) << shift
+
+    def add(self, value_ns: int, count: int = 1) -> None:
+        index = self.bucket_index(value_ns)
+        self.counts[index] += count
+        if not self.count or value_ns < self.min_ns:
+            self.min_ns = value_ns
+        if value_ns > self.max_ns:
+            self.max_ns = value_ns
+        self.count += count
+
+    def add_many(self, values_ns: List[int]) -> None:
+        """Add a batch of durations (bucket_index inlined; counted by Counter in C)"""
+        if not values_ns:
+            return
+        low = 2 << self.SUB_BUCKET_BITS
+        bits = self.SUB_BUCKET_BITS + 1
+        self.counts.update([
+            value if value < low else ((shift := value.bit_length() - bits) << self.SUB_BUCKET_BITS) + (value >> shift)
+            for value in values_ns
+        ])
+        low_value, high_value = min(values_ns), max(values_ns)
+        if not self.count or low_value < self.min_ns:
+            self.min_ns = low_value
+        if high_value > self.max_ns:
+            self.max_ns = high_value
+        self.count += len(values_ns)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        if not other.count:
+            return
+        self.counts.update(other.counts)
+        self.min_ns = other.min_ns if not self.count else min(self.min_ns, other.min_ns)
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[int]:
+        """Duration (ns) below which a fraction ``q`` of the samples fall"""
+        return self.quantiles((q,))[0]
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[int]]:
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+        targets = sorted((max(1, math.ceil(q * self.count)), position) for position, q in enumerate(qs))
+        found: List[Optional[int]] = [None] * len(qs)
+        seen = 0
+        pending = iter(targets)
+        target = next(pending)
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            while target is not None and seen >= target[0]:
+                lower, upper = self.bucket_bounds(index)
+                value = (lower + upper - 1) // 2
+                found[target[1]] = min(max(value, self.min_ns), self.max_ns)
+                target = next(pending, None)
+            if target is None:
+                break
+        return found
+
+    def cumulative(self, bounds_ns: Iterable[int]) -> List[int]:
+        """Samples at or below each ascending bound, placing each bucket at its midpoint"""
+        items = sorted(self.counts.items())
+        result = []
+        position = seen = 0
+        for bound in bounds_ns:
+            while position < len(items):
+                lower, upper = self.bucket_bounds(items[position][0])
+                if (lower + upper - 1) // 2 > bound:
+                    break
+                seen += items[position][1]
+                position += 1
+            result.append(seen)
+        return result
+
+    @classmethod
+    def from_counts(cls, counts: Dict[int, int], min_ns: int = 0, max_ns: int = 0) -> 'LatencyHistogram':
+        """Rebuild a histogram from exported bucket counts (e.g. another process)"""
+        histogram = cls()
+        histogram.counts.update(counts)
+        histogram.count = sum(histogram.counts.values())
+        histogram.min_ns = min_ns
+        histogram.max_ns = max_ns
+        return histogram
+
+    def copy(self) -> 'LatencyHistogram':
+        clone = LatencyHistogram()
+        clone.merge(self)
+        return clone
+
+
+class _OperationStats:
+    """Aggregated timings of one operation (only touched under the monitor lock)"""
+
+    __slots__ = ('calls', 'total_ns', 'errors', 'last_ns', 'histogram')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.errors = 0
+        self.last_ns = 0
+        self.histogram = LatencyHistogram()
+
+
+class _ThreadBuffer:
+    """Samples, failures and counters written only by their own thread; drained by flush"""
+
+    __slots__ = ('timings', 'errors', 'counters', 'thread')
+
+    def __init__(self, thread: threading.Thread):
+        # name -> [elapsed_ns, end_ns, elapsed_ns, end_ns, ...]
+        self.timings: Dict[str, List[int]] = {}
+        self.errors: List[str] = []
+        self.counters: Dict[str, int] = {}
+        self.thread = thread
+
+
 class PerformanceMonitor(IPerformanceMonitor):
-    """Performance monitor implementation"""
+    """
+    Performance monitor implementation.
+
+    Recording a timing or a counter never takes a lock: each thread appends
+    ``elapsed_ns, end_ns`` to its own flat list per operation. The lists are
+    folded into the per-operation stats (count, total, min/max, histogram)
+    when one fills up or when someone reads the stats. Metrics passed to
+    record_metric are kept in a fixed-size ring buffer; timings are only
+    kept as stats, the histogram standing in for the old list of samples.
+    """
     
-    def __init__(self):
-        self.timers: Dict[str, Dict[str, Any]] = {}
-        self.profiles: Dict[str, PerformanceProfile] = {}
-        self.metrics: List[PerformanceMetric] = []
+    def __init__(self, buffer_size: int = 1024, max_metrics: int = 1000):
+        self.buffer_size = buffer_size
+        # Two ints (elapsed, end) per timing
+        self._flush_at = 2 * buffer_size
+        self.timers: Dict[str, Tuple[str, int]] = {}
+        self.metrics: deque = deque(maxlen=max_metrics)
+        self._stats: Dict[str, _OperationStats] = {}
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._buffers: List[_ThreadBuffer] = []
+        self._local = threading.local()
+        self._timer_ids = itertools.count()
         self._lock = threading.Lock()
     
+    def _buffer(self) -> _ThreadBuffer:
+        try:
+            return self._local.buffer
+        except AttributeError:
+            buffer = _ThreadBuffer(threading.current_thread())
+            with self._lock:
+                self._buffers.append(buffer)
+            self._local.buffer = buffer
+            self._local.timings = buffer.timings
+            return buffer
+    
     def start_timer(self, name: str) -> str:
         """Start timing an operation"""
-        timer_id = f"{name}_{int(time.time() * 1000000)}"
-        with self._lock:
-            self.timers[timer_id] = {
-                'name': name,
-                'start_time': time.time(),
-                'start_datetime': datetime.now()
-            }
+        timer_id = f"{name}#{next(self._timer_ids)}"
+        self.timers[timer_id] = (name, time.perf_counter_ns())
         return timer_id
     
-    def stop_timer(self, timer_id: str) -> float:
+    def stop_timer(self, timer_id: str, error: bool = False) -> float:
         """Stop timing an operation"""
+        timer = self.timers.pop(timer_id, None)
+        if timer is None:
+            logger.warning(f"Timer {timer_id} not found")
+            return 0.0
+        name, start_ns = timer
+        return self.record_timing(name, start_ns, error) / 1e9
+    
+    def record_timing(self, name: str, start_ns: int, error: bool = False) -> int:
+        """Record an operation started at ``start_ns`` (perf_counter_ns) and ending now"""
+        end_ns = time.perf_counter_ns()
+        elapsed_ns = end_ns - start_ns
+        try:
+            timings = self._local.timings
+        except AttributeError:
+            timings = self._buffer().timings
+        samples = timings.get(name)
+        if samples is None:
+            samples = timings[name] = []
+        samples += (elapsed_ns, end_ns)
+        if error:
+            self._local.buffer.errors.append(name)
+        if len(samples) >= self._flush_at:
+            self.flush()
+        return elapsed_ns
+    
+    def timer(self, name: str) -> 'PerformanceContext':
+        """Context manager timing the enclosed block"""
+        return PerformanceContext(name, self)
+    
+    def flush(self) -> None:
+        """Fold every thread buffer into the shared stats"""
         with self._lock:
-            if timer_id not in self.timers:
-                logger.warning(f"Timer {timer_id} not found")
-                return 0.0
-            
-            timer_data = self.timers[timer_id]
-            elapsed_time = time.time() - timer_data['start_time']
-            
-            # Update profile
-            name = timer_data['name']
-            if name not in self.profiles:
-                self.profiles[name] = PerformanceProfile(name=name)
-            
-            profile = self.profiles[name]
-            profile.total_calls += 1
-            profile.total_time += elapsed_time
-            profile.min_time = min(profile.min_time, elapsed_time)
-            profile.max_time = max(profile.max_time, elapsed_time)
-            profile.avg_time = profile.total_time / profile.total_calls
-            profile.last_call = datetime.now()
-            
-            # Record metric
-            self.record_metric(name, elapsed_time * 1000, "ms")
-            
-            # Clean up timer
-            del self.timers[timer_id]
-            
-            return elapsed_time
+            alive = []
+            for buffer in self._buffers:
+                self._drain(buffer)
+                if buffer.thread.is_alive():
+                    alive.append(buffer)
+                else:
+                    # Thread gone: keep its counters, drop its buffer
+                    for name, value in list(buffer.counters.items()):
+                        self._counters[name] += value
+            self._buffers = alive
+    
+    def _drain(self, buffer: _ThreadBuffer) -> None:
+        for name, samples in list(buffer.timings.items()):
+            chunk = self._take(samples)
+            if not chunk:
+                continue
+            elapsed = chunk[0::2]
+            operation = self._operation(name)
+            operation.calls += len(elapsed)
+            operation.total_ns += sum(elapsed)
+            operation.last_ns = max(operation.last_ns, chunk[-1])
+            operation.histogram.add_many(elapsed)
+        for name in self._take(buffer.errors):
+            self._operation(name).errors += 1
+    
+    @staticmethod
+    def _take(items: list) -> list:
+        # Only the owner appends, always at the end: the first n items are stable
+        # (and a timing is appended as one pair, so n is always even)
+        count = len(items)
+        chunk = items[:count]
+        del items[:count]
+        return chunk
+    
+    def _operation(self, name: str) -> _OperationStats:
+        operation = self._stats.get(name)
+        if operation is None:
+            operation = self._stats[name] = _OperationStats()
+        return operation
     
     def record_metric(self, name: str, value: float, unit: str = "ms", 
                      metadata: Optional[Dict[str, Any]] = None) -> None:
         """Record a performance metric"""
-        metric = PerformanceMetric(
+        self.metrics.append((name, value, unit, time.perf_counter_ns(), metadata))
+    
+    def _profile(self, name: str, operation: _OperationStats) -> PerformanceProfile:
+        if not operation.calls:
+            # Errors drained before the first timing of the operation
+            return PerformanceProfile(name=name, errors=operation.errors)
+        histogram = operation.histogram
+        p50, p95, p99 = histogram.quantiles((0.5, 0.95, 0.99))
+        return PerformanceProfile(
             name=name,
-            value=value,
-            unit=unit,
-            timestamp=datetime.now(),
-            metadata=metadata or {}
+            total_calls=operation.calls,
+            total_time=operation.total_ns / 1e9,
+            min_time=histogram.min_ns / 1e9,
+            max_time=histogram.max_ns / 1e9,
+            avg_time=operation.total_ns / operation.calls / 1e9,
+            last_call=_wall_datetime(operation.last_ns),
+            errors=operation.errors,
+            p50_time=p50 / 1e9,
+            p95_time=p95 / 1e9,
+            p99_time=p99 / 1e9,
         )
-        
-        with self._lock:
-            self.metrics.append(metric)
-            
-            # Keep only last 1000 metrics
-            if len(self.metrics) > 1000:
-                self.metrics = self.metrics[-1000:]
     
     def get_profile(self, name: str) -> Optional[PerformanceProfile]:
         """Get performance profile for a name"""
-        return self.profiles.get(name)
+        self.flush()
+        with self._lock:
+            operation = self._stats.get(name)
+            return self._profile(name, operation) if operation else None
     
     def get_all_profiles(self) -> Dict[str, PerformanceProfile]:
         """Get all performance profiles"""
-        return self.profiles.copy()
+        self.flush()
+        with self._lock:
+            return {name: self._profile(name, operation) for name, operation in self._stats.items()}
+    
+    def get_histogram(self, name: str) -> Optional[LatencyHistogram]:
+        """Copy of the duration histogram of an operation"""
+        self.flush()
+        with self._lock:
+            operation = self._stats.get(name)
+            return operation.histogram.copy() if operation else None
+    
+    def get_quantiles(self, name: str, quantiles: Iterable[float] = (0.5, 0.95, 0.99)) -> Dict[float, float]:
+        """Duration quantiles (seconds) of an operation, e.g. {0.5: ..., 0.99: ...}"""
+        histogram = self.get_histogram(name)
+        quantiles = list(quantiles)
+        if histogram is None:
+            return {}
+        return {q: value / 1e9 for q, value in zip(quantiles, histogram.quantiles(quantiles))}
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain-data copy of counters and timer stats (JSON-serializable, for exporters)"""
+        self.flush()
+        with self._lock:
+            timers = {
+                name: {
+                    'count': operation.calls,
+                    'sum_ns': operation.total_ns,
+                    'errors': operation.errors,
+                    'min_ns': operation.histogram.min_ns,
+                    'max_ns': operation.histogram.max_ns,
+                    'buckets': dict(operation.histogram.counts),
+                }
+                for name, operation in self._stats.items()
+            }
+        return {'counters': self.get_counters(), 'timers': timers}
     
     def get_metrics(self, name: Optional[str] = None, 
                    since: Optional[datetime] = None) -> List[PerformanceMetric]:
         """Get metrics, optionally filtered by name and time"""
-        with self._lock:
-            metrics = self.metrics.copy()
-        
-        if name:
-            metrics = [m for m in metrics if m.name == name]
+        metrics = [
+            PerformanceMetric(
+                name=entry_name, value=value, unit=unit,
+                timestamp=_wall_datetime(perf_ns), metadata=metadata or {},
+            )
+            for entry_name, value, unit, perf_ns, metadata in list(self.metrics)
+            if not name or entry_name == name
+        ]
         
         if since:
             metrics = [m for m in metrics if m.timestamp >= since]
         
         return metrics
     
+    def increment_counter(self, name: str, value: int = 1) -> None:
+        """Increment a named counter (cache hits/misses, events, ...)"""
+        try:
+            counters = self._local.buffer.counters
+        except AttributeError:
+            counters = self._buffer().counters
+        counters[name] = counters.get(name, 0) + value
+    
+    def get_counter(self, name: str) -> int:
+        """Get the current value of a counter"""
+        return self.get_counters().get(name, 0)
+    
+    def get_counters(self, prefix: Optional[str] = None) -> Dict[str, int]:
+        """Get all counters, optionally filtered by name prefix"""
+        with self._lock:
+            counters = dict(self._counters)
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            for name, value in list(buffer.counters.items()):
+                counters[name] = counters.get(name, 0) + value
+        if prefix:
+            counters = {name: value for name, value in counters.items() if name.startswith(prefix)}
+        return counters
+    
+    def clear_counters(self) -> None:
+        """Clear all counters"""
+        with self._lock:
+            self._counters.clear()
+            for buffer in self._buffers:
+                buffer.counters = {}
+    
     def clear_metrics(self) -> None:
         """Clear all metrics"""
-        with self._lock:
-            self.metrics.clear()
+        self.metrics.clear()
     
     def clear_profiles(self) -> None:
         """Clear all profiles"""
+        self.flush()
         with self._lock:
-            self.profiles.clear()
+            self._stats.clear()
 
 
 class SystemMonitor:
-    """System resource monitor"""
+    """
+    System resource monitor.
     
-    def __init__(self):
+    ``start()`` runs a daemon sampler thread in the current process that reads
+    CPU, memory, disk and process stats every ``interval`` seconds without
+    blocking (CPU is measured since the previous sample). Worker processes
+    elect one sampler per tick through a cache lock; the winner appends to a
+    rolling series kept in the Django cache, so every worker reads the latest
+    snapshot and the recent trend instantly.
+    """
+    
+    SERIES_KEY = 'core.system_metrics:series'
+    LOCK_KEY = 'core.system_metrics:sampler'
+    
+    def __init__(self, interval: Optional[float] = None, history_size: Optional[int] = None):
+        self.interval = interval
+        self.history_size = history_size
         self.last_check = datetime.now()
-        self.metrics_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+        self.metrics_history: Dict[str, deque] = defaultdict(lambda: deque(maxlen=self.get_history_size()))
+        self._latest: Optional[Dict[str, float]] = None
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        # The first cpu_percent(None) of a process only sets the baseline
+        psutil.cpu_percent(interval=None)
     
-    def get_system_metrics(self) -> Dict[str, float]:
-        """Get current system metrics"""
-        try:
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            metrics = {
-                'cpu_percent': cpu_percent,
-                'memory_percent': memory.percent,
-                'memory_available_gb': memory.available / (1024**3),
-                'memory_used_gb': memory.used / (1024**3),
-                'disk_percent': disk.percent,
-                'disk_free_gb': disk.free / (1024**3),
-                'disk_used_gb': disk.used / (1024**3),
-            }
-            
-            # Store in history
-            timestamp = datetime.now()
-            for key, value in metrics.items():
+    def get_interval(self) -> float:
+        """Seconds between samples (0 disables the sampler thread)"""
+        if self.interval is not None:
+            return self.interval
+        return getattr(settings, 'SYSTEM_METRICS_INTERVAL', 10)
+    
+    def get_history_size(self) -> int:
+        """Samples kept in the rolling series"""
+        if self.history_size is not None:
+            return self.history_size
+        return getattr(settings, 'SYSTEM_METRICS_HISTORY', 360)
+    
+    def start(self) -> bool:
+        """Start the sampler thread of this process (no-op when already running)"""
+        if self._pid == os.getpid():
+            return False
+        if self.get_interval() <= 0:
+            return False
+        with self._lock:
+            # After a fork the parent's thread does not exist in the child
+            if self._pid == os.getpid():
+                return False
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name='system-metrics-sampler', daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+        return True
+    
+    def stop(self) -> None:
+        """Stop the sampler thread"""
+        self._stop.set()
+        self._pid = None
+    
+    def _run(self) -> None:
+        stop = self._stop
+        delay = min(1.0, self.get_interval())
+        while not stop.wait(delay):
+            delay = self.get_interval()
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error sampling system metrics: {e}")
+    
+    def collect(self, cpu_percent: Optional[float] = None) -> Dict[str, float]:
+        """
+        Read current system and process metrics (non-blocking).
+        
+        ``cpu_percent`` is a CPU usage already measured by the caller; by
+        default it is the usage since the previous call.
+        """
+        if cpu_percent is None:
+            cpu_percent = psutil.cpu_percent(interval=None)
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('/')
+        metrics = {
+            'timestamp': time.time(),
+            'cpu_percent': cpu_percent,
+            'memory_percent': memory.percent,
+            'memory_available_gb': memory.available / (1024**3),
+            'memory_used_gb': memory.used / (1024**3),
+            'memory_total_gb': memory.total / (1024**3),
+            'disk_percent': disk.percent,
+            'disk_free_gb': disk.free / (1024**3),
+            'disk_used_gb': disk.used / (1024**3),
+            'disk_total_gb': disk.total / (1024**3),
+        }
+        if hasattr(os, 'getloadavg'):
+            metrics['load_1m'] = os.getloadavg()[0]
+        process = psutil.Process()
+        with process.oneshot():
+            metrics['process_memory_mb'] = process.memory_info().rss / (1024**2)
+            metrics['process_threads'] = process.num_threads()
+        return metrics
+    
+    def sample(self, cpu_percent: Optional[float] = None) -> Dict[str, float]:
+        """Collect a sample, keep it locally and publish it to the shared series"""
+        metrics = self.collect(cpu_percent)
+        timestamp = datetime.fromtimestamp(metrics['timestamp'])
+        for key, value in metrics.items():
+            if key != 'timestamp':
                 self.metrics_history[key].append((timestamp, value))
-            
-            self.last_check = timestamp
-            return metrics
-            
+        self.last_check = timestamp
+        self._latest = metrics
+        self._publish(metrics)
+        return metrics
+    
+    def _publish(self, metrics: Dict[str, float]) -> None:
+        interval = self.get_interval() or 10
+        try:
+            # One sampler per tick across the workers
+            if not cache.add(self.LOCK_KEY, os.getpid(), timeout=max(1, int(interval * 0.8))):
+                return
+            series = cache.get(self.SERIES_KEY) or []
+            series.append(metrics)
+            cache.set(self.SERIES_KEY, series[-self.get_history_size():],
+                      timeout=int(interval * self.get_history_size()) + 60)
+        except Exception as e:
+            logger.debug(f"Error publishing system metrics: {e}")
+    
+    def get_series(self, limit: Optional[int] = None) -> List[Dict[str, float]]:
+        """Recent samples, oldest first (shared series, else this process' samples)"""
+        try:
+            series = cache.get(self.SERIES_KEY)
+        except Exception:
+            series = None
+        if not series:
+            series = [self._latest] if self._latest else []
+        return series[-limit:] if limit else list(series)
+    
+    def get_latest(self) -> Optional[Dict[str, float]]:
+        """Most recent sample of any worker, or None before the first one"""
+        series = self.get_series(limit=1)
+        latest = series[-1] if series else None
+        if self._latest and (latest is None or self._latest['timestamp'] > latest['timestamp']):
+            latest = self._latest
+        return latest
+    
+    def get_system_metrics(self, interval: Optional[float] = None) -> Dict[str, float]:
+        """
+        Get current system metrics.
+        
+        Returns the latest sample when it is recent; otherwise samples now
+        without blocking. A positive ``interval`` measures CPU over that many
+        seconds instead (blocking, for scripts).
+        """
+        try:
+            if interval:
+                return self.sample(psutil.cpu_percent(interval=interval))
+            latest = self.get_latest()
+            max_age = 3 * (self.get_interval() or 10)
+            if latest and time.time() - latest['timestamp'] <= max_age:
+                return dict(latest)
+            return self.sample()
         except Exception as e:
             logger.error(f"Error getting system metrics: {e}")
             return {}
@@ -211,13 +650,21 @@ class SystemMonitor:
     def get_metrics_history(self, metric_name: str, 
                            since: Optional[datetime] = None) -> List[tuple]:
         """Get metric history"""
-        history = list(self.metrics_history[metric_name])
+        history = [
+            (datetime.fromtimestamp(sample['timestamp']), sample[metric_name])
+            for sample in self.get_series()
+            if metric_name in sample
+        ] or list(self.metrics_history[metric_name])
         
         if since:
             history = [(ts, val) for ts, val in history if ts >= since]
         
         return history
     
+    def get_trend(self, metric_name: str, points: int = 60) -> List[float]:
+        """Last ``points`` values of a metric, oldest first (for sparklines)"""
+        return [sample[metric_name] for sample in self.get_series(limit=points) if metric_name in sample]
+    
     def get_average_metric(self, metric_name: str, 
                           minutes: int = 5) -> Optional[float]:
         """Get average metric over time period"""
@@ -239,22 +686,18 @@ system_monitor = SystemMonitor()
 def monitor_performance(name: Optional[str] = None):
     """Decorator to monitor function performance"""
     def decorator(func: Callable) -> Callable:
+        timer_name = name or f"{func.__module__}.{func.__name__}"
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
-            timer_name = name or f"{func.__module__}.{func.__name__}"
-            timer_id = performance_monitor.start_timer(timer_name)
-            
+            start_ns = time.perf_counter_ns()
+            error = True
             try:
                 result = func(*args, **kwargs)
-                performance_monitor.stop_timer(timer_id)
+                error = False
                 return result
-            except Exception as e:
-                # Record error in profile
-                profile = performance_monitor.get_profile(timer_name)
-                if profile:
-                    profile.errors += 1
-                performance_monitor.stop_timer(timer_id)
-                raise
+            finally:
+                performance_monitor.record_timing(timer_name, start_ns, error)
         
         return wrapper
     return decorator
@@ -263,22 +706,21 @@ def monitor_performance(name: Optional[str] = None):
 def monitor_method_performance(name: Optional[str] = None):
     """Decorator to monitor method performance"""
     def decorator(func: Callable) -> Callable:
+        names: Dict[type, str] = {}
+        
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            timer_name = name or f"{type(self).__name__}.{func.__name__}"
-            timer_id = performance_monitor.start_timer(timer_name)
-            
+            timer_name = name or names.get(type(self))
+            if timer_name is None:
+                timer_name = names[type(self)] = f"{type(self).__name__}.{func.__name__}"
+            start_ns = time.perf_counter_ns()
+            error = True
             try:
                 result = func(self, *args, **kwargs)
-                performance_monitor.stop_timer(timer_id)
+                error = False
                 return result
-            except Exception as e:
-                # Record error in profile
-                profile = performance_monitor.get_profile(timer_name)
-                if profile:
-                    profile.errors += 1
-                performance_monitor.stop_timer(timer_id)
-                raise
+            finally:
+                performance_monitor.record_timing(timer_name, start_ns, error)
         
         return wrapper
     return decorator
@@ -287,17 +729,20 @@ def monitor_method_performance(name: Optional[str] = None):
 class PerformanceContext:
     """Context manager for performance monitoring"""
     
-    def __init__(self, name: str):
+    __slots__ = ('name', 'monitor', 'start_ns')
+    
+    def __init__(self, name: str, monitor: Optional[PerformanceMonitor] = None):
         self.name = name
-        self.timer_id = None
+        self.monitor = monitor
+        self.start_ns = None
     
     def __enter__(self):
-        self.timer_id = performance_monitor.start_timer(self.name)
+        self.start_ns = time.perf_counter_ns()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.timer_id:
-            performance_monitor.stop_timer(self.timer_id)
+        if self.start_ns is not None:
+            (self.monitor or performance_monitor).record_timing(self.name, self.start_ns, exc_type is not None)
 
 
 class QueryOptimizer:
@@ -345,9 +790,14 @@ class PerformanceReporter:
                 'min_time': profile.min_time,
                 'max_time': profile.max_time,
                 'errors': profile.errors,
+                'p50_time': profile.p50_time,
+                'p95_time': profile.p95_time,
+                'p99_time': profile.p99_time,
                 'last_call': profile.last_call.isoformat() if profile.last_call else None
             }
         
+        report['counters'] = performance_monitor.get_counters()
+        
         return report
     
     @staticmethod
@@ -363,6 +813,8 @@ class PerformanceReporter:
         
         # Calculate averages for last 5 minutes
         for metric_name in current_metrics.keys():
+            if metric_name == 'timestamp':
+                continue
             avg = system_monitor.get_average_metric(metric_name, minutes=5)
             if avg is not None:
                 report['averages'][f"{metric_name}_5min_avg"] = avg
@@ -397,6 +849,19 @@ def record_performance_metric(name: str, value: float, unit: str = "ms",
     performance_monitor.record_metric(name, value, unit, metadata)
 
 
+def increment_performance_counter(name: str, value: int = 1) -> None:
+    """Increment a performance counter"""
+    performance_monitor.increment_counter(name, value)
+
+
+def get_cache_hit_ratio(prefix: str) -> Optional[float]:
+    """Hit ratio from the ``<prefix>.hit`` and ``<prefix>.miss`` counters"""
+    hits = performance_monitor.get_counter(f"{prefix}.hit")
+    misses = performance_monitor.get_counter(f"{prefix}.miss")
+    total = hits + misses
+    return hits / total if total else None
+
+
 def get_performance_profile(name: str) -> Optional[PerformanceProfile]:
     """Get performance profile"""
     return performance_monitor.get_profile(name)
@@ -0,0 +1,258 @@
+"""
+Per-Request SQL Query Budgets
+Records query count, DB time and repeated statements (N+1 patterns) per
+request, and enforces per-view query budgets
+"""
+import logging
+import re
+import time
+from contextlib import ExitStack
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from core.performance import performance_monitor
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(sql: str) -> str:
+    """Normalize a statement so the same query with other parameters compares equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block runs more queries than its budget"""
+
+
+class QueryRecorder:
+    """
+    Execute wrapper counting queries, DB time and repeated statements.
+
+    Use as a context manager: it installs itself on every configured
+    connection of the current thread (``connection.execute_wrapper``), so it
+    works with DEBUG off, unlike ``connection.queries``. Statements are kept
+    as raw SQL and only fingerprinted when a report is asked for, which keeps
+    the per-query cost to a dict update.
+    """
+
+    def __init__(self, using: Optional[Iterable[str]] = None):
+        self.using = list(using) if using is not None else None
+        self.count = 0
+        self.duration_ns = 0
+        self.statements: Dict[str, List[int]] = {}
+        self._stack: Optional[ExitStack] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start_ns = time.perf_counter_ns()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            self.count += 1
+            self.duration_ns += elapsed_ns
+            entry = self.statements.get(sql)
+            if entry is None:
+                self.statements[sql] = [1, elapsed_ns]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed_ns
+
+    def __enter__(self) -> 'QueryRecorder':
+        self._stack = ExitStack()
+        for alias in self.using if self.using is not None else connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stack.close()
+        self._stack = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_ns / 1e6
+
+    def fingerprints(self) -> Dict[str, Tuple[int, int]]:
+        """{fingerprint: (executions, duration_ns)}"""
+        grouped: Dict[str, List[int]] = {}
+        for sql, (count, duration_ns) in self.statements.items():
+            entry = grouped.setdefault(fingerprint(sql), [0, 0])
+            entry[0] += count
+            entry[1] += duration_ns
+        return {key: (count, duration_ns) for key, (count, duration_ns) in grouped.items()}
+
+    def duplicates(self, threshold: int = 2) -> List[Tuple[str, int, int]]:
+        """Statements run at least ``threshold`` times: [(fingerprint, executions, duration_ns)], worst first"""
+        found = [
+            (key, count, duration_ns)
+            for key, (count, duration_ns) in self.fingerprints().items()
+            if count >= threshold
+        ]
+        found.sort(key=lambda item: (-item[1], -item[2]))
+        return found
+
+    def report(self, limit: int = 5) -> str:
+        """Short human-readable summary (used in assertion messages)"""
+        lines = [f"{self.count} queries in {self.duration_ms:.1f}ms"]
+        for key, count, duration_ns in self.duplicates()[:limit]:
+            lines.append(f"  {count}x ({duration_ns / 1e6:.1f}ms) {key[:200]}")
+        return '\n'.join(lines)
+
+
+def query_budget(max_queries: int) -> Callable:
+    """Declare the query budget of a function view (class-based views set ``query_budget``)"""
+    def decorator(view_func: Callable) -> Callable:
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            return view_func(*args, **kwargs)
+        wrapper.query_budget = max_queries
+        return wrapper
+    return decorator
+
+
+def get_view_budget(view_func: Callable) -> Optional[int]:
+    """Budget declared by a view: ``@query_budget(n)`` or the ``query_budget`` class attribute"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        view_class = getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+    return budget
+
+
+class assert_query_budget:
+    """
+    Test helper: fail when the block runs more than ``max_queries`` queries
+    or repeats a statement ``n_plus_one`` times or more.
+
+        with assert_query_budget(8):
+            client.get('/artigos/')
+
+        with assert_query_budget(view=ArticleListView):
+            client.get('/artigos/')
+    """
+
+    def __init__(self, max_queries: Optional[int] = None, view: Optional[Callable] = None,
+                 n_plus_one: Optional[int] = None, using: Optional[Iterable[str]] = None):
+        if max_queries is None and view is not None:
+            max_queries = get_view_budget(view)
+        self.max_queries = max_queries
+        self.n_plus_one = n_plus_one
+        self.recorder = QueryRecorder(using)
+
+    def __enter__(self) -> QueryRecorder:
+        return self.recorder.__enter__()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.recorder.__exit__(exc_type, exc_val, exc_tb)
+        if exc_type is not None:
+            return
+        recorder = self.recorder
+        if self.max_queries is not None and recorder.count > self.max_queries:
+            raise QueryBudgetExceeded(
+                f"Query budget exceeded: {recorder.count} > {self.max_queries}\n{recorder.report()}"
+            )
+        if self.n_plus_one and recorder.duplicates(self.n_plus_one):
+            raise QueryBudgetExceeded(f"Repeated statements (N+1)\n{recorder.report()}")
+
+
+class QueryBudgetMiddleware:
+    """
+    Records the queries of every request.
+
+    Logs statements repeated QUERY_N_PLUS_ONE_THRESHOLD times or more (N+1
+    patterns) and views going over their declared budget, feeds the counters
+    of core.performance and, with QUERY_SERVER_TIMING (DEBUG by default),
+    adds a ``Server-Timing`` header. With QUERY_BUDGET_STRICT (on under the
+    test runner) an exceeded budget raises QueryBudgetExceeded, so the test
+    suite enforces the budgets.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.n_plus_one = getattr(settings, 'QUERY_N_PLUS_ONE_THRESHOLD', 5)
+        self.strict = getattr(settings, 'QUERY_BUDGET_STRICT', False)
+        self.server_timing = getattr(settings, 'QUERY_SERVER_TIMING', settings.DEBUG)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start_ns = time.perf_counter_ns()
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.finish(request, response, recorder, start_ns)
+
+    async def __acall__(self, request):
+        # Database connections are thread-local: the ORM only runs on the
+        # request's thread-sensitive executor thread (sync views and async
+        # ORM calls alike), so the recorder is installed there, not here
+        start_ns = time.perf_counter_ns()
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.finish(request, response, recorder, start_ns)
+
+    def finish(self, request, response, recorder: 'QueryRecorder', start_ns: int):
+        """Reports the recorded queries and adds the Server-Timing header"""
+        self.report(request, recorder)
+        if self.server_timing:
+            total_ms = (time.perf_counter_ns() - start_ns) / 1e6
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration_ms:.2f};desc="{recorder.count} queries", '
+                f'app;dur={total_ms:.2f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_view_budget(view_func)
+        request.query_budget_view = getattr(view_func, '__qualname__', repr(view_func))
+        view_class = getattr(view_func, 'view_class', None)
+        if view_class is not None:
+            request.query_budget_view = f"{view_class.__module__}.{view_class.__qualname__}"
+        return None
+
+    def report(self, request, recorder: QueryRecorder) -> None:
+        view = getattr(request, 'query_budget_view', request.path)
+        performance_monitor.increment_counter('db.requests')
+        performance_monitor.increment_counter('db.request_queries', recorder.count)
+        performance_monitor.record_metric(
+            'db.request_queries', recorder.count, unit='queries',
+            metadata={'view': view, 'duration_ms': recorder.duration_ms},
+        )
+
+        if recorder.count >= self.n_plus_one:
+            for key, count, duration_ns in recorder.duplicates(self.n_plus_one):
+                performance_monitor.increment_counter('db.n_plus_one')
+                logger.warning(
+                    f"Possible N+1 in {view} ({request.path}): {count}x in "
+                    f"{duration_ns / 1e6:.1f}ms: {key[:200]}"
+                )
+
+        budget = getattr(request, 'query_budget', None)
+        if budget is not None and recorder.count > budget:
+            performance_monitor.increment_counter('db.query_budget_exceeded')
+            message = f"Query budget exceeded in {view} ({request.path}): {recorder.count} > {budget}"
+            if self.strict:
+                raise QueryBudgetExceeded(f"{message}\n{recorder.report()}")
+            logger.warning(message)
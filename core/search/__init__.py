@@ -0,0 +1,161 @@
+"""
+Full-Text Search
+Pluggable inverted-index search with incremental updates
+
+Usage:
+
+    from core.search import search_engine
+    ids = search_engine.search('articles', 'programação django')
+"""
+import logging
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, QuerySet, Value, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils.module_loading import import_string
+
+from core.search.analysis import analyze, unique_terms
+from core.search.backends import (
+    ISearchBackend, InMemorySearchBackend, PostgresSearchBackend,
+    SQLiteFTS5SearchBackend, get_default_backend,
+)
+from core.search.indexes import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SearchEngine:
+    """Registry of search indexes bound to one backend"""
+
+    def __init__(self, backend: Optional[ISearchBackend] = None):
+        self._backend = backend
+        self._indexes: Dict[str, SearchIndex] = {}
+
+    @property
+    def backend(self) -> ISearchBackend:
+        """Backend from ``SEARCH_BACKEND`` ('auto' picks one for the database)"""
+        if self._backend is None:
+            path = getattr(settings, 'SEARCH_BACKEND', 'auto')
+            self._backend = get_default_backend() if path == 'auto' else import_string(path)()
+            logger.info(f"Search backend: {type(self._backend).__name__}")
+        return self._backend
+
+    def set_backend(self, backend: Optional[ISearchBackend]) -> None:
+        """Replace the backend (None re-reads the settings on next use)"""
+        self._backend = backend
+
+    def register(self, index: SearchIndex) -> None:
+        """Register an index and keep it updated on save/delete"""
+        self._indexes[index.name] = index
+        dispatch_uid = f'core.search.{index.name}'
+        post_save.connect(self._on_save, sender=index.model, dispatch_uid=dispatch_uid, weak=False)
+        post_delete.connect(self._on_delete, sender=index.model, dispatch_uid=dispatch_uid, weak=False)
+        for field in index.m2m_fields:
+            through = getattr(index.model, field).through
+            m2m_changed.connect(self._on_m2m_changed, sender=through,
+                                dispatch_uid=f'{dispatch_uid}.{field}', weak=False)
+
+    def get_index(self, name: str) -> SearchIndex:
+        """Registered index by name"""
+        try:
+            return self._indexes[name]
+        except KeyError:
+            raise KeyError(f"Search index not registered: {name}")
+
+    def get_indexes(self) -> List[SearchIndex]:
+        """All registered indexes"""
+        return list(self._indexes.values())
+
+    def search(self, name: str, query: str, limit: Optional[int] = None,
+               queryset: Optional[QuerySet] = None) -> List[int]:
+        """
+        Primary keys matching the query, best first.
+
+        With ``queryset`` (e.g. only published rows), hits outside it are
+        dropped before the limit is applied: the backend is asked for more
+        hits until ``limit`` visible ones are found or the index runs out,
+        so drafts never push visible results out of the top ``limit``.
+        """
+        terms = unique_terms(analyze(query))
+        if not terms:
+            return []
+        limit = limit or getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+        index = self.get_index(name)
+        if queryset is None:
+            return [doc_id for doc_id, _ in self.backend.search(index, terms, limit)]
+
+        fetch = limit
+        while True:
+            ids = [doc_id for doc_id, _ in self.backend.search(index, terms, fetch)]
+            visible = set(queryset.filter(pk__in=ids).prefetch_related(None).values_list('pk', flat=True))
+            results = [doc_id for doc_id in ids if doc_id in visible]
+            if len(results) >= limit or len(ids) < fetch:
+                return results[:limit]
+            fetch *= 2
+
+    def update(self, name: str, instance) -> None:
+        """Index (or re-index) one instance"""
+        index = self.get_index(name)
+        self.backend.index_document(index, instance.pk, index.analyze(instance))
+
+    def remove(self, name: str, pk: int) -> None:
+        """Remove one document"""
+        self.backend.remove_document(self.get_index(name), pk)
+
+    def rebuild(self, name: Optional[str] = None) -> Dict[str, int]:
+        """Rebuild one or all indexes; returns documents indexed per index"""
+        indexes = [self.get_index(name)] if name else self.get_indexes()
+        return {index.name: self.backend.rebuild(index, index.iter_documents()) for index in indexes}
+
+    def _indexes_for(self, model) -> List[SearchIndex]:
+        return [index for index in self._indexes.values() if index.model is model]
+
+    def _on_save(self, sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        for index in self._indexes_for(sender):
+            transaction.on_commit(lambda index=index: self._safe(self.update, index.name, instance))
+
+    def _on_delete(self, sender, instance, **kwargs):
+        pk = instance.pk
+        for index in self._indexes_for(sender):
+            transaction.on_commit(lambda index=index: self._safe(self.remove, index.name, pk))
+
+    def _on_m2m_changed(self, sender, instance, action, reverse=False, model=None, pk_set=None, **kwargs):
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        if not reverse:
+            self._on_save(type(instance), instance)
+        elif pk_set:
+            # Changed from the other side (e.g. tag.articles.add(...))
+            for related in model._default_manager.filter(pk__in=pk_set):
+                self._on_save(model, related)
+
+    def _safe(self, method, *args) -> None:
+        # The search index is derived data: never break the write that triggered it
+        try:
+            method(*args)
+        except Exception as e:
+            logger.warning(f"Error updating search index: {e}")
+
+
+def ranked_queryset(queryset: QuerySet, ids: List[int]) -> QuerySet:
+    """Filter a queryset to ``ids`` keeping the ranking order"""
+    if not ids:
+        return queryset.none()
+    ranking = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(ranking)
+
+
+# Global search engine instance
+search_engine = SearchEngine()
+
+__all__ = [
+    'SearchEngine', 'SearchIndex', 'ISearchBackend', 'InMemorySearchBackend',
+    'SQLiteFTS5SearchBackend', 'PostgresSearchBackend', 'ranked_queryset', 'search_engine',
+]
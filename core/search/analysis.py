@@ -0,0 +1,91 @@
+"""
+Text Analysis
+Portuguese-aware tokenization: accent folding, stopwords and a light stemmer
+"""
+import re
+import unicodedata
+from typing import Iterable, List
+
+from django.utils.html import strip_tags
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Common Portuguese stopwords (already accent-folded)
+STOPWORDS = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas dele
+deles depois do dos e ela elas ele eles em entre era eram essa essas esse esses esta
+estas este estes eu foi foram ha isso isto ja la lhe lhes mais mas me mesmo meu meus
+minha minhas muito na nas nem no nos nossa nossas nosso nossos num numa o os ou para
+pela pelas pelo pelos por qual quando que quem se sem ser seu seus so sua suas tambem
+te tem tu tua tuas um uma umas uns voce voces vos
+""".split())
+
+# Plural endings, checked in order (longest first)
+PLURAL_RULES = (
+    ('oes', 'ao'),
+    ('aes', 'ao'),
+    ('ais', 'al'),
+    ('eis', 'el'),
+    ('ois', 'ol'),
+    ('res', 'r'),
+    ('zes', 'z'),
+    ('les', 'l'),
+    ('ns', 'm'),
+)
+
+MIN_STEM_LENGTH = 4
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents ("Programação" -> "programacao")"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(token: str) -> str:
+    """
+    Light Portuguese stemmer for folded tokens.
+
+    Removes plural and adverb endings and the final gender vowel, so
+    "artigos", "artigo" and "artiga" share the stem "artig". It is applied
+    to both documents and queries, so it only has to be consistent.
+    """
+    if len(token) < MIN_STEM_LENGTH or token.isdigit():
+        return token
+
+    if token.endswith('mente') and len(token) > 7:
+        token = token[:-5]
+
+    for suffix, replacement in PLURAL_RULES:
+        if token.endswith(suffix) and len(token) > len(suffix) + 1:
+            token = token[:-len(suffix)] + replacement
+            break
+    else:
+        if token.endswith('s') and not token.endswith(('ss', 'us', 'is')):
+            token = token[:-1]
+
+    if len(token) >= MIN_STEM_LENGTH and token[-1] in 'aeo':
+        token = token[:-1]
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Tokenize, fold, drop stopwords and stem"""
+    if not text:
+        return []
+    tokens = []
+    for token in TOKEN_RE.findall(fold(text)):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        tokens.append(stem(token))
+    return tokens
+
+
+def analyze_html(text: str) -> List[str]:
+    """Analyze rich text (TinyMCE content) after stripping the markup"""
+    return analyze(strip_tags(text or ''))
+
+
+def unique_terms(tokens: Iterable[str]) -> List[str]:
+    """Distinct terms, keeping their first-seen order"""
+    return list(dict.fromkeys(tokens))
@@ -0,0 +1,406 @@
+"""
+Search Backends
+Inverted-index implementations: pure Python (BM25), SQLite FTS5 and PostgreSQL
+"""
+import heapq
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Tuple
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from core.search.schema import has_fts5, table_statements
+
+if TYPE_CHECKING:
+    from core.search.indexes import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# Analyzed document: field name -> list of terms
+AnalyzedDocument = Dict[str, List[str]]
+SearchHit = Tuple[int, float]
+
+
+class SearchTableMissing(RuntimeError):
+    """The index table of a database backend was not created (migrations not applied)"""
+
+
+class ISearchBackend(ABC):
+    """Search backend interface"""
+
+    @abstractmethod
+    def index_document(self, index: 'SearchIndex', doc_id: int, document: AnalyzedDocument) -> None:
+        """Add or replace a document"""
+        pass
+
+    @abstractmethod
+    def remove_document(self, index: 'SearchIndex', doc_id: int) -> None:
+        """Remove a document"""
+        pass
+
+    @abstractmethod
+    def search(self, index: 'SearchIndex', terms: List[str], limit: int) -> List[SearchHit]:
+        """Return (doc_id, score) pairs, best first, matching any of the terms"""
+        pass
+
+    @abstractmethod
+    def rebuild(self, index: 'SearchIndex', documents: Iterable[Tuple[int, AnalyzedDocument]]) -> int:
+        """Replace the whole index; returns the number of documents indexed"""
+        pass
+
+    @abstractmethod
+    def drop(self, index: 'SearchIndex') -> None:
+        """Remove the index storage"""
+        pass
+
+    @abstractmethod
+    def document_count(self, index: 'SearchIndex') -> int:
+        """Number of indexed documents"""
+        pass
+
+
+class _MemoryIndex:
+    """Postings and document lengths of one index"""
+
+    __slots__ = ('postings', 'lengths', 'terms', 'total_length', 'version', 'checked_at')
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self.lengths: Dict[int, float] = {}
+        self.terms: Dict[int, Tuple[str, ...]] = {}
+        self.total_length = 0.0
+        self.version = None
+        self.checked_at = 0.0
+
+
+class InMemorySearchBackend(ISearchBackend):
+    """
+    Pure-Python inverted index with field-weighted BM25 ranking.
+
+    Each process keeps its own copy, built from the database on first use.
+    Writes bump a version in the Django cache; other processes notice it
+    (checked at most every ``check_interval`` seconds) and rebuild.
+    """
+
+    VERSION_KEY = 'search:{index}:version'
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, check_interval: float = 5.0):
+        self.k1 = k1
+        self.b = b
+        self.check_interval = check_interval
+        self._indexes: Dict[str, _MemoryIndex] = {}
+        self._lock = threading.RLock()
+
+    def index_document(self, index, doc_id, document):
+        with self._lock:
+            state = self._get_state(index)
+            self._remove(state, doc_id)
+            self._add(state, index, doc_id, document)
+            state.version = self._bump_version(index)
+
+    def remove_document(self, index, doc_id):
+        with self._lock:
+            state = self._get_state(index)
+            self._remove(state, doc_id)
+            state.version = self._bump_version(index)
+
+    def search(self, index, terms, limit):
+        state = self._get_state(index)
+        if not terms or not state.lengths:
+            return []
+
+        total_docs = len(state.lengths)
+        avg_length = state.total_length / total_docs or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            postings = state.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                norm = k1 * (1 - b + b * state.lengths[doc_id] / avg_length)
+                scores[doc_id] += idf * tf * (k1 + 1) / (tf + norm)
+        return heapq.nlargest(limit, scores.items(), key=lambda hit: hit[1])
+
+    def rebuild(self, index, documents):
+        state = _MemoryIndex()
+        count = 0
+        for doc_id, document in documents:
+            self._add(state, index, doc_id, document)
+            count += 1
+        with self._lock:
+            state.version = self._read_version(index)
+            state.checked_at = time.monotonic()
+            self._indexes[index.name] = state
+        return count
+
+    def drop(self, index):
+        with self._lock:
+            self._indexes.pop(index.name, None)
+
+    def document_count(self, index):
+        return len(self._get_state(index).lengths)
+
+    def _get_state(self, index) -> _MemoryIndex:
+        state = self._indexes.get(index.name)
+        now = time.monotonic()
+        if state is not None and now - state.checked_at < self.check_interval:
+            return state
+
+        with self._lock:
+            state = self._indexes.get(index.name)
+            if state is None or self._read_version(index) != state.version:
+                self.rebuild(index, index.iter_documents())
+                state = self._indexes[index.name]
+            state.checked_at = now
+            return state
+
+    def _add(self, state: _MemoryIndex, index, doc_id: int, document: AnalyzedDocument) -> None:
+        length = 0.0
+        frequencies: Dict[str, float] = defaultdict(float)
+        for field, terms in document.items():
+            weight = index.fields.get(field, 1.0)
+            for term in terms:
+                frequencies[term] += weight
+            length += weight * len(terms)
+        for term, tf in frequencies.items():
+            state.postings[term][doc_id] = tf
+        state.terms[doc_id] = tuple(frequencies)
+        state.lengths[doc_id] = length
+        state.total_length += length
+
+    def _remove(self, state: _MemoryIndex, doc_id: int) -> None:
+        length = state.lengths.pop(doc_id, None)
+        if length is None:
+            return
+        state.total_length -= length
+        for term in state.terms.pop(doc_id, ()):
+            postings = state.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del state.postings[term]
+
+    def _read_version(self, index):
+        try:
+            return cache.get(self.VERSION_KEY.format(index=index.name))
+        except Exception as e:
+            logger.warning(f"Error reading search index version: {e}")
+            return None
+
+    def _bump_version(self, index):
+        key = self.VERSION_KEY.format(index=index.name)
+        try:
+            cache.add(key, 0, timeout=None)
+            return cache.incr(key)
+        except Exception as e:
+            logger.debug(f"Error bumping search index version: {e}")
+            version = time.time_ns()
+            cache.set(key, version, timeout=None)
+            return version
+
+
+class _SQLSearchBackend(ISearchBackend):
+    """Shared plumbing for backends that keep the index in a database table"""
+
+    vendor = ''
+    batch_size = 500
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        self._ready_tables = set()
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def table_name(self, index) -> str:
+        return f'search_{index.name}'
+
+    def is_available(self) -> bool:
+        """Whether this backend can run on the configured database"""
+        return self.connection.vendor == self.vendor
+
+    def ensure_table(self, index) -> None:
+        """
+        Check (once per process) that the index table exists.
+
+        Tables are created by the migrations and filled by the
+        ``rebuild_search_index`` command, never during a request.
+        """
+        table = self.table_name(index)
+        if table in self._ready_tables:
+            return
+        with self._lock:
+            if table in self._ready_tables:
+                return
+            if table not in self.connection.introspection.table_names():
+                raise SearchTableMissing(
+                    f"Search table {table} does not exist: run migrate and rebuild_search_index"
+                )
+            self._ready_tables.add(table)
+
+    def drop(self, index):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table_name(index)}')
+        self._ready_tables.discard(self.table_name(index))
+
+    def document_count(self, index):
+        self.ensure_table(index)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table_name(index)}')
+            return cursor.fetchone()[0]
+
+    def rebuild(self, index, documents):
+        table = self.table_name(index)
+        if table not in self._ready_tables:
+            # Explicit rebuilds (command, benchmarks) may run before the table exists
+            with self.connection.cursor() as cursor:
+                for statement in self.create_statements(index):
+                    cursor.execute(statement)
+            self._ready_tables.add(table)
+
+        count = 0
+        batch = []
+        with transaction.atomic(using=self.using), self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table}')
+            for doc_id, document in documents:
+                batch.append(self.row(index, doc_id, document))
+                if len(batch) >= self.batch_size:
+                    cursor.executemany(self.upsert_sql(index), batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(self.upsert_sql(index), batch)
+                count += len(batch)
+        return count
+
+    def index_document(self, index, doc_id, document):
+        self.ensure_table(index)
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.upsert_sql(index), self.row(index, doc_id, document))
+
+    def create_statements(self, index) -> List[str]:
+        return table_statements(self.vendor, self.table_name(index), list(index.fields))
+
+    @abstractmethod
+    def upsert_sql(self, index) -> str:
+        pass
+
+    @abstractmethod
+    def row(self, index, doc_id: int, document: AnalyzedDocument) -> tuple:
+        pass
+
+
+class SQLiteFTS5SearchBackend(_SQLSearchBackend):
+    """
+    SQLite FTS5 virtual table per index, ranked with ``bm25()``.
+
+    Text is analyzed in Python (stemming, accent folding) before it is
+    stored, so FTS5 only tokenizes on whitespace-separated stems.
+    """
+
+    vendor = 'sqlite'
+
+    def is_available(self) -> bool:
+        return super().is_available() and has_fts5(self.connection)
+
+    def upsert_sql(self, index):
+        columns = ', '.join(index.fields)
+        placeholders = ', '.join(['%s'] * (len(index.fields) + 1))
+        return f'INSERT OR REPLACE INTO {self.table_name(index)} (rowid, {columns}) VALUES ({placeholders})'
+
+    def row(self, index, doc_id, document):
+        return (doc_id, *(' '.join(document.get(field, [])) for field in index.fields))
+
+    def remove_document(self, index, doc_id):
+        self.ensure_table(index)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table_name(index)} WHERE rowid = %s', [doc_id])
+
+    def search(self, index, terms, limit):
+        if not terms:
+            return []
+        self.ensure_table(index)
+        table = self.table_name(index)
+        weights = ', '.join(str(float(weight)) for weight in index.fields.values())
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid, bm25({table}, {weights}) AS score FROM {table} '
+                f'WHERE {table} MATCH %s ORDER BY score LIMIT %s',
+                [match, limit],
+            )
+            # bm25() is negative: lower is better
+            return [(doc_id, -score) for doc_id, score in cursor.fetchall()]
+
+
+class PostgresSearchBackend(_SQLSearchBackend):
+    """
+    PostgreSQL ``tsvector`` column with a GIN index, ranked with ``ts_rank_cd``.
+
+    Fields are mapped to the weight classes A-D by their configured weight.
+    The 'simple' configuration is used because stems come from the shared
+    Python analyzer, which keeps results identical across backends.
+    """
+
+    vendor = 'postgresql'
+    WEIGHT_CLASSES = 'ABCD'
+
+    def weight_classes(self, index) -> Dict[str, str]:
+        """Field -> weight class (highest weight gets 'A')"""
+        distinct = sorted(set(index.fields.values()), reverse=True)
+        classes = {}
+        for field, weight in index.fields.items():
+            position = min(distinct.index(weight), len(self.WEIGHT_CLASSES) - 1)
+            classes[field] = self.WEIGHT_CLASSES[position]
+        return classes
+
+    def upsert_sql(self, index):
+        classes = self.weight_classes(index)
+        vector = ' || '.join(
+            f"setweight(to_tsvector('simple', %s), '{classes[field]}')" for field in index.fields
+        )
+        return (
+            f'INSERT INTO {self.table_name(index)} (doc_id, document) VALUES (%s, {vector}) '
+            f'ON CONFLICT (doc_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+
+    def row(self, index, doc_id, document):
+        return (doc_id, *(' '.join(document.get(field, [])) for field in index.fields))
+
+    def remove_document(self, index, doc_id):
+        self.ensure_table(index)
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table_name(index)} WHERE doc_id = %s', [doc_id])
+
+    def search(self, index, terms, limit):
+        if not terms:
+            return []
+        self.ensure_table(index)
+        table = self.table_name(index)
+        # Terms are analyzer output (\w+ only), safe to join into a tsquery
+        query = ' | '.join(terms)
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT doc_id, ts_rank_cd(document, query) AS score "
+                f"FROM {table}, to_tsquery('simple', %s) query "
+                f"WHERE document @@ query ORDER BY score DESC LIMIT %s",
+                [query, limit],
+            )
+            return list(cursor.fetchall())
+
+
+def get_default_backend(using: str = DEFAULT_DB_ALIAS) -> ISearchBackend:
+    """Best backend for the configured database"""
+    for backend_class in (PostgresSearchBackend, SQLiteFTS5SearchBackend):
+        backend = backend_class(using)
+        if backend.is_available():
+            return backend
+    return InMemorySearchBackend()
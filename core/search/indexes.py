@@ -0,0 +1,58 @@
+"""
+Search Indexes
+Declares which model fields are indexed and with which weight
+"""
+from typing import Dict, Iterator, Optional, Tuple, Type
+
+from django.db import models
+
+from core.search.analysis import analyze, analyze_html
+from core.search.backends import AnalyzedDocument
+
+
+class SearchIndex:
+    """
+    Search index definition for a model.
+
+    ``fields`` maps field names to ranking weights. A field is read from
+    ``prepare_<field>(instance)`` when defined, otherwise from the model
+    attribute. Fields listed in ``html_fields`` have their markup stripped.
+    ``m2m_fields`` are re-indexed when the relation changes.
+    """
+
+    name: str = ''
+    model: Optional[Type[models.Model]] = None
+    fields: Dict[str, float] = {}
+    html_fields: Tuple[str, ...] = ()
+    m2m_fields: Tuple[str, ...] = ()
+    chunk_size = 500
+
+    def get_queryset(self):
+        """Rows to index (visibility filters belong to the caller's queryset)"""
+        return self.model._default_manager.all()
+
+    def prepare(self, instance) -> Dict[str, str]:
+        """Raw text of each indexed field"""
+        document = {}
+        for field in self.fields:
+            preparer = getattr(self, f'prepare_{field}', None)
+            value = preparer(instance) if preparer else getattr(instance, field, '')
+            document[field] = value or ''
+        return document
+
+    def analyze(self, instance) -> AnalyzedDocument:
+        """Terms of each indexed field"""
+        return {
+            field: analyze_html(text) if field in self.html_fields else analyze(text)
+            for field, text in self.prepare(instance).items()
+        }
+
+    def iter_documents(self) -> Iterator[Tuple[int, AnalyzedDocument]]:
+        """All documents of the index, for rebuilds"""
+        queryset = self.get_queryset()
+        iterator = (
+            queryset if queryset._prefetch_related_lookups
+            else queryset.iterator(chunk_size=self.chunk_size)
+        )
+        for instance in iterator:
+            yield instance.pk, self.analyze(instance)
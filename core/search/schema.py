@@ -0,0 +1,72 @@
+"""
+Search Schema
+DDL of the database-backed index tables, shared by the backends and the migrations
+"""
+from typing import List, Sequence
+
+
+def table_statements(vendor: str, table: str, fields: Sequence[str]) -> List[str]:
+    """CREATE statements of an index table ([] for vendors without a SQL backend)"""
+    if vendor == 'sqlite':
+        columns = ', '.join(fields)
+        return [f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({columns}, tokenize='unicode61')"]
+    if vendor == 'postgresql':
+        return [
+            f'CREATE TABLE IF NOT EXISTS {table} (doc_id bigint PRIMARY KEY, document tsvector NOT NULL)',
+            f'CREATE INDEX IF NOT EXISTS {table}_document_idx ON {table} USING GIN (document)',
+        ]
+    return []
+
+
+def has_fts5(connection) -> bool:
+    """Whether the SQLite build ships the FTS5 extension"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if cursor.fetchone()[0]:
+                return True
+            # Builds may ship FTS5 without the compile option flag
+            cursor.execute('CREATE VIRTUAL TABLE temp.search_fts5_probe USING fts5(body)')
+            cursor.execute('DROP TABLE temp.search_fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+def create_table(schema_editor, table: str, fields: Sequence[str]) -> None:
+    """
+    Migration helper: create an index table on databases that support it.
+
+    SQLite without FTS5 and other vendors are skipped; the search engine
+    then falls back to the in-memory backend.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not has_fts5(connection):
+        return
+    for statement in table_statements(connection.vendor, table, fields):
+        schema_editor.execute(statement)
+
+
+def drop_table(schema_editor, table: str) -> None:
+    """Migration helper: drop an index table"""
+    schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def populate_table(schema_editor, index) -> int:
+    """
+    Migration helper: fill the index table of ``index`` from the database.
+
+    ``index`` is a SearchIndex bound to the historical model, so existing
+    rows are searchable right after ``migrate``. Skipped (0) where
+    create_table() created nothing.
+    """
+    from core.search.backends import PostgresSearchBackend, SQLiteFTS5SearchBackend
+
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and has_fts5(connection):
+        backend = SQLiteFTS5SearchBackend(connection.alias)
+    elif connection.vendor == 'postgresql':
+        backend = PostgresSearchBackend(connection.alias)
+    else:
+        return 0
+    return backend.rebuild(index, index.iter_documents())
@@ -173,6 +173,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.query_budget.QueryBudgetMiddleware',
     'apps.config.middleware.setup_middleware.SetupMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -212,6 +213,10 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                # core não é um app instalado: registra as tags de imagem ({% load image_tags %})
+                'image_tags': 'core.templatetags.image_tags',
+            },
         },
     },
 ]
@@ -498,6 +503,93 @@ CACHES = get_cache_config()
 RATELIMIT_ENABLE = os.environ.get('RATELIMIT_ENABLE', 'True').lower() == 'true'
 RATELIMIT_USE_CACHE = os.environ.get('RATELIMIT_USE_CACHE', 'default')
 
+# Contadores de visualização: gravados em lote a cada N segundos ou N incrementos por worker
+VIEW_COUNT_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNT_FLUSH_INTERVAL', '10'))
+VIEW_COUNT_MAX_PENDING = int(os.environ.get('VIEW_COUNT_MAX_PENDING', '1000'))
+
+# Tempo de vida (segundos) do HTML da página de artigo servido a leitores anônimos
+ARTICLE_DETAIL_CACHE_TIMEOUT = int(os.environ.get('ARTICLE_DETAIL_CACHE_TIMEOUT', '300'))
+
+# Cache em memória do core.cache (por processo): limite de entradas e de bytes (0 = sem limite)
+MEMORY_CACHE_MAX_ENTRIES = int(os.environ.get('MEMORY_CACHE_MAX_ENTRIES', '10000'))
+MEMORY_CACHE_MAX_BYTES = int(os.environ.get('MEMORY_CACHE_MAX_BYTES', '0'))
+
+# Cache em duas camadas (core.cache "tiered"): L1 por processo na frente do cache do Django.
+# Cada processo relê o log de invalidação no máximo a cada N segundos (janela de consistência)
+TIERED_CACHE_CONSISTENCY_WINDOW = float(os.environ.get('TIERED_CACHE_CONSISTENCY_WINDOW', '1.0'))
+TIERED_CACHE_L1_MAX_ENTRIES = int(os.environ.get('TIERED_CACHE_L1_MAX_ENTRIES', '1000'))
+TIERED_CACHE_L1_TIMEOUT = int(os.environ.get('TIERED_CACHE_L1_TIMEOUT', '60'))
+TIERED_CACHE_LOG_SIZE = int(os.environ.get('TIERED_CACHE_LOG_SIZE', '1000'))
+
+# CacheManager.get_or_set: segundos servindo o valor vencido enquanto um único processo o recalcula,
+# espera máxima pelo recálculo de outro processo e intensidade da renovação antecipada (0 = desligada)
+CACHE_STALE_TTL = int(os.environ.get('CACHE_STALE_TTL', '30'))
+CACHE_LOCK_TIMEOUT = float(os.environ.get('CACHE_LOCK_TIMEOUT', '10'))
+CACHE_EARLY_REFRESH_BETA = float(os.environ.get('CACHE_EARLY_REFRESH_BETA', '1.0'))
+
+# Endpoint /metrics (OpenMetrics): cada worker grava um instantâneo em METRICS_DIR (vazio = diretório
+# temporário do sistema) a cada N segundos; com METRICS_TOKEN, a coleta exige "Authorization: Bearer <token>"
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_WRITE_INTERVAL = float(os.environ.get('METRICS_WRITE_INTERVAL', '5'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Amostragem de CPU, memória e disco em segundo plano (0 = desligada) e quantas amostras
+# ficam na série compartilhada pelos workers (360 x 10 s = 1 hora)
+SYSTEM_METRICS_INTERVAL = float(os.environ.get('SYSTEM_METRICS_INTERVAL', '10'))
+SYSTEM_METRICS_HISTORY = int(os.environ.get('SYSTEM_METRICS_HISTORY', '360'))
+
+# Consultas SQL por requisição (core.query_budget): a mesma consulta repetida N vezes é registrada como
+# possível N+1; estourar o orçamento da view gera erro em vez de aviso (padrão: só nos testes);
+# cabeçalho Server-Timing com o tempo de banco (padrão: só em DEBUG)
+QUERY_N_PLUS_ONE_THRESHOLD = int(os.environ.get('QUERY_N_PLUS_ONE_THRESHOLD', '5'))
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', str(ENVIRONMENT == 'testing')).lower() == 'true'
+QUERY_SERVER_TIMING = os.environ.get('QUERY_SERVER_TIMING', str(DEBUG)).lower() == 'true'
+
+# Eventos (core.observers): modo padrão dos observers ('sync', 'on_commit' ou 'background'; nos testes,
+# 'sync'), threads do pool em segundo plano, tamanho da fila e espera máxima com a fila cheia antes de
+# executar o observer na própria requisição
+EVENT_DISPATCH_MODE = os.environ.get('EVENT_DISPATCH_MODE', 'sync' if ENVIRONMENT == 'testing' else 'on_commit')
+EVENT_WORKERS = int(os.environ.get('EVENT_WORKERS', '2'))
+EVENT_QUEUE_SIZE = int(os.environ.get('EVENT_QUEUE_SIZE', '1000'))
+EVENT_QUEUE_TIMEOUT = float(os.environ.get('EVENT_QUEUE_TIMEOUT', '0.1'))
+
+# Derivados de imagens (core.images): larguras das variantes geradas no upload, qualidade
+# JPEG/WebP e nome do manifesto em MEDIA_ROOT (preencher o que já existe: generate_image_derivatives)
+IMAGE_DERIVATIVE_WIDTHS = [int(width) for width in os.environ.get('IMAGE_DERIVATIVE_WIDTHS', '320,640,960,1280').split(',')]
+IMAGE_DERIVATIVE_QUALITY = int(os.environ.get('IMAGE_DERIVATIVE_QUALITY', '80'))
+IMAGE_MANIFEST_NAME = os.environ.get('IMAGE_MANIFEST_NAME', 'derivatives.json')
+
+# Avatares: lado máximo em pixels (reduzidos e sem metadados em segundo plano, apps.accounts.services.avatar_service)
+AVATAR_SIZE = int(os.environ.get('AVATAR_SIZE', '300'))
+
+# Backup da mídia (apps.config.services.media_backup_service): nível de compressão gzip do tar.gz
+# gerado em fluxo (a maior parte da mídia já é comprimida: níveis altos custam CPU e quase não reduzem)
+MEDIA_BACKUP_COMPRESSLEVEL = int(os.environ.get('MEDIA_BACKUP_COMPRESSLEVEL', '6'))
+
+# Backups (backups/<tipo>): quantos manter e por quantos dias (0 = sem limite de idade), aplicados ao
+# listar e ao fim de cada job; backup do banco pelo worker (manage.py backup_worker): processos do
+# pg_dump/pg_restore -j, nível de compressão e após quantos segundos sem sinal um job é dado como perdido
+BACKUP_RETENTION_COUNT = int(os.environ.get('BACKUP_RETENTION_COUNT', '10'))
+BACKUP_RETENTION_DAYS = int(os.environ.get('BACKUP_RETENTION_DAYS', '0'))
+BACKUP_DUMP_JOBS = int(os.environ.get('BACKUP_DUMP_JOBS', str(min(4, os.cpu_count() or 1))))
+BACKUP_DUMP_COMPRESSLEVEL = int(os.environ.get('BACKUP_DUMP_COMPRESSLEVEL', '6'))
+BACKUP_JOB_STALE_SECONDS = int(os.environ.get('BACKUP_JOB_STALE_SECONDS', '600'))
+
+# Email (apps.accounts.services.email_transport): intervalo de verificação da versão da configuração
+# em cache, conexões SMTP ociosas mantidas por configuração e por quanto tempo, mensagens por
+# conexão no envio em massa
+EMAIL_CONFIG_CHECK_INTERVAL = float(os.environ.get('EMAIL_CONFIG_CHECK_INTERVAL', '5'))
+EMAIL_POOL_SIZE = int(os.environ.get('EMAIL_POOL_SIZE', '4'))
+EMAIL_POOL_IDLE_TIMEOUT = float(os.environ.get('EMAIL_POOL_IDLE_TIMEOUT', '60'))
+EMAIL_BULK_BATCH_SIZE = int(os.environ.get('EMAIL_BULK_BATCH_SIZE', '100'))
+
+# Busca textual: 'auto' escolhe PostgreSQL (tsvector), SQLite (FTS5) ou o índice em memória
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')
+SEARCH_MAX_RESULTS = int(os.environ.get('SEARCH_MAX_RESULTS', '500'))
+
+# Artigos relacionados: vizinhos pré-calculados guardados por artigo
+RELATED_ARTICLES_LIMIT = int(os.environ.get('RELATED_ARTICLES_LIMIT', '6'))
+
 
 
 # Crispy Forms Configuration
@@ -645,6 +737,12 @@ FACEBOOK_PIXEL_ID = os.environ.get('FACEBOOK_PIXEL_ID', '')
 # Módulos ativos do sistema
 ACTIVE_MODULES = os.environ.get('ACTIVE_MODULES', 'accounts,config,pages,articles').split(',')
 
+# Intervalo (segundos) em que cada worker confere a versão do snapshot de módulos
+MODULE_STATE_CHECK_INTERVAL = float(os.environ.get('MODULE_STATE_CHECK_INTERVAL', '5'))
+
+# Intervalo (segundos) para testar novamente um banco de dados indisponível
+DATABASE_READINESS_RETRY_INTERVAL = float(os.environ.get('DATABASE_READINESS_RETRY_INTERVAL', '30'))
+
 # Configurações de tema e localização
 DEFAULT_THEME = os.environ.get('DEFAULT_THEME', 'light')
 DEFAULT_LANGUAGE = os.environ.get('DEFAULT_LANGUAGE', 'pt-br')
@@ -1,8 +1,11 @@
 from django import template
 from django.utils.safestring import mark_safe
+from django.forms.utils import flatatt
 from django.utils.html import format_html
 import os
 
+from core.images import image_derivatives
+
 register = template.Library()
 
 
@@ -10,6 +13,7 @@ register = template.Library()
 def optimized_image(src, alt="", css_class="", lazy=True, aspect_ratio=None, sizes="100vw"):
     """
     Render an optimized image with lazy loading and WebP support
+    (WebP and srcset only when core.images generated them)
     
     Usage:
     {% optimized_image "path/to/image.jpg" "Alt text" "css-class" lazy=True aspect_ratio="16-9" %}
@@ -17,8 +21,8 @@ def optimized_image(src, alt="", css_class="", lazy=True, aspect_ratio=None, siz
     if not src:
         return ""
     
-    # Generate WebP version path
-    webp_src = generate_webp_path(src)
+    webp_src = image_derivatives.webp_url(src)
+    srcset = _srcset(image_derivatives.srcset(src))
     
     # Build CSS classes
     classes = ["img-optimized"]
@@ -43,12 +47,18 @@ def optimized_image(src, alt="", css_class="", lazy=True, aspect_ratio=None, siz
         img_attrs['data-src'] = src
         if webp_src:
             img_attrs['data-webp'] = webp_src
+        if srcset:
+            img_attrs['data-srcset'] = srcset
+            img_attrs['sizes'] = sizes
         img_attrs['src'] = 'data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMTAwIiBoZWlnaHQ9IjEwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMTAwJSIgaGVpZ2h0PSIxMDAlIiBmaWxsPSIjZGRkIi8+PC9zdmc+'
     else:
         img_attrs['src'] = src
+        if srcset:
+            img_attrs['srcset'] = srcset
+            img_attrs['sizes'] = sizes
     
     # Build HTML
-    img_html = format_html('<img {}>', ' '.join(f'{k}="{v}"' for k, v in img_attrs.items()))
+    img_html = format_html('<img{}>', flatatt(img_attrs))
     
     if aspect_ratio:
         return format_html(
@@ -87,7 +97,7 @@ def responsive_image(src, alt="", css_class="", lazy=True, breakpoints=None):
     
     # Add source elements for each breakpoint
     for width, bp_src in sources:
-        webp_src = generate_webp_path(bp_src)
+        webp_src = image_derivatives.webp_url(bp_src)
         
         if webp_src:
             picture_html.append(
@@ -97,10 +107,10 @@ def responsive_image(src, alt="", css_class="", lazy=True, breakpoints=None):
             f'<source media="(min-width: {width}px)" srcset="{bp_src}">'
         )
     
-    # Add WebP fallback for main image
-    webp_src = generate_webp_path(src)
-    if webp_src:
-        picture_html.append(f'<source srcset="{webp_src}" type="image/webp">')
+    # Add WebP sources for the main image (the generated width variants when there are any)
+    webp_srcset = _srcset(image_derivatives.srcset(src, webp=True))
+    if webp_srcset:
+        picture_html.append(f'<source srcset="{webp_srcset}" type="image/webp">')
     
     # Add main img element
     classes = ["img-optimized"]
@@ -116,7 +126,7 @@ def responsive_image(src, alt="", css_class="", lazy=True, breakpoints=None):
         'loading': 'lazy' if lazy else 'eager',
     }
     
-    picture_html.append(format_html('<img {}>', ' '.join(f'{k}="{v}"' for k, v in img_attrs.items())))
+    picture_html.append(format_html('<img{}>', flatatt(img_attrs)))
     picture_html.append('</picture>')
     
     return mark_safe(''.join(picture_html))
@@ -149,12 +159,12 @@ def image_placeholder(width=300, height=200, text="", bg_color="#ddd", text_colo
 @register.filter
 def webp_url(image_url):
     """
-    Convert image URL to WebP version
+    Convert image URL to its WebP version, when one was generated
     
     Usage:
     {{ image.url|webp_url }}
     """
-    return generate_webp_path(image_url) or image_url
+    return image_derivatives.webp_url(image_url) or image_url
 
 
 @register.inclusion_tag('includes/optimized_image.html')
@@ -167,7 +177,7 @@ def include_optimized_image(src, alt="", css_class="", lazy=True, aspect_ratio=N
     """
     return {
         'src': src,
-        'webp_src': generate_webp_path(src),
+        'webp_src': image_derivatives.webp_url(src),
         'alt': alt,
         'css_class': css_class,
         'lazy': lazy,
@@ -178,7 +188,8 @@ def include_optimized_image(src, alt="", css_class="", lazy=True, aspect_ratio=N
 
 def generate_webp_path(image_path):
     """
-    Generate WebP version path for an image
+    Generate WebP version path for an image (naming only: the file may not exist,
+    see core.images.image_derivatives.webp_url)
     """
     if not image_path:
         return None
@@ -219,7 +230,8 @@ def preload_image(src, as_type="image"):
 @register.simple_tag
 def image_srcset(base_src, widths="320,640,960,1280"):
     """
-    Generate srcset attribute for responsive images
+    Generate srcset attribute for responsive images, listing only the
+    widths generated by core.images (plus the original)
     
     Usage:
     {% image_srcset "image.jpg" "320,640,960,1280" %}
@@ -227,15 +239,12 @@ def image_srcset(base_src, widths="320,640,960,1280"):
     if not base_src:
         return ""
     
-    name, ext = os.path.splitext(base_src)
-    srcset_items = []
-    
-    for width in widths.split(','):
-        width = width.strip()
-        responsive_src = f"{name}-{width}w{ext}"
-        srcset_items.append(f"{responsive_src} {width}w")
-    
-    return ', '.join(srcset_items)
+    wanted = [int(width) for width in widths.split(',') if width.strip()]
+    return _srcset(image_derivatives.srcset(base_src, wanted))
+
+
+def _srcset(sources):
+    return ', '.join(f"{url} {width}w" for url, width in sources)
 
 
 @register.filter
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+from decimal import Decimal
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+
+from core.cache import (
+    UnstableCacheKey, cache_manager, cache_method_result, cache_result, make_cache_key,
+)
+
+KEY_ARGS = "('texto', {'b': 1, 'a': {'x', 'y', 'z'}}, frozenset(['um', 'dois', 'três']))"
+KEY_KWARGS = "{'limite': Decimal('1.5')}"
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def key_in_subprocess(hash_seed: str) -> str:
+    script = (
+        'import django; django.setup()\n'
+        'from decimal import Decimal\n'
+        'from core.cache import make_cache_key\n'
+        f'print(make_cache_key(make_cache_key, {KEY_ARGS}, {KEY_KWARGS}, "teste"))\n'
+    )
+    env = dict(os.environ, PYTHONHASHSEED=hash_seed, DJANGO_SETTINGS_MODULE='core.settings')
+    result = subprocess.run(
+        [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_key_is_stable_across_processes_and_hash_seeds():
+    local = make_cache_key(make_cache_key, eval(KEY_ARGS), eval(KEY_KWARGS), 'teste')
+
+    assert key_in_subprocess('1') == local
+    assert key_in_subprocess('2') == local
+
+
+def test_unsupported_arguments_raise():
+    with pytest.raises(UnstableCacheKey):
+        make_cache_key(make_cache_key, (object(),))
+    assert issubclass(UnstableCacheKey, TypeError)
+
+
+def test_unsupported_arguments_are_not_cached():
+    calls = []
+
+    @cache_result(timeout=60)
+    def compute(value):
+        calls.append(value)
+        return len(calls)
+
+    marker = object()
+    assert compute(marker) == 1
+    assert compute(marker) == 2
+
+
+def test_invalidate_tags_evicts_tagged_entries():
+    calls = []
+
+    @cache_result(timeout=60, tags=['article:{0}'])
+    def render(article_id):
+        calls.append(article_id)
+        return f'artigo {article_id} v{calls.count(article_id)}'
+
+    assert render(1) == 'artigo 1 v1'
+    assert render(2) == 'artigo 2 v1'
+    assert render(1) == 'artigo 1 v1'
+
+    cache_manager.invalidate_tags('article:1')
+
+    assert render(1) == 'artigo 1 v2'
+    assert render(2) == 'artigo 2 v1'
+    assert calls == [1, 2, 1]
+
+
+class Counter:
+    def __init__(self, start):
+        self.start = start
+        self.calls = 0
+
+    @cache_method_result(timeout=60)
+    def value(self, step):
+        self.calls += 1
+        return self.start + step
+
+
+class KeyedCounter(Counter):
+    def cache_key(self):
+        return 'counter'
+
+
+def test_method_without_instance_key_is_not_shared_between_instances():
+    first, second = Counter(10), Counter(20)
+
+    assert first.value(1) == 11
+    assert second.value(1) == 21
+    assert first.value(1) == 11
+    assert first.calls == 2
+
+
+def test_method_with_cache_key_is_shared_between_instances():
+    first, second = KeyedCounter(10), KeyedCounter(20)
+
+    assert first.value(1) == 11
+    assert second.value(1) == 11
+    assert second.calls == 0
+
+
+
+def test_method_without_instance_key_warns_once(caplog, monkeypatch):
+    monkeypatch.setattr('core.cache._not_cached_warned', set())
+    counter = Counter(10)
+
+    with caplog.at_level('DEBUG', logger='core.cache'):
+        counter.value(1)
+        counter.value(2)
+        Counter(20).value(1)
+
+    levels = [record.levelname for record in caplog.records if 'Not caching' in record.getMessage()]
+    assert levels == ['WARNING', 'DEBUG', 'DEBUG']
+
+@pytest.mark.django_db
+def test_model_instances_are_keyed_by_label_and_pk(django_user_model):
+    first = django_user_model.objects.create(username='primeiro', email='primeiro@example.com')
+    second = django_user_model.objects.create(username='segundo', email='segundo@example.com')
+
+    assert make_cache_key(make_cache_key, (first,)) == make_cache_key(
+        make_cache_key, (django_user_model.objects.get(pk=first.pk),)
+    )
+    assert make_cache_key(make_cache_key, (first,)) != make_cache_key(make_cache_key, (second,))
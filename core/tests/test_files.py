@@ -0,0 +1,58 @@
+import os
+import stat
+
+import pytest
+from PIL import Image
+
+from core.files import FileLock, atomic_write, write_json
+from core.images import ImageManifest, build_derivatives
+
+
+def mode(path):
+    return stat.S_IMODE(os.stat(path).st_mode)
+
+
+def test_atomic_write_applies_upload_permissions(tmp_path, settings):
+    settings.FILE_UPLOAD_PERMISSIONS = 0o644
+    path = tmp_path / 'data.bin'
+
+    with atomic_write(str(path)) as f:
+        f.write(b'content')
+
+    assert path.read_bytes() == b'content'
+    assert mode(path) == 0o644
+
+
+def test_failed_write_keeps_the_original(tmp_path):
+    path = tmp_path / 'data.json'
+    write_json(str(path), {'a': 1})
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path), 'w') as f:
+            f.write('partial')
+            raise RuntimeError
+
+    assert path.read_text() == '{"a":1}'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+@pytest.mark.skipif(not FileLock.supported, reason='flock not available')
+def test_non_blocking_lock_fails_while_held(tmp_path):
+    path = str(tmp_path / '.lock')
+    with FileLock(path):
+        with pytest.raises(BlockingIOError):
+            FileLock(path).acquire(blocking=False)
+    FileLock(path).acquire(blocking=False).release()
+
+
+def test_image_derivatives_and_manifest_readable_by_web_server(tmp_path, settings):
+    settings.FILE_UPLOAD_PERMISSIONS = 0o644
+    Image.new('RGB', (1000, 600), 'blue').save(tmp_path / 'photo.jpg')
+
+    entry = build_derivatives('photo.jpg', str(tmp_path), widths=(320, 640))
+    manifest = ImageManifest(str(tmp_path / 'derivatives.json'))
+    manifest.update({'photo.jpg': entry})
+
+    written = [name for name in os.listdir(tmp_path) if name != 'photo.jpg' and not name.endswith('.lock')]
+    assert {'photo.webp', 'photo-320w.jpg', 'photo-640w.webp', 'derivatives.json'} <= set(written)
+    assert all(mode(tmp_path / name) == 0o644 for name in written)
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from core.cache import CacheManager, CachedValue
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+class Loader:
+    """Counts calls; optionally blocks until released"""
+
+    def __init__(self, value='value', delay=0.0, gate=None):
+        self.value = value
+        self.delay = delay
+        self.gate = gate
+        self.calls = 0
+        self.started = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        time.sleep(self.delay)
+        return self.value
+
+
+def run_concurrently(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(position):
+        barrier.wait()
+        results[position] = target(position)
+
+    threads = [threading.Thread(target=worker, args=(position,)) for position in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_concurrent_misses_run_the_loader_once():
+    manager = CacheManager()
+    loader = Loader(delay=0.2)
+
+    results = run_concurrently(16, lambda _: manager.get_or_set('key', loader, timeout=60))
+
+    assert loader.calls == 1
+    assert results == ['value'] * 16
+
+
+def test_single_flight_across_managers_sharing_the_cache():
+    # Two managers stand in for two processes: only the cache lock is shared
+    managers = [CacheManager(), CacheManager()]
+    loader = Loader(delay=0.2)
+
+    results = run_concurrently(
+        16, lambda position: managers[position % 2].get_or_set('key', loader, timeout=60)
+    )
+
+    assert loader.calls == 1
+    assert results == ['value'] * 16
+
+
+def test_stale_value_served_while_one_caller_refreshes():
+    manager = CacheManager()
+    backend = manager.get_backend()
+    backend.set('key', CachedValue('old', time.time() - 1, 0.0), 60)
+    gate = threading.Event()
+    refresh = Loader('new', gate=gate)
+
+    refresher = threading.Thread(target=manager.get_or_set, args=('key', refresh), kwargs={'timeout': 60})
+    refresher.start()
+    assert refresh.started.wait(5)
+
+    other = Loader('other')
+    assert manager.get_or_set('key', other, timeout=60) == 'old'
+    assert other.calls == 0
+
+    gate.set()
+    refresher.join(5)
+    assert manager.get_or_set('key', other, timeout=60) == 'new'
+    assert refresh.calls == 1
+    assert other.calls == 0
+    assert manager.get_stats()['stale_served'] == 1
+
+
+def test_none_cached_only_with_cache_none():
+    manager = CacheManager()
+    loader = Loader(None)
+
+    assert manager.get_or_set('negative', loader, timeout=60) is None
+    assert manager.get_or_set('negative', loader, timeout=60) is None
+    assert loader.calls == 1
+
+    assert manager.get_or_set('not-cached', loader, timeout=60, cache_none=False) is None
+    assert manager.get_or_set('not-cached', loader, timeout=60, cache_none=False) is None
+    assert loader.calls == 3
+
+
+def test_stale_value_kept_when_refresh_returns_none_without_cache_none():
+    manager = CacheManager()
+    manager.get_backend().set('key', CachedValue('old', time.time() - 1, 0.0), 60)
+
+    assert manager.get_or_set('key', Loader(None), timeout=60, cache_none=False) == 'old'
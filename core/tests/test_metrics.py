@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+
+import psutil
+from django.conf import settings
+
+from core.metrics import ARCHIVE_FILE, MetricsExporter
+
+
+def _dead_pid():
+    pid = 4_000_000
+    while psutil.pid_exists(pid):
+        pid += 1
+    return pid
+
+
+def _snapshot(pid, count):
+    return {
+        'pid': pid,
+        'counters': {'test.merge': count},
+        'timers': {'test.timer': {
+            'count': count, 'sum_ns': count * 1000, 'errors': 0,
+            'min_ns': 1000, 'max_ns': 1000, 'buckets': {'2': count},
+        }},
+        'gauges': {'rss_bytes': 1},
+    }
+
+
+def test_collect_merges_live_workers_and_archives_dead_ones(tmp_path):
+    exporter = MetricsExporter(directory=str(tmp_path))
+    live, dead = os.getppid(), _dead_pid()
+    (tmp_path / f'{live}.json').write_text(json.dumps(_snapshot(live, 2)))
+    (tmp_path / f'{dead}.json').write_text(json.dumps(_snapshot(dead, 3)))
+
+    merged = exporter.collect()
+
+    assert merged['counters']['test.merge'] == 5
+    assert merged['timers']['test.timer']['count'] == 5
+    assert merged['timers']['test.timer']['buckets'] == {2: 5}
+    assert set(merged['processes']) == {os.getpid(), live}
+    assert not (tmp_path / f'{dead}.json').exists()
+    assert json.loads((tmp_path / ARCHIVE_FILE).read_text())['counters'] == {'test.merge': 3}
+
+    # The archive is counted once: the dead worker's counters never go backwards or double
+    merged = exporter.collect()
+    assert merged['counters']['test.merge'] == 5
+
+
+def test_instrumentation_wired_at_startup():
+    code = (
+        'import sys, django; django.setup(); '
+        'from django.core.signals import request_started; '
+        'print("core.metrics" in sys.modules, any("core.metrics" in str(receiver[0]) for receiver in request_started.receivers))'
+    )
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='core.settings')
+    result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.split()[-2:] == ['True', 'True']
@@ -0,0 +1,48 @@
+import time
+
+import psutil
+
+from core.performance import PerformanceMonitor, SystemMonitor
+
+
+def test_profile_with_errors_drained_before_timings():
+    monitor = PerformanceMonitor()
+    # Owner thread appended the error after the flush took its timings
+    monitor._buffer().errors.append('operation')
+
+    profile = monitor.get_profile('operation')
+
+    assert profile.total_calls == 0
+    assert profile.errors == 1
+    assert profile.avg_time == 0.0
+    assert 'operation' in monitor.get_all_profiles()
+
+
+def test_profile_after_timings():
+    monitor = PerformanceMonitor()
+    monitor.record_timing('operation', time.perf_counter_ns() - 2_000_000)
+    monitor.record_timing('operation', time.perf_counter_ns() - 4_000_000, error=True)
+
+    profile = monitor.get_profile('operation')
+
+    assert profile.total_calls == 2
+    assert profile.errors == 1
+    assert profile.avg_time >= 0.003
+    assert profile.p99_time >= profile.p50_time
+
+
+def test_system_metrics_keep_the_blocking_cpu_measurement(monkeypatch):
+    monitor = SystemMonitor(interval=0)
+    monkeypatch.setattr(monitor, '_publish', lambda metrics: None)
+    calls = []
+
+    def cpu_percent(interval=None):
+        calls.append(interval)
+        return 42.0 if interval else 0.0
+
+    monkeypatch.setattr(psutil, 'cpu_percent', cpu_percent)
+
+    metrics = monitor.get_system_metrics(interval=0.5)
+
+    assert metrics['cpu_percent'] == 42.0
+    assert calls == [0.5]
@@ -0,0 +1,76 @@
+import pytest
+from django.core.cache import cache
+
+from core.cache import TieredCacheBackend
+
+
+@pytest.fixture(autouse=True)
+def clear_shared_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def make_backend():
+    # Large window: each test replays the invalidation log explicitly with sync()
+    backend = TieredCacheBackend(consistency_window=60)
+    # The first sync drops whatever L1 holds; do it before the test writes
+    backend.sync()
+    return backend
+
+
+def test_l1_hit_after_local_write():
+    backend = make_backend()
+    backend.set('key', 'value', 300)
+
+    assert backend.get('key') == 'value'
+    assert backend.l1_hits == 1
+    assert backend.l2_hits == 0
+
+
+def test_l2_fallback_fills_l1():
+    writer, reader = make_backend(), make_backend()
+    writer.set('key', 'value', 300)
+
+    assert reader.get('key') == 'value'
+    assert reader.l2_hits == 1
+    assert reader.get('key') == 'value'
+    assert reader.l1_hits == 1
+
+
+def test_write_in_other_instance_invalidates_l1_on_sync():
+    writer, reader = make_backend(), make_backend()
+    writer.set('key', 'old', 300)
+    assert reader.get('key') == 'old'
+
+    writer.set('key', 'new', 300)
+    # Inside the consistency window the reader may still serve its L1 copy
+    assert reader.get('key') == 'old'
+
+    reader.sync()
+
+    assert reader.get('key') == 'new'
+    # Both writes replayed key by key; only the initial sync flushed L1
+    assert reader.invalidations == 2
+    assert reader.l1_flushes == 1
+
+
+def test_delete_in_other_instance_propagates():
+    writer, reader = make_backend(), make_backend()
+    writer.set('key', 'value', 300)
+    assert reader.get('key') == 'value'
+
+    writer.delete('key')
+    reader.sync()
+
+    assert reader.get('key') is None
+
+
+def test_own_writes_do_not_invalidate_own_l1():
+    backend = make_backend()
+    backend.set('key', 'value', 300)
+    backend.sync()
+
+    assert backend.invalidations == 0
+    assert backend.get('key') == 'value'
+    assert backend.l1_hits == 1
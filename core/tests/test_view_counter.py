@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection, connections
+from django.test.utils import CaptureQueriesContext
+
+from apps.pages.models import Page
+from core import view_counter
+from core.view_counter import ViewCountBuffer
+
+
+@pytest.fixture
+def pages(db):
+    return [Page.objects.create(title=f'Page {i}', slug=f'page-{i}', content='Content') for i in range(3)]
+
+
+def view_counts(pages):
+    return list(Page.objects.filter(pk__in=[page.pk for page in pages]).order_by('pk').values_list('view_count', flat=True))
+
+
+def test_increments_stay_pending_until_flushed(pages):
+    buffer = ViewCountBuffer()
+    for _ in range(3):
+        buffer.increment(Page, pages[0].pk)
+    buffer.increment(Page, pages[1].pk)
+
+    assert buffer.pending(Page, pages[0].pk) == 3
+    assert buffer.pending(Page, pages[2].pk) == 0
+    assert buffer.get_stats()['pending_increments'] == 4
+    assert buffer.get_stats()['pending_rows'] == 2
+    assert view_counts(pages) == [0, 0, 0]
+
+
+def test_flush_writes_rows_in_one_batched_update(pages):
+    buffer = ViewCountBuffer(batch_size=2)
+    for amount, page in zip((3, 1, 2), pages):
+        buffer.increment(Page, page.pk, amount=amount)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert buffer.flush() == 3
+
+    updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+    assert len(updates) == 2  # batch of two rows (CASE) + batch of one
+    assert 'CASE' in updates[0]
+    assert buffer.get_stats()['update_queries'] == 2
+    assert buffer.pending(Page, pages[0].pk) == 0
+    assert view_counts(pages) == [3, 1, 2]
+
+
+def test_failed_batch_is_requeued(pages, monkeypatch):
+    buffer = ViewCountBuffer()
+    buffer.increment(Page, pages[0].pk, amount=2)
+    buffer.increment(Page, pages[1].pk)
+
+    def fail(model, field, batch):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(buffer, '_write_batch', fail)
+    assert buffer.flush() == 0
+    assert buffer.pending(Page, pages[0].pk) == 2
+    assert buffer.get_stats()['pending_increments'] == 3
+
+    monkeypatch.undo()
+    buffer.increment(Page, pages[0].pk)
+    assert buffer.flush() == 2
+    assert view_counts(pages) == [3, 1, 0]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_flush_after_request_closes_the_connection_it_opens(pages, monkeypatch):
+    buffer = ViewCountBuffer(flush_interval=0)
+    monkeypatch.setattr(view_counter, 'view_count_buffer', buffer)
+    default = connections['default']
+    closed = []
+    # The in-memory test database ignores close(): record it instead
+    monkeypatch.setattr(default, 'close', lambda: closed.append(default.connection is not None))
+
+    buffer.increment(Page, pages[0].pk)
+    view_counter._flush_after_request(sender=None)
+    assert closed == []  # connection still open (persistent): left alone
+
+    monkeypatch.setattr(default, 'connection', None)  # closed by close_old_connections
+    buffer.increment(Page, pages[0].pk)
+    view_counter._flush_after_request(sender=None)
+
+    assert closed == [True]
+    assert view_counts(pages) == [2, 0, 0]
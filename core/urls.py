@@ -19,7 +19,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.static import serve
-from .health_check import health_check, readiness_check, liveness_check
+from .health_check import health_check, readiness_check, liveness_check, metrics
 from apps.config.views.setup_wizard_view import setup_redirect
 
 # Importar views de erro personalizadas
@@ -40,6 +40,7 @@ urlpatterns = [
     path('health/', health_check, name='health_check'),
     path('health/ready/', readiness_check, name='readiness_check'),
     path('health/live/', liveness_check, name='liveness_check'),
+    path('metrics/', metrics, name='metrics'),
 
     # Pages como app principal (DEVE SER O ÚLTIMO devido ao catch-all)
     path('pages/', include('apps.pages.urls')),
@@ -0,0 +1,174 @@
+"""
+Buffered View Counters
+Aggregates page/article view increments in memory and flushes them in bulk
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple, Type
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections, models
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """
+    Per-process buffer of counter increments.
+
+    ``increment()`` only touches a dict under a lock. Pending deltas are
+    written with one ``UPDATE ... SET field = field + CASE pk WHEN ... END``
+    per model/field (in batches), when the flush interval elapses or too many
+    increments are pending. Stored counters are therefore eventually
+    consistent: they lag by at most one flush interval per worker.
+    """
+
+    def __init__(self, flush_interval: Optional[float] = None,
+                 max_pending: Optional[int] = None, batch_size: int = 500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._pending: Dict[Tuple[Type[models.Model], str], Dict[int, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        # Statistics
+        self.increments = 0
+        self.flushes = 0
+        self.update_queries = 0
+
+    def get_flush_interval(self) -> float:
+        """Maximum seconds between flushes"""
+        if self.flush_interval is not None:
+            return self.flush_interval
+        return getattr(settings, 'VIEW_COUNT_FLUSH_INTERVAL', 10)
+
+    def get_max_pending(self) -> int:
+        """Pending increments that force a flush"""
+        if self.max_pending is not None:
+            return self.max_pending
+        return getattr(settings, 'VIEW_COUNT_MAX_PENDING', 1000)
+
+    def increment(self, model: Type[models.Model], pk: int,
+                  field: str = 'view_count', amount: int = 1) -> None:
+        """Buffer an increment of ``field`` for the given row"""
+        with self._lock:
+            self._pending[(model, field)][pk] += amount
+            self._pending_count += amount
+            self.increments += amount
+
+    def pending(self, model: Type[models.Model], pk: int, field: str = 'view_count') -> int:
+        """Increments for a row not yet written to the database"""
+        with self._lock:
+            deltas = self._pending.get((model, field))
+            return deltas.get(pk, 0) if deltas else 0
+
+    def should_flush(self) -> bool:
+        """Whether the interval elapsed or the buffer is full"""
+        if not self._pending_count:
+            return False
+        return (self._pending_count >= self.get_max_pending()
+                or time.monotonic() - self._last_flush >= self.get_flush_interval())
+
+    def maybe_flush(self) -> int:
+        """Flush only when due; returns the number of rows updated"""
+        if self.should_flush():
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """Write all pending increments; returns the number of rows updated"""
+        # A single flusher at a time; other threads keep buffering
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending = self._pending
+                self._pending = defaultdict(lambda: defaultdict(int))
+                self._pending_count = 0
+                self._last_flush = time.monotonic()
+
+            updated = 0
+            for (model, field), deltas in pending.items():
+                items = [(pk, delta) for pk, delta in deltas.items() if delta]
+                for start in range(0, len(items), self.batch_size):
+                    batch = items[start:start + self.batch_size]
+                    try:
+                        updated += self._write_batch(model, field, batch)
+                    except Exception as e:
+                        logger.warning(f"Error flushing {model.__name__}.{field} counters: {e}")
+                        self._requeue(model, field, batch)
+            if pending:
+                self.flushes += 1
+            return updated
+        finally:
+            self._flush_lock.release()
+
+    def clear(self) -> None:
+        """Discard pending increments"""
+        with self._lock:
+            self._pending = defaultdict(lambda: defaultdict(int))
+            self._pending_count = 0
+
+    def get_stats(self) -> Dict[str, int]:
+        """Buffer statistics"""
+        with self._lock:
+            pending_rows = sum(len(deltas) for deltas in self._pending.values())
+            return {
+                'increments': self.increments,
+                'pending_increments': self._pending_count,
+                'pending_rows': pending_rows,
+                'flushes': self.flushes,
+                'update_queries': self.update_queries,
+            }
+
+    def _write_batch(self, model: Type[models.Model], field: str, batch) -> int:
+        self.update_queries += 1
+        if len(batch) == 1:
+            pk, delta = batch[0]
+            return model._default_manager.filter(pk=pk).update(**{field: F(field) + delta})
+
+        increment = Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in batch],
+            default=Value(0),
+            output_field=model._meta.get_field(field),
+        )
+        return model._default_manager.filter(pk__in=[pk for pk, _ in batch]).update(
+            **{field: F(field) + increment}
+        )
+
+    def _requeue(self, model: Type[models.Model], field: str, batch) -> None:
+        with self._lock:
+            for pk, delta in batch:
+                self._pending[(model, field)][pk] += delta
+                self._pending_count += delta
+
+
+# Global buffer instance (one per process)
+view_count_buffer = ViewCountBuffer()
+
+
+def _flush_after_request(sender, **kwargs):
+    # request_finished fires after the response has been sent to the client
+    if not view_count_buffer.should_flush():
+        return
+    # Django's close_old_connections receiver already ran: a connection the
+    # flush opens would sit idle until the next request, so close it again
+    closed = [alias for alias in connections if connections[alias].connection is None]
+    try:
+        view_count_buffer.flush()
+    finally:
+        for alias in closed:
+            connections[alias].close()
+
+
+request_finished.connect(_flush_after_request, dispatch_uid='core.view_counter.flush')
+atexit.register(view_count_buffer.flush)